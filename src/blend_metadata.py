@@ -0,0 +1,95 @@
+"""Metadata of blend files, i.e. their scenes, cameras and view layers, with an on-disk cache.
+
+Reading the metadata requires Blender, so it is stored in a SQLite database. An entry is valid as
+long as the modification time and the size of the blend file are unchanged.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+CACHE_FILE_NAME = ".rr_metadata.sqlite"
+
+
+def get_file_signature(path: str) -> tuple[int, int] | None:
+  """Get the modification time and the size of a file, or None if it doesn't exist."""
+  try:
+    stat_result = os.stat(path)
+  except OSError:
+    return None
+  return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def get_cache_path() -> Path:
+  """Get the path of the cache, which is shared by the GUI and the command line."""
+  return Path.home() / ".renderrob" / CACHE_FILE_NAME
+
+
+def get_scene_name(metadata: dict, scene: str) -> str:
+  """Get the scene Blender renders for the scene of a job. An empty scene is the active one."""
+  return scene or metadata["active_scene"]
+
+
+def get_invalid_fields(
+  metadata: dict,
+  scene: str,
+  camera: str,
+  view_layers: list[str],
+) -> list[str]:
+  """Get the fields of a render job, which don't exist in its blend file.
+
+  Returns:
+    The names of the invalid fields out of "scene", "camera" and "view_layers".
+  """
+  invalid_fields = []
+  scene_name = get_scene_name(metadata, scene)
+  if scene_name not in metadata["scenes"]:
+    invalid_fields.append("scene")
+  if camera and camera not in metadata["cameras"]:
+    invalid_fields.append("camera")
+  scene_view_layers = metadata["scenes"].get(scene_name, [])
+  if any(view_layer and view_layer not in scene_view_layers for view_layer in view_layers):
+    invalid_fields.append("view_layers")
+  return invalid_fields
+
+
+class MetadataCache:
+  """SQLite cache of the metadata of blend files."""
+
+  def __init__(self, db_path: Path | str) -> None:
+    """Open the database and create the table if necessary."""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    self.connection = sqlite3.connect(str(db_path))
+    self.connection.execute(
+      "CREATE TABLE IF NOT EXISTS metadata ("
+      "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, metadata TEXT)",
+    )
+    self.connection.commit()
+
+  def get(self, path: str, signature: tuple[int, int]) -> dict | None:
+    """Get the metadata of a blend file, unless the file changed since it was stored."""
+    row = self.connection.execute(
+      "SELECT metadata FROM metadata WHERE path = ? AND mtime_ns = ? AND size = ?",
+      (path, *signature),
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+  def lookup(self, path: str) -> dict | None:
+    """Get the metadata of a blend file, if it was stored and the file didn't change since."""
+    signature = get_file_signature(path)
+    return None if signature is None else self.get(path, signature)
+
+  def put(self, path: str, signature: tuple[int, int], metadata: dict) -> None:
+    """Store the metadata of a blend file."""
+    self.connection.execute(
+      "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?)",
+      (path, *signature, json.dumps(metadata)),
+    )
+    self.connection.commit()
+
+  def close(self) -> None:
+    """Close the database."""
+    self.connection.close()
@@ -0,0 +1,58 @@
+"""Unit tests for blend_metadata.py."""
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import blend_metadata
+
+METADATA = {
+  "active_scene": "Scene",
+  "cameras": ["Camera", "Closeup"],
+  "scenes": {"Scene": ["ViewLayer"], "Layout": ["Background", "Characters"]},
+}
+
+
+class TestBlendMetadata(unittest.TestCase):
+  """Tests for the blend_metadata module."""
+
+  def test_get_invalid_fields(self):
+    """Test that scenes, cameras and view layers, which don't exist, are found."""
+    self.assertEqual(blend_metadata.get_invalid_fields(METADATA, "", "", [""]), [])
+    self.assertEqual(
+      blend_metadata.get_invalid_fields(METADATA, "Layout", "Closeup", ["Characters"]),
+      [],
+    )
+    self.assertEqual(
+      blend_metadata.get_invalid_fields(METADATA, "", "Camera", ["Characters"]),
+      ["view_layers"],
+    )
+    self.assertEqual(
+      blend_metadata.get_invalid_fields(METADATA, "Missing", "Missing", ["ViewLayer"]),
+      ["scene", "camera", "view_layers"],
+    )
+
+  def test_cache(self):
+    """Test that the cached metadata is only used while the blend file is unchanged."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      blend_path = str(Path(tempdir) / "cube.blend")
+      self.assertIsNone(blend_metadata.get_file_signature(blend_path))
+      Path(blend_path).write_bytes(b"BLENDER")
+      signature = blend_metadata.get_file_signature(blend_path)
+
+      cache = blend_metadata.MetadataCache(Path(tempdir) / blend_metadata.CACHE_FILE_NAME)
+      self.assertIsNone(cache.get(blend_path, signature))
+      cache.put(blend_path, signature, METADATA)
+      cache.close()
+
+      cache = blend_metadata.MetadataCache(Path(tempdir) / blend_metadata.CACHE_FILE_NAME)
+      self.assertEqual(cache.get(blend_path, signature), METADATA)
+      self.assertEqual(cache.lookup(blend_path), METADATA)
+      os.utime(blend_path, ns=(0, signature[0] + 1))
+      self.assertIsNone(cache.get(blend_path, blend_metadata.get_file_signature(blend_path)))
+      self.assertIsNone(cache.lookup(blend_path))
+      cache.close()
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,106 @@
+"""Unit tests for blender_sync.py."""
+import sys
+import time
+import unittest
+
+from PySide6.QtWidgets import QApplication
+
+from utils_common.render_protocol import SYNC_PREFIX
+from utils_rr import blender_sync
+
+# Stands in for Blender with the settings loader. It reports the cameras of the requests in
+# reverse order and fails for the camera "broken".
+FAKE_SETTINGS_LOADER = f"""
+import json, os
+requests = json.loads(os.environ["RENDERROB_SYNC_REQUESTS"])
+print("Blender started")
+for index, request in reversed(list(enumerate(requests))):
+  if request["camera"] == "broken":
+    result = {{"request": index, "error": "no camera"}}
+  else:
+    result = {{"request": index, "settings": {{"camera": request["camera"]}}}}
+  print({SYNC_PREFIX!r} + json.dumps(result), flush=True)
+"""
+
+
+class TestBlenderSync(unittest.TestCase):
+  """Tests for the blender_sync module."""
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    """Create the application for the event loop of the processes."""
+    cls.app = QApplication.instance() or QApplication([])
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    """Shut down the application, since the main window tests create their own."""
+    cls.app.shutdown()
+    del cls.app
+
+  def setUp(self) -> None:
+    """Collect the results and the progress of the syncs."""
+    self.results = []
+    self.progress = []
+    self.sync = blender_sync.BlenderSync(
+      lambda job_key, settings: self.results.append((job_key, settings)),
+      lambda finished_count, started_count: self.progress.append((finished_count, started_count)),
+    )
+
+  def wait_for_syncs(self) -> None:
+    """Process events until all syncs are finished."""
+    deadline = time.monotonic() + 10
+    while self.sync.running_count() and time.monotonic() < deadline:
+      self.app.processEvents()
+      time.sleep(0.01)
+    self.assertEqual(self.sync.running_count(), 0)
+
+  def test_batch_sync(self):
+    """Test that the jobs of a file are synced in one process and reported one by one."""
+    requests = [
+      blender_sync.SyncRequest("a", "Scene", "Camera"),
+      blender_sync.SyncRequest("b", "Scene", "broken"),
+      blender_sync.SyncRequest("c", "Scene.001", "Closeup"),
+    ]
+    self.sync.start("shot.blend", sys.executable, ["-c", FAKE_SETTINGS_LOADER], requests)
+    self.sync.start("other.blend", sys.executable, ["-c", "raise SystemExit(1)"], [
+      blender_sync.SyncRequest("d", "Scene", "Camera"),
+    ])
+    self.assertEqual(self.sync.running_count(), 2)
+    self.wait_for_syncs()
+    self.assertEqual(
+      sorted(self.results, key=lambda result: result[0]),
+      [("a", {"camera": "Camera"}), ("b", None), ("c", {"camera": "Closeup"}), ("d", None)],
+    )
+    self.assertEqual(self.progress[:2], [(0, 3), (0, 4)])
+    self.assertEqual(self.progress[-1], (4, 4))
+
+  def test_cancel_all(self):
+    """Test that the jobs of canceled syncs are reported as failed."""
+    self.sync.start("shot.blend", sys.executable, ["-c", "import time; time.sleep(30)"], [
+      blender_sync.SyncRequest("a", "Scene", "Camera"),
+    ])
+    self.sync.cancel_all()
+    self.assertEqual(self.sync.running_count(), 0)
+    self.assertEqual(self.results, [("a", None)])
+    self.assertEqual(self.progress, [(0, 1), (1, 1)])
+
+  def test_missing_program(self):
+    """Test that a sync, whose program can't be started, is reported as failed."""
+    self.sync.start("shot.blend", "/nonexistent/blender", [], [
+      blender_sync.SyncRequest("a", "Scene", "Camera"),
+    ])
+    self.wait_for_syncs()
+    self.assertEqual(self.results, [("a", None)])
+
+  def test_broken_result(self):
+    """Test that a result, which isn't valid JSON, is skipped and its job is reported as failed."""
+    program = f"print({SYNC_PREFIX!r} + '{{\"request\": 0, \"settings\"')"
+    self.sync.start("shot.blend", sys.executable, ["-c", program], [
+      blender_sync.SyncRequest("a", "Scene", "Camera"),
+    ])
+    self.wait_for_syncs()
+    self.assertEqual(self.results, [("a", None)])
+
+
+if __name__ == "__main__":
+  unittest.main()
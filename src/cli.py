@@ -0,0 +1,278 @@
+"""Command line interface to render RenderRob projects without the GUI.
+
+Usage:
+    python cli.py render project.rrp [--cpu-workers N] [--gpu-workers N] [--blender PATH]
+        [--chunk-size N] [--chunk-count N] [--order ORDER] [--retries N] [--retry-delay SECONDS]
+        [--warm] [--resume] [--stats PATH]
+    python cli.py coordinator project.rrp [--host HOST] [--port N] [--token TOKEN]
+        [--chunk-size N] [--chunk-count N] [--order ORDER] [--retries N] [--retry-delay SECONDS]
+        [--resume] [--stats PATH]
+    python cli.py agent HOST[:PORT] --blender PATH [--cpu-workers N] [--gpu-workers N]
+        [--name NAME] [--token TOKEN]
+    python cli.py stats [SHOT_NAME] [--limit N] [--stats PATH]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(Path(__file__).parent.as_posix())
+
+import blend_metadata  # noqa: E402
+import farm_agent  # noqa: E402
+import farm_coordinator  # noqa: E402
+import farm_protocol  # noqa: E402
+import headless_runner  # noqa: E402
+import render_stats  # noqa: E402
+import run_journal  # noqa: E402
+from protos import state_pb2  # noqa: E402
+from utils_common import print_utils  # noqa: E402
+
+JOB_ORDERS = {
+  "table": state_pb2.table_order,  # pylint: disable=no-member
+  "shortest": state_pb2.shortest_first,  # pylint: disable=no-member
+  "longest": state_pb2.longest_first,  # pylint: disable=no-member
+  "file": state_pb2.by_file,  # pylint: disable=no-member
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+  """Build the argument parser of the command line interface."""
+  parser = argparse.ArgumentParser(prog="renderrob", description="RenderRob render manager.")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+
+  render_parser = subparsers.add_parser("render", help="Render all active jobs of a project.")
+  render_parser.add_argument("project", help="Path to the .rrp project file.")
+  render_parser.add_argument("--blender", help="Path to Blender. Overrides the project setting.")
+  render_parser.add_argument("--cpu-workers", type=int, help="Number of parallel CPU workers.")
+  render_parser.add_argument("--gpu-workers", type=int, help="Number of parallel GPU workers.")
+  render_parser.add_argument(
+    "--warm",
+    action="store_true",
+    help="Keep Blender open between jobs and reuse already loaded blend files.",
+  )
+  add_queue_arguments(render_parser)
+
+  coordinator_parser = subparsers.add_parser(
+    "coordinator",
+    help="Render all active jobs of a project on the agents, which connect to this machine.",
+  )
+  coordinator_parser.add_argument("project", help="Path to the .rrp project file.")
+  coordinator_parser.add_argument(
+    "--host",
+    default="",
+    help="Interface to listen on for agents. Defaults to all interfaces, which needs a token.",
+  )
+  coordinator_parser.add_argument(
+    "--port",
+    type=int,
+    default=farm_protocol.DEFAULT_PORT,
+    help="Port to listen on for agents.",
+  )
+  add_token_argument(coordinator_parser)
+  add_queue_arguments(coordinator_parser)
+
+  agent_parser = subparsers.add_parser(
+    "agent",
+    help="Render the jobs, which a coordinator leases to this machine.",
+  )
+  agent_parser.add_argument("coordinator", help="Address of the coordinator, e.g. host:62098.")
+  agent_parser.add_argument(
+    "--blender",
+    required=True,
+    help="Path to Blender on this machine. The Blender path of the project is never used.",
+  )
+  agent_parser.add_argument(
+    "--cpu-workers",
+    type=int,
+    default=1,
+    help="Number of parallel CPU workers.",
+  )
+  agent_parser.add_argument(
+    "--gpu-workers",
+    type=int,
+    default=1,
+    help="Number of parallel GPU workers.",
+  )
+  agent_parser.add_argument("--name", default="", help="Name of the agent. Defaults to the host.")
+  add_token_argument(agent_parser)
+
+  stats_parser = subparsers.add_parser("stats", help="Show the previous renders of the shots.")
+  stats_parser.add_argument("shot_name", nargs="?", default="", help="Only show this shot.")
+  stats_parser.add_argument("--limit", type=int, default=20, help="Number of renders shown.")
+  add_stats_argument(stats_parser)
+  return parser
+
+
+def add_queue_arguments(parser: argparse.ArgumentParser) -> None:
+  """Add the arguments, which change how the queue of a project is rendered."""
+  parser.add_argument("--chunk-size", type=int, help="Frames per chunk of animations.")
+  parser.add_argument("--chunk-count", type=int, help="Number of chunks per animation.")
+  parser.add_argument(
+    "--order",
+    choices=list(JOB_ORDERS),
+    help="Order, in which the jobs are rendered. Overrides the project setting.",
+  )
+  parser.add_argument(
+    "--retries",
+    type=int,
+    help="How often a job is rendered again, if Blender crashed or ran out of memory.",
+  )
+  parser.add_argument(
+    "--retry-delay",
+    type=int,
+    help="Seconds before the first retry. The delay doubles with every further retry.",
+  )
+  parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Continue the interrupted run of the project and skip the jobs it already rendered.",
+  )
+  parser.add_argument(
+    "--no-color",
+    action="store_true",
+    help="Remove the color codes from the Blender output.",
+  )
+  add_stats_argument(parser)
+
+
+def add_token_argument(parser: argparse.ArgumentParser) -> None:
+  """Add the argument for the token, which the agents need to join the coordinator."""
+  parser.add_argument(
+    "--token",
+    default=os.environ.get("RENDERROB_FARM_TOKEN", ""),
+    help="Token, which agents need to join the coordinator. Defaults to $RENDERROB_FARM_TOKEN.",
+  )
+
+
+def add_stats_argument(parser: argparse.ArgumentParser) -> None:
+  """Add the argument for the path of the render statistics database."""
+  parser.add_argument(
+    "--stats",
+    default=str(render_stats.get_stats_path()),
+    help="Path to the render statistics database.",
+  )
+
+
+def load_project(
+  args: argparse.Namespace,
+) -> state_pb2.render_rob_state:  # pylint: disable=no-member
+  """Load the project and override its settings with the queue arguments.
+
+  Relative folders of the project are resolved from the folder of the project, since the render
+  changes the working directory.
+  """
+  project_path = Path(args.project).resolve()
+  state = headless_runner.load_state(project_path)
+  if args.chunk_size is not None:
+    state.settings.chunk_size = args.chunk_size
+  if args.chunk_count is not None:
+    state.settings.chunk_count = args.chunk_count
+  if args.order:
+    state.settings.job_order = JOB_ORDERS[args.order]
+  if args.retries is not None:
+    state.settings.max_retries = args.retries
+  if args.retry_delay is not None:
+    state.settings.retry_delay = args.retry_delay
+  if state.settings.output_path:
+    state.settings.output_path = str(project_path.parent / state.settings.output_path)
+  if state.settings.blender_files_path:
+    state.settings.blender_files_path = str(project_path.parent / state.settings.blender_files_path)
+  else:
+    # Relative blend files are resolved from the directory the command was called from.
+    state.settings.blender_files_path = str(Path.cwd())
+  return state
+
+
+def render(args: argparse.Namespace) -> int:
+  """Render a project and return the exit code of the command."""
+  project_path = Path(args.project).resolve()
+  stats_path = Path(args.stats).resolve()
+  state = load_project(args)
+  if args.blender:
+    state.settings.blender_path = args.blender
+  if args.cpu_workers:
+    state.settings.cpu_workers = args.cpu_workers
+  if args.gpu_workers:
+    state.settings.gpu_workers = args.gpu_workers
+
+  # Blender imports the utils_bpy module relative to the working directory.
+  os.chdir(Path(__file__).parent)
+  runner = headless_runner.HeadlessRunner(
+    state,
+    strip_colors=args.no_color or not sys.stdout.isatty(),
+    warm_workers=args.warm,
+    stats_recorder=render_stats.StatsRecorder(stats_path),
+    journal=run_journal.RunJournal(run_journal.get_journal_path(project_path)),
+    resume=args.resume,
+    metadata_cache=blend_metadata.MetadataCache(blend_metadata.get_cache_path()),
+  )
+  return 0 if runner.run() else 1
+
+
+def coordinate(args: argparse.Namespace) -> int:
+  """Render a project on the agents and return the exit code of the command."""
+  project_path = Path(args.project).resolve()
+  state = load_project(args)
+  try:
+    coordinator = farm_coordinator.FarmCoordinator(
+      state,
+      host=args.host,
+      port=args.port,
+      token=args.token,
+      strip_colors=args.no_color or not sys.stdout.isatty(),
+      stats_recorder=render_stats.StatsRecorder(Path(args.stats).resolve()),
+      journal=run_journal.RunJournal(run_journal.get_journal_path(project_path)),
+      resume=args.resume,
+      metadata_cache=blend_metadata.MetadataCache(blend_metadata.get_cache_path()),
+    )
+  except (ValueError, OSError) as error:
+    print_utils.print_error_no_exit(str(error))
+    return 1
+  return 0 if coordinator.run() else 1
+
+
+def run_agent(args: argparse.Namespace) -> int:
+  """Render the jobs of a coordinator and return the exit code of the command."""
+  host, port = farm_protocol.parse_address(args.coordinator)
+  # Blender imports the utils_bpy module relative to the working directory.
+  os.chdir(Path(__file__).parent)
+  agent = farm_agent.FarmAgent(
+    host,
+    args.blender,
+    port=port,
+    name=args.name,
+    cpu_workers=args.cpu_workers,
+    gpu_workers=args.gpu_workers,
+    token=args.token,
+  )
+  return 0 if agent.run() else 1
+
+
+def show_stats(args: argparse.Namespace) -> int:
+  """Print the previous renders and return the exit code of the command."""
+  database = render_stats.RenderStatsDatabase(args.stats)
+  history = database.get_history(args.shot_name, args.limit)
+  database.close()
+  for line in reversed(render_stats.format_history(history)):
+    print(line)
+  return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+  """Run the command line interface."""
+  args = build_parser().parse_args(argv)
+  if args.command == "render":
+    return render(args)
+  if args.command == "coordinator":
+    return coordinate(args)
+  if args.command == "agent":
+    return run_agent(args)
+  if args.command == "stats":
+    return show_stats(args)
+  return 1
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,49 @@
+"""Unit tests for cli.py."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import cli
+from protos import state_pb2
+
+
+class TestCli(unittest.TestCase):
+  """Tests for the cli module."""
+
+  def setUp(self) -> None:
+    """Create a temporary directory for the project."""
+    self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self.project_folder = Path(self.temp_dir.name).resolve()
+
+  def tearDown(self) -> None:
+    """Remove the temporary directory."""
+    self.temp_dir.cleanup()
+
+  def write_project(self, output_path: str, blender_files_path: str) -> str:
+    """Write a project with the given folders and return its path."""
+    state = state_pb2.render_rob_state()  # pylint: disable=no-member
+    state.settings.output_path = output_path
+    state.settings.blender_files_path = blender_files_path
+    project_path = self.project_folder / "project.rrp"
+    project_path.write_bytes(state.SerializeToString())
+    return str(project_path)
+
+  def test_load_project_resolves_relative_folders(self) -> None:
+    """Test that relative folders are resolved from the folder of the project."""
+    args = cli.build_parser().parse_args(["render", self.write_project("renders", "blends")])
+    state = cli.load_project(args)
+    self.assertEqual(state.settings.output_path, str(self.project_folder / "renders"))
+    self.assertEqual(state.settings.blender_files_path, str(self.project_folder / "blends"))
+
+  def test_load_project_keeps_absolute_folders(self) -> None:
+    """Test that absolute folders and an empty output folder are kept."""
+    blend_folder = str(self.project_folder / "shared" / "blends")
+    args = cli.build_parser().parse_args(["render", self.write_project("", blend_folder)])
+    state = cli.load_project(args)
+    self.assertEqual(state.settings.output_path, "")
+    self.assertEqual(state.settings.blender_files_path, blend_folder)
+
+
+if __name__ == "__main__":
+  unittest.main()
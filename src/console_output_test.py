@@ -0,0 +1,102 @@
+"""Unit tests for console_output.py."""
+import tempfile
+import unittest
+from pathlib import Path
+
+from PySide6.QtWidgets import QApplication, QTextBrowser
+
+import job_log
+from utils_common.print_utils import BASH_COLORS
+from utils_common.render_protocol import EVENT_PREFIX
+from utils_rr import console_output
+
+INFO_LINE = BASH_COLORS["BACK_CYAN"] + " " + BASH_COLORS["FORE_BLACK"] + "[INFO] a" + (
+  BASH_COLORS["RESET_ALL"]
+)
+WARNING_LINE = BASH_COLORS["BACK_YELLOW"] + " " + BASH_COLORS["FORE_BLACK"] + "[WARNING] b"
+ERROR_LINE = BASH_COLORS["BACK_RED"] + " " + BASH_COLORS["FORE_WHITE"] + "[ERROR] c"
+# An event after a colored message starts with the reset code of the message.
+EVENT_LINE = BASH_COLORS["RESET_ALL"] + EVENT_PREFIX + '{"type": "warning", "message": "b"}'
+
+
+class TestConsoleOutput(unittest.TestCase):
+  """Tests for the console_output module."""
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    """Create the application for the text browser."""
+    cls.app = QApplication.instance() or QApplication([])
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    """Shut down the application, since the main window tests create their own."""
+    cls.app.shutdown()
+    del cls.app
+
+  def test_parse_line(self):
+    """Test that the color codes are removed and turned into styles."""
+    self.assertEqual(
+      console_output.parse_line(INFO_LINE),
+      ("[INFO] a", console_output.STYLE_INFO, True),
+    )
+    self.assertEqual(
+      console_output.parse_line(BASH_COLORS["RESET_ALL"] + WARNING_LINE),
+      ("[WARNING] b", console_output.STYLE_WARNING, False),
+    )
+    self.assertEqual(console_output.parse_line("Fra:1 Mem:2"), ("Fra:1 Mem:2", None, False))
+    self.assertEqual(
+      console_output.parse_line("see blender.crash.txt")[1],
+      console_output.STYLE_ERROR,
+    )
+
+  def test_flush(self):
+    """Test that chunks are split into lines per worker and events are reported, not shown."""
+    text_browser = QTextBrowser()
+    events = []
+    console = console_output.ConsoleOutput(
+      text_browser,
+      lambda worker_id, event: events.append((worker_id, event)),
+    )
+    console.append(0, "[Job 1] ", b"Fra:1 ")
+    console.append(1, "[Job 2] ", (INFO_LINE + "\n").encode())
+    console.append(0, "[Job 1] ", f"Sample 1\n{WARNING_LINE}\n{EVENT_LINE}\n".encode())
+    console.append(0, "[Job 1] ", ("\n".join([WARNING_LINE, ERROR_LINE, ERROR_LINE])).encode())
+    self.assertEqual(text_browser.toPlainText(), "")
+    console.flush()
+    self.assertEqual(
+      text_browser.toPlainText().splitlines(),
+      [
+        "[Job 2] [INFO] a",
+        "[Job 1] Fra:1 Sample 1",
+        "[Job 1] [WARNING] b",
+        "[Job 1] [WARNING] b",
+        "[Job 1] [ERROR] c",
+      ],
+    )
+    self.assertEqual(events, [(0, {"type": "warning", "message": "b"})])
+
+    # The incomplete last line is shown once the worker is finished.
+    console.finish_worker(0)
+    self.assertEqual(text_browser.toPlainText().splitlines()[-1], "[Job 1] [ERROR] c")
+
+  def test_log(self):
+    """Test that the output of the chunks of a job is written to the log of the job."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      log_path = Path(tempdir) / "cube-pv-v01.log"
+      console = console_output.ConsoleOutput(QTextBrowser())
+      console.open_log(0, log_path)
+      console.open_log(1, log_path)
+      console.append(0, "[Job 1] ", ("Fra:1\n" + WARNING_LINE + "\n").encode())
+      console.append(1, "[Job 1] ", b"Fra:2\nSaved")
+      console.finish_worker(0)
+      self.assertIn(log_path, console.logs.writers)
+      console.finish_worker(1)
+      self.assertEqual(console.logs.writers, {})
+
+      self.assertEqual(log_path.read_text(), "Fra:1\n[WARNING] b\nFra:2\nSaved\n")
+      reader = job_log.JobLogReader(log_path)
+      self.assertEqual(reader.next_problem_offset(0), len("Fra:1\n"))
+
+
+if __name__ == "__main__":
+  unittest.main()
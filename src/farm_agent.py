@@ -0,0 +1,277 @@
+"""Agent of a render farm, which renders the tasks a coordinator leases to it.
+
+The agent connects to the coordinator, tells it how many Blender processes it runs per device
+class and renders every leased task with its own Blender. The output of Blender is streamed back
+line by line and a heartbeat is sent regularly, so the coordinator notices a lost agent and leases
+its tasks to the other agents.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import binascii
+import dataclasses
+import os
+import re
+import socket
+import subprocess
+import threading
+import time
+
+from google.protobuf import message as protobuf_message
+
+import farm_protocol
+from protos import state_pb2
+from render_job_to_rss import render_job_to_blender_args
+from utils_common import print_utils
+from utils_common.render_protocol import EVENTS_VARIABLE, EXIT_CODE_FAILED
+from utils_rr import render_constants
+
+CONNECT_RETRY_SECONDS = 2
+# The frame numbers of a job are passed to Blender as separate arguments.
+FRAME_PATTERN = re.compile(r"-?\d*")
+
+
+@dataclasses.dataclass
+class Lease:
+  """A task, which the coordinator leased to the agent."""
+
+  lease_id: int
+  row: int
+  job: state_pb2.render_job  # pylint: disable=no-member
+  settings: state_pb2.settings  # pylint: disable=no-member
+  frame_path: str
+  frame_range: tuple[int, int] | None
+
+
+def parse_lease(message: dict) -> Lease:
+  """Check the fields of a lease message and decode its job and settings.
+
+  The job is rendered with the Python command, which is built from it, so only leases, whose
+  values can't extend the command line of Blender, are accepted.
+
+  Raises:
+    ValueError: If a field is missing or invalid.
+  """
+  try:
+    lease_id = message["lease"]
+    row = message["row"]
+    frame_path = message["frame_path"]
+    frame_range = message.get("frame_range")
+    # pylint: disable-next=no-member
+    job = farm_protocol.decode_proto(message["job"], state_pb2.render_job)
+    # pylint: disable-next=no-member
+    settings = farm_protocol.decode_proto(message["settings"], state_pb2.settings)
+  except (KeyError, TypeError, binascii.Error, protobuf_message.DecodeError) as error:
+    msg = f"The lease is incomplete: {error!r}"
+    raise ValueError(msg) from error
+  if not isinstance(lease_id, int) or not isinstance(row, int):
+    msg = "The lease has no valid id or row."
+    raise ValueError(msg)
+  if not isinstance(frame_path, str) or not frame_path:
+    msg = "The lease has no frame path."
+    raise ValueError(msg)
+  if frame_range is not None and (
+    not isinstance(frame_range, list)
+    or len(frame_range) != 2
+    or not all(isinstance(frame, int) for frame in frame_range)
+  ):
+    msg = "The frame range of the lease is invalid."
+    raise ValueError(msg)
+  if not FRAME_PATTERN.fullmatch(job.start) or not FRAME_PATTERN.fullmatch(job.end):
+    msg = "The frame numbers of the job are invalid."
+    raise ValueError(msg)
+  if (
+    not 0 <= job.device < len(render_constants.DEVICES)
+    or not 0 <= job.engine < len(render_constants.RENDER_ENGINES)
+    or not 0 <= job.file_format < len(render_constants.FILE_FORMATS_COMMAND)
+  ):
+    msg = "The job has an unknown device, engine or file format."
+    raise ValueError(msg)
+  return Lease(
+    lease_id,
+    row,
+    job,
+    settings,
+    frame_path,
+    tuple(frame_range) if frame_range else None,
+  )
+
+
+class FarmAgent:
+  """Render the tasks, which a coordinator leases to this machine, with Blender subprocesses."""
+
+  def __init__(
+    self,
+    host: str,
+    blender_path: str,
+    port: int = farm_protocol.DEFAULT_PORT,
+    name: str = "",
+    cpu_workers: int = 1,
+    gpu_workers: int = 1,
+    token: str = "",
+    heartbeat_seconds: float = farm_protocol.HEARTBEAT_SECONDS,
+  ) -> None:
+    """Initialize the agent.
+
+    Args:
+      host: The host of the coordinator.
+      blender_path: The path to Blender on this machine. The Blender path of the project is never
+        used, so the coordinator can't choose the program the agent runs.
+      port: The port of the coordinator.
+      name: The name of the agent in the console of the coordinator. Defaults to the host name.
+      cpu_workers: The number of parallel Blender processes for CPU jobs.
+      gpu_workers: The number of parallel Blender processes for GPU jobs.
+      token: The token, which the coordinator expects.
+      heartbeat_seconds: How often the agent tells the coordinator, that it is still alive.
+    """
+    self.host = host
+    self.port = port
+    self.blender_path = blender_path
+    self.name = name or socket.gethostname()
+    self.cpu_workers = cpu_workers
+    self.gpu_workers = gpu_workers
+    self.token = token
+    self.heartbeat_seconds = heartbeat_seconds
+    self.connection = None
+    self.processes = {}
+    self._lock = threading.Lock()
+
+  def run(self) -> bool:
+    """Render the leased tasks until the coordinator finished its queue.
+
+    The agent waits for the coordinator, if it isn't running yet.
+
+    Returns:
+      Whether the coordinator finished its queue. False if the agent was rejected or the
+      connection to the coordinator was lost.
+    """
+    stopped = threading.Event()
+    try:
+      self.connection = farm_protocol.Connection(self._connect())
+      print_utils.print_info(f"Connected to the coordinator at {self.host}:{self.port}.")
+      self.connection.send(
+        farm_protocol.MESSAGE_HELLO,
+        name=self.name,
+        token=self.token,
+        cpu_workers=self.cpu_workers,
+        gpu_workers=self.gpu_workers,
+      )
+      heartbeat_thread = threading.Thread(
+        target=self._send_heartbeats,
+        args=(stopped,),
+        daemon=True,
+      )
+      heartbeat_thread.start()
+      for message in self.connection.receive():
+        if message["type"] == farm_protocol.MESSAGE_LEASE:
+          self._render(message)
+        elif message["type"] == farm_protocol.MESSAGE_DONE:
+          print_utils.print_info("The coordinator rendered all jobs.")
+          return True
+        elif message["type"] == farm_protocol.MESSAGE_REJECT:
+          print_utils.print_error_no_exit(
+            f"The coordinator rejected the agent: {message.get('reason', '')}",
+          )
+          return False
+      print_utils.print_warning("The connection to the coordinator was lost.")
+      return False
+    except KeyboardInterrupt:
+      print_utils.print_info("Agent stopped.")
+      return False
+    finally:
+      stopped.set()
+      self.stop()
+
+  def stop(self) -> None:
+    """Kill all running Blender processes and disconnect from the coordinator."""
+    with self._lock:
+      processes = list(self.processes.values())
+      self.processes = {}
+    for process in processes:
+      process.kill()
+    if self.connection:
+      self.connection.close()
+
+  def _connect(self) -> socket.socket:
+    """Connect to the coordinator and retry until it is running."""
+    waiting = False
+    while True:
+      try:
+        return socket.create_connection((self.host, self.port))
+      except OSError:
+        if not waiting:
+          print_utils.print_info(f"Waiting for the coordinator at {self.host}:{self.port}.")
+          waiting = True
+        time.sleep(CONNECT_RETRY_SECONDS)
+
+  def _send_heartbeats(self, stopped: threading.Event) -> None:
+    while not stopped.wait(self.heartbeat_seconds):
+      if not self.connection.send(farm_protocol.MESSAGE_HEARTBEAT):
+        return
+
+  def _render(self, message: dict) -> None:
+    """Start Blender for a leased task. Its output is streamed to the coordinator."""
+    try:
+      lease = parse_lease(message)
+    except ValueError as error:
+      print_utils.print_warning(f"Rejected a lease of the coordinator: {error}")
+      lease_id = message.get("lease")
+      if isinstance(lease_id, int):
+        self.connection.send(
+          farm_protocol.MESSAGE_OUTPUT,
+          lease=lease_id,
+          line=f"{self.name} rejected the lease: {error}\n",
+        )
+        self.connection.send(
+          farm_protocol.MESSAGE_FINISH,
+          lease=lease_id,
+          exit_code=EXIT_CODE_FAILED,
+        )
+      return
+    info = f"Rendering job {lease.row + 1} to {lease.frame_path}"
+    if lease.frame_range:
+      info += f" (frames {lease.frame_range[0]} to {lease.frame_range[1]})"
+    print_utils.print_info(info)
+    args = render_job_to_blender_args(
+      lease.job,
+      lease.settings,
+      lease.frame_path,
+      frame_range=lease.frame_range,
+    )
+    try:
+      process = subprocess.Popen(
+        [self.blender_path, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env={**os.environ, "PYTHONUNBUFFERED": "1", EVENTS_VARIABLE: "1"},
+        text=True,
+        errors="replace",
+      )
+    except OSError as error:
+      self.connection.send(
+        farm_protocol.MESSAGE_OUTPUT,
+        lease=lease.lease_id,
+        line=f"Could not start Blender on {self.name}: {error}\n",
+      )
+      self.connection.send(
+        farm_protocol.MESSAGE_FINISH,
+        lease=lease.lease_id,
+        exit_code=EXIT_CODE_FAILED,
+      )
+      return
+    with self._lock:
+      self.processes[lease.lease_id] = process
+    reader_thread = threading.Thread(
+      target=self._stream_output,
+      args=(lease.lease_id, process),
+      daemon=True,
+    )
+    reader_thread.start()
+
+  def _stream_output(self, lease: int, process: subprocess.Popen) -> None:
+    for line in process.stdout:
+      self.connection.send(farm_protocol.MESSAGE_OUTPUT, lease=lease, line=line)
+    exit_code = process.wait()
+    with self._lock:
+      self.processes.pop(lease, None)
+    self.connection.send(farm_protocol.MESSAGE_FINISH, lease=lease, exit_code=exit_code)
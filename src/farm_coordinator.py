@@ -0,0 +1,368 @@
+"""Coordinator of a render farm, which leases the tasks of a queue to agents on other machines.
+
+The coordinator schedules the queue like the headless runner, but instead of starting Blender it
+leases every task, i.e. a job or a chunk of its frames, to an agent with a free worker slot. The
+agents stream the output of Blender back, so warnings, errors, retries, the run journal and the
+render statistics work like on a single machine. If an agent disconnects or misses its heartbeats,
+its tasks are queued again and leased to the other agents.
+
+The agents render into the folders, which the coordinator resolved, so the blend files and the
+output folder must be reachable under the same paths on all machines, e.g. on a shared drive.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import dataclasses
+import hmac
+import socket
+import threading
+import time
+
+import blend_metadata
+import farm_protocol
+import headless_runner
+import render_scheduler
+import render_stats
+import run_journal
+from protos import state_pb2
+from utils_common import print_utils
+
+DEVICES = (state_pb2.gpu, state_pb2.cpu)  # pylint: disable=no-member
+
+
+def check_agent_message(message: dict) -> None:
+  """Check the fields of a message of an agent, which are used by the coordinator.
+
+  Raises:
+    ValueError: If a field has the wrong type.
+  """
+  if message["type"] == farm_protocol.MESSAGE_HELLO:
+    for field in ("cpu_workers", "gpu_workers"):
+      if not isinstance(message.get(field, 0), int):
+        msg = f"The number of {field} is invalid."
+        raise ValueError(msg)
+  elif message["type"] in (farm_protocol.MESSAGE_OUTPUT, farm_protocol.MESSAGE_FINISH):
+    if not isinstance(message.get("lease"), int):
+      msg = "The lease is invalid."
+      raise ValueError(msg)
+    if message["type"] == farm_protocol.MESSAGE_FINISH and not isinstance(
+      message.get("exit_code"),
+      int,
+    ):
+      msg = "The exit code is invalid."
+      raise ValueError(msg)
+
+
+@dataclasses.dataclass
+class Agent:
+  """An agent, which is connected to the coordinator."""
+
+  connection: farm_protocol.Connection
+  address: str
+  name: str = ""
+  # The number of parallel Blender processes of the agent per device class. It is empty until the
+  # agent said hello.
+  worker_slots: dict[int, int] = dataclasses.field(default_factory=dict)
+  # The worker ids of the tasks, which are leased to the agent.
+  leases: set[int] = dataclasses.field(default_factory=set)
+  connected: float = dataclasses.field(default_factory=time.time)
+  last_seen: float = dataclasses.field(default_factory=time.time)
+
+
+class FarmCoordinator(headless_runner.HeadlessRunner):
+  """Render the queue of a state on the agents, which connect to the coordinator."""
+
+  def __init__(
+    self,
+    state: state_pb2.render_rob_state,  # pylint: disable=no-member
+    host: str = "",
+    port: int = farm_protocol.DEFAULT_PORT,
+    token: str = "",
+    agent_timeout: float = farm_protocol.AGENT_TIMEOUT_SECONDS,
+    strip_colors: bool = False,
+    stats_recorder: render_stats.StatsRecorder | None = None,
+    journal: run_journal.RunJournal | None = None,
+    resume: bool = False,
+    metadata_cache: blend_metadata.MetadataCache | None = None,
+  ) -> None:
+    """Initialize the coordinator and listen for agents.
+
+    Args:
+      state: The state with the settings and the render jobs.
+      host: The interface to listen on. All interfaces if it is empty.
+      port: The port to listen on. A free port is chosen if it is 0.
+      token: The token, which the agents have to send to be accepted. It is required, unless the
+        coordinator only listens on the loopback interface.
+      agent_timeout: The seconds without a message, after which an agent counts as lost. A
+        connection, which didn't say hello within this time, is closed as well.
+      strip_colors: Whether to remove the ANSI color codes from the Blender output.
+      stats_recorder: Stores the statistics of the finished jobs. Nothing is stored if it is None.
+      journal: Records the finished jobs, so an interrupted run can be resumed.
+      resume: Whether to skip the jobs, which the interrupted run in the journal already rendered.
+      metadata_cache: The cached metadata of the blend files, which the jobs are checked against.
+
+    Raises:
+      ValueError: If the coordinator listens on the network without a token.
+    """
+    # Without a token any machine in the network could join, take the jobs and fake the results.
+    if not token and not farm_protocol.is_loopback_host(host):
+      msg = "The coordinator needs a token to listen on the network. Set one with --token."
+      raise ValueError(msg)
+    super().__init__(
+      state,
+      strip_colors=strip_colors,
+      stats_recorder=stats_recorder,
+      journal=journal,
+      resume=resume,
+      metadata_cache=metadata_cache,
+    )
+    self.token = token
+    self.agent_timeout = agent_timeout
+    self.agents = []
+    # The connections, which didn't say hello yet. They are added by the thread, which accepts them.
+    self.pending_agents = []
+    self._pending_lock = threading.Lock()
+    # The agent of every leased task by its worker id.
+    self.leases = {}
+    # The slots are added by the agents, once they connect.
+    self.scheduler.worker_slots = {device: 0 for device in DEVICES}
+    self.server = socket.create_server((host, port))
+    self.address = self.server.getsockname()[:2]
+
+  def run(self) -> bool:
+    """Render the queue on the agents and block until all jobs are finished.
+
+    Returns:
+      Whether all jobs were rendered without errors.
+    """
+    print_utils.print_info(f"Waiting for agents on port {self.address[1]}.")
+    accept_thread = threading.Thread(target=self._accept_agents, daemon=True)
+    accept_thread.start()
+    try:
+      return super().run()
+    finally:
+      self.shutdown()
+
+  def stop(self) -> None:
+    """Disconnect all agents, which then quit their Blender processes."""
+    for agent in self.agents + self._take_pending_agents():
+      agent.connection.close()
+    self.agents = []
+    self.leases = {}
+    super().stop()
+
+  def shutdown(self) -> None:
+    """Tell the agents, that the queue is rendered, and stop listening."""
+    for agent in self.agents:
+      agent.connection.send(farm_protocol.MESSAGE_DONE)
+      agent.connection.finish()
+    self.agents = []
+    for agent in self._take_pending_agents():
+      agent.connection.close()
+    try:
+      self.server.shutdown(socket.SHUT_RDWR)
+    except OSError:
+      pass
+    self.server.close()
+
+  def _accept_agents(self) -> None:
+    while True:
+      try:
+        agent_socket, address = self.server.accept()
+      except OSError:
+        return
+      agent = Agent(farm_protocol.Connection(agent_socket), f"{address[0]}:{address[1]}")
+      with self._pending_lock:
+        self.pending_agents.append(agent)
+      reader_thread = threading.Thread(target=self._read_messages, args=(agent,), daemon=True)
+      reader_thread.start()
+
+  def _read_messages(self, agent: Agent) -> None:
+    for message in agent.connection.receive():
+      agent.last_seen = time.time()
+      if message["type"] != farm_protocol.MESSAGE_HEARTBEAT:
+        self._output_queue.put((agent, message))
+    agent.connection.close()
+    # The connection is lost, so the tasks of the agent have to be leased to other agents.
+    self._output_queue.put((agent, None))
+
+  def _check_settings(self) -> bool:
+    """The agents start their own Blender, so the settings need no Blender path."""
+    return True
+
+  def _get_wait_seconds(self) -> float | None:
+    """Wake up regularly to find agents, which missed their heartbeats."""
+    wait_seconds = self.agent_timeout / 3
+    retry_seconds = super()._get_wait_seconds()
+    return wait_seconds if retry_seconds is None else min(wait_seconds, retry_seconds)
+
+  def _handle_output(self, item: tuple) -> None:
+    """Handle a message of an agent, or its disconnection if the message is None."""
+    agent, message = item
+    if message is None:
+      self._remove_pending_agent(agent)
+      self._drop_agent(agent, "disconnected")
+      self._start_next_tasks()
+      return
+    try:
+      check_agent_message(message)
+    except ValueError as error:
+      if self._remove_pending_agent(agent):
+        print_utils.print_warning(f"Closed the connection of {agent.address}. {error}")
+        agent.connection.close()
+      elif agent in self.agents:
+        print_utils.print_warning(f"Agent {agent.name} sent an invalid message. {error}")
+        self._drop_agent(agent, "was dropped")
+        self._start_next_tasks()
+      return
+    # Only the hello of a new connection is accepted, until its token was checked.
+    if agent not in self.agents:
+      if message["type"] == farm_protocol.MESSAGE_HELLO and self._remove_pending_agent(agent):
+        self._add_agent(agent, message)
+        self._start_next_tasks()
+      return
+    lease = message.get("lease")
+    # The messages of a task, which was leased to another agent in the meantime, are ignored.
+    if self.leases.get(lease) is not agent:
+      return
+    if message["type"] == farm_protocol.MESSAGE_OUTPUT:
+      self._write_line(lease, str(message.get("line", "")))
+    elif message["type"] == farm_protocol.MESSAGE_FINISH:
+      del self.leases[lease]
+      agent.leases.discard(lease)
+      super()._handle_output((lease, None, message["exit_code"]))
+    if self._drop_silent_agents():
+      self._start_next_tasks()
+
+  def _start_next_tasks(self) -> None:
+    self._drop_silent_agents()
+    super()._start_next_tasks()
+
+  def _start_task(self, task: render_scheduler.RenderTask) -> bool:
+    """Lease a task to the agent with the most free worker slots for its device.
+
+    Returns:
+      Whether the task was leased. Otherwise it is queued again until an agent is free.
+    """
+    agent = max(
+      self.agents,
+      key=lambda agent: self._count_free_slots(agent, task.device),
+      default=None,
+    )
+    if agent is None or self._count_free_slots(agent, task.device) <= 0:
+      self.scheduler.requeue_task(task.worker_id)
+      return False
+    self.leases[task.worker_id] = agent
+    agent.leases.add(task.worker_id)
+    print_utils.print_info(f"Job {task.job_index + 1} is rendered by {agent.name}.")
+    # A failed send is noticed by the reader of the agent, which queues the task again.
+    agent.connection.send(
+      farm_protocol.MESSAGE_LEASE,
+      lease=task.worker_id,
+      row=task.job_index,
+      job=farm_protocol.encode_proto(task.job),
+      settings=farm_protocol.encode_proto(self.state.settings),
+      frame_path=task.frame_path,
+      frame_range=task.frame_range,
+    )
+    return True
+
+  def _count_free_slots(self, agent: Agent, device: int) -> int:
+    """Get the number of worker slots of an agent, which don't render a task yet."""
+    busy_count = len(
+      [
+        lease
+        for lease in agent.leases
+        if self.scheduler.running_tasks[lease].device == device
+      ],
+    )
+    return agent.worker_slots.get(device, 0) - busy_count
+
+  def _add_agent(self, agent: Agent, message: dict) -> None:
+    """Accept an agent, which said hello, and add its worker slots."""
+    token = str(message.get("token", ""))
+    if not hmac.compare_digest(token.encode(), self.token.encode()):
+      print_utils.print_warning(f"Rejected the agent at {agent.address}, its token is wrong.")
+      agent.connection.send(farm_protocol.MESSAGE_REJECT, reason="The token is wrong.")
+      agent.connection.finish()
+      # The connection is closed by the agent, or once it didn't say hello in time.
+      with self._pending_lock:
+        self.pending_agents.append(agent)
+      return
+    cpu_workers = max(message.get("cpu_workers", 0), 0)
+    gpu_workers = max(message.get("gpu_workers", 0), 0)
+    agent.name = str(message.get("name") or agent.address)
+    agent.worker_slots = {
+      state_pb2.cpu: cpu_workers,  # pylint: disable=no-member
+      state_pb2.gpu: gpu_workers,  # pylint: disable=no-member
+    }
+    agent.last_seen = time.time()
+    self.agents.append(agent)
+    self._update_worker_slots()
+    print_utils.print_info(
+      f"Agent {agent.name} joined with {cpu_workers} CPU and {gpu_workers} GPU workers.",
+    )
+
+  def _drop_agent(self, agent: Agent, reason: str) -> None:
+    """Disconnect an agent and queue its tasks again."""
+    if agent not in self.agents:
+      return
+    self.agents.remove(agent)
+    agent.connection.close()
+    print_utils.print_warning(f"Agent {agent.name} {reason}.")
+    for lease in sorted(agent.leases):
+      del self.leases[lease]
+      self.job_logs.close(lease)
+      task = self.scheduler.requeue_task(lease)
+      print_utils.print_warning(f"Job {task.job_index + 1} is queued again.")
+    agent.leases.clear()
+    self._update_worker_slots()
+
+  def _remove_pending_agent(self, agent: Agent) -> bool:
+    """Remove a connection from the ones, which didn't say hello yet.
+
+    Returns:
+      Whether the connection didn't say hello yet.
+    """
+    with self._pending_lock:
+      if agent not in self.pending_agents:
+        return False
+      self.pending_agents.remove(agent)
+      return True
+
+  def _take_pending_agents(self) -> list[Agent]:
+    """Remove and return all connections, which didn't say hello yet."""
+    with self._pending_lock:
+      pending_agents = self.pending_agents
+      self.pending_agents = []
+    return pending_agents
+
+  def _drop_silent_agents(self) -> bool:
+    """Drop the agents, which missed their heartbeats, e.g. because their machine froze.
+
+    Connections, which didn't say hello in time, are closed as well.
+
+    Returns:
+      Whether an agent was dropped.
+    """
+    now = time.time()
+    with self._pending_lock:
+      silent_connections = [
+        agent for agent in self.pending_agents if now - agent.connected > self.agent_timeout
+      ]
+      for agent in silent_connections:
+        self.pending_agents.remove(agent)
+    for agent in silent_connections:
+      print_utils.print_warning(f"Closed the connection of {agent.address}, it didn't say hello.")
+      agent.connection.close()
+    silent_agents = [agent for agent in self.agents if now - agent.last_seen > self.agent_timeout]
+    for agent in silent_agents:
+      self._drop_agent(agent, "missed its heartbeats")
+    return bool(silent_agents)
+
+  def _update_worker_slots(self) -> None:
+    """Set the worker slots of the scheduler to the sum of the slots of all agents."""
+    self.scheduler.worker_slots = {
+      device: sum(agent.worker_slots.get(device, 0) for agent in self.agents)
+      for device in DEVICES
+    }
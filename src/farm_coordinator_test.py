@@ -0,0 +1,321 @@
+"""End-to-end tests of the render farm with local agents and a fake Blender."""
+
+import json
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import farm_agent
+import farm_coordinator
+import farm_protocol
+import job_registry
+from headless_runner_test import make_fake_blender
+from protos import state_pb2
+
+
+def start_thread(target: object, results: list) -> threading.Thread:
+  """Run a function in a thread and append its result to a list."""
+  thread = threading.Thread(target=lambda: results.append(target()), daemon=True)
+  thread.start()
+  return thread
+
+
+@unittest.skipIf(platform.system() == "Windows", "Fake Blender executable needs a shebang.")
+class TestFarmCoordinator(unittest.TestCase):
+  """Tests for the FarmCoordinator and FarmAgent classes."""
+
+  def setUp(self) -> None:
+    """Set up a state, whose Blender path only exists on the agents."""
+    self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self.blender_path = make_fake_blender(self.temp_dir.name)
+    self.state = state_pb2.render_rob_state()  # pylint: disable=no-member
+    self.state.settings.blender_path = "/coordinator/has/no/blender"
+    self.state.settings.output_path = self.temp_dir.name
+
+  def tearDown(self) -> None:
+    """Remove the temporary directory."""
+    self.temp_dir.cleanup()
+
+  def add_job(self, name: str) -> None:
+    """Add a CPU render job of a blend file in the temporary directory to the state."""
+    blend_path = Path(self.temp_dir.name) / name
+    blend_path.touch()
+    render_job = self.state.render_jobs.add()
+    render_job.id = job_registry.new_job_id()
+    render_job.file = str(blend_path)
+    render_job.active = True
+    render_job.device = state_pb2.cpu  # pylint: disable=no-member
+    render_job.start = "1"
+
+  def make_agent(self, name: str, address: tuple[str, int]) -> farm_agent.FarmAgent:
+    """Create an agent with a single CPU worker, which renders with the fake Blender."""
+    return farm_agent.FarmAgent(
+      address[0],
+      self.blender_path,
+      port=address[1],
+      name=name,
+      gpu_workers=0,
+      token="secret",
+      heartbeat_seconds=0.2,
+    )
+
+  def test_render_on_agents(self) -> None:
+    """Test that the jobs are leased to several agents and their output is streamed back."""
+    for name in ("slow_a.blend", "slow_b.blend", "slow_warning.blend", "broken.blend"):
+      self.add_job(name)
+    coordinator = farm_coordinator.FarmCoordinator(
+      self.state,
+      host="127.0.0.1",
+      port=0,
+      token="secret",
+      strip_colors=True,
+    )
+    results = []
+    with patch("sys.stdout") as stdout:
+      agent_threads = [
+        start_thread(self.make_agent(name, coordinator.address).run, results)
+        for name in ("agent-1", "agent-2")
+      ]
+      self.assertFalse(coordinator.run())
+      for thread in agent_threads:
+        thread.join(timeout=10)
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertIn("is rendered by agent-1", output)
+    self.assertIn("is rendered by agent-2", output)
+    self.assertIn("Fake Blender rendering", output)
+    self.assertEqual(
+      coordinator.job_statuses,
+      {0: "finished", 1: "finished", 2: "warning", 3: "failed"},
+    )
+    self.assertEqual(results, [True, True])
+
+  def test_reject_wrong_token(self) -> None:
+    """Test that an agent with a wrong token gets no tasks."""
+    self.add_job("a.blend")
+    coordinator = farm_coordinator.FarmCoordinator(
+      self.state,
+      host="127.0.0.1",
+      port=0,
+      token="other secret",
+    )
+    results = []
+    with patch("sys.stdout"):
+      coordinator_thread = start_thread(coordinator.run, results)
+      self.assertFalse(self.make_agent("agent-1", coordinator.address).run())
+      self.assertEqual(coordinator.job_statuses, {})
+      agent = self.make_agent("agent-2", coordinator.address)
+      agent.token = "other secret"
+      self.assertTrue(agent.run())
+      coordinator_thread.join(timeout=10)
+    self.assertEqual(coordinator.job_statuses, {0: "finished"})
+    self.assertEqual(results, [True])
+
+  def test_lease_of_lost_agent(self) -> None:
+    """Test that the task of an agent, which missed its heartbeats, is leased to another agent."""
+    self.add_job("a.blend")
+    coordinator = farm_coordinator.FarmCoordinator(
+      self.state,
+      host="127.0.0.1",
+      port=0,
+      token="secret",
+      agent_timeout=1,
+      strip_colors=True,
+    )
+    results = []
+    with patch("sys.stdout") as stdout:
+      coordinator_thread = start_thread(coordinator.run, results)
+      # An agent, which takes a lease and then freezes without closing its connection.
+      with socket.create_connection(coordinator.address) as frozen_agent:
+        hello = {"type": "hello", "name": "frozen", "token": "secret", "cpu_workers": 1}
+        frozen_agent.sendall((json.dumps(hello) + "\n").encode())
+        lease = json.loads(frozen_agent.makefile("r").readline())
+        self.assertEqual(lease["type"], farm_protocol.MESSAGE_LEASE)
+        agent_thread = start_thread(self.make_agent("agent-1", coordinator.address).run, results)
+        coordinator_thread.join(timeout=10)
+        agent_thread.join(timeout=10)
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertIn("Agent frozen missed its heartbeats.", output)
+    self.assertIn("Job 1 is queued again.", output)
+    self.assertIn("Job 1 is rendered by agent-1.", output)
+    self.assertEqual(coordinator.job_statuses, {0: "finished"})
+    self.assertEqual(results, [True, True])
+
+  def test_invalid_messages(self) -> None:
+    """Test that invalid messages and silent connections don't stop the coordinator."""
+    self.add_job("a.blend")
+    coordinator = farm_coordinator.FarmCoordinator(
+      self.state,
+      host="127.0.0.1",
+      port=0,
+      token="secret",
+      agent_timeout=1,
+      strip_colors=True,
+    )
+    results = []
+    with (
+      patch("sys.stdout") as stdout,
+      socket.create_connection(coordinator.address) as stranger,
+      socket.create_connection(coordinator.address) as silent_stranger,
+      socket.create_connection(coordinator.address) as broken_agent,
+    ):
+      coordinator_thread = start_thread(coordinator.run, results)
+      # Messages of a connection, which didn't say hello, are never used.
+      stranger.sendall(b'{"type": "output", "lease": [1]}\n{"type": "finish", "lease": 0}\n')
+      hello = {"type": "hello", "name": "broken", "token": "secret", "cpu_workers": 1}
+      broken_agent.sendall((json.dumps(hello) + "\n").encode())
+      lease = json.loads(broken_agent.makefile("r").readline())
+      self.assertEqual(lease["type"], farm_protocol.MESSAGE_LEASE)
+      finish = {"type": "finish", "lease": lease["lease"], "exit_code": "zero"}
+      broken_agent.sendall((json.dumps(finish) + "\n").encode())
+      agent_thread = start_thread(self.make_agent("agent-1", coordinator.address).run, results)
+      coordinator_thread.join(timeout=10)
+      agent_thread.join(timeout=10)
+      # The connection, which never said hello, was closed.
+      silent_stranger.settimeout(10)
+      self.assertEqual(silent_stranger.recv(1), b"")
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertIn("Agent broken sent an invalid message. The exit code is invalid.", output)
+    self.assertIn("Job 1 is rendered by agent-1.", output)
+    self.assertEqual(coordinator.job_statuses, {0: "finished"})
+    self.assertEqual(results, [True, True])
+
+  def test_check_agent_message(self) -> None:
+    """Test that the fields of the messages of an agent are type checked."""
+    farm_coordinator.check_agent_message({"type": "hello", "cpu_workers": 2})
+    farm_coordinator.check_agent_message({"type": "finish", "lease": 1, "exit_code": 0})
+    for message in (
+      {"type": "hello", "gpu_workers": "2"},
+      {"type": "output", "lease": [1], "line": ""},
+      {"type": "finish", "lease": 1},
+    ):
+      with self.assertRaises(ValueError):
+        farm_coordinator.check_agent_message(message)
+
+  def test_lease_of_killed_agent(self) -> None:
+    """Test that the task of an agent, whose process died, is leased to another agent."""
+    self.add_job("slow_a.blend")
+    coordinator = farm_coordinator.FarmCoordinator(
+      self.state,
+      host="127.0.0.1",
+      port=0,
+      token="secret",
+      strip_colors=True,
+    )
+    results = []
+    with patch("sys.stdout") as stdout:
+      coordinator_thread = start_thread(coordinator.run, results)
+      agent_process = subprocess.Popen(
+        [
+          sys.executable,
+          str(Path(farm_agent.__file__).parent / "cli.py"),
+          "agent",
+          f"127.0.0.1:{coordinator.address[1]}",
+          f"--blender={self.blender_path}",
+          "--name=doomed",
+          "--gpu-workers=0",
+          "--token=secret",
+        ],
+        stdout=subprocess.DEVNULL,
+      )
+      deadline = time.time() + 10
+      while not coordinator.leases and time.time() < deadline:
+        time.sleep(0.05)
+      agent_process.kill()
+      agent_process.wait()
+      self.assertTrue(self.make_agent("agent-1", coordinator.address).run())
+      coordinator_thread.join(timeout=10)
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertIn("Job 1 is rendered by doomed.", output)
+    self.assertIn("Agent doomed disconnected.", output)
+    self.assertIn("Job 1 is rendered by agent-1.", output)
+    self.assertEqual(coordinator.job_statuses, {0: "finished"})
+    self.assertEqual(results, [True])
+
+  def test_token_required_on_network(self) -> None:
+    """Test that the coordinator refuses to listen on the network without a token."""
+    with self.assertRaises(ValueError):
+      farm_coordinator.FarmCoordinator(self.state, port=0)
+    self.assertTrue(farm_protocol.is_loopback_host("localhost"))
+    self.assertTrue(farm_protocol.is_loopback_host("::1"))
+    self.assertFalse(farm_protocol.is_loopback_host(""))
+    self.assertFalse(farm_protocol.is_loopback_host("render-01"))
+
+  def test_agent_rejects_invalid_leases(self) -> None:
+    """Test that an agent fails invalid leases of a coordinator without crashing."""
+    job = state_pb2.render_job()  # pylint: disable=no-member
+    job.start = "1 --python-expr evil"
+    lease = {
+      "lease": 2,
+      "row": 0,
+      "job": farm_protocol.encode_proto(job),
+      "settings": farm_protocol.encode_proto(self.state.settings),
+      "frame_path": str(Path(self.temp_dir.name) / "frame_####"),
+    }
+    with socket.create_server(("127.0.0.1", 0)) as server:
+      agent = self.make_agent("agent-1", server.getsockname())
+      results = []
+      with patch("sys.stdout"):
+        agent_thread = start_thread(agent.run, results)
+        connection = farm_protocol.Connection(server.accept()[0])
+        messages = connection.receive()
+        self.assertEqual(next(messages)["type"], farm_protocol.MESSAGE_HELLO)
+        connection.send(farm_protocol.MESSAGE_LEASE, lease=1)
+        connection.send(farm_protocol.MESSAGE_LEASE, **lease)
+        finished = []
+        for message in messages:
+          if message["type"] == farm_protocol.MESSAGE_FINISH:
+            finished.append((message["lease"], message["exit_code"]))
+          if len(finished) == 2:
+            break
+        connection.send(farm_protocol.MESSAGE_DONE)
+        agent_thread.join(timeout=10)
+        connection.close()
+    self.assertEqual(finished, [(1, 62097), (2, 62097)])
+    self.assertEqual(results, [True])
+    self.assertFalse(Path(self.temp_dir.name, "blender.crashed").exists())
+
+  def test_parse_lease(self) -> None:
+    """Test that a lease is only accepted with valid fields."""
+    job = state_pb2.render_job()  # pylint: disable=no-member
+    job.start = "1"
+    job.end = "10"
+    lease = {
+      "lease": 3,
+      "row": 1,
+      "job": farm_protocol.encode_proto(job),
+      "settings": farm_protocol.encode_proto(self.state.settings),
+      "frame_path": "/out/frame_####",
+      "frame_range": [1, 5],
+    }
+    parsed_lease = farm_agent.parse_lease(lease)
+    self.assertEqual((parsed_lease.lease_id, parsed_lease.frame_range), (3, (1, 5)))
+    self.assertEqual(parsed_lease.job, job)
+    for field, value in (
+      ("lease", "3"),
+      ("frame_path", ""),
+      ("frame_range", [1, "5; rm"]),
+      ("job", "not base64!"),
+    ):
+      with self.assertRaises(ValueError):
+        farm_agent.parse_lease({**lease, field: value})
+    with self.assertRaises(ValueError):
+      farm_agent.parse_lease({key: value for key, value in lease.items() if key != "row"})
+
+  def test_parse_address(self) -> None:
+    """Test that the port of an address is optional."""
+    self.assertEqual(farm_protocol.parse_address("render-01:4000"), ("render-01", 4000))
+    self.assertEqual(
+      farm_protocol.parse_address("render-01"),
+      ("render-01", farm_protocol.DEFAULT_PORT),
+    )
+
+
+if __name__ == "__main__":
+  unittest.main()
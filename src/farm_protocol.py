@@ -0,0 +1,127 @@
+"""Messages between the coordinator and the agents of a render farm.
+
+The coordinator and the agents talk over TCP with one JSON object per line. Every message has a
+type and the fields of its type. Render jobs and settings are sent as base64 encoded protobuf
+messages, so an agent renders exactly the job, which the coordinator leased to it.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import base64
+import ipaddress
+import json
+import socket
+import threading
+from collections.abc import Iterator
+
+from google.protobuf import message as protobuf_message
+
+DEFAULT_PORT = 62098
+# An agent sends a heartbeat this often, so the coordinator knows it is still alive.
+HEARTBEAT_SECONDS = 5
+# The coordinator drops an agent and leases its tasks to the other agents, if it was silent this
+# long.
+AGENT_TIMEOUT_SECONDS = 30
+
+# Agent: name, token, cpu_workers, gpu_workers
+MESSAGE_HELLO = "hello"
+MESSAGE_HEARTBEAT = "heartbeat"
+# Coordinator: lease, row, job, settings, frame_path, frame_range
+MESSAGE_LEASE = "lease"
+# Agent: lease, line
+MESSAGE_OUTPUT = "output"
+# Agent: lease, exit_code
+MESSAGE_FINISH = "finish"
+# Coordinator: reason
+MESSAGE_REJECT = "reject"
+# Coordinator: The queue is rendered, so the agent can quit.
+MESSAGE_DONE = "done"
+
+
+def encode_proto(message: protobuf_message.Message) -> str:
+  """Encode a protobuf message, so it can be sent in a JSON message."""
+  return base64.b64encode(message.SerializeToString()).decode("ascii")
+
+
+def decode_proto(
+  text: str,
+  message_class: type[protobuf_message.Message],
+) -> protobuf_message.Message:
+  """Decode a protobuf message, which was encoded with encode_proto."""
+  message = message_class()
+  message.ParseFromString(base64.b64decode(text))
+  return message
+
+
+def parse_address(address: str) -> tuple[str, int]:
+  """Split an address like render-01:62098 into host and port. The port is optional."""
+  host, _, port = address.rpartition(":")
+  if not host or not port.isdigit():
+    return address, DEFAULT_PORT
+  return host, int(port)
+
+
+def is_loopback_host(host: str) -> bool:
+  """Check if a host only accepts connections from the same machine."""
+  if host == "localhost":
+    return True
+  try:
+    return ipaddress.ip_address(host).is_loopback
+  except ValueError:
+    return False
+
+
+class Connection:
+  """A TCP connection, which sends and receives messages. Messages can be sent by any thread."""
+
+  def __init__(self, connected_socket: socket.socket) -> None:
+    """Wrap a connected socket."""
+    self.socket = connected_socket
+    self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    self._reader = connected_socket.makefile("r", encoding="utf-8", errors="replace")
+    self._lock = threading.Lock()
+
+  def send(self, message_type: str, **fields: object) -> bool:
+    """Send a message.
+
+    Returns:
+      Whether the message was sent. False if the connection is closed.
+    """
+    data = json.dumps({"type": message_type, **fields}) + "\n"
+    try:
+      with self._lock:
+        self.socket.sendall(data.encode("utf-8"))
+    except OSError:
+      return False
+    return True
+
+  def receive(self) -> Iterator[dict]:
+    """Yield the received messages until the connection is closed. Broken lines are skipped."""
+    try:
+      for line in self._reader:
+        try:
+          message = json.loads(line)
+        except json.JSONDecodeError:
+          continue
+        if isinstance(message, dict) and "type" in message:
+          yield message
+    except (OSError, ValueError):
+      return
+    finally:
+      # The socket is only released, once the reader is closed as well.
+      self._reader.close()
+
+  def finish(self) -> None:
+    """Stop sending, but let the other side read the messages, which were already sent."""
+    try:
+      self.socket.shutdown(socket.SHUT_WR)
+    except OSError:
+      pass
+
+  def close(self) -> None:
+    """Close the connection immediately. A thread, which waits for messages, stops receiving."""
+    try:
+      self.socket.shutdown(socket.SHUT_RDWR)
+    except OSError:
+      pass
+    self.socket.close()
@@ -0,0 +1,96 @@
+"""Unit tests for file_watcher.py."""
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from PySide6.QtWidgets import QApplication
+
+from protos import state_pb2
+from utils_rr import file_watcher, path_utils
+
+
+class TestFileWatcher(unittest.TestCase):
+  """Tests for the file_watcher module."""
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    """Create the application for the event loop of the watcher."""
+    cls.app = QApplication.instance() or QApplication([])
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    """Shut down the application, since the main window tests create their own."""
+    cls.app.shutdown()
+    del cls.app
+
+  def wait_for_changes(self, changes: list) -> None:
+    """Process events until the watcher reported a change."""
+    deadline = time.monotonic() + 5
+    while not changes and time.monotonic() < deadline:
+      self.app.processEvents()
+      time.sleep(0.01)
+    self.assertTrue(changes)
+
+  def test_get_watched_directories(self):
+    """Test that the folders of the blend files and the output folders are watched."""
+    state = state_pb2.render_rob_state()  # pylint: disable=no-member
+    state.settings.blender_files_path = "/shots"
+    state.settings.output_path = "/renders"
+    state.render_jobs.add().file = "seq01/cube.blend"
+    state.render_jobs.add().file = "/other/sphere.blend"
+    state.render_jobs.add()
+    self.assertEqual(
+      file_watcher.get_watched_directories(state),
+      {
+        os.path.abspath(path)
+        for path in ("/shots", "/renders", "/renders/stills", "/shots/seq01", "/other")
+      },
+    )
+    self.assertEqual(
+      file_watcher.get_output_directories(state.settings),
+      {os.path.abspath(path) for path in ("/renders", "/renders/stills")},
+    )
+
+  def test_watch_state(self):
+    """Test that cached results are reused until the watcher reports a change."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      state = state_pb2.render_rob_state()  # pylint: disable=no-member
+      state.settings.blender_files_path = tempdir
+      state.render_jobs.add().file = "cube.blend"
+      changes = []
+      watcher = file_watcher.FileWatcher(changes.append)
+      watcher.watch_state(state)
+      self.assertEqual(watcher.watcher.directories(), [tempdir])
+
+      blend_path = Path(tempdir) / "cube.blend"
+      self.assertFalse(path_utils.path_exists(blend_path))
+      with patch("os.path.exists") as exists:
+        self.assertFalse(path_utils.path_exists(blend_path, max_age=0))
+        exists.assert_not_called()
+
+      blend_path.touch()
+      self.wait_for_changes(changes)
+      self.assertEqual(changes, [{tempdir}])
+      self.assertTrue(path_utils.path_exists(blend_path, max_age=0))
+
+      state.settings.blender_files_path = str(Path(tempdir) / "missing")
+      watcher.watch_state(state)
+      self.assertEqual(watcher.watcher.directories(), [])
+
+      # A missing folder is watched once it exists and its files count as changed.
+      changes.clear()
+      Path(state.settings.blender_files_path).mkdir()
+      watcher.watch_missing_directories()
+      self.assertEqual(watcher.watcher.directories(), [state.settings.blender_files_path])
+      self.assertEqual(watcher.missing_directories, set())
+      self.wait_for_changes(changes)
+      self.assertEqual(changes, [{state.settings.blender_files_path}])
+      watcher.clear()
+    path_utils.clear_path_exists_cache()
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,311 @@
+"""Render a RenderRob queue without the GUI.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import blend_metadata
+import job_log
+import job_registry
+import preflight
+import render_scheduler
+import render_stats
+import run_journal
+import warm_worker
+from protos import state_pb2
+from render_job_to_rss import render_job_to_blender_args, render_job_to_server_request
+from utils_common import print_utils
+from utils_common.render_protocol import EVENTS_VARIABLE, EXIT_CODE_FAILED
+
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def load_state(rrp_path: str) -> state_pb2.render_rob_state:  # pylint: disable=no-member
+  """Load a RenderRob project file."""
+  state = state_pb2.render_rob_state()  # pylint: disable=no-member
+  state.ParseFromString(Path(rrp_path).read_bytes())
+  return state
+
+
+class HeadlessRunner:
+  """Render all active jobs of a state with concurrent Blender subprocesses."""
+
+  def __init__(
+    self,
+    state: state_pb2.render_rob_state,  # pylint: disable=no-member
+    strip_colors: bool = False,
+    warm_workers: bool = False,
+    stats_recorder: render_stats.StatsRecorder | None = None,
+    journal: run_journal.RunJournal | None = None,
+    resume: bool = False,
+    metadata_cache: blend_metadata.MetadataCache | None = None,
+  ) -> None:
+    """Initialize the headless runner.
+
+    Args:
+      state: The state with the settings and the render jobs.
+      strip_colors: Whether to remove the ANSI color codes from the Blender output.
+      warm_workers: Whether to keep Blender open between the jobs instead of starting a new
+        Blender process for every job.
+      stats_recorder: Stores the statistics of the finished jobs. Nothing is stored if it is None.
+      journal: Records the finished jobs, so an interrupted run can be resumed.
+      resume: Whether to skip the jobs, which the interrupted run in the journal already rendered.
+      metadata_cache: The cached metadata of the blend files, which the jobs are checked against
+        before the first render. Only the blend files and frame ranges are checked if it is None.
+    """
+    self.state = state
+    # Projects, which were saved before the jobs had ids, get them here.
+    job_registry.assign_job_ids(state.render_jobs)
+    self.strip_colors = strip_colors
+    self.scheduler = render_scheduler.RenderScheduler(state.settings)
+    self.processes = {}
+    self.finished_jobs = job_registry.JobStatusRegistry()
+    self.job_statuses = {}
+    self.stats_recorder = stats_recorder
+    self.journal = journal
+    self.resume = resume
+    self.metadata_cache = metadata_cache
+    # The output of every job is written to a log next to its frames, like in the GUI.
+    self.job_logs = job_log.JobLogs()
+    self._output_queue = queue.Queue()
+    self.warm_worker_pool = None
+    if warm_workers:
+      self.warm_worker_pool = warm_worker.WarmWorkerPool(
+        state.settings.blender_path,
+        self._output_queue,
+      )
+
+  def run(self) -> bool:
+    """Render the queue and block until all jobs are finished.
+
+    Returns:
+      Whether all jobs were rendered without errors.
+    """
+    try:
+      if not self._check_settings():
+        return False
+      if self.journal:
+        self._start_journal()
+      self._skip_invalid_jobs()
+      if self.stats_recorder:
+        expected_seconds = self.stats_recorder.predict(
+          [job for job in self.state.render_jobs if job.active and job not in self.finished_jobs],
+          self.state.settings,
+        )
+        self.scheduler.set_expected_seconds(self.state.render_jobs, expected_seconds)
+      self._start_next_tasks()
+      while not self.scheduler.is_done():
+        try:
+          item = self._output_queue.get(timeout=self._get_wait_seconds())
+        except queue.Empty:
+          self._start_next_tasks()
+          continue
+        self._handle_output(item)
+      if self.journal:
+        self.journal.end_run()
+    except KeyboardInterrupt:
+      self.stop()
+      print_utils.print_info("Render stopped.")
+      return False
+    finally:
+      self.job_logs.close_all()
+      # The journal of a run, which didn't end, is only closed, so the run can be resumed.
+      if self.journal:
+        self.journal.close()
+      if self.warm_worker_pool:
+        self.warm_worker_pool.shutdown()
+      if self.stats_recorder:
+        self.stats_recorder.close()
+      if self.metadata_cache:
+        self.metadata_cache.close()
+    print_utils.print_info("No more render jobs left.")
+    return render_scheduler.STATUS_FAILED not in self.job_statuses.values()
+
+  def stop(self) -> None:
+    """Kill all running Blender processes."""
+    for process in self.processes.values():
+      process.kill()
+    self.processes = {}
+    if self.warm_worker_pool:
+      self.warm_worker_pool.kill()
+    self.scheduler.clear()
+
+  def _check_settings(self) -> bool:
+    """Check if the settings are complete enough to start rendering."""
+    if not self.state.settings.blender_path:
+      print_utils.print_error_no_exit("The Blender path is not set.")
+      return False
+    return True
+
+  def _get_wait_seconds(self) -> float | None:
+    """Get the time to wait for the next output, before the ready queue is checked again."""
+    # Wake up once a failed task, which waits for its retry, is ready.
+    return self.scheduler.seconds_until_ready()
+
+  def _handle_output(self, item: tuple) -> None:
+    """Handle an item of the output queue, i.e. a line of a worker or its exit code."""
+    worker_id, line, exit_code = item
+    if line is None:
+      self._finish_worker(worker_id, exit_code)
+      self._start_next_tasks()
+    else:
+      self._write_line(worker_id, line)
+
+  def _start_journal(self) -> None:
+    """Start the run in the journal and take over the jobs the interrupted run rendered."""
+    statuses = run_journal.get_interrupted_run(self.journal.path) if self.resume else None
+    if self.resume and statuses is None:
+      print_utils.print_info("There is no interrupted run to resume, so all jobs are rendered.")
+    self.journal.start_run(resume=statuses is not None)
+    for row, job in enumerate(self.state.render_jobs):
+      status = (statuses or {}).get(run_journal.get_job_id(job))
+      if job.active and status:
+        self.finished_jobs.set(job, status)
+        self.job_statuses[row] = status
+    if statuses is not None:
+      print_utils.print_info(
+        f"Resuming the run, which already rendered {len(self.finished_jobs)} jobs.",
+      )
+
+  def _skip_invalid_jobs(self) -> None:
+    """Mark the jobs, which can't be rendered, as failed before the first render starts."""
+    if self.metadata_cache:
+      report = preflight.validate_jobs(self.state, self.metadata_cache.lookup)
+    else:
+      report = preflight.validate_jobs(self.state)
+    for row in list(report):
+      if row in self.job_statuses:
+        del report[row]
+        continue
+      self.finished_jobs.set(self.state.render_jobs[row], render_scheduler.STATUS_FAILED)
+      self.job_statuses[row] = render_scheduler.STATUS_FAILED
+    for line in preflight.format_report(report):
+      print_utils.print_error_no_exit(line)
+
+  def _start_next_tasks(self) -> None:
+    complete_jobs = self.scheduler.update_ready_queue(self.state.render_jobs, self.finished_jobs)
+    for job_index in complete_jobs:
+      self.finished_jobs.set(self.state.render_jobs[job_index], render_scheduler.STATUS_FINISHED)
+      self.job_statuses[job_index] = render_scheduler.STATUS_FINISHED
+      if self.journal:
+        self.journal.job_finished(
+          self.state.render_jobs[job_index],
+          job_index,
+          render_scheduler.STATUS_FINISHED,
+        )
+      print_utils.print_info(f"All frames of job {job_index + 1} are already rendered.")
+    for task in self.scheduler.start_next_tasks():
+      self._render_task(task)
+
+  def _render_task(self, task: render_scheduler.RenderTask) -> None:
+    message = f"Rendering job {task.job_index + 1} to {task.frame_path}"
+    if task.frame_range:
+      message += f" (frames {task.frame_range[0]} to {task.frame_range[1]})"
+    print_utils.print_info(message)
+    try:
+      self.job_logs.open(task.worker_id, job_log.get_log_path(task.frame_path))
+    except OSError as error:
+      print_utils.print_warning(f"Could not write the log of the job: {error}")
+    # A task, which couldn't be started, isn't recorded, so the journal only lists real renders.
+    if self._start_task(task) and self.journal:
+      self.journal.job_started(task.job, task.job_index)
+
+  def _start_task(self, task: render_scheduler.RenderTask) -> bool:
+    """Start Blender for a task. Its output is put into the output queue.
+
+    Returns:
+      Whether Blender was started. Otherwise the task is finished as failed.
+    """
+    if self.warm_worker_pool:
+      request = render_job_to_server_request(
+        task.job,
+        self.state.settings,
+        task.frame_path,
+        frame_range=task.frame_range,
+      )
+      self.warm_worker_pool.render(task.worker_id, request)
+      return True
+    args = render_job_to_blender_args(
+      task.job,
+      self.state.settings,
+      task.frame_path,
+      frame_range=task.frame_range,
+    )
+    try:
+      process = subprocess.Popen(
+        [self.state.settings.blender_path, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env={**os.environ, "PYTHONUNBUFFERED": "1", EVENTS_VARIABLE: "1"},
+        text=True,
+        errors="replace",
+      )
+    except OSError as error:
+      self._output_queue.put((task.worker_id, f"Could not start Blender: {error}\n", None))
+      self._output_queue.put((task.worker_id, None, EXIT_CODE_FAILED))
+      return False
+    self.processes[task.worker_id] = process
+    reader_thread = threading.Thread(
+      target=self._read_output,
+      args=(task.worker_id, process),
+      daemon=True,
+    )
+    reader_thread.start()
+    return True
+
+  def _read_output(self, worker_id: int, process: subprocess.Popen) -> None:
+    for line in process.stdout:
+      self._output_queue.put((worker_id, line, None))
+    self._output_queue.put((worker_id, None, process.wait()))
+
+  def _write_line(self, worker_id: int, line: str) -> None:
+    event = print_utils.parse_event(line)
+    if event:
+      self.scheduler.report_event(worker_id, event)
+      return
+    self.scheduler.report_output(worker_id, line)
+    task = self.scheduler.running_tasks[worker_id]
+    # The log contains the text without the color codes, like the console of the GUI.
+    text = ANSI_ESCAPE_PATTERN.sub("", print_utils.ANSI_PREFIX_PATTERN.sub("", line))
+    self.job_logs.write_line(worker_id, text.rstrip("\n"), job_log.get_line_kind(line))
+    # The logs are written to the disk, once the workers are quiet for a moment.
+    if self._output_queue.empty():
+      self.job_logs.flush()
+    if self.strip_colors:
+      line = ANSI_ESCAPE_PATTERN.sub("", line)
+    sys.stdout.write(f"[Job {task.job_index + 1}] {line}")
+    sys.stdout.flush()
+
+  def _finish_worker(self, worker_id: int, exit_code: int) -> None:
+    self.processes.pop(worker_id, None)
+    self.job_logs.close(worker_id)
+    task, job_status = self.scheduler.finish_task(
+      worker_id,
+      render_scheduler.status_from_exit_code(exit_code),
+      exit_code,
+      crashed=exit_code < 0,
+    )
+    if self.stats_recorder:
+      self.stats_recorder.record_task(task, job_status, self.state.settings)
+    if task.retry_delay is not None:
+      print_utils.print_warning(render_scheduler.format_retry(task, self.scheduler.retry_policy))
+    if job_status is None:
+      return
+    self.finished_jobs.set(task.job, job_status)
+    self.job_statuses[task.job_index] = job_status
+    if self.journal:
+      self.journal.job_finished(task.job, task.job_index, job_status)
+    print_utils.print_info(f"Job {task.job_index + 1} {job_status}.")
+    eta_seconds = self.scheduler.eta_seconds()
+    if eta_seconds is not None and not self.scheduler.is_done():
+      print_utils.print_info(
+        f"{self.scheduler.progress():.0f}% of the frames rendered, about "
+        f"{render_scheduler.format_duration(eta_seconds)} left.",
+      )
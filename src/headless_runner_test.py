@@ -0,0 +1,287 @@
+"""Unit tests for headless_runner.py."""
+
+import platform
+import re
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import blend_metadata
+import headless_runner
+import job_registry
+import render_stats
+import run_journal
+from protos import state_pb2
+from warm_worker_test import make_fake_warm_blender
+
+FAKE_BLENDER = """#!{python}
+import os
+import sys
+import time
+print("Fake Blender rendering", sys.argv[2], flush=True)
+if "slow" in sys.argv[2]:
+  time.sleep(1)
+if "warning" in sys.argv[2] and os.environ.get("RENDERROB_EVENTS"):
+  print('RENDERROB_EVENT {{"type": "warning", "message": "No camera"}}', flush=True)
+if "crash" in sys.argv[2]:
+  sys.exit(139)
+if "flaky" in sys.argv[2] and not os.path.exists(sys.argv[2] + ".crashed"):
+  open(sys.argv[2] + ".crashed", "w").close()
+  print("Segmentation fault", flush=True)
+  sys.exit(2)
+sys.exit(62097 if "broken" in sys.argv[2] else 0)
+"""
+
+
+def make_fake_blender(directory: str) -> str:
+  """Write an executable, which behaves like Blender for the runner."""
+  fake_blender = Path(directory) / "blender"
+  fake_blender.write_text(FAKE_BLENDER.format(python=sys.executable), encoding="utf-8")
+  fake_blender.chmod(fake_blender.stat().st_mode | stat.S_IEXEC)
+  return str(fake_blender)
+
+
+@unittest.skipIf(platform.system() == "Windows", "Fake Blender executable needs a shebang.")
+class TestHeadlessRunner(unittest.TestCase):
+  """Tests for the HeadlessRunner class."""
+
+  def setUp(self) -> None:
+    """Set up a state with a fake Blender."""
+    self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self.state = state_pb2.render_rob_state()  # pylint: disable=no-member
+    self.state.settings.blender_path = make_fake_blender(self.temp_dir.name)
+    self.state.settings.output_path = self.temp_dir.name
+    self.state.settings.cpu_workers = 2
+
+  def tearDown(self) -> None:
+    """Remove the temporary directory."""
+    self.temp_dir.cleanup()
+
+  def blend_path(self, name: str) -> str:
+    """Get the path of a blend file in the temporary directory."""
+    return str(Path(self.temp_dir.name) / name)
+
+  def add_job(self, name: str, active: bool = True) -> None:
+    """Add a CPU render job of a blend file in the temporary directory to the state."""
+    Path(self.blend_path(name)).touch()
+    render_job = self.state.render_jobs.add()
+    render_job.id = job_registry.new_job_id()
+    render_job.file = self.blend_path(name)
+    render_job.active = active
+    render_job.device = state_pb2.cpu
+    render_job.start = "1"
+
+  def test_run(self) -> None:
+    """Test that all active jobs are rendered."""
+    self.add_job("a.blend")
+    self.add_job("b.blend", active=False)
+    self.add_job("c.blend")
+    stats_recorder = render_stats.StatsRecorder(self.blend_path("stats.sqlite"))
+    runner = headless_runner.HeadlessRunner(
+      self.state,
+      strip_colors=True,
+      stats_recorder=stats_recorder,
+    )
+    with patch("sys.stdout") as stdout:
+      self.assertTrue(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertIn(f"[Job 1] Fake Blender rendering {self.blend_path('a.blend')}", output)
+    self.assertIn(f"[Job 3] Fake Blender rendering {self.blend_path('c.blend')}", output)
+    self.assertNotIn(self.blend_path("b.blend"), output)
+    self.assertEqual(runner.job_statuses, {0: "finished", 2: "finished"})
+    history = stats_recorder.database.get_history()
+    self.assertEqual(sorted(stats.shot_name for stats in history), ["a-pv-v$$", "c-pv-v$$"])
+    stats_recorder.close()
+
+  def test_run_job_logs(self) -> None:
+    """Test that the output of every job is written to its log next to its frames."""
+    self.add_job("warning.blend")
+    runner = headless_runner.HeadlessRunner(self.state)
+    with patch("sys.stdout"):
+      self.assertTrue(runner.run())
+    log_path = Path(self.temp_dir.name) / "stills" / "warning-pv-v01.log"
+    log = log_path.read_text(encoding="utf-8")
+    self.assertIn(f"Fake Blender rendering {self.blend_path('warning.blend')}", log)
+    self.assertNotIn("RENDERROB_EVENT", log)
+    self.assertEqual(runner.job_logs.writers, {})
+
+  def test_run_failed_job(self) -> None:
+    """Test that a failed job is reported and the rest of the queue is rendered."""
+    self.add_job("broken.blend")
+    self.add_job("a.blend")
+    runner = headless_runner.HeadlessRunner(self.state, strip_colors=True)
+    with patch("sys.stdout"):
+      self.assertFalse(runner.run())
+    self.assertEqual(runner.job_statuses, {0: "failed", 1: "finished"})
+
+  def test_run_events(self) -> None:
+    """Test that the events of Blender set the job status and are not printed."""
+    self.add_job("warning.blend")
+    self.add_job("crash.blend")
+    runner = headless_runner.HeadlessRunner(self.state, strip_colors=True)
+    with patch("sys.stdout") as stdout:
+      self.assertFalse(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertNotIn("RENDERROB_EVENT", output)
+    self.assertEqual(runner.job_statuses, {0: "warning", 1: "failed"})
+
+  def test_run_retry(self) -> None:
+    """Test that crashed jobs are rendered again until the retries are used up."""
+    self.add_job("flaky.blend")
+    self.add_job("crash.blend")
+    self.add_job("broken.blend")
+    self.state.settings.max_retries = 2
+    runner = headless_runner.HeadlessRunner(self.state, strip_colors=True)
+    with patch("sys.stdout") as stdout:
+      self.assertFalse(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertEqual(output.count(f"Fake Blender rendering {self.blend_path('flaky.blend')}"), 2)
+    self.assertEqual(output.count(f"Fake Blender rendering {self.blend_path('crash.blend')}"), 3)
+    self.assertEqual(output.count(f"Fake Blender rendering {self.blend_path('broken.blend')}"), 1)
+    self.assertEqual(runner.job_statuses, {0: "finished", 1: "failed", 2: "failed"})
+
+  def test_run_resume(self) -> None:
+    """Test that a resumed run only renders the jobs, which the interrupted run didn't finish."""
+    self.add_job("a.blend")
+    self.add_job("b.blend")
+    journal_path = self.blend_path("project.rrp.journal")
+    journal = run_journal.RunJournal(journal_path)
+    journal.start_run()
+    journal.job_finished(self.state.render_jobs[0], 0, "warning")
+    journal.close()
+
+    runner = headless_runner.HeadlessRunner(
+      self.state,
+      strip_colors=True,
+      journal=run_journal.RunJournal(journal_path),
+      resume=True,
+    )
+    with patch("sys.stdout") as stdout:
+      self.assertTrue(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertNotIn(f"Fake Blender rendering {self.blend_path('a.blend')}", output)
+    self.assertIn(f"Fake Blender rendering {self.blend_path('b.blend')}", output)
+    self.assertEqual(runner.job_statuses, {0: "warning", 1: "finished"})
+    # The run is complete, so there is nothing left to resume.
+    self.assertIsNone(run_journal.get_interrupted_run(journal_path))
+
+  def test_run_interrupted(self) -> None:
+    """Test that an interrupted run closes the statistics and keeps the journal resumable."""
+    self.add_job("slow.blend")
+    stats_recorder = render_stats.StatsRecorder(self.blend_path("stats.sqlite"))
+    journal_path = self.blend_path("project.rrp.journal")
+    runner = headless_runner.HeadlessRunner(
+      self.state,
+      strip_colors=True,
+      stats_recorder=stats_recorder,
+      journal=run_journal.RunJournal(journal_path),
+    )
+    with (
+      patch("sys.stdout"),
+      patch.object(runner, "_handle_output", side_effect=KeyboardInterrupt),
+      patch.object(stats_recorder, "close", wraps=stats_recorder.close) as close,
+    ):
+      self.assertFalse(runner.run())
+    close.assert_called_once()
+    self.assertEqual(runner.processes, {})
+    self.assertEqual(run_journal.get_interrupted_run(journal_path), {})
+
+  def test_run_blender_not_started(self) -> None:
+    """Test that a job, whose Blender can't be started, fails without a start in the journal."""
+    self.state.settings.blender_path = self.blend_path("missing_blender")
+    self.add_job("a.blend")
+    journal_path = self.blend_path("project.rrp.journal")
+    runner = headless_runner.HeadlessRunner(
+      self.state,
+      strip_colors=True,
+      journal=run_journal.RunJournal(journal_path),
+    )
+    with patch("sys.stdout"):
+      self.assertFalse(runner.run())
+    self.assertEqual(runner.job_statuses, {0: "failed"})
+    record_types = [record["type"] for record in run_journal.read_records(journal_path)]
+    self.assertNotIn(run_journal.RECORD_JOB_START, record_types)
+
+  def test_run_chunked_job(self) -> None:
+    """Test that an animation is rendered in chunks into the same folder."""
+    self.add_job("a.blend")
+    self.state.render_jobs[0].end = "9"
+    self.state.render_jobs[0].high_quality = True
+    self.state.settings.chunk_size = 3
+    runner = headless_runner.HeadlessRunner(self.state, strip_colors=True)
+    with patch("sys.stdout") as stdout:
+      self.assertTrue(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    rendering_line = f"[Job 1] Fake Blender rendering {self.blend_path('a.blend')}"
+    self.assertEqual(output.count(rendering_line), 3)
+    self.assertEqual(runner.job_statuses, {0: "finished"})
+
+  def test_run_warm_workers(self) -> None:
+    """Test that warm workers render several jobs without restarting Blender."""
+    self.state.settings.blender_path = make_fake_warm_blender(self.temp_dir.name)
+    self.state.settings.cpu_workers = 1
+    self.add_job("a.blend")
+    self.add_job("broken.blend")
+    self.add_job("a.blend")
+    self.state.render_jobs[2].start = "2"
+    runner = headless_runner.HeadlessRunner(self.state, strip_colors=True, warm_workers=True)
+    with patch("sys.stdout") as stdout:
+      self.assertFalse(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertIn(f"[Job 1] Fake Blender rendering {self.blend_path('a.blend')}", output)
+    self.assertIn(f"[Job 3] Fake Blender rendering {self.blend_path('a.blend')}", output)
+    self.assertEqual(runner.job_statuses, {0: "finished", 1: "failed", 2: "finished"})
+    process_ids = re.findall(r"Fake Blender rendering \S+ in (\d+)", output)
+    self.assertEqual(len(process_ids), 3)
+    self.assertEqual(len(set(process_ids)), 1)
+
+  def test_run_invalid_job(self) -> None:
+    """Test that jobs, which can't be rendered, are skipped without starting Blender."""
+    self.add_job("a.blend")
+    self.add_job("b.blend")
+    self.state.render_jobs[0].file = self.blend_path("missing.blend")
+    self.state.render_jobs[1].end = "x"
+    self.add_job("c.blend")
+    runner = headless_runner.HeadlessRunner(self.state, strip_colors=True)
+    with patch("sys.stdout") as stdout:
+      self.assertFalse(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertEqual(output.count("Fake Blender rendering"), 1)
+    self.assertEqual(runner.job_statuses, {0: "failed", 1: "failed", 2: "finished"})
+
+  def test_run_invalid_camera(self) -> None:
+    """Test that a job, whose camera isn't in the cached metadata of its file, is skipped."""
+    self.add_job("a.blend")
+    self.add_job("b.blend")
+    self.state.render_jobs[0].camera = "Closeup"
+    self.state.render_jobs[1].camera = "Camera"
+    metadata_cache = blend_metadata.MetadataCache(self.blend_path(blend_metadata.CACHE_FILE_NAME))
+    for name in ("a.blend", "b.blend"):
+      metadata_cache.put(
+        self.blend_path(name),
+        blend_metadata.get_file_signature(self.blend_path(name)),
+        {"active_scene": "Scene", "cameras": ["Camera"], "scenes": {"Scene": ["ViewLayer"]}},
+      )
+    runner = headless_runner.HeadlessRunner(
+      self.state,
+      strip_colors=True,
+      metadata_cache=metadata_cache,
+    )
+    with patch("sys.stdout") as stdout:
+      self.assertFalse(runner.run())
+    output = "".join(call.args[0] for call in stdout.write.call_args_list)
+    self.assertIn("Job 1: The camera Closeup doesn't exist in the blend file.", output)
+    self.assertEqual(output.count("Fake Blender rendering"), 1)
+    self.assertEqual(runner.job_statuses, {0: "failed", 1: "finished"})
+
+  def test_load_state(self) -> None:
+    """Test that a project file is loaded."""
+    state = headless_runner.load_state("test/basic_state.rrp")
+    self.assertEqual(state.render_jobs[0].file, "test/cube.blend")
+
+
+if __name__ == "__main__":
+  unittest.main()
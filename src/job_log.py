@@ -0,0 +1,240 @@
+"""Log files with the output of a render job, which are written next to its frames.
+
+Every log has a small index file, which stores the byte offsets of pages of lines and of the
+warning and error lines. The log viewer uses it to only read the page, which is shown, instead of
+the whole log. A log is rotated once it exceeds a maximum size. The logs are written by the GUI
+and by the headless runner and the farm coordinator, which write the output their agents stream.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import bisect
+import re
+from pathlib import Path
+
+from utils_common.print_utils import ANSI_PREFIX_PATTERN, BASH_COLORS
+
+MAX_LOG_BYTES = 16 * 1024 * 1024
+LOG_BACKUP_COUNT = 2
+PAGE_LINES = 1000
+LOG_SUFFIX = ".log"
+INDEX_SUFFIX = ".idx"
+
+KIND_PAGE = "p"
+KIND_WARNING = "w"
+KIND_ERROR = "e"
+# The kind of the lines, which start with the background color of a message of print_utils.
+BACKGROUND_KINDS = {
+  BASH_COLORS["RESET_ALL"]: None,
+  BASH_COLORS["BACK_CYAN"]: None,
+  BASH_COLORS["BACK_YELLOW"]: KIND_WARNING,
+  BASH_COLORS["BACK_RED"]: KIND_ERROR,
+}
+ANSI_CODE_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def get_log_path(frame_path: str) -> Path:
+  """Get the path of the log of a render job from the path of its frames.
+
+  The log is named like the shot and stored next to the folder of the frames, so the folder only
+  contains frames and an empty folder of a failed render is still reused by the next version.
+  """
+  frame_path_ = Path(frame_path)
+  shotname, separator, _ = frame_path_.name.rpartition("-f")
+  # Frame paths, which weren't built by the shot name builder, are used as they are.
+  if not separator:
+    shotname = frame_path_.name
+  directory = frame_path_.parent
+  if directory.name == shotname:
+    directory = directory.parent
+  return directory / (shotname + LOG_SUFFIX)
+
+
+def get_line_kind(line: str) -> str | None:
+  """Get the kind of a line of Blender output, which is added to the index.
+
+  Args:
+    line: The line with its ANSI codes.
+
+  Returns:
+    KIND_WARNING or KIND_ERROR if the line is a warning or an error, otherwise None.
+  """
+  kind = None
+  prefix = ANSI_PREFIX_PATTERN.match(line)
+  if prefix:
+    for code in ANSI_CODE_PATTERN.findall(prefix.group()):
+      kind = BACKGROUND_KINDS.get(code, kind)
+  if "blender.crash.txt" in line:
+    kind = KIND_ERROR
+  return kind
+
+
+def get_index_path(log_path: Path) -> Path:
+  """Get the path of the index of a log."""
+  return log_path.with_name(log_path.name + INDEX_SUFFIX)
+
+
+def get_backup_path(path: Path, number: int) -> Path:
+  """Get the path of a rotated log or index."""
+  return path.with_name(f"{path.name}.{number}")
+
+
+def rotate_log(log_path: Path) -> None:
+  """Move the log and its index to the first backup and drop the oldest backup."""
+  for path in (log_path, get_index_path(log_path)):
+    get_backup_path(path, LOG_BACKUP_COUNT).unlink(missing_ok=True)
+    for number in range(LOG_BACKUP_COUNT - 1, 0, -1):
+      if get_backup_path(path, number).exists():
+        get_backup_path(path, number).rename(get_backup_path(path, number + 1))
+    if path.exists():
+      path.rename(get_backup_path(path, 1))
+
+
+class JobLogWriter:
+  """Append lines to a log and keep its index up to date."""
+
+  def __init__(self, log_path: Path) -> None:
+    """Open the log for appending. A log, which is too large, is rotated first."""
+    self.log_path = log_path
+    self.log_path.parent.mkdir(parents=True, exist_ok=True)
+    if self.log_path.exists() and self.log_path.stat().st_size > MAX_LOG_BYTES:
+      rotate_log(self.log_path)
+    self.open()
+
+  def open(self) -> None:
+    """Open the log and the index and start a new page."""
+    self.log_file = self.log_path.open("ab")
+    self.index_file = get_index_path(self.log_path).open("a", encoding="utf-8")
+    self.offset = self.log_file.tell()
+    self.lines_in_page = PAGE_LINES
+
+  def write_line(self, line: str, kind: str | None = None) -> None:
+    """Append a line.
+
+    Args:
+      line: The line without ANSI codes and without a line break.
+      kind: KIND_WARNING or KIND_ERROR if the line is added to the index.
+    """
+    if self.offset > MAX_LOG_BYTES:
+      self.close()
+      rotate_log(self.log_path)
+      self.open()
+    if self.lines_in_page >= PAGE_LINES:
+      self.index_file.write(f"{KIND_PAGE} {self.offset}\n")
+      self.lines_in_page = 0
+    if kind:
+      self.index_file.write(f"{kind} {self.offset}\n")
+    data = (line + "\n").encode(errors="replace")
+    self.log_file.write(data)
+    self.offset += len(data)
+    self.lines_in_page += 1
+
+  def flush(self) -> None:
+    """Write the buffered lines to the disk."""
+    self.log_file.flush()
+    self.index_file.flush()
+
+  def close(self) -> None:
+    """Close the log and the index."""
+    self.log_file.close()
+    self.index_file.close()
+
+
+class JobLogs:
+  """The logs of the running workers.
+
+  The chunks of a job, which render at the same time, share the writer of its log.
+  """
+
+  def __init__(self) -> None:
+    """Initialize without open logs."""
+    self.writers = {}
+    self.worker_log_paths = {}
+
+  def open(self, worker_id: int, log_path: Path) -> None:
+    """Write the output of a worker to a log.
+
+    Raises:
+      OSError: If the log can't be opened.
+    """
+    if log_path not in self.writers:
+      self.writers[log_path] = JobLogWriter(log_path)
+    self.worker_log_paths[worker_id] = log_path
+
+  def write_line(self, worker_id: int, line: str, kind: str | None = None) -> None:
+    """Append a line to the log of a worker, if it has one."""
+    log_path = self.worker_log_paths.get(worker_id)
+    if log_path:
+      self.writers[log_path].write_line(line, kind)
+
+  def flush(self) -> None:
+    """Write the buffered lines of all logs to the disk."""
+    for writer in self.writers.values():
+      writer.flush()
+
+  def close(self, worker_id: int) -> None:
+    """Close the log of a worker, unless another worker still writes to it."""
+    log_path = self.worker_log_paths.pop(worker_id, None)
+    if log_path and log_path not in self.worker_log_paths.values():
+      self.writers.pop(log_path).close()
+
+  def close_all(self) -> None:
+    """Close the logs of all workers."""
+    for worker_id in list(self.worker_log_paths):
+      self.close(worker_id)
+
+
+class JobLogReader:
+  """Read single pages of a log with the help of its index."""
+
+  def __init__(self, log_path: Path) -> None:
+    """Load the index of a log."""
+    self.log_path = log_path
+    self.page_offsets = [0]
+    self.problem_offsets = []
+    self.load_index()
+
+  def load_index(self) -> None:
+    """Load the index again, e.g. if the log is still being written."""
+    page_offsets = {0}
+    problem_offsets = []
+    index_path = get_index_path(self.log_path)
+    if index_path.exists():
+      for line in index_path.read_text(encoding="utf-8").splitlines():
+        kind, _, offset = line.partition(" ")
+        if not offset.isdigit():
+          continue
+        if kind == KIND_PAGE:
+          page_offsets.add(int(offset))
+        elif kind in (KIND_WARNING, KIND_ERROR):
+          problem_offsets.append(int(offset))
+    self.page_offsets = sorted(page_offsets)
+    self.problem_offsets = sorted(problem_offsets)
+
+  def page_count(self) -> int:
+    """Get the number of pages."""
+    return len(self.page_offsets)
+
+  def page_of_offset(self, offset: int) -> int:
+    """Get the page, which contains the line at a byte offset."""
+    return bisect.bisect_right(self.page_offsets, offset) - 1
+
+  def read_page(self, page: int) -> str:
+    """Read a single page of the log."""
+    if not self.log_path.exists():
+      return ""
+    start = self.page_offsets[page]
+    with self.log_path.open("rb") as log_file:
+      log_file.seek(start)
+      if page + 1 < self.page_count():
+        data = log_file.read(self.page_offsets[page + 1] - start)
+      else:
+        data = log_file.read()
+    return data.decode(errors="replace")
+
+  def next_problem_offset(self, offset: int) -> int | None:
+    """Get the offset of the first warning or error line after a byte offset."""
+    index = bisect.bisect_right(self.problem_offsets, offset)
+    if index == len(self.problem_offsets):
+      return None
+    return self.problem_offsets[index]
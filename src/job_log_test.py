@@ -0,0 +1,83 @@
+"""Unit tests for job_log.py."""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import job_log
+from utils_common.print_utils import BASH_COLORS
+
+
+class TestJobLog(unittest.TestCase):
+  """Tests for the job_log module."""
+
+  def test_get_log_path(self):
+    """Test that the log is stored next to the folder of the frames."""
+    self.assertEqual(
+      job_log.get_log_path("out/cube-pv-v02/cube-pv-v02-f####.png"),
+      Path("out/cube-pv-v02.log"),
+    )
+    self.assertEqual(
+      job_log.get_log_path("out/stills/cube-hq-v01-f####.exr"),
+      Path("out/stills/cube-hq-v01.log"),
+    )
+    self.assertEqual(job_log.get_log_path("out/frame_####.png"), Path("out/frame_####.png.log"))
+
+  def test_get_line_kind(self):
+    """Test that warnings and errors are found by the color, which the line starts with."""
+    self.assertEqual(
+      job_log.get_line_kind(f"{BASH_COLORS['BACK_YELLOW']} {BASH_COLORS['FORE_BLACK']}[WARNING] a"),
+      job_log.KIND_WARNING,
+    )
+    self.assertEqual(
+      job_log.get_line_kind(f"{BASH_COLORS['BACK_RED']} {BASH_COLORS['FORE_WHITE']}[ERROR] a"),
+      job_log.KIND_ERROR,
+    )
+    self.assertEqual(job_log.get_line_kind("see blender.crash.txt"), job_log.KIND_ERROR)
+    self.assertIsNone(job_log.get_line_kind(f"{BASH_COLORS['BACK_CYAN']}[INFO] a"))
+    self.assertIsNone(job_log.get_line_kind("Fra:1 Mem:2"))
+
+  @patch("job_log.PAGE_LINES", 3)
+  def test_write_and_read_pages(self):
+    """Test that the pages and the warnings and errors are found through the index."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      log_path = Path(tempdir) / "shot" / "cube-pv-v01.log"
+      writer = job_log.JobLogWriter(log_path)
+      for i in range(7):
+        kind = job_log.KIND_WARNING if i == 4 else None
+        writer.write_line(f"line {i}", kind)
+      writer.close()
+      # A second render of the job appends to the log and starts a new page.
+      writer = job_log.JobLogWriter(log_path)
+      writer.write_line("error", job_log.KIND_ERROR)
+      writer.close()
+
+      reader = job_log.JobLogReader(log_path)
+      self.assertEqual(reader.page_count(), 4)
+      self.assertEqual(reader.read_page(0), "line 0\nline 1\nline 2\n")
+      self.assertEqual(reader.read_page(2), "line 6\n")
+      self.assertEqual(reader.read_page(3), "error\n")
+      warning_offset = reader.next_problem_offset(0)
+      self.assertEqual(reader.page_of_offset(warning_offset), 1)
+      error_offset = reader.next_problem_offset(warning_offset)
+      self.assertEqual(reader.page_of_offset(error_offset), 3)
+      self.assertIsNone(reader.next_problem_offset(error_offset))
+
+  @patch("job_log.MAX_LOG_BYTES", 20)
+  def test_rotate_log(self):
+    """Test that a log is rotated once it is too large."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      log_path = Path(tempdir) / "cube-pv-v01.log"
+      writer = job_log.JobLogWriter(log_path)
+      for i in range(10):
+        writer.write_line(f"line {i}")
+      writer.close()
+      self.assertTrue(job_log.get_backup_path(log_path, 1).exists())
+      self.assertTrue(job_log.get_backup_path(log_path, 2).exists())
+      self.assertFalse(job_log.get_backup_path(log_path, 3).exists())
+      reader = job_log.JobLogReader(log_path)
+      self.assertEqual(reader.read_page(0), "line 9\n")
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,84 @@
+"""Stable ids of the render jobs and the status of the finished jobs by their id.
+
+Every render job of a state has a unique id, which is kept when the job is edited or moved, so
+two rows with the same settings are still different jobs. Projects, which were saved before the
+ids existed, get ids derived from the row and the settings of their jobs, so a project gets the
+same ids every time it is loaded, e.g. to resume its run from the command line.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import hashlib
+import uuid
+
+from protos import state_pb2
+
+
+def new_job_id() -> str:
+  """Create the id of a new job."""
+  return uuid.uuid4().hex[:16]
+
+
+def get_settings_key(job: state_pb2.render_job) -> bytes:  # pylint: disable=no-member
+  """Get a hashable key, which is equal for jobs with the same settings, regardless of their id."""
+  job_copy = state_pb2.render_job()  # pylint: disable=no-member
+  job_copy.CopyFrom(job)
+  job_copy.id = ""
+  return job_copy.SerializeToString(deterministic=True)
+
+
+def assign_job_ids(jobs: list[state_pb2.render_job]) -> int:  # pylint: disable=no-member
+  """Give the jobs without an id or with the id of a previous job a unique id.
+
+  Returns:
+    The number of jobs, which got a new id.
+  """
+  seen_ids = set()
+  assigned_count = 0
+  for row, job in enumerate(jobs):
+    if not job.id or job.id in seen_ids:
+      digest = hashlib.sha256(f"{row}:{job.id}:".encode() + get_settings_key(job))
+      job.id = digest.hexdigest()[:16]
+      assigned_count += 1
+    seen_ids.add(job.id)
+  return assigned_count
+
+
+class JobStatusRegistry:
+  """The status of the finished jobs by their id.
+
+  A status only belongs to the job as it was rendered, so the owner of the registry has to discard
+  the status of a job, once it is edited.
+  """
+
+  def __init__(self) -> None:
+    """Initialize an empty registry."""
+    self._statuses = {}
+
+  def set(self, job: state_pb2.render_job, status: str) -> None:  # pylint: disable=no-member
+    """Store the status of a finished job."""
+    self._statuses[job.id] = status
+
+  def get(self, job: state_pb2.render_job) -> str | None:  # pylint: disable=no-member
+    """Get the status of a job, if it is finished."""
+    return self._statuses.get(job.id)
+
+  def discard(self, job: state_pb2.render_job) -> None:  # pylint: disable=no-member
+    """Forget the status of a job, e.g. because it was edited and has to be rendered again."""
+    self._statuses.pop(job.id, None)
+
+  def count(self, status: str) -> int:
+    """Get the number of jobs with a status."""
+    return sum(1 for job_status in self._statuses.values() if job_status == status)
+
+  def clear(self) -> None:
+    """Forget the status of all jobs."""
+    self._statuses.clear()
+
+  def __contains__(self, job: state_pb2.render_job) -> bool:  # pylint: disable=no-member
+    """Check if a job is finished."""
+    return job.id in self._statuses
+
+  def __len__(self) -> int:
+    """Get the number of finished jobs."""
+    return len(self._statuses)
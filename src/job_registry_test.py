@@ -0,0 +1,71 @@
+"""Unit tests for job_registry.py."""
+
+import unittest
+
+import job_registry
+from protos import state_pb2
+
+
+def make_job(
+  blend_file: str,
+  job_id: str = "",
+) -> state_pb2.render_job:  # pylint: disable=no-member
+  """Create a render job for testing."""
+  render_job = state_pb2.render_job()  # pylint: disable=no-member
+  render_job.id = job_id
+  render_job.file = blend_file
+  render_job.active = True
+  return render_job
+
+
+class TestJobRegistry(unittest.TestCase):
+  """Tests for the job_registry module."""
+
+  def test_assign_job_ids(self) -> None:
+    """Test that missing and repeated ids are replaced by ids, which are the same on every load."""
+    jobs = [make_job("a.blend"), make_job("a.blend"), make_job("b.blend", "kept")]
+    jobs.append(make_job("c.blend", "kept"))
+    self.assertEqual(job_registry.assign_job_ids(jobs), 3)
+    self.assertEqual(jobs[2].id, "kept")
+    self.assertEqual(len({job.id for job in jobs}), 4)
+
+    reloaded_jobs = [make_job("a.blend"), make_job("a.blend"), make_job("b.blend", "kept")]
+    reloaded_jobs.append(make_job("c.blend", "kept"))
+    job_registry.assign_job_ids(reloaded_jobs)
+    self.assertEqual([job.id for job in reloaded_jobs], [job.id for job in jobs])
+    self.assertEqual(job_registry.assign_job_ids(jobs), 0)
+
+  def test_get_settings_key(self) -> None:
+    """Test that duplicated jobs have the same settings key."""
+    self.assertEqual(
+      job_registry.get_settings_key(make_job("a.blend", "first")),
+      job_registry.get_settings_key(make_job("a.blend", "second")),
+    )
+    self.assertNotEqual(
+      job_registry.get_settings_key(make_job("a.blend", "first")),
+      job_registry.get_settings_key(make_job("b.blend", "first")),
+    )
+
+  def test_status_registry(self) -> None:
+    """Test that the status belongs to a job id and is kept until it is discarded."""
+    first_job = make_job("a.blend", "first")
+    second_job = make_job("a.blend", "second")
+    registry = job_registry.JobStatusRegistry()
+    registry.set(first_job, "finished")
+    self.assertEqual(registry.get(first_job), "finished")
+    self.assertNotIn(second_job, registry)
+
+    registry.set(second_job, "failed")
+    self.assertEqual(registry.count("failed"), 1)
+    self.assertEqual(len(registry), 2)
+
+    first_job.camera = "other"
+    self.assertEqual(registry.get(first_job), "finished")
+    registry.discard(first_job)
+    self.assertIsNone(registry.get(first_job))
+    registry.clear()
+    self.assertEqual(len(registry), 0)
+
+
+if __name__ == "__main__":
+  unittest.main()
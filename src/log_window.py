@@ -0,0 +1,64 @@
+"""Log viewer for RenderRob, which shows the log of a render job page by page."""
+
+from pathlib import Path
+
+from PySide6.QtGui import QIcon, QTextCursor
+
+import job_log
+from utils_rr import ui_utils
+
+
+class LogWindow:
+  """Log viewer for RenderRob.
+
+  Only the shown page of the log is read from the disk. The index of the log is used to find the
+  pages and to jump to the warnings and errors.
+  """
+
+  def __init__(self, log_path: Path) -> None:
+    """Open the log viewer on the last page of the log."""
+    self.reader = job_log.JobLogReader(log_path)
+    self.page = self.reader.page_count() - 1
+    self.window = ui_utils.load_ui_from_file("log.ui")
+    self.window.setWindowTitle(f"RenderRob Log {log_path.name}")
+    self.window.setWindowIcon(QIcon("icon/icon.ico"))
+    self.window.previous_button.clicked.connect(lambda: self.show_page(self.page - 1))
+    self.window.next_button.clicked.connect(lambda: self.show_page(self.page + 1))
+    self.window.problem_button.clicked.connect(self.show_next_problem)
+    self.window.refresh_button.clicked.connect(self.refresh)
+    self.show_page(self.page)
+    self.window.show()
+
+  def show_page(self, page: int) -> None:
+    """Read a page of the log and show it."""
+    self.page = min(max(page, 0), self.reader.page_count() - 1)
+    self.window.log_text.setPlainText(self.reader.read_page(self.page))
+    self.window.page_label.setText(f"Page {self.page + 1} of {self.reader.page_count()}")
+    self.window.previous_button.setEnabled(self.page > 0)
+    self.window.next_button.setEnabled(self.page < self.reader.page_count() - 1)
+
+  def refresh(self) -> None:
+    """Load the index again and show the last page, e.g. while the job is still rendering."""
+    self.reader.load_index()
+    self.show_page(self.reader.page_count() - 1)
+
+  def current_offset(self) -> int:
+    """Get the byte offset of the line with the cursor."""
+    cursor = self.window.log_text.textCursor()
+    text = self.window.log_text.toPlainText()[: cursor.block().position()]
+    return self.reader.page_offsets[self.page] + len(text.encode(errors="replace"))
+
+  def show_next_problem(self) -> None:
+    """Show the next warning or error after the cursor."""
+    offset = self.reader.next_problem_offset(self.current_offset())
+    if offset is None:
+      return
+    self.show_page(self.reader.page_of_offset(offset))
+    page_data = self.window.log_text.toPlainText().encode(errors="replace")
+    line_start = offset - self.reader.page_offsets[self.page]
+    position = len(page_data[:line_start].decode(errors="replace"))
+    cursor = self.window.log_text.textCursor()
+    cursor.setPosition(position)
+    cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+    self.window.log_text.setTextCursor(cursor)
+    self.window.log_text.ensureCursorVisible()
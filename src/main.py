@@ -1,38 +1,68 @@
 """Main file to open RenderRob."""
 
+import collections
+import functools
 import os
 import platform
 import subprocess
 import sys
+from collections.abc import Iterable
 from pathlib import Path
 
 sys.path.append(Path(__file__).parent.parent.as_posix())
 sys.path.append(Path(__file__).parent.parent.as_posix())
 
 
-from PySide6.QtCore import QCoreApplication, QProcess, Qt
-from PySide6.QtGui import QAction, QCloseEvent, QColor, QIcon, QTextCharFormat, QTextCursor
+from PySide6.QtCore import QCoreApplication, QModelIndex, QProcess, Qt, QTimer
+from PySide6.QtGui import QAction, QCloseEvent, QColor, QIcon, QTextCursor
 from PySide6.QtWidgets import (
   QApplication,
   QFileDialog,
   QMessageBox,
   QStackedLayout,
-  QTableWidgetItem,
   QWidget,
 )
 
+import blend_metadata
+import job_log
+import job_registry
+import log_window
+import preflight
+import render_scheduler
+import render_stats
+import run_journal
 import settings_window
 import shot_name_builder
 import state_saver
-from protos import cache_pb2, state_pb2
-from render_job_to_rss import render_job_to_render_settings_setter
+from protos import cache_pb2
+from render_job_to_rss import metadata_loader_command, render_job_to_blender_args
 from utils_common import print_utils
-from utils_rr import path_utils, placeholder_delegate, table_utils, ui_utils
+from utils_common.render_protocol import EVENT_FRAME_DONE, EVENTS_VARIABLE
+from utils_rr import (
+  blender_sync,
+  cell_delegates,
+  console_output,
+  file_watcher,
+  metadata_scanner,
+  path_utils,
+  placeholder_delegate,
+  table_utils,
+  ui_utils,
+)
 from utils_rr.dropwidget import DropWidget
+from utils_rr.render_job_model import (
+  CAMERA_COLUMN,
+  COLUMN_FIELDS,
+  FILE_COLUMN,
+  SCENE_COLUMN,
+  VIEW_LAYERS_COLUMN,
+  RenderJobModel,
+)
 
 MAX_NUMBER_OF_RECENT_FILES = 5
 
 UI_FILE_NAME = "window.ui"
+PROGRESS_FORMAT = "%p%"
 
 
 class MainWindow(QWidget):
@@ -57,18 +87,29 @@ class MainWindow(QWidget):
     super().__init__()
     self.window = None
     self.table = None
+    self.model = None
     self.cache = cache_pb2.RenderRobCache()  # pylint: disable=no-member
     self.state_saver = state_saver.StateSaver()
 
     self.recent_file_actions = None
-    self.process = None
+    self.processes = {}
+    self.console = None
+    self.file_watcher = None
+    self.blender_sync = None
+    self.metadata_scanner = None
+    self.log_window = None
     self.is_saved = True
-    self.recent_states = []
 
-    self.active_render_job = None
-    self.green_jobs = []
-    self.yellow_jobs = []
-    self.red_jobs = []
+    self.scheduler = render_scheduler.RenderScheduler(self.state_saver.state.settings)
+    self.stats_recorder = render_stats.StatsRecorder(render_stats.get_stats_path())
+    self.run_journal = None
+    # The status of the finished jobs, which colors their rows green, yellow or red.
+    self.job_statuses = job_registry.JobStatusRegistry()
+    # The blend files, which were added or changed since the table was colored, so their metadata
+    # is requested. None stands for all blend files. The watched folders only follow the blend
+    # files, once they changed.
+    self.unchecked_blend_files = None
+    self.watched_folders_outdated = True
 
     self.cache_path = self.get_temp_dir() / ".rr_cache"
 
@@ -89,11 +130,29 @@ class MainWindow(QWidget):
 
     self.window.setWindowIcon(QIcon("icon/icon-256.png"))
     self.app.setWindowIcon(QIcon("icon/icon-256.png"))
-    self.table = self.window.tableWidget
+    self.table = self.window.tableView
     self.table.setStyleSheet(
-      "QTableWidget {background-color: " + str(table_utils.COLORS["grey_light"]) + "}",
+      "QTableView {background-color: " + str(table_utils.COLORS["grey_light"]) + "}",
     )
+    self.model = RenderJobModel(self.state_saver.state, self.table)
+    self.table.setModel(self.model)
+    table_utils.setup_header(self.table)
     self.refresh_recent_files_menu()
+    self.console = console_output.ConsoleOutput(
+      self.window.textBrowser,
+      self.handle_worker_event,
+      self.scheduler_report_output,
+    )
+    # Continues the render once a failed task, which waits for its retry, is ready.
+    self.retry_timer = QTimer()
+    self.retry_timer.setSingleShot(True)
+    self.retry_timer.timeout.connect(self._continue_render)
+    self.file_watcher = file_watcher.FileWatcher(self.files_changed)
+    self.metadata_scanner = metadata_scanner.MetadataScanner(
+      blend_metadata.MetadataCache(blend_metadata.get_cache_path()),
+      self.set_table_colors,
+    )
+    self.blender_sync = blender_sync.BlenderSync(self.apply_synced_job, self.show_sync_progress)
     self.window.progressBar.setValue(0)
     self.window.progressBar.setMinimum(0)
     self.window.progressBar.setMaximum(100)
@@ -101,7 +160,14 @@ class MainWindow(QWidget):
     layout.addWidget(self.window)
     self.setLayout(layout)
     self.make_main_window_connections()
-    placeholder_delegate.setup_placeholder_delegate(self.table)
+    placeholder_delegate.setup_placeholder_delegate(
+      self.table,
+      {
+        column: functools.partial(self.get_completions, column)
+        for column in (CAMERA_COLUMN, SCENE_COLUMN, VIEW_LAYERS_COLUMN)
+      },
+    )
+    cell_delegates.setup_cell_delegates(self.table)
 
   def execute(self) -> None:
     """Execute the main window.
@@ -138,6 +204,11 @@ class MainWindow(QWidget):
 
   def quit(self) -> None:
     """Quit the application."""
+    self.blender_sync.cancel_all()
+    self.metadata_scanner.cancel_all()
+    self.stats_recorder.close()
+    if self.run_journal:
+      self.run_journal.close()
     self.save_cache()
     QCoreApplication.quit()
 
@@ -174,6 +245,9 @@ class MainWindow(QWidget):
 
     self.window.actionCopy_cell.triggered.connect(self.copy_from_cell)
     self.window.actionPaste_cell.triggered.connect(self.paste_into_cell)
+    self.window.actionShow_log.triggered.connect(self.open_log_window)
+    self.window.actionShow_history.triggered.connect(self.show_render_history)
+    self.window.actionResume_render.triggered.connect(self.resume_render)
 
     self.window.render_button.clicked.connect(self.start_render)
     self.window.stop_button.clicked.connect(self.stop_render)
@@ -183,19 +257,26 @@ class MainWindow(QWidget):
     self.window.actionSettings.triggered.connect(self.open_settings_window)
     self.window.actionNew.triggered.connect(self.new_file)
     self.window.actionQuit.triggered.connect(self.quit)
-    self.table.itemChanged.connect(self.before_and_after_table_change)
+    self.model.job_about_to_change.connect(lambda _row: self.before_table_change())
+    self.model.job_changed.connect(self.after_table_change)
+    self.model.dataChanged.connect(self.jobs_edited)
+    self.model.rowsInserted.connect(
+      lambda _parent, first, last: self.blend_files_changed(range(first, last + 1)),
+    )
+    self.model.rowsRemoved.connect(lambda *_: self.blend_files_changed(range(0)))
+    self.model.modelReset.connect(self.blend_files_changed)
     self.window.blender_button.clicked.connect(self.open_blender_file)
     self.window.duplicate_button.clicked.connect(
       lambda: table_utils.duplicate_row(
         self.table,
-        self.state_saver,
         self.before_table_change,
         self.after_table_change,
       ),
     )
     self.window.actionUndo.triggered.connect(self.undo)
+    self.window.actionRedo.triggered.connect(self.redo)
     self.window.sync_button.clicked.connect(self.load_settings_from_blender)
-    ui_utils.TABLE_CHANGED_FUNCTION = self.before_and_after_table_change
+    self.window.actionCancel_syncs.triggered.connect(self.blender_sync.cancel_all)
 
   ######## CACHE UTILS ##########
   def save_cache(self) -> None:
@@ -220,7 +301,6 @@ class MainWindow(QWidget):
 
   def save_as_file(self) -> None:
     """Save the state to a serialized proto file with a dialog."""
-    self.state_saver.table_to_state(self.table)
     file_name, _ = QFileDialog.getSaveFileName(
       self.window,
       "Save File",
@@ -236,7 +316,6 @@ class MainWindow(QWidget):
 
   def save_file(self) -> None:
     """Save the state to a serialized proto file without a dialog."""
-    self.state_saver.table_to_state(self.table)
     Path(self.cache.current_file).write_bytes(self.state_saver.state.SerializeToString())
     self.is_saved = True
     self.window.parent().setWindowTitle("Render Rob " + self.cache.current_file)
@@ -246,16 +325,14 @@ class MainWindow(QWidget):
     self.window.parent().setWindowTitle("* Render Rob")
     if not self.ask_for_save():
       return
-    for _ in range(self.table.rowCount()):
-      self.table.removeRow(0)
     self.cache.current_file = ""
-    self.state_saver.state.FromString(b"")
+    del self.state_saver.state.render_jobs[:]
+    self.model.reset()
     self.state_saver.parent_widget = self
-    self.recent_states = [b""]
     self.window.render_button.setEnabled(True)
     self.window.stop_button.setEnabled(False)
-    table_utils.post_process_row(self.table, 0)
     table_utils.add_row_below(self.table)
+    self.model.history.clear()
 
   def clear_recent_files(self) -> None:
     """Clear the recent files."""
@@ -299,25 +376,21 @@ class MainWindow(QWidget):
 
   def open_file(self, file_name: str, ask_for_save: bool = True) -> None:
     """Open a RenderRob file."""
-    self.green_jobs = []
-    self.yellow_jobs = []
-    self.red_jobs = []
+    self.job_statuses.clear()
     if ask_for_save and not self.ask_for_save():
       return
     if file_name == "":
       return
-    self.table.blockSignals(True)
     self.state_saver.state.ParseFromString(Path(file_name).read_bytes())
-    self.state_saver.state_to_table(self.table)
+    job_registry.assign_job_ids(self.state_saver.state.render_jobs)
+    self.model.reset()
     self.cache.current_file = file_name
     self.window.parent().setWindowTitle("Render Rob " + file_name)
     self.add_filepath_to_cache(file_name)
     self.cache.recent_files.remove(file_name)
     self.cache.recent_files.insert(0, file_name)
     self.refresh_recent_files_menu()
-    self.recent_states = [self.state_saver.state.SerializeToString()]
     self.after_table_change()
-    self.table.blockSignals(False)
 
   def ask_for_save(self) -> bool:
     """Ask the user to save the current file. Returns True if the user wants to continue."""
@@ -340,166 +413,237 @@ class MainWindow(QWidget):
     return None
 
   ######### CONSOLE WINDOW ###########
-  def _handle_output(self):
-    """Output the subprocess output to the textbrowser widget."""
-    self.table.blockSignals(True)
-    data = self.process.readAll()
-    output = data.data().decode()
-    color_format = QTextCharFormat()
-    if "\u001b" in output:
-      for line in output.splitlines():
-        back_color = print_utils.BASH_COLORS
-        info = back_color["BACK_CYAN"] + " " + back_color["FORE_BLACK"]
-        warning = back_color["BACK_YELLOW"] + " " + back_color["FORE_BLACK"]
-        error = back_color["BACK_RED"] + " " + back_color["FORE_WHITE"]
-        reset = back_color["RESET_ALL"]
-        if line.startswith(reset):
-          line = line.replace(reset, "")
-          color_format.setBackground(QColor(table_utils.COLORS["grey_light"]))
-          color_format.setForeground(QColor(table_utils.COLORS["grey_light"]))
-        if line.startswith(info):
-          line = line.replace(info, "")
-          color_format.setBackground(QColor(table_utils.COLORS["blue_grey_lighter"]))
-          color_format.setForeground(QColor(Qt.black))
-        if line.startswith(warning):
-          line = line.replace(warning, "")
-          color_format.setBackground(QColor(table_utils.COLORS["yellow"]))
-          color_format.setForeground(QColor(Qt.black))
-
-          self.state_saver.table_to_state(self.table)
-          row_number = state_saver.find_job(
-            self.state_saver.state.render_jobs,
-            self.active_render_job,
-          )
-
-          table_utils.color_row_background(
-            self.table,
-            row_number,
-            QColor(table_utils.COLORS["yellow"]),
-          )
-        if line.startswith(error) or "blender.crash.txt" in line:
-          line = line.replace(error, "")
-          color_format.setBackground(QColor(table_utils.COLORS["red"]))
-          color_format.setForeground(QColor(table_utils.COLORS["grey_light"]))
-
-          self.state_saver.table_to_state(self.table)
-          row_number = state_saver.find_job(
-            self.state_saver.state.render_jobs,
-            self.active_render_job,
-          )
+  def _handle_output(self, worker_id: int) -> None:
+    """Pass the subprocess output of a worker to the console."""
+    if worker_id not in self.processes or worker_id not in self.scheduler.running_tasks:
+      return
+    task = self.scheduler.running_tasks[worker_id]
+    data = self.processes[worker_id].readAll()
+    self.console.append(worker_id, f"[Job {task.job_index + 1}] ", data.data())
 
-          table_utils.color_row_background(
-            self.table,
-            row_number,
-            QColor(table_utils.COLORS["red"]),
-          )
+  def scheduler_report_output(self, worker_id: int, line: str) -> None:
+    """Pass a line of the output of a worker to the scheduler to classify failures."""
+    self.scheduler.report_output(worker_id, line)
 
-          # Only scroll down if user is at bottom.
-        if (
-          self.window.textBrowser.verticalScrollBar().value()
-          > (self.window.textBrowser.verticalScrollBar().maximum()) - 1500
-        ):
-          self.window.textBrowser.moveCursor(QTextCursor.End)
-        self.window.textBrowser.setCurrentCharFormat(color_format)
-        self.window.textBrowser.insertPlainText(line.replace(reset, "") + "\n")
-
-        if line.endswith(reset):
-          line = line.replace(reset, "")
-          color_format.setBackground(QColor(52, 80, 100))
-          color_format.setForeground(QColor(table_utils.COLORS["grey_light"]))
+  def handle_worker_event(self, worker_id: int, event: dict) -> None:
+    """Pass an event of a worker to the scheduler and color the row if the status got worse."""
+    if worker_id not in self.processes:
+      return
+    status = self.scheduler.report_event(worker_id, event)
+    if status:
+      self.color_worker_status(worker_id, status)
+    if event["type"] == EVENT_FRAME_DONE:
+      self.show_render_progress()
+
+  def show_render_progress(self) -> None:
+    """Show the share of rendered frames and the estimated time left in the progress bar."""
+    self.window.progressBar.setValue(int(self.scheduler.progress()))
+    eta_seconds = self.scheduler.eta_seconds()
+    if eta_seconds is None:
+      self.window.progressBar.setFormat(PROGRESS_FORMAT)
     else:
-      # Only scroll down if user is at bottom.
-      if (
-        self.window.textBrowser.verticalScrollBar().value()
-        > (self.window.textBrowser.verticalScrollBar().maximum()) - 1500
-      ):
-        self.window.textBrowser.moveCursor(QTextCursor.End)
-      self.window.textBrowser.setCurrentCharFormat(color_format)
-      self.window.textBrowser.insertPlainText(output)
-
-    # Find a more elegant way to do this.
-    if "Blender quit" in output:
-      self.window.textBrowser.moveCursor(QTextCursor.End)
-
-    if "blender.crash.txt" in output:
-      self.window.textBrowser.moveCursor(QTextCursor.End)
+      self.window.progressBar.setFormat(
+        f"{PROGRESS_FORMAT}  ({render_scheduler.format_duration(eta_seconds)} left)",
+      )
 
-    self.table.blockSignals(False)
+  def color_worker_status(self, worker_id: int, status: str) -> None:
+    """Color the row of a worker, which reported a warning or an error."""
+    if worker_id not in self.scheduler.running_tasks:
+      return
+    task = self.scheduler.running_tasks[worker_id]
+    row_number = self.model.find_row(task.job.id)
+    if row_number == -1:
+      return
+    color = "red" if status == render_scheduler.STATUS_FAILED else "yellow"
+    table_utils.color_row_background(self.model, row_number, QColor(table_utils.COLORS[color]))
 
   ##### STATE OPS #####
   def undo(self) -> None:
     """Undo the last action."""
-    if not self.recent_states:
-      return
-    self.state_saver.state.ParseFromString(self.recent_states.pop())
-    # Refactor: The blockSignals could be done as a context manager on the top level operator
-    # methods.
-    self.table.blockSignals(True)
-    self.state_saver.state_to_table(self.table)
-    self.table.blockSignals(False)
-
-  def before_table_change(self) -> None:
-    """Handle before table change."""
+    if self.model.history.undo(self.model):
+      self.mark_unsaved()
+      self.set_table_colors()
+
+  def redo(self) -> None:
+    """Redo the last undone action."""
+    if self.model.history.redo(self.model):
+      self.mark_unsaved()
+      self.set_table_colors()
+
+  def mark_unsaved(self) -> None:
+    """Show that the file has unsaved changes."""
     self.is_saved = False
     self.window.parent().setWindowTitle("* Render Rob" + self.cache.current_file)
 
-    self.state_saver.table_to_state(self.table)
-    state_string = self.state_saver.state.SerializeToString()
-    if not self.recent_states or self.recent_states[-1] != state_string:
-      self.recent_states.append(state_string)
-
-  def after_table_change(self, item: QTableWidgetItem | None = None) -> None:
-    """Handle after table change."""
-    self.state_saver.table_to_state(self.table)
-    if item and isinstance(item, QTableWidgetItem) and item.column() == 1:
-      table_utils.fix_active_row_path(item, self.state_saver.state.settings.blender_files_path)
-    self.table.blockSignals(True)
+  def before_table_change(self) -> None:
+    """Handle before table change.
+
+    All changes until the next after_table_change are undone together.
+    """
+    self.mark_unsaved()
+    self.model.history.begin_group()
+
+  def after_table_change(self, row: int | None = None, column: int | None = None) -> None:
+    """Handle after table change.
+
+    Args:
+      row: The edited row. Without a row, rows might have been added, removed or moved.
+      column: The edited column.
+    """
+    if row is not None and column == FILE_COLUMN:
+      path = table_utils.fix_path(
+        self.model.job(row).file,
+        self.state_saver.state.settings.blender_files_path,
+      )
+      self.model.set_value(row, FILE_COLUMN, path)
+    self.model.history.end_group()
     self.set_table_colors()
-    self.table.blockSignals(False)
 
-  def before_and_after_table_change(self, item: QTableWidgetItem | None = None) -> None:
-    """Handle before and after table change."""
-    self.before_table_change()
-    self.after_table_change(item)
+  def jobs_edited(
+    self,
+    top_left: QModelIndex,
+    bottom_right: QModelIndex,
+    roles: list[int] | None = None,
+  ) -> None:
+    """Forget the status and the queued tasks of edited jobs, so they are rendered again.
+
+    This also covers the values, which are changed by undo and redo.
+    """
+    if roles and Qt.BackgroundRole in roles:
+      return
+    rows = range(top_left.row(), bottom_right.row() + 1)
+    for row in rows:
+      job = self.model.job(row)
+      self.job_statuses.discard(job)
+      self.scheduler.forget_job(render_scheduler.get_job_key(job))
+    if top_left.column() <= FILE_COLUMN <= bottom_right.column():
+      self.blend_files_changed(rows)
+
+  def blend_files_changed(self, rows: Iterable[int] | None = None) -> None:
+    """Check the blend files of rows, or of all rows, the next time the table is colored."""
+    self.watched_folders_outdated = True
+    if rows is None:
+      self.unchecked_blend_files = None
+      return
+    if self.unchecked_blend_files is None:
+      return
+    blender_files_path = self.state_saver.state.settings.blender_files_path
+    for row in rows:
+      blend_file = self.model.job(row).file
+      if blend_file:
+        self.unchecked_blend_files.add(
+          path_utils.get_abs_blend_path(blend_file, blender_files_path),
+        )
 
   ########### MAIN WINDOW OPS #############
   def open_settings_window(self) -> None:
     """Open the settings window."""
-    self.is_saved = False
-    self.window.parent().setWindowTitle("* Render Rob" + self.cache.current_file)
+    self.mark_unsaved()
     settings_window.SettingsWindow(self.state_saver.state)
+    # The watched folders and the Blender, which scans the blend files, follow the settings.
+    self.files_changed()
+
+  def get_journal_path(self) -> Path:
+    """Get the path of the run journal of the current file."""
+    if self.cache.current_file:
+      return run_journal.get_journal_path(self.cache.current_file)
+    return run_journal.get_journal_path(self.get_temp_dir() / "untitled.rrp")
 
   def start_render(self) -> None:
     """Render operator called by the Render button."""
-    self.green_jobs = []
-    self.yellow_jobs = []
-    self.red_jobs = []
-    self.active_render_job = None
+    self.start_run(resume=False)
+
+  def resume_render(self) -> None:
+    """Continue the interrupted render of the current file without the jobs it already rendered."""
+    if not self.window.render_button.isEnabled():
+      return
+    self.start_run(resume=True)
+
+  def start_run(self, resume: bool) -> None:
+    """Render all active jobs and record the run in the journal of the current file.
+
+    Args:
+      resume: Whether to take over the status of the jobs, which the interrupted run in the
+        journal already rendered.
+    """
+    self.job_statuses.clear()
+    self.scheduler = render_scheduler.RenderScheduler(self.state_saver.state.settings)
+    self.stats_recorder.clear()
+    if self.run_journal:
+      self.run_journal.close()
+    self.run_journal = run_journal.RunJournal(self.get_journal_path())
+    statuses = run_journal.get_interrupted_run(self.run_journal.path) if resume else None
+    if resume and statuses is None:
+      print_utils.print_info("There is no interrupted run to resume, so all jobs are rendered.")
+    self.run_journal.start_run(resume=statuses is not None)
+    if statuses:
+      self.replay_statuses(statuses)
+    self.skip_invalid_jobs()
+    jobs = self.state_saver.state.render_jobs
+    expected_seconds = self.stats_recorder.predict(
+      [job for job in jobs if job.active and job not in self.job_statuses],
+      self.state_saver.state.settings,
+    )
+    self.scheduler.set_expected_seconds(jobs, expected_seconds)
     self.window.progressBar.setValue(0)
+    self.window.progressBar.setFormat(PROGRESS_FORMAT)
     self.window.render_button.setEnabled(False)
     self.window.stop_button.setEnabled(True)
-    self.state_saver.table_to_state(self.table)
-    self._continue_render(0)
-    self.table.blockSignals(False)
+    self._continue_render()
+
+  def replay_statuses(self, statuses: dict[str, str]) -> None:
+    """Mark the jobs, which the interrupted run already rendered, with their status."""
+    for job in self.state_saver.state.render_jobs:
+      status = statuses.get(run_journal.get_job_id(job))
+      if job.active and status in render_scheduler.STATUS_SEVERITY:
+        self.job_statuses.set(job, status)
+    print_utils.print_info(
+      f"Resuming the run, which already rendered {len(self.job_statuses)} jobs.",
+    )
+
+  def skip_invalid_jobs(self) -> None:
+    """Check all active jobs before rendering and mark the ones, which can't be rendered, as failed.
+
+    The jobs are checked against the known metadata of their blend files, so a broken job doesn't
+    cost a launch of Blender. Files, which weren't scanned yet, are looked up in the cache.
+    """
+    report = preflight.validate_jobs(self.state_saver.state, self.metadata_scanner.lookup)
+    for row in list(report):
+      job = self.state_saver.state.render_jobs[row]
+      if job in self.job_statuses:
+        del report[row]
+        continue
+      self.job_statuses.set(job, render_scheduler.STATUS_FAILED)
+    for line in preflight.format_report(report):
+      print_utils.print_error_no_exit(line)
+    if report:
+      self.window.statusbar.showMessage(f"Skipped {len(report)} job(s), which can't be rendered.")
 
   def stop_render(self) -> None:
     """Interrupt the render operator."""
-    if self.process:
-      self.process.kill()
+    self.window.stop_button.setEnabled(False)
+    self.retry_timer.stop()
+    # The run can be resumed later.
+    if self.run_journal:
+      self.run_journal.close()
+    for process in self.processes.values():
+      process.kill()
+    self.processes = {}
+    self.console.flush()
+    self.console.clear_workers()
+    self.scheduler.clear()
+    self.stats_recorder.clear()
     self.window.progressBar.setValue(0)
+    self.window.progressBar.setFormat(PROGRESS_FORMAT)
     print_utils.print_info("Render stopped.")
-    self.active_render_job = None
-    self.window.stop_button.setEnabled(False)
     self.window.render_button.setEnabled(True)
     self.window.textBrowser.moveCursor(QTextCursor.End)
 
     self.set_table_colors()
-    self.table.blockSignals(False)
 
   def play_job(self) -> int:
     """Open a job in image viewer or Blender Player."""
-    self.state_saver.table_to_state(self.table)
-    current_row = self.table.currentRow()
+    current_row = self.table.currentIndex().row()
     snb = shot_name_builder.ShotNameBuilder(
       self.state_saver.state.render_jobs[current_row],
       self.state_saver.state.settings.output_path,
@@ -519,17 +663,17 @@ class MainWindow(QWidget):
       )
       == "STILL"
     ):
-      if not Path(filepath).exists():
+      if not path_utils.path_exists(filepath, max_age=0):
         QMessageBox.warning(self, "Warning", "The output does not yet exist.", QMessageBox.Ok)
         return
       if platform.system() == "Darwin":  # macOS
-        subprocess.call(("open", filepath))
+        QProcess.startDetached("open", [filepath])
       elif platform.system() == "Windows":  # Windows
         os.startfile(filepath)
       else:  # Linux variants
-        subprocess.call(("xdg-open", filepath))
+        QProcess.startDetached("xdg-open", [filepath])
     else:
-      if not os.path.exists(filepath):
+      if not path_utils.path_exists(filepath, max_age=0):
         QMessageBox.warning(self, "Warning", "The output does not yet exist.", QMessageBox.Ok)
       if self.state_saver.state.settings.preview.frame_step_use:
         frame_step = self.state_saver.state.settings.preview.frame_step
@@ -563,8 +707,7 @@ class MainWindow(QWidget):
 
   def open_output_folder(self) -> None:
     """Open the output folder of the currently selected job."""
-    self.state_saver.table_to_state(self.table)
-    current_row = self.table.currentRow()
+    current_row = self.table.currentIndex().row()
     if current_row == -1:
       return
     snb = shot_name_builder.ShotNameBuilder(
@@ -580,20 +723,58 @@ class MainWindow(QWidget):
         self.state_saver.state.render_jobs[current_row].start.zfill(4),
       )
     folder_path = Path(filepath).parent
-    if not folder_path.exists():
+    if not path_utils.path_exists(folder_path, max_age=0):
       QMessageBox.warning(self, "Warning", "The output folder does not yet exist.", QMessageBox.Ok)
       return
     if platform.system() == "Darwin":  # macOS
-      subprocess.call(("open", folder_path))
+      QProcess.startDetached("open", [str(folder_path)])
     elif platform.system() == "Windows":  # Windows
       os.startfile(folder_path)  # noqa: S606
     else:  # Linux variants
-      subprocess.call(("xdg-open", folder_path))
+      QProcess.startDetached("xdg-open", [str(folder_path)])
+
+  def open_log_window(self) -> None:
+    """Open the log of the currently selected job."""
+    current_row = self.table.currentIndex().row()
+    if current_row == -1:
+      return
+    snb = shot_name_builder.ShotNameBuilder(
+      self.state_saver.state.render_jobs[current_row],
+      self.state_saver.state.settings.output_path,
+      is_replay_mode=True,
+    )
+    log_path = job_log.get_log_path(snb.frame_path)
+    if not log_path.exists():
+      QMessageBox.warning(self, "Warning", "The job has no log yet.", QMessageBox.Ok)
+      return
+    self.log_window = log_window.LogWindow(log_path)
+
+  def show_render_history(self) -> None:
+    """Show the previous renders of the currently selected job."""
+    current_row = self.table.currentIndex().row()
+    if current_row == -1:
+      return
+    job = self.state_saver.state.render_jobs[current_row]
+    settings = self.state_saver.state.settings
+    shot_name = render_stats.get_shot_name(job, settings)
+    database = self.stats_recorder.database
+    history = database.get_history(shot_name)
+    if not history:
+      QMessageBox.information(self, "Render History", "The job was not rendered yet.")
+      return
+    lines = render_stats.format_history(history)
+    expected_seconds = database.get_expected_seconds(
+      shot_name,
+      render_stats.get_settings_hash(job, settings),
+    )
+    if expected_seconds is not None:
+      expected_time = render_scheduler.format_duration(expected_seconds)
+      lines.insert(0, f"Expected render time with the current settings: {expected_time}\n")
+    QMessageBox.information(self, f"Render History of {shot_name}", "\n".join(lines))
 
   def open_blender_file(self) -> None:
     """Open the currently selected Blender file."""
-    self.state_saver.table_to_state(self.table)
-    current_row = self.table.currentRow()
+    current_row = self.table.currentIndex().row()
     if not self.state_saver.state.settings.blender_path:
       error_message = "The Blender path is not set."
       print_utils.print_error_no_exit(error_message)
@@ -603,31 +784,50 @@ class MainWindow(QWidget):
       self.state_saver.state.render_jobs[current_row].file,
       self.state_saver.state.settings.blender_files_path,
     )
-    if not Path(filepath).exists():
+    if not path_utils.path_exists(filepath, max_age=0):
       QMessageBox.warning(self, "Warning", "The .blend file does not exist.", QMessageBox.Ok)
       return
     # Launch Blender with the file.
     subprocess.Popen([self.state_saver.state.settings.blender_path, filepath])
 
   def load_settings_from_blender(self) -> None:
-    """Opens Blender and syncs the settings."""
-    self.table.blockSignals(True)
-    self.before_table_change()
+    """Start syncs of the settings of the selected jobs in Blender.
 
-    job_index = self.table.currentRow()
-    job = self.state_saver.state.render_jobs.pop(job_index)
+    The jobs are grouped by their blend files, so every file is opened only once. A job is
+    replaced as soon as Blender reports its settings.
+    """
+    rows = sorted({index.row() for index in self.table.selectionModel().selectedIndexes()})
+    if not rows and self.table.currentIndex().row() != -1:
+      rows = [self.table.currentIndex().row()]
+    if not rows:
+      return
 
     if not self.state_saver.state.settings.blender_path:
       error_message = "The Blender path is not set."
       print_utils.print_error_no_exit(error_message)
       QMessageBox.warning(self, "Warning", error_message, QMessageBox.Ok)
-    filepath = path_utils.get_abs_blend_path(
-      job.file,
-      self.state_saver.state.settings.blender_files_path,
-    )
-    if filepath == "" or not Path(filepath).exists():
-      QMessageBox.warning(self, "Warning", "The .blend file does not exist.", QMessageBox.Ok)
       return
+    requests_by_file = collections.defaultdict(list)
+    missing_files = set()
+    for row in rows:
+      job = self.model.job(row)
+      filepath = path_utils.get_abs_blend_path(
+        job.file,
+        self.state_saver.state.settings.blender_files_path,
+      )
+      if job.file == "" or not path_utils.path_exists(filepath, max_age=0):
+        missing_files.add(job.file)
+        continue
+      requests_by_file[filepath].append(
+        blender_sync.SyncRequest(render_scheduler.get_job_key(job), job.scene, job.camera),
+      )
+    if missing_files:
+      QMessageBox.warning(
+        self,
+        "Warning",
+        "The .blend file does not exist: " + ", ".join(sorted(missing_files)),
+        QMessageBox.Ok,
+      )
 
     if Path("../Resources").exists():
       cwd = Path("../Resources").resolve()
@@ -642,186 +842,279 @@ class MainWindow(QWidget):
       "from utils_bpy import settings_loader",
     ]
     python_command = " ; ".join(python_command)
-    blender_args = ["-b", filepath, "-y", "--factory-startup", "--python-expr", python_command]
-    QApplication.setOverrideCursor(Qt.WaitCursor)
-    subprocess.run([self.state_saver.state.settings.blender_path, *blender_args], check=True)
-    QApplication.restoreOverrideCursor()
-    loaded_job = self.state_saver.load_job_from_json(".sync.json")
-    print_utils.print_info("Settings loaded from Blender.")
-    self.state_saver.state.render_jobs.insert(job_index, loaded_job)
-    self.state_saver.state_to_table(self.table)
+    for filepath, requests in requests_by_file.items():
+      blender_args = ["-b", filepath, "-y", "--factory-startup", "--python-expr", python_command]
+      self.blender_sync.start(
+        Path(filepath).name,
+        self.state_saver.state.settings.blender_path,
+        blender_args,
+        requests,
+      )
 
-    self.after_table_change(self.table.item(job_index, 1))
-    self.table.blockSignals(False)
+  def apply_synced_job(self, job_key: str, settings: dict | None) -> None:
+    """Replace a synced job with its settings from Blender."""
+    if settings is None:
+      return
+    job_index = self.model.find_row(job_key)
+    if job_index == -1:
+      print_utils.print_warning("The synced job was removed in the meantime.")
+      return
+    loaded_job = self.state_saver.load_job_from_dict(settings)
+    loaded_job.id = self.state_saver.state.render_jobs[job_index].id
+    print_utils.print_info("Settings loaded from Blender.")
+    self.before_table_change()
+    self.model.removeRows(job_index, 1)
+    self.model.insert_job(job_index, loaded_job)
+    self.after_table_change(job_index, FILE_COLUMN)
+
+  def show_sync_progress(self, finished_count: int, started_count: int) -> None:
+    """Show the progress of the running syncs in the status bar."""
+    running = finished_count < started_count
+    self.window.actionCancel_syncs.setEnabled(running)
+    if running:
+      self.window.statusbar.showMessage(
+        f"Syncing settings from Blender: {finished_count} of {started_count} finished",
+      )
+    else:
+      self.window.statusbar.clearMessage()
 
   ######### MAIN WINDOW UTILS ###########
-  def _continue_render(self, exit_code: int) -> None:
-    self.table.blockSignals(True)
+  def _finish_worker(
+    self,
+    worker_id: int,
+    exit_code: int,
+    exit_status: QProcess.ExitStatus = QProcess.NormalExit,
+  ) -> None:
+    """Handle a finished Blender worker and store its job in the correct list."""
+    # The processes were killed if the stop button was pressed.
+    if worker_id not in self.processes:
+      return
+    self._handle_output(worker_id)
+    self.console.finish_worker(worker_id)
+    self.processes.pop(worker_id)
+    crashed = exit_status == QProcess.CrashExit
+    if crashed:
+      status = render_scheduler.STATUS_FAILED
+    else:
+      status = render_scheduler.status_from_exit_code(exit_code)
+    task, job_status = self.scheduler.finish_task(worker_id, status, exit_code, crashed)
+    self.stats_recorder.record_task(task, job_status, self.state_saver.state.settings)
+    if job_status and self.run_journal:
+      self.run_journal.job_finished(task.job, task.job_index, job_status)
+    if task.retry_delay is not None:
+      print_utils.print_warning(render_scheduler.format_retry(task, self.scheduler.retry_policy))
+
+    # A job, which was edited while it rendered, gets no status, so it is rendered again.
+    row = self.model.find_row(task.job.id)
+    if job_status and row != -1 and self.model.job(row) == task.job:
+      self.job_statuses.set(task.job, job_status)
+    self._continue_render()
+
+  def _continue_render(self) -> None:
+    """Start render jobs on all free workers."""
     print_utils.print_info("Continuing render.")
     # Stop the process if the stop button was pressed.
     if not self.window.stop_button.isEnabled():
       return
 
-    # Handle the previous render job and store it in the correct list.
-    if self.active_render_job:
-      if exit_code in (0, 1):
-        self.green_jobs.append(self.active_render_job)
-      elif exit_code == 987:
-        self.yellow_jobs.append(self.active_render_job)
-      elif exit_code in (62097, 11):
-        self.red_jobs.append(self.active_render_job)
-      else:
-        msg = f"Exit code {exit_code} not recognized."
-        raise ValueError(msg)
-
-    self.active_render_job = None
-
-    self.state_saver.table_to_state(self.table)
-
-    # Get the next render job.
-    for job in self.state_saver.state.render_jobs:
-      if job in self.green_jobs or job in self.yellow_jobs or job in self.red_jobs:
-        continue
-      if not job.active:
-        continue
-      self.active_render_job = job
-      break
+    # Feed the ready queue from the table, so changes during rendering are taken into account.
+    complete_jobs = self.scheduler.update_ready_queue(
+      self.state_saver.state.render_jobs,
+      self.job_statuses,
+    )
+    for job_index in complete_jobs:
+      job = self.state_saver.state.render_jobs[job_index]
+      self.job_statuses.set(job, render_scheduler.STATUS_FINISHED)
+      print_utils.print_info(f"All frames of job {job_index + 1} are already rendered.")
+      if self.run_journal:
+        self.run_journal.job_finished(job, job_index, render_scheduler.STATUS_FINISHED)
+    for task in self.scheduler.start_next_tasks():
+      self.render_task(task)
     self.set_table_colors()
+    retry_seconds = self.scheduler.seconds_until_ready()
+    if retry_seconds is not None:
+      self.retry_timer.start(int(retry_seconds * 1000) + 1)
 
-    if not self.active_render_job:
+    if self.scheduler.is_done():
       print_utils.print_info("No more render jobs left.")
+      if self.run_journal:
+        self.run_journal.end_run()
       self.window.progressBar.setValue(100)
+      self.window.progressBar.setFormat(PROGRESS_FORMAT)
       self.window.render_button.setEnabled(True)
       self.window.stop_button.setEnabled(False)
     else:
-      all_jobs_count = len([x for x in self.state_saver.state.render_jobs if x.active])
-      done_jobs_count = len(self.green_jobs) + len(self.yellow_jobs) + len(self.red_jobs)
-      self.window.progressBar.setValue(100 * done_jobs_count / all_jobs_count)
-      if self.active_render_job.active:
-        self.render_job(self.active_render_job)
+      self.show_render_progress()
     self.window.textBrowser.moveCursor(QTextCursor.End)
-    self.blockSignals(False)
 
   def set_table_colors(self):
-    """Set the colors of the table."""
-    self.table.blockSignals(True)
-    active_job_index = state_saver.find_job(
-      self.state_saver.state.render_jobs,
-      self.active_render_job,
-    )
-    for i, job in enumerate(self.state_saver.state.render_jobs):
-      if job in self.green_jobs:
-        table_utils.color_row_background(self.table, i, QColor(table_utils.COLORS["green"]))
-      elif job in self.yellow_jobs:
-        table_utils.color_row_background(self.table, i, QColor(table_utils.COLORS["yellow"]))
-      elif job in self.red_jobs:
-        table_utils.color_row_background(self.table, i, QColor(table_utils.COLORS["red"]))
+    """Set the colors of the table.
+
+    Jobs with the same settings are found by the settings keys, which the model caches until a row
+    is edited. The status of the finished jobs is looked up by their id. Only rows, whose colors
+    changed, are repainted. The existence of the blend files is looked up
+    in the cache of the file watcher. Scenes, cameras and view layers, which don't exist in the
+    blend file, are colored once the metadata of the file is known. Only the metadata of added or
+    changed blend files is requested.
+    """
+    if self.watched_folders_outdated:
+      self.file_watcher.watch_state(self.state_saver.state)
+      self.watched_folders_outdated = False
+    else:
+      self.file_watcher.watch_missing_directories()
+    settings = self.state_saver.state.settings
+    colors = {name: QColor(value) for name, value in table_utils.COLORS.items()}
+    jobs = self.state_saver.state.render_jobs
+    settings_keys = [self.model.get_settings_key(row) for row in range(len(jobs))]
+    key_counts = collections.Counter(settings_keys)
+    status_colors = {
+      render_scheduler.STATUS_FINISHED: colors["green"],
+      render_scheduler.STATUS_WARNING: colors["yellow"],
+      render_scheduler.STATUS_FAILED: colors["red"],
+    }
+    # Color the active jobs if a render process is active.
+    running_keys = set()
+    if self.window.stop_button.isEnabled():
+      running_keys = {task.job_key for task in self.scheduler.running_tasks.values()}
+    blender_files_path = Path(settings.blender_files_path)
+    abs_blend_paths = [
+      path_utils.get_abs_blend_path(job.file, settings.blender_files_path) for job in jobs
+    ]
+    if self.unchecked_blend_files is None:
+      unchecked_blend_files = [path for job, path in zip(jobs, abs_blend_paths) if job.file]
+    else:
+      unchecked_blend_files = sorted(self.unchecked_blend_files)
+    self.unchecked_blend_files = set()
+    if unchecked_blend_files:
+      self.metadata_scanner.request(
+        unchecked_blend_files,
+        settings.blender_path,
+        ["-b", "--factory-startup", "--python-expr", metadata_loader_command()],
+      )
+
+    for row, (job, settings_key) in enumerate(zip(jobs, settings_keys)):
+      status = self.job_statuses.get(job)
+      if status:
+        base_color = status_colors[status]
       elif not job.active:
-        table_utils.color_row_background(self.table, i, QColor(table_utils.COLORS["grey_inactive"]))
-      # Color the active job if a render process is active.
-      elif i == active_job_index and self.window.stop_button.isEnabled():
-        table_utils.color_row_background(
-          self.table,
-          i,
-          QColor(table_utils.COLORS["blue_grey_lighter"]),
-        )
+        base_color = colors["grey_inactive"]
+      elif render_scheduler.get_job_key(job) in running_keys:
+        base_color = colors["blue_grey_lighter"]
       else:
-        table_utils.color_row_background(self.table, i, QColor(table_utils.COLORS["grey_light"]))
-
-    # Check for duplicates.
-    for row_index in range(self.table.rowCount()):
-      if (
-        list(self.state_saver.state.render_jobs).count(
-          self.state_saver.state.render_jobs[row_index],
-        )
-        > 1
-      ):
-        table_utils.color_row_background(
-          self.table,
-          row_index,
-          QColor(table_utils.COLORS["yellow"]),
-        )
+        base_color = colors["grey_light"]
+      color = table_utils.get_row_color(self.model.row_colors[row], base_color)
+      # Check for duplicates.
+      if key_counts[settings_key] > 1:
+        color = table_utils.get_row_color(color, colors["yellow"])
 
       # Set the background color of the blend path.
-      blend_path_item = self.table.item(row_index, 1)
-      blend_path = Path(blend_path_item.text())
-      if (
-        not blend_path.exists()
-        and not (self.state_saver.state.settings.blender_files_path / blend_path).exists()
+      cell_colors = {}
+      blend_path = Path(job.file)
+      if not path_utils.path_exists(blender_files_path / blend_path) and not path_utils.path_exists(
+        blend_path,
       ):
-        blend_path_item.setBackground(QColor(table_utils.COLORS["red"]))
+        cell_colors[FILE_COLUMN] = colors["red"]
+      else:
+        metadata = self.metadata_scanner.get(abs_blend_paths[row])
+        invalid_fields = []
+        if metadata:
+          invalid_fields = blend_metadata.get_invalid_fields(
+            metadata,
+            job.scene,
+            job.camera,
+            list(job.view_layers),
+          )
+        for field in invalid_fields:
+          cell_colors[COLUMN_FIELDS.index(field)] = colors["red"]
+      self.model.set_row_color(row, color, cell_colors)
+
+  def files_changed(self, directories: set[str] | None = None) -> None:
+    """Check the blend files again after the file watcher reported changes.
+
+    Only the blend files in the changed folders are checked again. New frames in the output folders
+    don't affect them. All blend files are checked again if the folders are None.
+    """
+    if directories is None:
+      self.metadata_scanner.forget()
+      self.blend_files_changed()
+    else:
+      settings = self.state_saver.state.settings
+      directories = directories - file_watcher.get_output_directories(settings)
+      rows = []
+      for row, job in enumerate(self.state_saver.state.render_jobs):
+        blend_path = path_utils.get_abs_blend_path(job.file, settings.blender_files_path)
+        if job.file and os.path.dirname(os.path.abspath(blend_path)) in directories:
+          self.metadata_scanner.forget([blend_path])
+          rows.append(row)
+      self.blend_files_changed(rows)
+    self.set_table_colors()
+
+  def get_completions(self, column: int, row: int) -> list[str]:
+    """Get the names from the blend file of a job, which complete a cell of the job."""
+    job = self.model.job(row)
+    metadata = self.metadata_scanner.get(
+      path_utils.get_abs_blend_path(job.file, self.state_saver.state.settings.blender_files_path),
+    )
+    if not metadata:
+      return []
+    if column == SCENE_COLUMN:
+      return list(metadata["scenes"])
+    if column == CAMERA_COLUMN:
+      return metadata["cameras"]
+    return metadata["scenes"].get(blend_metadata.get_scene_name(metadata, job.scene), [])
 
   ########## TABLE OPS ############
   def copy_from_cell(self) -> None:
     """Copies the content of the active cell into the clipboard."""
-    current_row = self.table.currentRow()
-    current_column = self.table.currentColumn()
+    index = self.table.currentIndex()
+    if index.column() not in ui_utils.TEXT_COLUMNS + ui_utils.NUMBER_COLUMNS:
+      return
     clipboard = QApplication.clipboard()
-    clipboard.setText(self.table.item(current_row, current_column).text())
+    clipboard.setText(self.model.data(index, Qt.EditRole))
 
   def paste_into_cell(self) -> None:
     """Pastes the content of clipboard into the active cell."""
-    self.table.blockSignals(True)
-    self.before_table_change()
-
-    current_row = self.table.currentRow()
-    current_column = self.table.currentColumn()
+    index = self.table.currentIndex()
+    if index.column() not in ui_utils.TEXT_COLUMNS + ui_utils.NUMBER_COLUMNS:
+      return
     clipboard = QApplication.clipboard()
-    self.table.item(current_row, current_column).setText(clipboard.text())
-
-    self.after_table_change()
-    self.table.blockSignals(False)
-
-  def render_job(self, job: state_pb2.render_job) -> None:  # pylint: disable=no-member
-    """Render a job."""
-    snb = shot_name_builder.ShotNameBuilder(job, self.state_saver.state.settings.output_path)
-    inline_python = render_job_to_render_settings_setter(job, self.state_saver.state.settings)
-
-    if shot_name_builder.still_or_animation(job.start, job.end) == "STILL":
-      render_frame_command = f"-f {job.start!s}" if job.start else "-f 1"
-    elif job.start:
-      render_frame_command = f"-s {job.start!s} -e {job.end!s} -a"
-    else:
-      render_frame_command = "-a"
+    # The model notifies about the change, so it can be undone.
+    self.model.setData(index, clipboard.text())
 
-    self.process = QProcess()
-    self.process.setProcessChannelMode(QProcess.MergedChannels)
+  def render_task(self, task: render_scheduler.RenderTask) -> None:
+    """Render a task in a new Blender worker process."""
+    process = QProcess()
+    process.setProcessChannelMode(QProcess.MergedChannels)
     # Because buffering added some issues with printing, not using it for now.
     env = QProcess.systemEnvironment()
-    env += "PYTHONUNBUFFERED=1"
-    self.process.setEnvironment(env)
+    env.append("PYTHONUNBUFFERED=1")
+    env.append(f"{EVENTS_VARIABLE}=1")
+    process.setEnvironment(env)
 
     if not self.state_saver.state.settings.blender_path:
       error_message = "The Blender path is not set."
       print_utils.print_error_no_exit(error_message)
       QMessageBox.warning(self, "Warning", error_message, QMessageBox.Ok)
 
-    self.process.setProgram(self.state_saver.state.settings.blender_path)
-    self.process.finished.connect(self._continue_render)
-
-    # Check if the file was converted to a relative path.
-    file_path = path_utils.get_abs_blend_path(
-      job.file,
-      self.state_saver.state.settings.blender_files_path,
+    process.setProgram(self.state_saver.state.settings.blender_path)
+    process.finished.connect(functools.partial(self._finish_worker, task.worker_id))
+    process.setArguments(
+      render_job_to_blender_args(
+        task.job,
+        self.state_saver.state.settings,
+        task.frame_path,
+        frame_range=task.frame_range,
+      ),
     )
-    scene_command = ["-S", job.scene] if job.scene else ""
-    args = [
-      "-b",
-      file_path,
-      "-o",
-      snb.frame_path,
-      "-y",
-      *scene_command,
-      "-F",
-      ui_utils.FILE_FORMATS_COMMAND[job.file_format],
-      "--python-expr",
-      inline_python,
-      *render_frame_command.split(" "),
-    ]
-    args = [i for i in args if i]
-    self.process.setArguments(args)
-    self.process.readyRead.connect(self._handle_output)
-    self.process.start()
+    process.readyRead.connect(functools.partial(self._handle_output, task.worker_id))
+    self.processes[task.worker_id] = process
+    try:
+      self.console.open_log(task.worker_id, job_log.get_log_path(task.frame_path))
+    except OSError as error:
+      print_utils.print_warning(f"Could not write the log of the job: {error}")
+    process.start()
+    if self.run_journal:
+      self.run_journal.job_started(task.job, task.job_index)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+"""Unit tests for metadata_scanner.py."""
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from PySide6.QtWidgets import QApplication
+
+import blend_metadata
+from utils_common.render_protocol import METADATA_PREFIX
+from utils_rr import metadata_scanner
+
+# Stands in for Blender with the metadata loader. It fails for files named "broken.blend" and prints
+# a line, which isn't valid JSON, for files named "truncated.blend".
+FAKE_METADATA_LOADER = f"""
+import json, os, pathlib
+for path in json.loads(os.environ["RENDERROB_METADATA_FILES"]):
+  if path.endswith("truncated.blend"):
+    print({METADATA_PREFIX!r} + json.dumps({{"file": path}})[:-1], flush=True)
+    continue
+  if path.endswith("broken.blend"):
+    result = {{"file": path, "error": "not a blend file"}}
+  else:
+    metadata = {{"active_scene": "Scene", "cameras": [pathlib.Path(path).stem], "scenes": {{}}}}
+    result = {{"file": path, "metadata": metadata}}
+  print({METADATA_PREFIX!r} + json.dumps(result), flush=True)
+"""
+
+
+class TestMetadataScanner(unittest.TestCase):
+  """Tests for the metadata_scanner module."""
+
+  @classmethod
+  def setUpClass(cls) -> None:
+    """Create the application for the event loop of the processes."""
+    cls.app = QApplication.instance() or QApplication([])
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    """Shut down the application, since the main window tests create their own."""
+    cls.app.shutdown()
+    del cls.app
+
+  def wait_for_scanner(self, scanner: metadata_scanner.MetadataScanner) -> None:
+    """Process events until all Blender processes are finished."""
+    deadline = time.monotonic() + 10
+    while scanner.running_count() and time.monotonic() < deadline:
+      self.app.processEvents()
+      time.sleep(0.01)
+    self.assertEqual(scanner.running_count(), 0)
+
+  @patch("utils_rr.metadata_scanner.MAX_SCAN_PROCESSES", 2)
+  def test_scan(self):
+    """Test that the files are scanned in a pool of processes and cached on the disk."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      paths = [str(Path(tempdir) / name) for name in ("a.blend", "b.blend", "broken.blend")]
+      for path in paths:
+        Path(path).write_bytes(b"BLENDER")
+      cache = blend_metadata.MetadataCache(Path(tempdir) / blend_metadata.CACHE_FILE_NAME)
+      changes = []
+      scanner = metadata_scanner.MetadataScanner(cache, lambda: changes.append(True))
+      arguments = ["-c", FAKE_METADATA_LOADER]
+      scanner.request([*paths, str(Path(tempdir) / "missing.blend")], sys.executable, arguments)
+      self.assertEqual(scanner.running_count(), 2)
+      self.wait_for_scanner(scanner)
+      self.assertEqual(len(changes), 2)
+      self.assertEqual(scanner.get(paths[0])["cameras"], ["a"])
+      self.assertEqual(scanner.get(paths[1])["cameras"], ["b"])
+      self.assertIsNone(scanner.get(paths[2]))
+
+      # Unchanged files are loaded from the cache without starting Blender.
+      scanner = metadata_scanner.MetadataScanner(cache)
+      self.assertIsNone(scanner.get(paths[0]))
+      self.assertEqual(scanner.lookup(paths[0])["cameras"], ["a"])
+      scanner.request(paths[:2], "/nonexistent/blender", [])
+      self.assertEqual(scanner.running_count(), 0)
+      self.assertEqual(scanner.get(paths[1])["cameras"], ["b"])
+      cache.close()
+
+
+  def test_forget_while_scanning(self):
+    """Test that the result of a scan, which started before forgetting, is only cached."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      path = str(Path(tempdir) / "a.blend")
+      Path(path).write_bytes(b"BLENDER")
+      cache = blend_metadata.MetadataCache(Path(tempdir) / blend_metadata.CACHE_FILE_NAME)
+      scanner = metadata_scanner.MetadataScanner(cache)
+      scanner.request([path], sys.executable, ["-c", FAKE_METADATA_LOADER])
+      scanner.forget()
+      self.wait_for_scanner(scanner)
+      self.assertNotIn(path, scanner.metadata)
+      scanner.request([path], "/nonexistent/blender", [])
+      self.assertEqual(scanner.get(path)["cameras"], ["a"])
+      cache.close()
+
+  def test_broken_result(self):
+    """Test that a result, which isn't valid JSON, is skipped and the other files are stored."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      paths = [str(Path(tempdir) / name) for name in ("truncated.blend", "a.blend")]
+      for path in paths:
+        Path(path).write_bytes(b"BLENDER")
+      cache = blend_metadata.MetadataCache(Path(tempdir) / blend_metadata.CACHE_FILE_NAME)
+      scanner = metadata_scanner.MetadataScanner(cache)
+      scanner.request(paths, sys.executable, ["-c", FAKE_METADATA_LOADER])
+      self.wait_for_scanner(scanner)
+      self.assertIn(paths[0], scanner.metadata)
+      self.assertIsNone(scanner.get(paths[0]))
+      self.assertEqual(scanner.get(paths[1])["cameras"], ["a"])
+      cache.close()
+
+  def test_forget_paths(self):
+    """Test that only the metadata of the given files is forgotten."""
+    scanner = metadata_scanner.MetadataScanner(None)
+    scanner.metadata = {"/shots/a.blend": {"cameras": ["a"]}, "/shots/b.blend": None}
+    scanner.signatures = {"/shots/c.blend": (1, 2), "/shots/d.blend": (3, 4)}
+    scanner.forget(["/shots/a.blend", "/shots/c.blend"])
+    self.assertEqual(scanner.metadata, {"/shots/b.blend": None})
+    self.assertEqual(scanner.stale_paths, {"/shots/c.blend"})
+    scanner.forget()
+    self.assertEqual(scanner.metadata, {})
+    self.assertEqual(scanner.stale_paths, {"/shots/c.blend", "/shots/d.blend"})
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,7 +1,11 @@
 """Tests for the path utilities."""
 
+import os
 import platform
+import tempfile
 import unittest
+from pathlib import Path
+from unittest.mock import patch
 
 from utils_rr import path_utils
 
@@ -58,3 +62,55 @@ class TestPathUtils(unittest.TestCase):
       "C:/something/completely/different.blend", "C:/Users/peter/Nextcloud/20_prod/24_shots",
     )
     self.assertEqual(path.replace("\\", "/"), "C:/something/completely/different.blend")
+
+  def test_list_directory(self) -> None:
+    """Test that a directory listing is cached until the directory changes."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      (Path(tempdir) / "folder").mkdir()
+      (Path(tempdir) / "file.png").touch()
+      os.utime(tempdir, (1000, 1000))
+      self.assertEqual(path_utils.list_directory(tempdir), {"folder": True, "file.png": False})
+
+      with patch("os.scandir") as scandir:
+        self.assertEqual(len(path_utils.list_directory(tempdir)), 2)
+        scandir.assert_not_called()
+
+      (Path(tempdir) / "new.png").touch()
+      os.utime(tempdir, (2000, 2000))
+      self.assertEqual(len(path_utils.list_directory(tempdir)), 3)
+
+    self.assertEqual(path_utils.list_directory(tempdir), {})
+
+  def test_path_exists(self) -> None:
+    """Test that the result of an existence check is reused until it expires."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      blend_path = Path(tempdir) / "cube.blend"
+      self.assertFalse(path_utils.path_exists(blend_path))
+      blend_path.touch()
+      self.assertFalse(path_utils.path_exists(blend_path))
+      with patch("utils_rr.path_utils.PATH_EXISTS_TTL_SECONDS", 0):
+        self.assertTrue(path_utils.path_exists(blend_path))
+      path_utils.clear_path_exists_cache()
+
+  def test_watched_directory(self) -> None:
+    """Test that the cached results in a watched directory are checked again after a while."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      os.utime(tempdir, (1000, 1000))
+      blend_path = Path(tempdir) / "cube.blend"
+      path_utils.watch_directory(tempdir)
+      self.assertEqual(path_utils.list_directory(tempdir), {})
+      self.assertFalse(path_utils.path_exists(blend_path, max_age=0))
+
+      # The watcher missed the change, e.g. on a network share.
+      blend_path.touch()
+      os.utime(tempdir, (2000, 2000))
+      with patch("os.stat") as stat, patch("os.path.exists") as exists:
+        self.assertEqual(path_utils.list_directory(tempdir), {})
+        self.assertFalse(path_utils.path_exists(blend_path))
+        stat.assert_not_called()
+        exists.assert_not_called()
+
+      with patch("utils_rr.path_utils.WATCHED_MAX_AGE_SECONDS", 0):
+        self.assertEqual(path_utils.list_directory(tempdir), {"cube.blend": False})
+        self.assertTrue(path_utils.path_exists(blend_path))
+      path_utils.unwatch_directory(tempdir)
@@ -0,0 +1,100 @@
+"""Pre-flight validation, which checks the render jobs before the first render starts.
+
+Jobs with a missing blend file, an invalid frame range or a scene, camera or view layer, which
+doesn't exist in the blend file, would only fail after Blender loaded the file. They are found up
+front, so they can be skipped without starting Blender.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import blend_metadata
+import shot_name_builder
+from protos import state_pb2
+from utils_rr.path_utils import get_abs_blend_path
+
+# The blend files might be on a network share, so their existence is checked in parallel.
+MAX_CHECK_THREADS = 8
+
+
+def check_frame_range(start: str, end: str) -> list[str]:
+  """Get the problems of the frame range of a job."""
+  try:
+    shot_name_builder.still_or_animation(start, end)
+  except ValueError as error:
+    return [str(error)]
+  problems = [
+    f"The {name} frame {frame} is not a number."
+    for name, frame in (("start", start), ("end", end))
+    if frame and not frame.isnumeric()
+  ]
+  if not problems and start and end and int(start) > int(end):
+    problems.append(f"The start frame {start} is after the end frame {end}.")
+  return problems
+
+
+def check_metadata(
+  job: state_pb2.render_job,  # pylint: disable=no-member
+  metadata: dict,
+) -> list[str]:
+  """Get the problems of the scene, camera and view layers of a job in its blend file."""
+  view_layers = list(job.view_layers)
+  scene_name = blend_metadata.get_scene_name(metadata, job.scene)
+  messages = {
+    "scene": f"The scene {scene_name} doesn't exist in the blend file.",
+    "camera": f"The camera {job.camera} doesn't exist in the blend file.",
+    "view_layers": f"The view layers {';'.join(view_layers)} don't exist in scene {scene_name}.",
+  }
+  return [
+    messages[field]
+    for field in blend_metadata.get_invalid_fields(metadata, job.scene, job.camera, view_layers)
+  ]
+
+
+def validate_jobs(
+  state: state_pb2.render_rob_state,  # pylint: disable=no-member
+  get_metadata: Callable[[str], dict | None] = lambda _path: None,
+) -> dict[int, list[str]]:
+  """Check all active jobs of a state.
+
+  Args:
+    state: The state with the settings and the render jobs.
+    get_metadata: Get the known metadata of a blend file by its absolute path. Jobs, whose
+      metadata is unknown, are only checked for the blend file and the frame range.
+
+  Returns:
+    The problems by row of the jobs, which can't be rendered.
+  """
+  blend_paths = {
+    row: get_abs_blend_path(job.file, state.settings.blender_files_path)
+    for row, job in enumerate(state.render_jobs)
+    if job.active
+  }
+  unique_paths = list(dict.fromkeys(path for path in blend_paths.values() if path))
+  with ThreadPoolExecutor(max_workers=MAX_CHECK_THREADS) as executor:
+    existing_paths = dict(zip(unique_paths, executor.map(os.path.isfile, unique_paths)))
+
+  report = {}
+  for row, blend_path in blend_paths.items():
+    job = state.render_jobs[row]
+    if not job.file:
+      report[row] = ["The job has no blend file."]
+      continue
+    if not existing_paths[blend_path]:
+      report[row] = [f"The blend file {job.file} doesn't exist."]
+      continue
+    problems = check_frame_range(job.start, job.end)
+    metadata = get_metadata(blend_path)
+    if metadata:
+      problems += check_metadata(job, metadata)
+    if problems:
+      report[row] = problems
+  return report
+
+
+def format_report(report: dict[int, list[str]]) -> list[str]:
+  """Format the problems as one line per job with the row number as shown in the table."""
+  return [f"Job {row + 1}: {' '.join(problems)}" for row, problems in sorted(report.items())]
@@ -0,0 +1,74 @@
+"""Unit tests for preflight.py."""
+import tempfile
+import unittest
+from pathlib import Path
+
+import preflight
+from protos import state_pb2
+
+METADATA = {
+  "active_scene": "Scene",
+  "cameras": ["Camera"],
+  "scenes": {"Scene": ["ViewLayer"]},
+}
+
+
+class TestPreflight(unittest.TestCase):
+  """Tests for the preflight module."""
+
+  def test_check_frame_range(self):
+    """Test that invalid frame ranges are found."""
+    self.assertEqual(preflight.check_frame_range("", ""), [])
+    self.assertEqual(preflight.check_frame_range("1", ""), [])
+    self.assertEqual(preflight.check_frame_range("1", "250"), [])
+    self.assertEqual(
+      preflight.check_frame_range("", "250"),
+      ["End frame is set, but start frame is not."],
+    )
+    self.assertEqual(
+      preflight.check_frame_range("a", "250"),
+      ["The start frame a is not a number."],
+    )
+    self.assertEqual(
+      preflight.check_frame_range("20", "10"),
+      ["The start frame 20 is after the end frame 10."],
+    )
+
+  def test_validate_jobs(self):
+    """Test that only the active jobs, which can't be rendered, are reported."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      (Path(tempdir) / "cube.blend").touch()
+      state = state_pb2.render_rob_state()  # pylint: disable=no-member
+      state.settings.blender_files_path = tempdir
+      for file, camera, active in (
+        ("cube.blend", "Camera", True),
+        ("missing.blend", "Camera", True),
+        ("cube.blend", "Closeup", True),
+        ("cube.blend", "Closeup", False),
+        ("", "", True),
+      ):
+        job = state.render_jobs.add()
+        job.file = file
+        job.camera = camera
+        job.active = active
+        job.view_layers.append("")
+
+      report = preflight.validate_jobs(state, {str(Path(tempdir) / "cube.blend"): METADATA}.get)
+      self.assertEqual(
+        report,
+        {
+          1: ["The blend file missing.blend doesn't exist."],
+          2: ["The camera Closeup doesn't exist in the blend file."],
+          4: ["The job has no blend file."],
+        },
+      )
+      self.assertEqual(
+        preflight.format_report(report)[1],
+        "Job 3: The camera Closeup doesn't exist in the blend file.",
+      )
+      # Without metadata, only the blend files and the frame ranges are checked.
+      self.assertEqual(list(preflight.validate_jobs(state)), [1, 4])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,109 @@
+"""Unit tests for render_job_model.py."""
+import unittest
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
+
+from protos import state_pb2
+from utils_rr import table_utils
+from utils_rr.render_job_model import RenderJobModel, new_render_job
+
+
+def make_state(cameras: list[str]) -> state_pb2.render_rob_state:  # pylint: disable=no-member
+  """Create a state with one render job per camera."""
+  state = state_pb2.render_rob_state()  # pylint: disable=no-member
+  for camera in cameras:
+    render_job = new_render_job()
+    render_job.camera = camera
+    state.render_jobs.append(render_job)
+  return state
+
+
+def get_cameras(model: RenderJobModel) -> list[str]:
+  """Get the cameras of all rows."""
+  return [model.index(row, 2).data() for row in range(model.rowCount())]
+
+
+class TestRenderJobModel(unittest.TestCase):
+  """Tests for the RenderJobModel class."""
+
+  def test_data(self):
+    """Test that the model shows the values of the render jobs."""
+    state = make_state(["a"])
+    state.render_jobs[0].device = state_pb2.cpu  # pylint: disable=no-member
+    state.render_jobs[0].view_layers[:] = ["b", "c"]
+    model = RenderJobModel(state)
+    self.assertEqual(model.index(0, 0).data(Qt.CheckStateRole), Qt.Checked)
+    self.assertIsNone(model.index(0, 0).data())
+    self.assertEqual(model.index(0, 10).data(), "cpu")
+    self.assertEqual(model.index(0, 10).data(Qt.EditRole), 1)
+    self.assertEqual(model.index(0, 16).data(), "b;c")
+
+  def test_set_data(self):
+    """Test that edits are written into the state and announced."""
+    state = make_state(["a"])
+    model = RenderJobModel(state)
+    signals = []
+    model.job_about_to_change.connect(lambda row: signals.append(("before", row)))
+    model.job_changed.connect(lambda row, column: signals.append(("after", row, column)))
+
+    self.assertTrue(model.setData(model.index(0, 16), "b;c"))
+    self.assertEqual(list(state.render_jobs[0].view_layers), ["b", "c"])
+    self.assertTrue(model.setData(model.index(0, 9), 1))
+    self.assertEqual(state.render_jobs[0].engine, state_pb2.eevee)  # pylint: disable=no-member
+    self.assertTrue(model.setData(model.index(0, 11), Qt.Checked, Qt.CheckStateRole))
+    self.assertTrue(state.render_jobs[0].motion_blur)
+    self.assertEqual(
+      signals,
+      [("before", 0), ("after", 0, 16), ("before", 0), ("after", 0, 9), ("before", 0),
+       ("after", 0, 11)],
+    )
+
+    # Unchanged values and read only tables are not announced.
+    self.assertFalse(model.setData(model.index(0, 16), "b;c"))
+    model.read_only = True
+    self.assertFalse(model.setData(model.index(0, 2), "b"))
+    self.assertFalse(model.flags(model.index(0, 2)) & Qt.ItemIsEditable)
+    self.assertEqual(len(signals), 6)
+
+  def test_rows(self):
+    """Test inserting, removing and moving rows."""
+    state = make_state(["a", "b", "c"])
+    model = RenderJobModel(state)
+    model.move_row(0, 3)
+    self.assertEqual(get_cameras(model), ["b", "c", "a"])
+    model.move_row(2, 1)
+    self.assertEqual(get_cameras(model), ["b", "a", "c"])
+    model.insertRows(1, 1)
+    self.assertEqual(get_cameras(model), ["b", "", "a", "c"])
+    self.assertTrue(state.render_jobs[1].active)
+    model.insert_job(0, state.render_jobs[3])
+    self.assertEqual(get_cameras(model), ["c", "b", "", "a", "c"])
+    model.removeRows(1, 2)
+    self.assertEqual([job.camera for job in state.render_jobs], ["c", "a", "c"])
+
+  def test_background(self):
+    """Test the precedence of the background colors."""
+    model = RenderJobModel(make_state(["a", "b"]))
+    red = QColor(table_utils.COLORS["red"])
+    green = QColor(table_utils.COLORS["green"])
+    table_utils.color_row_background(model, 0, green)
+    model.set_cell_color(0, 1, red)
+    model.set_value(0, 3, "x")
+    self.assertEqual(model.index(0, 1).data(Qt.BackgroundRole), red)
+    self.assertEqual(model.index(0, 2).data(Qt.BackgroundRole), green)
+    self.assertEqual(model.index(0, 3).data(Qt.BackgroundRole), red)
+    self.assertIsNone(model.index(1, 2).data(Qt.BackgroundRole))
+
+    # Moving a row takes its colors along.
+    model.move_row(0, 2)
+    self.assertEqual(model.index(1, 2).data(Qt.BackgroundRole), green)
+    self.assertEqual(model.index(1, 1).data(Qt.BackgroundRole), red)
+
+    # Unchanged colors don't repaint the row.
+    self.assertFalse(model.set_row_color(1, green, {1: red}))
+    self.assertTrue(model.set_row_color(1, green))
+
+
+if __name__ == "__main__":
+  unittest.main()
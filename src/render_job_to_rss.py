@@ -1,39 +1,71 @@
 """Build a Python command to execute the render_settings_setter."""
 
+import re
 import sys
 from pathlib import Path
 
 from protos import state_pb2
-from utils_rr import ui_utils
-from utils_rr.path_utils import normalize_drive_letter
+from shot_name_builder import still_or_animation
+from utils_rr import render_constants
+from utils_rr.path_utils import get_abs_blend_path, normalize_drive_letter
+
+
+def get_frame_step(
+  render_job: state_pb2.render_job,  # pylint: disable=no-member
+  settings: state_pb2.settings,  # pylint: disable=no-member
+) -> int:
+  """Get the frame step of a render job, which depends on the preview settings."""
+  if render_job.high_quality:
+    return 1
+  return settings.preview.frame_step if settings.preview.frame_step_use else 1
+
+
+def format_number(value: str | int) -> str:
+  """Format a number of a render job as a Python literal.
+
+  Anything else, e.g. an empty cell, becomes an empty string, so a value can't break or extend the
+  Python command.
+  """
+  text = str(value).strip()
+  return text if re.fullmatch(r"-?\d+", text) else '""'
+
+
+def get_python_path() -> str:
+  """Get the directory, which Blender has to add to sys.path to import the utils_bpy module."""
+  if sys.platform == "darwin":
+    if Path("../Resources/").exists():
+      return str(Path("../Resources/").resolve())
+    if Path("src").exists():
+      return str(Path("src").resolve())
+  return normalize_drive_letter(str(Path.cwd()))
 
 
 def render_job_to_render_settings_setter(
   render_job: state_pb2.render_job,  # pylint: disable=no-member
   settings: state_pb2.settings,
+  overwrite: bool = False,
 ) -> str:  # pylint: disable=no-member
-  """Build a Python command to execute the render_settings_setter."""
+  """Build a Python command to execute the render_settings_setter.
+
+  Args:
+    render_job: The render job to render.
+    settings: The global settings.
+    overwrite: Whether Blender replaces existing frames instead of skipping them.
+  """
+  frame_step = get_frame_step(render_job, settings)
   if render_job.high_quality:
     resolution = 100
-    frame_step = 1
     samples = render_job.samples
   else:
     resolution = settings.preview.resolution if settings.preview.resolution_use else 100
-    frame_step = settings.preview.frame_step if settings.preview.frame_step_use else 1
     samples = settings.preview.samples if settings.preview.samples_use else render_job.samples
 
-  if sys.platform == "darwin":
-    if Path("../Resources/").exists():
-      cwd = Path("../Resources/").resolve()
-    elif Path("src").exists():
-      cwd = Path("src").resolve()
-  else:
-    cwd = normalize_drive_letter(Path.cwd())
+  cwd = get_python_path()
 
   # Set the resolution to an empty string if it is not set, otherwise a syntax error will occur.
-  x_res = render_job.x_res if render_job.x_res else '""'
-  y_res = render_job.y_res if render_job.y_res else '""'
-  samples = samples if samples else '""'
+  x_res = format_number(render_job.x_res)
+  y_res = format_number(render_job.y_res)
+  samples = format_number(samples) if samples else '""'
 
   addons = [addon for addon in settings.addons if addon != ""]
   addons_command = [f"rss.activate_addons({addons})"] if addons else []
@@ -42,12 +74,116 @@ def render_job_to_render_settings_setter(
     "import sys",
     f"sys.path.append('{cwd}')",
     "from utils_bpy import render_settings_setter",
-    f"rss = render_settings_setter.RenderSettingsSetter('{render_job.scene}', {render_job.view_layers})",  # noqa: E501
+    # The names are written as Python literals, so quotes in a name can't break the command.
+    f"rss = render_settings_setter.RenderSettingsSetter({render_job.scene!r}, {list(render_job.view_layers)!r})",  # noqa: E501
     *addons_command,
-    f"rss.set_camera('{render_job.camera}')",
-    f"rss.set_render_settings(render_device='{ui_utils.DEVICES[render_job.device]}', border={not render_job.high_quality}, samples={samples}, motion_blur={render_job.motion_blur}, engine='{ui_utils.RENDER_ENGINES[render_job.engine]}')",  # noqa: E501
+    f"rss.set_camera({render_job.camera!r})",
+    f"rss.set_render_settings(render_device='{render_constants.DEVICES[render_job.device]}', border={not render_job.high_quality}, samples={samples}, motion_blur={render_job.motion_blur}, engine='{render_constants.RENDER_ENGINES[render_job.engine]}')",  # noqa: E501
     f"rss.set_denoising_settings(denoise={render_job.denoise})",
-    f"rss.set_output_settings(frame_step={frame_step}, xres={x_res}, yres={y_res}, percres={resolution}, high_quality={render_job.high_quality})",  # noqa: E501
+    f"rss.set_output_settings(frame_step={frame_step}, xres={x_res}, yres={y_res}, percres={resolution}, high_quality={render_job.high_quality}, overwrite={overwrite})",  # noqa: E501
     "rss.custom_commands()",
   ]
   return " ; ".join(python_command)
+
+
+def render_job_to_blender_args(
+  render_job: state_pb2.render_job,  # pylint: disable=no-member
+  settings: state_pb2.settings,  # pylint: disable=no-member
+  frame_path: str,
+  frame_range: tuple[int, int] | None = None,
+) -> list[str]:
+  """Build the command line arguments for rendering a job with Blender.
+
+  Args:
+    render_job: The render job to render.
+    settings: The global settings.
+    frame_path: The output path of the frames with the version number resolved.
+    frame_range: Render only this chunk of the frames instead of the frame range of the job. The
+      scheduler only gives ranges of frames, which aren't rendered yet, so Blender replaces the
+      empty frames of an interrupted render in it.
+  """
+  inline_python = render_job_to_render_settings_setter(
+    render_job,
+    settings,
+    overwrite=frame_range is not None,
+  )
+
+  if frame_range:
+    render_frame_command = f"-s {frame_range[0]} -e {frame_range[1]} -a"
+  elif still_or_animation(render_job.start, render_job.end) == "STILL":
+    render_frame_command = f"-f {render_job.start!s}" if render_job.start else "-f 1"
+  elif render_job.start:
+    render_frame_command = f"-s {render_job.start!s} -e {render_job.end!s} -a"
+  else:
+    render_frame_command = "-a"
+
+  # Check if the file was converted to a relative path.
+  file_path = get_abs_blend_path(render_job.file, settings.blender_files_path)
+  scene_command = ["-S", render_job.scene] if render_job.scene else ""
+  args = [
+    "-b",
+    file_path,
+    "-o",
+    frame_path,
+    "-y",
+    *scene_command,
+    "-F",
+    render_constants.FILE_FORMATS_COMMAND[render_job.file_format],
+    "--python-expr",
+    inline_python,
+    *render_frame_command.split(" "),
+  ]
+  return [i for i in args if i]
+
+
+def render_server_command() -> str:
+  """Build a Python command, which starts a warm Blender worker reading requests from stdin."""
+  python_command = [
+    "import sys",
+    f"sys.path.append('{get_python_path()}')",
+    "from utils_bpy import render_server",
+    "render_server.serve()",
+  ]
+  return " ; ".join(python_command)
+
+
+def metadata_loader_command() -> str:
+  """Build a Python command, which prints the metadata of the blend files in the environment."""
+  python_command = [
+    "import sys",
+    f"sys.path.append('{get_python_path()}')",
+    "from utils_bpy import metadata_loader",
+    "metadata_loader.print_metadata()",
+  ]
+  return " ; ".join(python_command)
+
+
+def render_job_to_server_request(
+  render_job: state_pb2.render_job,  # pylint: disable=no-member
+  settings: state_pb2.settings,  # pylint: disable=no-member
+  frame_path: str,
+  frame_range: tuple[int, int] | None = None,
+) -> dict:
+  """Build the request for rendering a job with a warm Blender worker.
+
+  The request contains the same information as the command line arguments built by
+  render_job_to_blender_args.
+  """
+  request = {
+    "file": get_abs_blend_path(render_job.file, settings.blender_files_path),
+    "scene": render_job.scene,
+    "frame_path": frame_path,
+    "file_format": render_constants.FILE_FORMATS_COMMAND[render_job.file_format],
+    "python": render_job_to_render_settings_setter(
+      render_job,
+      settings,
+      overwrite=frame_range is not None,
+    ),
+  }
+  if frame_range:
+    request["start"], request["end"] = frame_range
+  elif still_or_animation(render_job.start, render_job.end) == "STILL":
+    request["still"] = int(render_job.start) if render_job.start else 1
+  elif render_job.start:
+    request["start"], request["end"] = int(render_job.start), int(render_job.end)
+  return request
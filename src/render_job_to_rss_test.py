@@ -1,5 +1,6 @@
 """Unit tests for shot_name_builder.py."""
 
+import ast
 import os
 import unittest
 
@@ -48,6 +49,47 @@ class TestRenderJobToRss(unittest.TestCase):
                 ".set_render_settings(render_device='gpu', border=False, samples=128, motion_blur="
                 "True, engine='cycles') ; rss.set_denoising_settings(denoise=True) ;"
                 " rss.set_output_settings(frame_step=1, xres=1920, yres=1080, percres=100, "
-                "high_quality=True) ; rss.custom_commands()"
+                "high_quality=True, overwrite=False) ; rss.custom_commands()"
             ),
         )
+
+    def test_render_settings_setter_escapes_values(self) -> None:
+        """Test that names and numbers of a job can't break out of the Python command."""
+        render_job = state_pb2.render_job()  # pylint: disable=no-member
+        render_job.camera = "Bob's camera"
+        render_job.scene = "Scene'); import os; os.system('touch /tmp/x"
+        render_job.x_res = "1920; import os"
+        render_job.samples = "64"
+        render_job.high_quality = True
+        settings = state_pb2.settings()  # pylint: disable=no-member
+        rss = render_job_to_rss.render_job_to_render_settings_setter(
+            render_job, settings
+        )
+        self.assertIn("rss.set_camera(\"Bob's camera\")", rss)
+        self.assertIn(f"RenderSettingsSetter({render_job.scene!r}, [])", rss)
+        self.assertIn('xres="", yres=""', rss)
+        self.assertIn("samples=64", rss)
+        imported_modules = [
+            alias.name
+            for node in ast.walk(ast.parse(rss))
+            if isinstance(node, ast.Import)
+            for alias in node.names
+        ]
+        self.assertEqual(imported_modules, ["sys"])
+
+    def test_render_job_to_blender_args_overwrites_frame_range(self) -> None:
+        """Test that only a frame range of missing frames replaces the existing frames."""
+        render_job = state_pb2.render_job()  # pylint: disable=no-member
+        render_job.file = "/tmp/a.blend"
+        render_job.start = "1"
+        render_job.end = "10"
+        settings = state_pb2.settings()  # pylint: disable=no-member
+        args = render_job_to_rss.render_job_to_blender_args(
+            render_job, settings, "/tmp/a-####", frame_range=(4, 6)
+        )
+        self.assertIn("overwrite=True", args[args.index("--python-expr") + 1])
+        self.assertEqual(args[-5:], ["-s", "4", "-e", "6", "-a"])
+        args = render_job_to_rss.render_job_to_blender_args(
+            render_job, settings, "/tmp/a-####"
+        )
+        self.assertIn("overwrite=False", args[args.index("--python-expr") + 1])
@@ -0,0 +1,607 @@
+"""Scheduler to distribute the render jobs over several concurrent Blender workers.
+
+Note: The scheduler does not know anything about processes. It only decides which task is
+rendered next and keeps track of the free worker slots per device class. Launching the Blender
+processes is done by the caller, e.g. the main window.
+"""
+
+import collections
+import dataclasses
+import datetime
+import time
+
+import job_registry
+import retry_policy
+import shot_name_builder
+from protos import state_pb2
+from render_job_to_rss import get_frame_step
+from utils_common.render_protocol import EVENT_ERROR, EVENT_FRAME_DONE, EVENT_WARNING
+from utils_rr.path_utils import get_abs_blend_path
+
+DEFAULT_WORKER_COUNT = 1
+# The number of recently rendered frames, whose render times estimate the time left.
+FRAME_TIME_WINDOW = 20
+
+STATUS_FINISHED = "finished"
+STATUS_WARNING = "warning"
+STATUS_FAILED = "failed"
+# The status of a job with several tasks is the worst status of its tasks.
+STATUS_SEVERITY = [STATUS_FINISHED, STATUS_WARNING, STATUS_FAILED]
+EVENT_STATUSES = {EVENT_WARNING: STATUS_WARNING, EVENT_ERROR: STATUS_FAILED}
+
+
+@dataclasses.dataclass
+class RenderTask:
+  """A unit of work which is rendered by a single Blender process."""
+
+  job_index: int
+  job: state_pb2.render_job  # pylint: disable=no-member
+  worker_id: int = -1
+  # The first and last frame of a chunk. None if the whole job is rendered at once.
+  frame_range: tuple[int, int] | None = None
+  frame_path: str = ""
+  # The number of frames the task renders. A job, which renders the frame range of its blend file,
+  # counts as a single frame, since its frame range is unknown.
+  frame_count: int = 1
+  # The worst status, which Blender reported with an event while rendering the task.
+  status: str = STATUS_FINISHED
+  frames_done: list[int] = dataclasses.field(default_factory=list)
+  frame_seconds: list[float] = dataclasses.field(default_factory=list)
+  peak_memory_mb: float = 0
+  started_at: float = 0
+  finished_at: float = 0
+  # The number of times the task was rendered again after a transient failure.
+  attempt: int = 0
+  # The task is not started before this time, so a retry waits for its backoff delay.
+  ready_at: float = 0
+  # The failures, which the output of Blender showed signs of.
+  failure_signatures: set[str] = dataclasses.field(default_factory=set)
+  # The classified failure and the delay of the retry, if the task failed.
+  failure: str = ""
+  retry_delay: float | None = None
+  # The key of the job, which is equal for the tasks of the same job.
+  job_key: str = dataclasses.field(init=False, repr=False)
+
+  def __post_init__(self) -> None:
+    """Store the key of the job, so the tasks of a job are found by it."""
+    self.job_key = get_job_key(self.job)
+
+  @property
+  def device(self) -> int:
+    """Get the device class the task is rendered on."""
+    return self.job.device
+
+
+def status_from_exit_code(exit_code: int) -> str:
+  """Get the status of a render task from the exit code of its Blender process.
+
+  Unknown exit codes, e.g. of a crash, fail the task.
+  """
+  if exit_code in (0, 1):
+    return STATUS_FINISHED
+  if exit_code == 987:
+    return STATUS_WARNING
+  return STATUS_FAILED
+
+
+def format_duration(seconds: float) -> str:
+  """Format a duration as hours, minutes and seconds, e.g. 1:02:03."""
+  return str(datetime.timedelta(seconds=round(seconds)))
+
+
+def count_frames(start: int, end: int, frame_step: int = 1) -> int:
+  """Get the number of frames Blender renders in a frame range."""
+  return max(len(range(start, end + 1, max(frame_step, 1))), 1)
+
+
+def get_worker_slots(settings: state_pb2.settings) -> dict[int, int]:  # pylint: disable=no-member
+  """Get the number of concurrent Blender workers per device class."""
+  return {
+    state_pb2.gpu: max(settings.gpu_workers, DEFAULT_WORKER_COUNT),  # pylint: disable=no-member
+    state_pb2.cpu: max(settings.cpu_workers, DEFAULT_WORKER_COUNT),  # pylint: disable=no-member
+  }
+
+
+def split_frame_range(
+  start: int,
+  end: int,
+  frame_step: int = 1,
+  chunk_size: int = 0,
+  chunk_count: int = 0,
+) -> list[tuple[int, int]]:
+  """Split a frame range into chunks, which can be rendered independently.
+
+  The chunk borders are aligned to the frame step, so the chunks render exactly the frames a
+  single Blender process would render.
+
+  Args:
+    start: The first frame of the range.
+    end: The last frame of the range.
+    frame_step: Only every n-th frame is rendered.
+    chunk_size: The maximum number of rendered frames per chunk. Has priority over chunk_count.
+    chunk_count: The number of chunks the range is split into.
+
+  Returns:
+    The first and last frame of every chunk.
+  """
+  frames = list(range(start, end + 1, max(frame_step, 1)))
+  if not frames:
+    return [(start, end)]
+  if chunk_size <= 0 and chunk_count > 0:
+    chunk_size = -(-len(frames) // chunk_count)
+  if chunk_size <= 0:
+    return [(start, end)]
+  return [
+    (frames[i], frames[min(i + chunk_size, len(frames)) - 1])
+    for i in range(0, len(frames), chunk_size)
+  ]
+
+
+def get_missing_frame_ranges(
+  start: int,
+  end: int,
+  frame_step: int,
+  rendered_frames: set[int],
+) -> list[tuple[int, int]]:
+  """Get the frames of a frame range, which are not rendered, compressed into ranges.
+
+  The ranges are aligned to the frame step, so rendering them with the frame step renders exactly
+  the missing frames.
+  """
+  frame_ranges = []
+  for frame in range(start, end + 1, max(frame_step, 1)):
+    if frame in rendered_frames:
+      continue
+    if frame_ranges and frame_ranges[-1][1] == frame - max(frame_step, 1):
+      frame_ranges[-1] = (frame_ranges[-1][0], frame)
+    else:
+      frame_ranges.append((frame, frame))
+  return frame_ranges
+
+
+def format_retry(task: RenderTask, policy: retry_policy.RetryPolicy) -> str:
+  """Describe the retry of a task, which failed because of a transient failure."""
+  return (
+    f"Job {task.job_index + 1} failed ({task.failure}). It is rendered again in "
+    f"{format_duration(task.retry_delay or 0)} (retry {task.attempt + 1} of {policy.max_retries})."
+  )
+
+
+def get_job_key(job: state_pb2.render_job) -> str:  # pylint: disable=no-member
+  """Get the key of a job, i.e. its id, which is kept when the job is edited or moved."""
+  return job.id
+
+
+class RenderScheduler:
+  """Keep a ready queue of render tasks and hand them out to free worker slots."""
+
+  def __init__(self, settings: state_pb2.settings) -> None:  # pylint: disable=no-member
+    """Initialize the scheduler.
+
+    Args:
+      settings: The settings with the worker counts, the chunking and the output path.
+    """
+    self.settings = settings
+    self.worker_slots = get_worker_slots(settings)
+    self.retry_policy = retry_policy.RetryPolicy.from_settings(settings)
+    self.ready_queue = collections.deque()
+    self.running_tasks = {}
+    self.done_count = 0
+    self.done_frame_count = 0
+    self.frame_times = collections.deque(maxlen=FRAME_TIME_WINDOW)
+    # The render time per frame of jobs, which is expected from their previous renders, by job key.
+    self.frame_seconds = {}
+    self._next_worker_id = 0
+    self._job_statuses = {}
+    self._frame_paths = {}
+    # The highest version of every shot, which was handed out in this run, by its versionless
+    # frame path. Duplicated jobs, which render in parallel, get their own versions.
+    self._reserved_versions = {}
+    self._next_retry_at = None
+
+  def split_job(
+    self,
+    job_index: int,
+    job: state_pb2.render_job,  # pylint: disable=no-member
+  ) -> list[RenderTask]:
+    """Split a job into chunks of its frame range, if chunking is enabled.
+
+    An animation, which continues in the last version of its folder, only renders its missing
+    frames.
+
+    Returns:
+      The tasks of the job. It is empty if all frames of the job are already rendered.
+    """
+    job_copy = state_pb2.render_job()  # pylint: disable=no-member
+    job_copy.CopyFrom(job)
+    frame_step = get_frame_step(job, self.settings)
+    chunking_enabled = self.settings.chunk_size > 0 or self.settings.chunk_count > 1
+    # A still has no end frame, so it is found before the jobs without a frame range.
+    if job.start and shot_name_builder.still_or_animation(job.start, job.end) == "STILL":
+      return [RenderTask(job_index, job_copy, frame_count=self.count_job_frames(job))]
+    if not job.start.isnumeric() or not job.end.isnumeric():
+      return [RenderTask(job_index, job_copy)]
+    frame_ranges = None
+    if job.overwrite:
+      frame_ranges = self.find_missing_frame_ranges(job, frame_step)
+    if frame_ranges is None:
+      if not chunking_enabled:
+        return [RenderTask(job_index, job_copy, frame_count=self.count_job_frames(job))]
+      frame_ranges = [(int(job.start), int(job.end))]
+    chunk_size = self.settings.chunk_size
+    if chunk_size <= 0 and self.settings.chunk_count > 0:
+      frame_count = sum(count_frames(*frame_range, frame_step) for frame_range in frame_ranges)
+      chunk_size = -(-frame_count // self.settings.chunk_count)
+    chunks = [
+      chunk
+      for frame_range in frame_ranges
+      for chunk in split_frame_range(*frame_range, frame_step=frame_step, chunk_size=chunk_size)
+    ]
+    return [
+      RenderTask(
+        job_index,
+        job_copy,
+        frame_range=chunk,
+        frame_count=count_frames(*chunk, frame_step),
+      )
+      for chunk in chunks
+    ]
+
+  def find_missing_frame_ranges(
+    self,
+    job: state_pb2.render_job,  # pylint: disable=no-member
+    frame_step: int,
+  ) -> list[tuple[int, int]]:
+    """Find the frames of an animation, which are not rendered yet, in the folder of the job.
+
+    Frames, which an interrupted render left empty, are missing as well. They are rendered with
+    their frame range, so Blender replaces them instead of skipping them.
+
+    Returns:
+      The missing frame ranges.
+    """
+    rendered_frames = shot_name_builder.find_rendered_frames(self.get_frame_path(job))
+    return get_missing_frame_ranges(int(job.start), int(job.end), frame_step, rendered_frames)
+
+  def count_job_frames(self, job: state_pb2.render_job) -> int:  # pylint: disable=no-member
+    """Get the number of frames of a job.
+
+    A still and a job, which renders the frame range of its blend file, count as a single frame.
+    """
+    if not job.start.isnumeric() or not job.end.isnumeric():
+      return 1
+    return count_frames(int(job.start), int(job.end), get_frame_step(job, self.settings))
+
+  def set_expected_seconds(
+    self,
+    render_jobs: list[state_pb2.render_job],  # pylint: disable=no-member
+    expected_seconds: dict[str, float],
+  ) -> None:
+    """Set the render times of jobs, which are expected from their previous renders.
+
+    Args:
+      render_jobs: All render jobs in table order.
+      expected_seconds: The expected render time by the key of the job.
+    """
+    self.frame_seconds = {}
+    for job in render_jobs:
+      job_key = get_job_key(job)
+      if job_key in expected_seconds:
+        self.frame_seconds[job_key] = expected_seconds[job_key] / self.count_job_frames(job)
+
+  def estimate_seconds(self, task: RenderTask) -> float:
+    """Estimate the render time of a task from the previous renders of its job.
+
+    Tasks of jobs, which were never rendered, are estimated with the mean frame time of the other
+    jobs, or with one second per frame.
+    """
+    frame_seconds = self.frame_seconds.get(task.job_key)
+    if frame_seconds is None and self.frame_seconds:
+      frame_seconds = sum(self.frame_seconds.values()) / len(self.frame_seconds)
+    return task.frame_count * (frame_seconds or 1)
+
+  def order_tasks(self, tasks: list[RenderTask]) -> list[RenderTask]:
+    """Order the tasks by the job order of the settings. Equal tasks keep the table order."""
+    job_order = self.settings.job_order
+    if job_order == state_pb2.shortest_first:  # pylint: disable=no-member
+      return sorted(tasks, key=self.estimate_seconds)
+    # Starting the longest tasks first keeps all workers busy until the end of the queue.
+    if job_order == state_pb2.longest_first:  # pylint: disable=no-member
+      return sorted(tasks, key=self.estimate_seconds, reverse=True)
+    if job_order == state_pb2.by_file:  # pylint: disable=no-member
+      # Consecutive jobs of the same blend file can reuse the file cache and warm workers.
+      file_positions = {}
+      for position, task in enumerate(tasks):
+        file_positions.setdefault(task.job.file, position)
+      return sorted(tasks, key=lambda task: file_positions[task.job.file])
+    return tasks
+
+  def update_ready_queue(
+    self,
+    render_jobs: list[state_pb2.render_job],  # pylint: disable=no-member
+    finished_jobs: job_registry.JobStatusRegistry,
+  ) -> list[int]:
+    """Rebuild the ready queue from the active render jobs, which are not rendered yet.
+
+    Jobs, which are already split into chunks, keep their remaining chunks.
+
+    Args:
+      render_jobs: All render jobs in table order.
+      finished_jobs: The render jobs, which are already rendered.
+
+    Returns:
+      The indices of the jobs, whose frames are all rendered already, so they need no task. The
+      caller has to add them to the finished jobs.
+    """
+    running_keys = {task.job_key for task in self.running_tasks.values()}
+    queued_tasks_by_key = collections.defaultdict(list)
+    for task in self.ready_queue:
+      queued_tasks_by_key[task.job_key].append(task)
+    ready_queue = collections.deque()
+    complete_jobs = []
+    for job_index, job in enumerate(render_jobs):
+      if not job.active or job in finished_jobs:
+        continue
+      job_key = get_job_key(job)
+      queued_tasks = queued_tasks_by_key.get(job_key, [])
+      if queued_tasks or job_key in running_keys:
+        for task in queued_tasks:
+          task.job_index = job_index
+        ready_queue.extend(queued_tasks)
+        continue
+      tasks = self.split_job(job_index, job)
+      if not tasks:
+        complete_jobs.append(job_index)
+        self._frame_paths.pop(job_key, None)
+      ready_queue.extend(tasks)
+    self.ready_queue = collections.deque(self.order_tasks(list(ready_queue)))
+    return complete_jobs
+
+  def free_slots(self, device: int) -> int:
+    """Get the number of free worker slots for a device class."""
+    busy_count = len([task for task in self.running_tasks.values() if task.device == device])
+    return self.worker_slots.get(device, DEFAULT_WORKER_COUNT) - busy_count
+
+  def start_next_tasks(self) -> list[RenderTask]:
+    """Take as many tasks from the ready queue as there are free worker slots.
+
+    The order of the ready queue is kept per device class. If all CPU slots are busy, a GPU
+    task further back in the queue can still be started.
+    """
+    started_tasks = []
+    skipped_tasks = collections.deque()
+    now = time.time()
+    self._next_retry_at = None
+    while self.ready_queue:
+      task = self.ready_queue.popleft()
+      if self.free_slots(task.device) <= 0:
+        skipped_tasks.append(task)
+        continue
+      if task.ready_at > now:
+        skipped_tasks.append(task)
+        self._next_retry_at = min(self._next_retry_at or task.ready_at, task.ready_at)
+        continue
+      task.worker_id = self._next_worker_id
+      task.frame_path = self.get_frame_path(task.job)
+      task.started_at = now
+      self._next_worker_id += 1
+      self.running_tasks[task.worker_id] = task
+      started_tasks.append(task)
+    self.ready_queue = skipped_tasks
+    return started_tasks
+
+  def get_frame_path(self, job: state_pb2.render_job) -> str:  # pylint: disable=no-member
+    """Get the frame path of a job.
+
+    The version number is resolved only once per job, so all chunks of a job render into the
+    same folder, even if the first chunk already created it. Jobs with the same shot name get
+    consecutive versions, like they would if they were rendered one after another.
+    """
+    job_key = get_job_key(job)
+    if job_key not in self._frame_paths:
+      snb = shot_name_builder.ShotNameBuilder(
+        job,
+        self.settings.output_path,
+        reserved_versions=self._reserved_versions,
+      )
+      self._frame_paths[job_key] = snb.frame_path
+    return self._frame_paths[job_key]
+
+  def forget_job(self, job_key: str) -> None:
+    """Drop the queued tasks and the frame path of a job, which was edited.
+
+    The next update of the ready queue splits the job again with its new settings. Its running
+    tasks are rendered to the end.
+    """
+    self.ready_queue = collections.deque(
+      task for task in self.ready_queue if task.job_key != job_key
+    )
+    self._frame_paths.pop(job_key, None)
+
+  def is_job_pending(self, job_key: str) -> bool:
+    """Check if a task of the job with the given key is still waiting or rendering."""
+    return any(task.job_key == job_key for task in self.ready_queue) or any(
+      task.job_key == job_key for task in self.running_tasks.values()
+    )
+
+  def report_event(self, worker_id: int, event: dict) -> str | None:
+    """Update the task of a worker with an event, which its Blender process reported.
+
+    Returns:
+      The new status of the task, if the event made it worse, otherwise None.
+    """
+    task = self.running_tasks.get(worker_id)
+    if task is None:
+      return None
+    if event["type"] == EVENT_FRAME_DONE:
+      task.frames_done.append(event["frame"])
+      if "seconds" in event:
+        task.frame_seconds.append(event["seconds"])
+        self.frame_times.append(event["seconds"])
+      task.peak_memory_mb = max(task.peak_memory_mb, event.get("peak_memory_mb", 0))
+      return None
+    if event["type"] == EVENT_ERROR:
+      task.failure_signatures.add(retry_policy.FAILURE_ERROR)
+    status = EVENT_STATUSES.get(event["type"])
+    if status is None or STATUS_SEVERITY.index(status) <= STATUS_SEVERITY.index(task.status):
+      return None
+    task.status = status
+    return status
+
+  def report_output(self, worker_id: int, line: str) -> None:
+    """Look for signs of a crash or a lack of memory in a line of the output of a worker."""
+    task = self.running_tasks.get(worker_id)
+    if task is None:
+      return
+    failure = retry_policy.match_log_signature(line)
+    if failure:
+      task.failure_signatures.add(failure)
+
+  def finish_task(
+    self,
+    worker_id: int,
+    status: str,
+    exit_code: int | None = None,
+    crashed: bool = False,
+  ) -> tuple[RenderTask, str | None]:
+    """Mark the task of a worker as finished and free its slot.
+
+    A task, which failed because of a transient failure, is queued again as long as the retry
+    policy allows it. Its retry_delay is set in that case.
+
+    Args:
+      worker_id: The worker, which rendered the task.
+      status: The status of the finished task from the exit code. The events of the task can
+        only make it worse.
+      exit_code: The exit code of Blender, which classifies a failure.
+      crashed: Whether Blender was terminated by a signal.
+
+    Returns:
+      The finished task and the status of its job. The job status is None as long as other
+      tasks of the job are still pending.
+    """
+    task = self.running_tasks.pop(worker_id)
+    task.finished_at = time.time()
+    status = max(task.status, status, key=STATUS_SEVERITY.index)
+    if status == STATUS_FAILED and self.retry_failed_task(task, exit_code, crashed):
+      return task, None
+    self.done_count += 1
+    self.done_frame_count += task.frame_count
+    job_key = task.job_key
+    previous_status = self._job_statuses.get(job_key, STATUS_FINISHED)
+    job_status = max(previous_status, status, key=STATUS_SEVERITY.index)
+    self._job_statuses[job_key] = job_status
+
+    # Don't waste time on the remaining chunks of a failed job.
+    if job_status == STATUS_FAILED:
+      self.ready_queue = collections.deque(
+        queued_task for queued_task in self.ready_queue if queued_task.job_key != job_key
+      )
+    if self.is_job_pending(job_key):
+      return task, None
+    del self._job_statuses[job_key]
+    self._frame_paths.pop(job_key, None)
+    return task, job_status
+
+  def retry_failed_task(self, task: RenderTask, exit_code: int | None, crashed: bool) -> bool:
+    """Classify the failure of a task and queue it again, if the failure is transient.
+
+    Returns:
+      Whether the task is rendered again.
+    """
+    blend_path = get_abs_blend_path(task.job.file, self.settings.blender_files_path)
+    if retry_policy.has_crash_log(blend_path, task.started_at):
+      task.failure_signatures.add(retry_policy.FAILURE_CRASH)
+    task.failure = retry_policy.classify_failure(exit_code, crashed, task.failure_signatures)
+    if not self.retry_policy.should_retry(task.failure, task.attempt):
+      return False
+    task.retry_delay = self.retry_policy.get_delay(task.attempt)
+    if self.retry_policy.reduce_workers:
+      worker_count = self.worker_slots.get(task.device, DEFAULT_WORKER_COUNT)
+      self.worker_slots[task.device] = max(worker_count - 1, 1)
+    self.ready_queue.appendleft(
+      RenderTask(
+        task.job_index,
+        task.job,
+        frame_range=task.frame_range,
+        frame_count=task.frame_count,
+        attempt=task.attempt + 1,
+        ready_at=task.finished_at + task.retry_delay,
+      ),
+    )
+    return True
+
+  def requeue_task(self, worker_id: int) -> RenderTask:
+    """Queue the task of a worker again, e.g. because the machine rendering it was lost.
+
+    The task is rendered again from its first frame. Unlike a retry, it doesn't count as an
+    attempt, since the task itself didn't fail.
+
+    Returns:
+      The task, which was running.
+    """
+    task = self.running_tasks.pop(worker_id)
+    self.ready_queue.appendleft(
+      RenderTask(
+        task.job_index,
+        task.job,
+        frame_range=task.frame_range,
+        frame_count=task.frame_count,
+        attempt=task.attempt,
+      ),
+    )
+    return task
+
+  def seconds_until_ready(self) -> float | None:
+    """Get the time until the next retry can be started, if it waits for its delay.
+
+    Only retries with a free worker slot at the last call of start_next_tasks are considered. The
+    others wait for a running task to finish like every other task.
+    """
+    if self._next_retry_at is None:
+      return None
+    return max(self._next_retry_at - time.time(), 0)
+
+  def clear(self) -> None:
+    """Remove all waiting and running tasks."""
+    self.ready_queue.clear()
+    self.running_tasks.clear()
+    self._job_statuses.clear()
+    self._frame_paths.clear()
+    self._reserved_versions.clear()
+    self._next_retry_at = None
+
+  def is_done(self) -> bool:
+    """Check if all tasks are rendered."""
+    return not self.ready_queue and not self.running_tasks
+
+  def count_frames(self) -> tuple[int, int]:
+    """Get the number of rendered frames and the number of all frames of the tasks."""
+    running_tasks = list(self.running_tasks.values())
+    done_count = self.done_frame_count + sum(
+      min(len(task.frames_done), task.frame_count) for task in running_tasks
+    )
+    total_count = self.done_frame_count + sum(
+      task.frame_count for task in running_tasks + list(self.ready_queue)
+    )
+    return done_count, total_count
+
+  def progress(self) -> float:
+    """Get the share of rendered frames in percent."""
+    done_count, total_count = self.count_frames()
+    if not total_count:
+      return 100
+    return 100 * done_count / total_count
+
+  def eta_seconds(self) -> float | None:
+    """Estimate the time until all tasks are rendered from the render times of the last frames.
+
+    Returns:
+      The seconds left, or None as long as no frame was rendered.
+    """
+    if not self.frame_times:
+      return None
+    done_count, total_count = self.count_frames()
+    frame_seconds = sum(self.frame_times) / len(self.frame_times)
+    # The running workers render their frames at the same time.
+    return (total_count - done_count) * frame_seconds / max(len(self.running_tasks), 1)
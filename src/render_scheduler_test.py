@@ -0,0 +1,394 @@
+"""Unit tests for render_scheduler.py."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import job_registry
+import render_scheduler
+import retry_policy
+from protos import state_pb2
+
+
+def make_job(
+  blend_file: str,
+  device: int = state_pb2.cpu,  # pylint: disable=no-member
+  active: bool = True,
+) -> state_pb2.render_job:  # pylint: disable=no-member
+  """Create a render job for testing."""
+  render_job = state_pb2.render_job()  # pylint: disable=no-member
+  render_job.id = job_registry.new_job_id()
+  render_job.file = blend_file
+  render_job.device = device
+  render_job.active = active
+  return render_job
+
+
+def make_scheduler(
+  cpu_workers: int = 1,
+  gpu_workers: int = 1,
+) -> render_scheduler.RenderScheduler:
+  """Create a scheduler with the given worker counts."""
+  settings = state_pb2.settings()  # pylint: disable=no-member
+  settings.cpu_workers = cpu_workers
+  settings.gpu_workers = gpu_workers
+  return render_scheduler.RenderScheduler(settings)
+
+
+class TestRenderScheduler(unittest.TestCase):
+  """Tests for the RenderScheduler class."""
+
+  def test_get_worker_slots(self) -> None:
+    """Test that unset worker counts fall back to a single worker."""
+    settings = state_pb2.settings()  # pylint: disable=no-member
+    settings.cpu_workers = 8
+    self.assertEqual(
+      render_scheduler.get_worker_slots(settings),
+      {state_pb2.gpu: 1, state_pb2.cpu: 8},
+    )
+
+  def test_start_next_tasks_respects_slots(self) -> None:
+    """Test that only as many tasks are started as there are free slots."""
+    scheduler = make_scheduler(cpu_workers=2)
+    jobs = [make_job(f"{i}.blend") for i in range(4)]
+    scheduler.update_ready_queue(jobs, [])
+
+    started_tasks = scheduler.start_next_tasks()
+    self.assertEqual([task.job_index for task in started_tasks], [0, 1])
+    self.assertEqual(scheduler.free_slots(state_pb2.cpu), 0)
+    self.assertEqual(scheduler.start_next_tasks(), [])
+
+    scheduler.finish_task(started_tasks[0].worker_id, render_scheduler.STATUS_FINISHED)
+    self.assertEqual([task.job_index for task in scheduler.start_next_tasks()], [2])
+
+  def test_start_next_tasks_per_device(self) -> None:
+    """Test that a GPU task can start while all CPU slots are busy."""
+    scheduler = make_scheduler()
+    jobs = [
+      make_job("a.blend"),
+      make_job("b.blend"),
+      make_job("c.blend", device=state_pb2.gpu),
+    ]
+    scheduler.update_ready_queue(jobs, [])
+    started_tasks = scheduler.start_next_tasks()
+    self.assertEqual([task.job_index for task in started_tasks], [0, 2])
+    self.assertEqual([task.job_index for task in scheduler.ready_queue], [1])
+
+  def test_update_ready_queue(self) -> None:
+    """Test that inactive, finished and running jobs are not queued."""
+    scheduler = make_scheduler()
+    jobs = [
+      make_job("a.blend"),
+      make_job("b.blend", active=False),
+      make_job("c.blend"),
+      make_job("d.blend"),
+    ]
+    scheduler.update_ready_queue(jobs, [jobs[2]])
+    self.assertEqual([task.job_index for task in scheduler.ready_queue], [0, 3])
+
+    scheduler.start_next_tasks()
+    scheduler.update_ready_queue(jobs, [jobs[2]])
+    self.assertEqual([task.job_index for task in scheduler.ready_queue], [3])
+
+  def test_update_ready_queue_duplicated_jobs(self) -> None:
+    """Test that duplicated jobs with different ids are both rendered and finished on their own."""
+    scheduler = make_scheduler(cpu_workers=2)
+    jobs = [make_job("a.blend"), make_job("a.blend")]
+    jobs[0].id = "first"
+    jobs[1].id = "second"
+    finished_jobs = job_registry.JobStatusRegistry()
+    scheduler.update_ready_queue(jobs, finished_jobs)
+    self.assertEqual([task.job_index for task in scheduler.ready_queue], [0, 1])
+
+    finished_jobs.set(jobs[0], render_scheduler.STATUS_FINISHED)
+    scheduler.update_ready_queue(jobs, finished_jobs)
+    self.assertEqual([task.job_index for task in scheduler.ready_queue], [1])
+
+  def test_duplicated_jobs_in_parallel(self) -> None:
+    """Test that duplicated jobs, which render in parallel, get their own versions."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+      scheduler = make_scheduler(cpu_workers=3)
+      scheduler.settings.output_path = temp_dir
+      jobs = [make_job("/tmp/a.blend"), make_job("/tmp/a.blend"), make_job("/tmp/a.blend")]
+      for job in jobs:
+        job.start = "1"
+        job.end = "10"
+      # The last job continues the last version instead of starting a new one.
+      jobs[2].overwrite = True
+      scheduler.update_ready_queue(jobs[:2], [])
+      started_tasks = scheduler.start_next_tasks()
+      self.assertEqual(
+        [Path(task.frame_path).parent.name for task in started_tasks],
+        ["a-pv-v01", "a-pv-v02"],
+      )
+      self.assertEqual(Path(scheduler.get_frame_path(jobs[2])).parent.name, "a-pv-v01")
+
+  def test_forget_job(self) -> None:
+    """Test that an edited job is split again with its new settings."""
+    scheduler = make_scheduler()
+    jobs = [make_job("a.blend")]
+    scheduler.update_ready_queue(jobs, [])
+    jobs[0].camera = "Closeup"
+    scheduler.update_ready_queue(jobs, [])
+    self.assertEqual(scheduler.ready_queue[0].job.camera, "")
+
+    scheduler.forget_job(render_scheduler.get_job_key(jobs[0]))
+    self.assertEqual(len(scheduler.ready_queue), 0)
+    scheduler.update_ready_queue(jobs, [])
+    self.assertEqual(scheduler.ready_queue[0].job.camera, "Closeup")
+
+  def test_progress(self) -> None:
+    """Test the progress of the scheduler."""
+    scheduler = make_scheduler(cpu_workers=2)
+    self.assertEqual(scheduler.progress(), 100)
+    scheduler.update_ready_queue([make_job("a.blend"), make_job("b.blend")], [])
+    started_tasks = scheduler.start_next_tasks()
+    self.assertEqual(scheduler.progress(), 0)
+    scheduler.finish_task(started_tasks[0].worker_id, render_scheduler.STATUS_FINISHED)
+    self.assertEqual(scheduler.progress(), 50)
+    self.assertFalse(scheduler.is_done())
+    scheduler.finish_task(started_tasks[1].worker_id, render_scheduler.STATUS_FINISHED)
+    self.assertTrue(scheduler.is_done())
+
+  def test_progress_per_frame(self) -> None:
+    """Test that the progress is weighted by frames and the time left follows the frame times."""
+    scheduler = make_scheduler()
+    animation = make_job("a.blend")
+    animation.start = "1"
+    animation.end = "30"
+    animation.high_quality = True
+    still = make_job("b.blend")
+    still.start = "5"
+    scheduler.update_ready_queue([animation, still], [])
+    self.assertEqual([task.frame_count for task in scheduler.ready_queue], [30, 1])
+    self.assertIsNone(scheduler.ready_queue[1].frame_range)
+    task = scheduler.start_next_tasks()[0]
+    self.assertIsNone(scheduler.eta_seconds())
+
+    for frame in range(1, 6):
+      scheduler.report_event(task.worker_id, {"type": "frame_done", "frame": frame, "seconds": 2})
+    self.assertAlmostEqual(scheduler.progress(), 100 * 5 / 31)
+    self.assertEqual(scheduler.eta_seconds(), 52)
+    self.assertEqual(render_scheduler.format_duration(3723.4), "1:02:03")
+
+    scheduler.finish_task(task.worker_id, render_scheduler.STATUS_FINISHED)
+    self.assertAlmostEqual(scheduler.progress(), 100 * 30 / 31)
+
+  def test_job_order(self) -> None:
+    """Test that the tasks are reordered by their expected render time or their blend file."""
+    scheduler = make_scheduler()
+    jobs = [make_job("a.blend"), make_job("b.blend"), make_job("a.blend"), make_job("c.blend")]
+    for job, end in zip(jobs, ["10", "2", "6", "4"], strict=True):
+      job.start = "1"
+      job.end = end
+      job.high_quality = True
+    # The first job renders quickly despite its frame count. The unknown jobs are estimated with
+    # the mean frame time of the known jobs.
+    scheduler.set_expected_seconds(
+      jobs,
+      {render_scheduler.get_job_key(jobs[0]): 10, render_scheduler.get_job_key(jobs[1]): 200},
+    )
+
+    def get_order() -> list[int]:
+      scheduler.update_ready_queue(jobs, [])
+      return [task.job_index for task in scheduler.ready_queue]
+
+    self.assertEqual(get_order(), [0, 1, 2, 3])
+    scheduler.settings.job_order = state_pb2.shortest_first  # pylint: disable=no-member
+    self.assertEqual(get_order(), [0, 1, 3, 2])
+    scheduler.settings.job_order = state_pb2.longest_first  # pylint: disable=no-member
+    self.assertEqual(get_order(), [2, 3, 1, 0])
+    scheduler.settings.job_order = state_pb2.by_file  # pylint: disable=no-member
+    self.assertEqual(get_order(), [0, 2, 1, 3])
+
+  def test_split_frame_range(self) -> None:
+    """Test that frame ranges are split into chunks."""
+    self.assertEqual(render_scheduler.split_frame_range(1, 10), [(1, 10)])
+    self.assertEqual(
+      render_scheduler.split_frame_range(1, 10, chunk_size=4),
+      [(1, 4), (5, 8), (9, 10)],
+    )
+    self.assertEqual(
+      render_scheduler.split_frame_range(1, 10, chunk_count=2),
+      [(1, 5), (6, 10)],
+    )
+    self.assertEqual(
+      render_scheduler.split_frame_range(1, 10, chunk_count=20),
+      [(i, i) for i in range(1, 11)],
+    )
+
+  def test_split_frame_range_frame_step(self) -> None:
+    """Test that the chunks are aligned to the frame step."""
+    self.assertEqual(
+      render_scheduler.split_frame_range(1, 20, frame_step=4, chunk_size=2),
+      [(1, 5), (9, 13), (17, 17)],
+    )
+
+  def test_chunked_job(self) -> None:
+    """Test that a chunked job shares one frame path and gets a single job status."""
+    scheduler = make_scheduler(cpu_workers=4)
+    scheduler.settings.chunk_count = 3
+    scheduler.settings.output_path = "/tmp/renderrob_test_output"
+    job = make_job("/tmp/a.blend")
+    job.start = "1"
+    job.end = "30"
+    job.high_quality = True
+    still_job = make_job("/tmp/b.blend")
+    still_job.start = "1"
+    scheduler.update_ready_queue([job, still_job], [])
+    started_tasks = scheduler.start_next_tasks()
+
+    self.assertEqual(
+      [task.frame_range for task in started_tasks],
+      [(1, 10), (11, 20), (21, 30), None],
+    )
+    self.assertEqual(len({task.frame_path for task in started_tasks[:3]}), 1)
+
+    # Already split jobs are not split again.
+    scheduler.update_ready_queue([job, still_job], [])
+    self.assertEqual(len(scheduler.ready_queue), 0)
+
+    _, job_status = scheduler.finish_task(0, render_scheduler.STATUS_FINISHED)
+    self.assertIsNone(job_status)
+    _, job_status = scheduler.finish_task(1, render_scheduler.STATUS_WARNING)
+    self.assertIsNone(job_status)
+    _, job_status = scheduler.finish_task(2, render_scheduler.STATUS_FINISHED)
+    self.assertEqual(job_status, render_scheduler.STATUS_WARNING)
+
+  def test_get_missing_frame_ranges(self) -> None:
+    """Test that the missing frames are compressed into ranges, which keep the frame step."""
+    self.assertEqual(
+      render_scheduler.get_missing_frame_ranges(1, 10, 1, {3, 4, 8}),
+      [(1, 2), (5, 7), (9, 10)],
+    )
+    self.assertEqual(
+      render_scheduler.get_missing_frame_ranges(1, 13, 3, {1, 7}),
+      [(4, 4), (10, 13)],
+    )
+    self.assertEqual(render_scheduler.get_missing_frame_ranges(1, 3, 1, {1, 2, 3}), [])
+
+  def test_resume_job(self) -> None:
+    """Test that a continued job only renders the missing frames of its last version."""
+    with tempfile.TemporaryDirectory() as output_path:
+      scheduler = make_scheduler(cpu_workers=4)
+      scheduler.settings.chunk_size = 2
+      scheduler.settings.output_path = output_path
+      job = make_job("/tmp/a.blend")
+      job.start = "1"
+      job.end = "8"
+      job.overwrite = True
+      frame_folder = Path(output_path) / "a-pv-v01"
+      frame_folder.mkdir()
+      for frame in (1, 2, 3, 6):
+        (frame_folder / f"a-pv-v01-f{frame:04}.exr").write_bytes(b"png")
+      # An empty frame of an interrupted render is rendered again, but not deleted beforehand.
+      empty_frame = frame_folder / "a-pv-v01-f0007.exr"
+      empty_frame.touch()
+      complete_job = make_job("/tmp/a.blend")
+      complete_job.start = "1"
+      complete_job.end = "3"
+      complete_job.overwrite = True
+
+      complete_jobs = scheduler.update_ready_queue([job, complete_job], [])
+      self.assertEqual(complete_jobs, [1])
+      self.assertTrue(empty_frame.exists())
+      self.assertEqual(
+        [task.frame_range for task in scheduler.ready_queue],
+        [(4, 5), (7, 8)],
+      )
+      self.assertEqual([task.frame_count for task in scheduler.ready_queue], [2, 2])
+
+  def test_failed_chunk_cancels_job(self) -> None:
+    """Test that the remaining chunks of a failed job are not rendered."""
+    scheduler = make_scheduler()
+    scheduler.settings.chunk_size = 5
+    job = make_job("/tmp/a.blend")
+    job.start = "1"
+    job.end = "20"
+    job.high_quality = True
+    scheduler.update_ready_queue([job], [])
+    started_tasks = scheduler.start_next_tasks()
+    self.assertEqual(len(scheduler.ready_queue), 3)
+
+    _, job_status = scheduler.finish_task(
+      started_tasks[0].worker_id,
+      render_scheduler.STATUS_FAILED,
+    )
+    self.assertEqual(job_status, render_scheduler.STATUS_FAILED)
+    self.assertTrue(scheduler.is_done())
+
+  def test_retry_crashed_task(self) -> None:
+    """Test that a crashed task is queued again after its delay with one worker less."""
+    scheduler = make_scheduler(cpu_workers=2)
+    scheduler.retry_policy = retry_policy.RetryPolicy(
+      max_retries=1,
+      delay_seconds=60,
+      reduce_workers=True,
+    )
+    scheduler.update_ready_queue([make_job("/tmp/a.blend"), make_job("/tmp/b.blend")], [])
+    first_task, second_task = scheduler.start_next_tasks()
+    scheduler.report_output(first_task.worker_id, "Segmentation fault (core dumped)")
+
+    _, job_status = scheduler.finish_task(first_task.worker_id, render_scheduler.STATUS_FAILED, 2)
+    self.assertIsNone(job_status)
+    self.assertEqual(first_task.failure, retry_policy.FAILURE_CRASH)
+    self.assertEqual(first_task.retry_delay, 60)
+    self.assertEqual(scheduler.worker_slots[state_pb2.cpu], 1)  # pylint: disable=no-member
+
+    # The retry waits for its delay, even if a worker is free.
+    scheduler.finish_task(second_task.worker_id, render_scheduler.STATUS_FINISHED)
+    self.assertEqual(scheduler.start_next_tasks(), [])
+    self.assertAlmostEqual(scheduler.seconds_until_ready(), 60, delta=1)
+    scheduler.ready_queue[0].ready_at = 0
+    retry_task = scheduler.start_next_tasks()[0]
+    self.assertEqual(retry_task.attempt, 1)
+
+    # The retries are used up.
+    _, job_status = scheduler.finish_task(retry_task.worker_id, render_scheduler.STATUS_FAILED, -11)
+    self.assertEqual(job_status, render_scheduler.STATUS_FAILED)
+    self.assertIsNone(retry_task.retry_delay)
+    self.assertTrue(scheduler.is_done())
+
+  def test_requeue_task(self) -> None:
+    """Test that a task of a lost worker is queued again without counting as a retry."""
+    scheduler = make_scheduler()
+    scheduler.update_ready_queue([make_job("a.blend")], [])
+    task = scheduler.start_next_tasks()[0]
+    scheduler.report_event(task.worker_id, {"type": "frame_done", "frame": 1})
+
+    self.assertIs(scheduler.requeue_task(task.worker_id), task)
+    self.assertEqual(scheduler.running_tasks, {})
+    requeued_task = scheduler.start_next_tasks()[0]
+    self.assertEqual((requeued_task.job_index, requeued_task.attempt), (0, 0))
+    self.assertEqual(requeued_task.frames_done, [])
+    self.assertNotEqual(requeued_task.worker_id, task.worker_id)
+
+  def test_status_from_exit_code(self) -> None:
+    """Test that unknown exit codes, e.g. of a crash, fail the task instead of raising."""
+    self.assertEqual(render_scheduler.status_from_exit_code(0), render_scheduler.STATUS_FINISHED)
+    self.assertEqual(render_scheduler.status_from_exit_code(987), render_scheduler.STATUS_WARNING)
+    self.assertEqual(render_scheduler.status_from_exit_code(-11), render_scheduler.STATUS_FAILED)
+    self.assertEqual(render_scheduler.status_from_exit_code(134), render_scheduler.STATUS_FAILED)
+
+  def test_report_event(self) -> None:
+    """Test that the events of a task make its status worse and record the rendered frames."""
+    scheduler = make_scheduler()
+    scheduler.update_ready_queue([make_job("/tmp/a.blend")], [])
+    task = scheduler.start_next_tasks()[0]
+
+    self.assertIsNone(scheduler.report_event(task.worker_id, {"type": "frame_start", "frame": 1}))
+    scheduler.report_event(task.worker_id, {"type": "frame_done", "frame": 1, "seconds": 2.5})
+    self.assertEqual(task.frames_done, [1])
+    self.assertEqual(
+      scheduler.report_event(task.worker_id, {"type": "warning", "message": "a"}),
+      render_scheduler.STATUS_WARNING,
+    )
+    self.assertIsNone(scheduler.report_event(task.worker_id, {"type": "warning", "message": "b"}))
+    self.assertIsNone(scheduler.report_event(42, {"type": "error", "message": "c"}))
+
+    _, job_status = scheduler.finish_task(task.worker_id, render_scheduler.STATUS_FINISHED)
+    self.assertEqual(job_status, render_scheduler.STATUS_WARNING)
+
+
+if __name__ == "__main__":
+  unittest.main()
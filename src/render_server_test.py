@@ -0,0 +1,105 @@
+"""Tests for render_server.py."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import bpy  # pylint: disable=import-error
+
+from protos import state_pb2
+from render_job_to_rss import render_job_to_server_request
+from utils_bpy import render_server
+from utils_common import print_utils
+
+
+def make_request(output_dir: str, **kwargs: object) -> dict:
+  """Create a request, which renders a tiny image of the test file."""
+  request = {
+    "file": str(Path("test/cube.blend").resolve()),
+    "scene": "",
+    "frame_path": str(Path(output_dir) / "frame_####"),
+    "file_format": "PNG",
+    "python": "import bpy ; bpy.context.scene.render.resolution_percentage = 1",
+    "still": 1,
+  }
+  request.update(kwargs)
+  return {key: value for key, value in request.items() if value is not None}
+
+
+class TestRenderServer(unittest.TestCase):
+  """Tests for the RenderServer class."""
+
+  def setUp(self) -> None:
+    """Set up an output directory."""
+    self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self.server = render_server.RenderServer()
+
+  def tearDown(self) -> None:
+    """Remove the output directory."""
+    self.temp_dir.cleanup()
+
+  def test_render_still(self) -> None:
+    """Test that a still is rendered with the frame number in the file name."""
+    exit_code = self.server.handle_request(make_request(self.temp_dir.name, still=3))
+    self.assertEqual(exit_code, 0)
+    self.assertTrue((Path(self.temp_dir.name) / "frame_0003.png").exists())
+
+  def test_reuse_loaded_file(self) -> None:
+    """Test that the file is not loaded again and the frame range is restored."""
+    self.server.load_file(make_request(self.temp_dir.name)["file"])
+    frame_end = bpy.context.scene.frame_end
+    self.server.handle_request(make_request(self.temp_dir.name))
+    bpy.context.scene["loaded_once"] = True
+    request = make_request(self.temp_dir.name, still=None, start=2, end=2)
+    exit_code = self.server.handle_request(request)
+    self.assertEqual(exit_code, 0)
+    self.assertTrue(bpy.context.scene.get("loaded_once"))
+    self.assertTrue((Path(self.temp_dir.name) / "frame_0002.png").exists())
+
+    self.server.load_file(make_request(self.temp_dir.name)["file"])
+    self.assertEqual(bpy.context.scene.frame_end, frame_end)
+
+  def test_reuse_loaded_file_with_other_settings(self) -> None:
+    """Test that the settings of a job don't carry over to the next job of the same file."""
+    settings = state_pb2.settings()  # pylint: disable=no-member
+    settings.preview.resolution_use = True
+    settings.preview.resolution = 1
+    settings.preview.samples_use = True
+    settings.preview.samples = 1
+    first_job = state_pb2.render_job()  # pylint: disable=no-member
+    first_job.file = make_request(self.temp_dir.name)["file"]
+    first_job.start = "1"
+    first_job.high_quality = True
+    first_job.x_res = "32"
+    first_job.y_res = "16"
+    first_job.samples = "1"
+    # The second job leaves the resolution empty, so the resolution of the file is used.
+    second_job = state_pb2.render_job()  # pylint: disable=no-member
+    second_job.file = first_job.file
+    second_job.start = "2"
+    frame_path = make_request(self.temp_dir.name)["frame_path"]
+    with patch.object(print_utils, "print_info") as print_info:
+      self.server.load_file(first_job.file)
+      resolution = bpy.context.scene.render.resolution_x
+      for job in (first_job, second_job):
+        request = render_job_to_server_request(job, settings, frame_path)
+        self.assertEqual(self.server.handle_request(request), 0)
+    self.assertEqual(self.server.loaded_file, first_job.file)
+    self.assertEqual(bpy.context.scene.render.resolution_x, resolution)
+    self.assertTrue(bpy.context.scene.render.use_stamp)
+    # The custom commands run for every job.
+    self.assertEqual(
+      [call.args for call in print_info.call_args_list].count(("Custom commands executed.",)),
+      2,
+    )
+
+  def test_failed_request(self) -> None:
+    """Test that a failed request returns the error exit code and loads the file again."""
+    request = make_request(self.temp_dir.name, python="import sys ; sys.exit(62097)")
+    self.assertEqual(self.server.handle_request(request), 62097)
+    self.assertIsNone(self.server.loaded_file)
+
+
+if __name__ == "__main__":
+  unittest.main()
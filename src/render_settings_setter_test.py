@@ -7,6 +7,7 @@ from unittest.mock import patch
 import bpy  # pylint: disable=import-error
 
 from utils_bpy import render_settings_setter
+from utils_common import print_utils
 
 
 def check_gpu() -> bool:
@@ -175,5 +176,24 @@ class TestRenderSettingsSetter(unittest.TestCase):
     self.assertFalse(scene.render.use_stamp)
 
 
+
+class TestFrameEvents(unittest.TestCase):
+  """Tests for the events of the rendered frames."""
+
+  def test_peak_memory_per_frame(self):
+    """Test that every frame reports the peak memory of its own render statistics."""
+    scene = bpy.context.scene
+    with patch.object(print_utils, "emit_event") as emit_event:
+      render_settings_setter.report_frame_start(scene)
+      render_settings_setter.report_render_stats("Fra:1 Mem:12.00M (Peak 1.50G) | Time:00:00.12")
+      render_settings_setter.report_frame_done(scene)
+      render_settings_setter.report_frame_start(scene)
+      render_settings_setter.report_render_stats("Mem: 5M | Sample 1/1")
+      render_settings_setter.report_render_stats("Time: 00:00.58 (Saving: 00:00.04)")
+      render_settings_setter.report_frame_done(scene)
+    peak_memory = [call.kwargs["peak_memory_mb"] for call in emit_event.call_args_list[1::2]]
+    self.assertEqual(peak_memory, [1536, 5])
+
+
 if __name__ == "__main__":
   unittest.main()
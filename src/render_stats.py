@@ -0,0 +1,297 @@
+"""Statistics of finished render jobs in a SQLite database.
+
+Every finished job is stored with its wall time, the render times of its frames, the peak memory
+of Blender, its status and a hash of its render settings. The jobs are keyed by their shot name,
+so the renders of a shot can be compared over time, e.g. to predict the duration of a queue or to
+notice that a shot got slower after its blend file changed.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import dataclasses
+import datetime
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+import blend_metadata
+import render_scheduler
+import shot_name_builder
+from protos import state_pb2
+from utils_common import print_utils
+from utils_rr.path_utils import get_abs_blend_path
+
+STATS_FILE_NAME = "render_stats.sqlite"
+# The number of previous renders with the same settings, which predict the duration of a job.
+HISTORY_WINDOW = 5
+# A job is reported as slower, if it took this much longer than its previous renders.
+REGRESSION_FACTOR = 1.5
+
+
+@dataclasses.dataclass
+class JobStats:
+  """The statistics of a finished render job."""
+
+  shot_name: str
+  blend_file: str
+  blend_mtime_ns: int
+  settings_hash: str
+  started_at: float
+  finished_at: float
+  status: str
+  frame_seconds: list[float] = dataclasses.field(default_factory=list)
+  peak_memory_mb: float = 0
+
+  @property
+  def wall_seconds(self) -> float:
+    """Get the time from the start of the first task to the end of the last task of the job."""
+    return self.finished_at - self.started_at
+
+
+def get_stats_path() -> Path:
+  """Get the path of the database, which is shared by the GUI and the command line."""
+  return Path.home() / ".renderrob" / STATS_FILE_NAME
+
+
+def get_settings_hash(
+  job: state_pb2.render_job,  # pylint: disable=no-member
+  settings: state_pb2.settings,  # pylint: disable=no-member
+) -> str:
+  """Get a hash of the settings a job is rendered with.
+
+  It changes with the job and the preview settings, but not if the job is only deactivated or
+  duplicated.
+  """
+  job_copy = state_pb2.render_job()  # pylint: disable=no-member
+  job_copy.CopyFrom(job)
+  job_copy.active = False
+  job_copy.id = ""
+  digest = hashlib.sha256(job_copy.SerializeToString(deterministic=True))
+  digest.update(settings.preview.SerializeToString(deterministic=True))
+  digest.update("\n".join(settings.addons).encode())
+  return digest.hexdigest()[:16]
+
+
+def get_shot_name(
+  job: state_pb2.render_job,  # pylint: disable=no-member
+  settings: state_pb2.settings,  # pylint: disable=no-member
+) -> str:
+  """Get the shot name, by which the renders of a job are stored."""
+  return shot_name_builder.ShotNameBuilder(job, settings.output_path, is_replay_mode=True).shotname
+
+
+def format_history(history: list[JobStats]) -> list[str]:
+  """Format the statistics as one line per render, e.g. for the console."""
+  lines = []
+  for stats in history:
+    finished_at = datetime.datetime.fromtimestamp(stats.finished_at).strftime("%Y-%m-%d %H:%M")
+    line = (
+      f"{finished_at}  {stats.shot_name}  {stats.status}  "
+      f"{render_scheduler.format_duration(stats.wall_seconds)}"
+    )
+    if stats.frame_seconds:
+      mean_seconds = sum(stats.frame_seconds) / len(stats.frame_seconds)
+      line += f"  {len(stats.frame_seconds)} frames, {mean_seconds:.1f} s per frame"
+    if stats.peak_memory_mb:
+      line += f"  peak {stats.peak_memory_mb:.0f} MB"
+    lines.append(f"{line}  settings {stats.settings_hash[:8]}")
+  return lines
+
+
+class RenderStatsDatabase:
+  """SQLite database of the statistics of finished render jobs."""
+
+  def __init__(self, db_path: Path | str) -> None:
+    """Open the database and create the table if necessary."""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    self.connection = sqlite3.connect(str(db_path))
+    self.connection.execute(
+      "CREATE TABLE IF NOT EXISTS renders ("
+      "shot_name TEXT, blend_file TEXT, blend_mtime_ns INTEGER, settings_hash TEXT, "
+      "started_at REAL, finished_at REAL, status TEXT, frame_seconds TEXT, peak_memory_mb REAL)",
+    )
+    self.connection.execute(
+      "CREATE INDEX IF NOT EXISTS renders_by_shot ON renders (shot_name, finished_at)",
+    )
+    self.connection.commit()
+
+  def add(self, stats: JobStats) -> None:
+    """Store the statistics of a finished job."""
+    self.connection.execute(
+      "INSERT INTO renders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+      (
+        stats.shot_name,
+        stats.blend_file,
+        stats.blend_mtime_ns,
+        stats.settings_hash,
+        stats.started_at,
+        stats.finished_at,
+        stats.status,
+        json.dumps(stats.frame_seconds),
+        stats.peak_memory_mb,
+      ),
+    )
+    self.connection.commit()
+
+  def get_history(self, shot_name: str = "", limit: int = 20) -> list[JobStats]:
+    """Get the last renders of a shot or of all shots, the newest first."""
+    query = "SELECT * FROM renders"
+    parameters = []
+    if shot_name:
+      query += " WHERE shot_name = ?"
+      parameters.append(shot_name)
+    query += " ORDER BY finished_at DESC LIMIT ?"
+    parameters.append(limit)
+    return [
+      JobStats(*row[:7], json.loads(row[7]), row[8])
+      for row in self.connection.execute(query, parameters)
+    ]
+
+  def get_expected_seconds(self, shot_name: str, settings_hash: str) -> float | None:
+    """Predict the wall time of a job from its last successful renders with the same settings.
+
+    Returns:
+      The mean wall time in seconds, or None if the job was never rendered with these settings.
+    """
+    rows = self.connection.execute(
+      "SELECT finished_at - started_at FROM renders "
+      "WHERE shot_name = ? AND settings_hash = ? AND status != ? "
+      "ORDER BY finished_at DESC LIMIT ?",
+      (shot_name, settings_hash, render_scheduler.STATUS_FAILED, HISTORY_WINDOW),
+    ).fetchall()
+    if not rows:
+      return None
+    return sum(row[0] for row in rows) / len(rows)
+
+  def predict_jobs(
+    self,
+    jobs: list[state_pb2.render_job],  # pylint: disable=no-member
+    settings: state_pb2.settings,  # pylint: disable=no-member
+  ) -> dict[str, float]:
+    """Predict the wall time of jobs from their previous renders.
+
+    Returns:
+      The expected seconds by the key of the job. Jobs, which were never rendered with their
+      current settings, are left out.
+    """
+    predictions = {}
+    for job in jobs:
+      expected_seconds = self.get_expected_seconds(
+        get_shot_name(job, settings),
+        get_settings_hash(job, settings),
+      )
+      if expected_seconds is not None:
+        predictions[render_scheduler.get_job_key(job)] = expected_seconds
+    return predictions
+
+  def close(self) -> None:
+    """Close the database."""
+    self.connection.close()
+
+
+class StatsRecorder:
+  """Collect the tasks of the jobs while they are rendered and store the finished jobs."""
+
+  def __init__(self, db_path: Path | str) -> None:
+    """Initialize the recorder. The database is only opened once it is needed."""
+    self.db_path = db_path
+    self._database = None
+    self._tasks = {}
+
+  @property
+  def database(self) -> RenderStatsDatabase:
+    """Get the database and open it on the first access."""
+    if self._database is None:
+      self._database = RenderStatsDatabase(self.db_path)
+    return self._database
+
+  def record_task(
+    self,
+    task: render_scheduler.RenderTask,
+    job_status: str | None,
+    settings: state_pb2.settings,  # pylint: disable=no-member
+  ) -> JobStats | None:
+    """Collect a finished task and store its job, once all tasks of the job are finished.
+
+    Args:
+      task: The finished task.
+      job_status: The status of the job, or None as long as other tasks of the job are pending.
+      settings: The settings the job was rendered with.
+
+    Returns:
+      The statistics of the job, if it is finished.
+    """
+    job_key = task.job_key
+    tasks = self._tasks.setdefault(job_key, [])
+    tasks.append(task)
+    if job_status is None:
+      return None
+    del self._tasks[job_key]
+    blend_path = get_abs_blend_path(task.job.file, settings.blender_files_path)
+    signature = blend_metadata.get_file_signature(blend_path)
+    stats = JobStats(
+      shot_name=get_shot_name(task.job, settings),
+      blend_file=blend_path,
+      blend_mtime_ns=signature[0] if signature else 0,
+      settings_hash=get_settings_hash(task.job, settings),
+      started_at=min(chunk.started_at for chunk in tasks),
+      finished_at=max(chunk.finished_at for chunk in tasks),
+      status=job_status,
+      frame_seconds=[seconds for chunk in tasks for seconds in chunk.frame_seconds],
+      peak_memory_mb=max(chunk.peak_memory_mb for chunk in tasks),
+    )
+    try:
+      self.warn_if_slower(stats)
+      self.database.add(stats)
+    except (OSError, sqlite3.Error) as error:
+      print_utils.print_warning(f"Could not store the render statistics: {error}")
+    return stats
+
+  def predict(
+    self,
+    jobs: list[state_pb2.render_job],  # pylint: disable=no-member
+    settings: state_pb2.settings,  # pylint: disable=no-member
+  ) -> dict[str, float]:
+    """Predict the render time of jobs and print it, if some of them were rendered before.
+
+    Returns:
+      The expected seconds by the key of the job.
+    """
+    try:
+      predictions = self.database.predict_jobs(jobs, settings)
+    except (OSError, sqlite3.Error) as error:
+      print_utils.print_warning(f"Could not read the render statistics: {error}")
+      return {}
+    if predictions:
+      print_utils.print_info(
+        f"The previous renders of {len(predictions)} of {len(jobs)} jobs took "
+        f"{render_scheduler.format_duration(sum(predictions.values()))} in total.",
+      )
+    return predictions
+
+  def warn_if_slower(self, stats: JobStats) -> None:
+    """Warn if a job took much longer than its previous renders with the same settings."""
+    expected_seconds = self.database.get_expected_seconds(stats.shot_name, stats.settings_hash)
+    if stats.status == render_scheduler.STATUS_FAILED or not expected_seconds:
+      return
+    if stats.wall_seconds <= REGRESSION_FACTOR * expected_seconds:
+      return
+    message = (
+      f"{stats.shot_name} took {render_scheduler.format_duration(stats.wall_seconds)}, which is "
+      f"{stats.wall_seconds / expected_seconds:.1f} times as long as its previous renders."
+    )
+    previous_renders = self.database.get_history(stats.shot_name, limit=1)
+    if previous_renders and previous_renders[0].blend_mtime_ns != stats.blend_mtime_ns:
+      message += " The blend file changed since the last render."
+    print_utils.print_warning(message)
+
+  def clear(self) -> None:
+    """Forget the tasks of the unfinished jobs, e.g. after the render was stopped."""
+    self._tasks.clear()
+
+  def close(self) -> None:
+    """Close the database, if it was opened."""
+    if self._database is not None:
+      self._database.close()
+      self._database = None
@@ -0,0 +1,104 @@
+"""Unit tests for render_stats.py."""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import render_scheduler
+import render_stats
+from protos import state_pb2
+
+
+def make_stats(shot_name: str, wall_seconds: float, finished_at: float) -> render_stats.JobStats:
+  """Create the statistics of a finished job for testing."""
+  return render_stats.JobStats(
+    shot_name=shot_name,
+    blend_file="/tmp/cube.blend",
+    blend_mtime_ns=1,
+    settings_hash="abc",
+    started_at=finished_at - wall_seconds,
+    finished_at=finished_at,
+    status=render_scheduler.STATUS_FINISHED,
+    frame_seconds=[1.5, 2.5],
+    peak_memory_mb=512,
+  )
+
+
+class TestRenderStats(unittest.TestCase):
+  """Tests for the render_stats module."""
+
+  def setUp(self) -> None:
+    """Create the database in a temporary directory."""
+    self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self.db_path = Path(self.temp_dir.name) / "stats" / render_stats.STATS_FILE_NAME
+
+  def tearDown(self) -> None:
+    """Remove the temporary directory."""
+    self.temp_dir.cleanup()
+
+  def test_database(self):
+    """Test that the renders are stored by shot and predict the duration of the next render."""
+    database = render_stats.RenderStatsDatabase(self.db_path)
+    database.add(make_stats("cube-pv-v$$", 10, 100))
+    database.add(make_stats("cube-pv-v$$", 20, 200))
+    database.add(make_stats("sphere-pv-v$$", 30, 300))
+    failed_stats = make_stats("cube-pv-v$$", 1000, 400)
+    failed_stats.status = render_scheduler.STATUS_FAILED
+    database.add(failed_stats)
+
+    history = database.get_history("cube-pv-v$$")
+    self.assertEqual([stats.finished_at for stats in history], [400, 200, 100])
+    self.assertEqual(history[1], make_stats("cube-pv-v$$", 20, 200))
+    self.assertEqual(len(database.get_history(limit=2)), 2)
+    self.assertEqual(database.get_expected_seconds("cube-pv-v$$", "abc"), 15)
+    self.assertIsNone(database.get_expected_seconds("cube-pv-v$$", "other"))
+    database.close()
+
+  def test_settings_hash(self):
+    """Test that the settings hash ignores whether the job is active."""
+    settings = state_pb2.settings()  # pylint: disable=no-member
+    job = state_pb2.render_job()  # pylint: disable=no-member
+    job.file = "cube.blend"
+    settings_hash = render_stats.get_settings_hash(job, settings)
+    job.active = True
+    self.assertEqual(render_stats.get_settings_hash(job, settings), settings_hash)
+    job.samples = "64"
+    self.assertNotEqual(render_stats.get_settings_hash(job, settings), settings_hash)
+
+  def test_record_task(self):
+    """Test that the chunks of a job are stored as a single render."""
+    settings = state_pb2.settings()  # pylint: disable=no-member
+    settings.output_path = self.temp_dir.name
+    job = state_pb2.render_job()  # pylint: disable=no-member
+    job.file = "/tmp/cube.blend"
+    job.start = "1"
+    job.end = "4"
+    recorder = render_stats.StatsRecorder(self.db_path)
+    first_chunk = render_scheduler.RenderTask(0, job, frame_range=(1, 2), started_at=10)
+    first_chunk.finished_at = 20
+    first_chunk.frame_seconds = [4, 5]
+    first_chunk.peak_memory_mb = 100
+    second_chunk = render_scheduler.RenderTask(0, job, frame_range=(3, 4), started_at=12)
+    second_chunk.finished_at = 25
+    second_chunk.frame_seconds = [6, 7]
+    second_chunk.peak_memory_mb = 300
+
+    self.assertIsNone(recorder.record_task(first_chunk, None, settings))
+    stats = recorder.record_task(second_chunk, render_scheduler.STATUS_WARNING, settings)
+    self.assertEqual(stats.shot_name, "cube-pv-v$$")
+    self.assertEqual(stats.wall_seconds, 15)
+    self.assertEqual(stats.frame_seconds, [4, 5, 6, 7])
+    self.assertEqual(stats.peak_memory_mb, 300)
+    self.assertEqual(recorder.database.get_history(), [stats])
+
+    # A render, which takes much longer than the previous ones, is reported.
+    slow_chunk = render_scheduler.RenderTask(0, job, started_at=100)
+    slow_chunk.finished_at = 200
+    with patch("utils_common.print_utils.print_warning") as print_warning:
+      recorder.record_task(slow_chunk, render_scheduler.STATUS_FINISHED, settings)
+    self.assertIn("6.7 times as long", print_warning.call_args.args[0])
+    recorder.close()
+
+
+if __name__ == "__main__":
+  unittest.main()
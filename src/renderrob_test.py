@@ -1,6 +1,8 @@
 """Unit tests for main module."""
 import unittest
 
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
 from PySide6.QtWidgets import QApplication
 
 import main
@@ -45,6 +47,31 @@ class TestMainWindow(unittest.TestCase):
     self.assertTrue(filepath in self.main_window.cache.current_file)
     self.assertEqual(self.main_window.cache.current_file, filepath)
 
+  def test_set_table_colors(self):
+    """Test that duplicates and missing blend files are colored."""
+    self.main_window.open_file("test/basic_state.rrp")
+    model = self.main_window.model
+    model.insert_job(1, model.job(0))
+    model.insertRows(2, 1)
+    model.set_value(2, 1, "test/missing.blend")
+    self.main_window.set_table_colors()
+    yellow = QColor(table_utils.COLORS["yellow"])
+    red = QColor(table_utils.COLORS["red"])
+    self.assertEqual(model.index(0, 2).data(Qt.BackgroundRole), yellow)
+    self.assertEqual(model.index(1, 2).data(Qt.BackgroundRole), yellow)
+    self.assertEqual(
+      model.index(2, 2).data(Qt.BackgroundRole),
+      QColor(table_utils.COLORS["grey_light"]),
+    )
+    self.assertEqual(model.index(2, 1).data(Qt.BackgroundRole), red)
+    self.assertNotEqual(model.index(0, 1).data(Qt.BackgroundRole), red)
+
+    # Coloring again without changes doesn't repaint any row.
+    changed_rows = []
+    model.dataChanged.connect(lambda top_left, *_: changed_rows.append(top_left.row()))
+    self.main_window.set_table_colors()
+    self.assertEqual(changed_rows, [])
+
   def test_quit(self):
     """Test the quit function."""
     self.main_window.quit()
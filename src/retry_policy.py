@@ -0,0 +1,118 @@
+"""Retry policy, which renders tasks again after a transient failure of Blender.
+
+A failed task is classified by the exit code of Blender, the signatures in its output and the
+crash log Blender writes. Crashes and a lack of memory often don't happen again, e.g. if another
+job freed its memory in the meantime, so these tasks are rendered again after a delay, which
+doubles with every retry. Errors, which RenderRob found in the job itself, are not retried.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import dataclasses
+import re
+import tempfile
+from pathlib import Path
+
+from protos import state_pb2
+from utils_common.render_protocol import EXIT_CODE_FAILED
+
+FAILURE_CRASH = "crash"
+FAILURE_OUT_OF_MEMORY = "out of memory"
+FAILURE_ERROR = "error"
+FAILURE_UNKNOWN = "unknown"
+TRANSIENT_FAILURES = (FAILURE_CRASH, FAILURE_OUT_OF_MEMORY)
+
+# Negative exit codes are signals, exit codes above 128 are signals reported by a shell and the
+# large exit codes are the NTSTATUS codes of Windows.
+CRASH_EXIT_CODES = {
+  -11,  # SIGSEGV
+  -6,  # SIGABRT
+  -7,  # SIGBUS
+  -4,  # SIGILL
+  139,
+  134,
+  135,
+  132,
+  0xC0000005,  # STATUS_ACCESS_VIOLATION
+  0xC0000409,  # STATUS_STACK_BUFFER_OVERRUN
+}
+OUT_OF_MEMORY_EXIT_CODES = {
+  -9,  # SIGKILL, usually sent by the out of memory killer.
+  137,
+  0xC0000017,  # STATUS_NO_MEMORY
+}
+LOG_SIGNATURES = (
+  (
+    re.compile(r"out of (gpu |device |host )?memory|MemoryError|std::bad_alloc", re.I),
+    FAILURE_OUT_OF_MEMORY,
+  ),
+  (re.compile(r"Segmentation fault|EXCEPTION_ACCESS_VIOLATION|\.crash\.txt"), FAILURE_CRASH),
+)
+
+
+def match_log_signature(line: str) -> str | None:
+  """Get the failure, which a line of the Blender output is a sign of, if any."""
+  for pattern, failure in LOG_SIGNATURES:
+    if pattern.search(line):
+      return failure
+  return None
+
+
+def get_crash_log_path(blend_path: str) -> Path:
+  """Get the path of the crash log, which Blender writes into the temporary directory."""
+  return Path(tempfile.gettempdir()) / f"{Path(blend_path).stem or 'blender'}.crash.txt"
+
+
+def has_crash_log(blend_path: str, since: float) -> bool:
+  """Check if Blender wrote a crash log for a blend file after the given time."""
+  try:
+    return get_crash_log_path(blend_path).stat().st_mtime >= since
+  except OSError:
+    return False
+
+
+def classify_failure(exit_code: int | None, crashed: bool, signatures: set[str]) -> str:
+  """Classify the failure of a task.
+
+  Args:
+    exit_code: The exit code of Blender, or None if it is unknown.
+    crashed: Whether Blender was terminated by a signal.
+    signatures: The failures, which the output of Blender showed signs of.
+
+  Returns:
+    One of the FAILURE constants.
+  """
+  if exit_code == EXIT_CODE_FAILED or FAILURE_ERROR in signatures:
+    return FAILURE_ERROR
+  if FAILURE_OUT_OF_MEMORY in signatures or exit_code in OUT_OF_MEMORY_EXIT_CODES:
+    return FAILURE_OUT_OF_MEMORY
+  if crashed or FAILURE_CRASH in signatures or exit_code in CRASH_EXIT_CODES:
+    return FAILURE_CRASH
+  return FAILURE_UNKNOWN
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+  """How often and when failed tasks are rendered again."""
+
+  max_retries: int = 0
+  # The delay before the first retry. It doubles with every further retry.
+  delay_seconds: float = 0
+  # Whether a device class renders with one worker less after a transient failure.
+  reduce_workers: bool = False
+
+  @classmethod
+  def from_settings(
+    cls,
+    settings: state_pb2.settings,  # pylint: disable=no-member
+  ) -> "RetryPolicy":
+    """Create the policy from the settings of a project."""
+    return cls(settings.max_retries, settings.retry_delay, settings.retry_reduce_workers)
+
+  def should_retry(self, failure: str, attempt: int) -> bool:
+    """Check if a task, which already was retried attempt times, is rendered again."""
+    return failure in TRANSIENT_FAILURES and attempt < self.max_retries
+
+  def get_delay(self, attempt: int) -> float:
+    """Get the delay before a task, which already was retried attempt times, is started again."""
+    return self.delay_seconds * 2**attempt
@@ -0,0 +1,69 @@
+"""Unit tests for retry_policy.py."""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import retry_policy
+
+
+class TestRetryPolicy(unittest.TestCase):
+  """Tests for the retry_policy module."""
+
+  def test_classify_failure(self) -> None:
+    """Test that failures are classified by the exit code and the output of Blender."""
+    self.assertEqual(retry_policy.classify_failure(-11, False, set()), retry_policy.FAILURE_CRASH)
+    self.assertEqual(retry_policy.classify_failure(2, True, set()), retry_policy.FAILURE_CRASH)
+    self.assertEqual(
+      retry_policy.classify_failure(137, False, set()),
+      retry_policy.FAILURE_OUT_OF_MEMORY,
+    )
+    self.assertEqual(
+      retry_policy.classify_failure(139, False, {retry_policy.FAILURE_OUT_OF_MEMORY}),
+      retry_policy.FAILURE_OUT_OF_MEMORY,
+    )
+    # Errors, which RenderRob found in the job, are not transient.
+    self.assertEqual(retry_policy.classify_failure(62097, False, set()), retry_policy.FAILURE_ERROR)
+    self.assertEqual(
+      retry_policy.classify_failure(139, False, {retry_policy.FAILURE_ERROR}),
+      retry_policy.FAILURE_ERROR,
+    )
+    self.assertEqual(retry_policy.classify_failure(2, False, set()), retry_policy.FAILURE_UNKNOWN)
+
+  def test_match_log_signature(self) -> None:
+    """Test that the output of Blender is searched for signs of a crash or a lack of memory."""
+    self.assertEqual(
+      retry_policy.match_log_signature("Writing: /tmp/cube.crash.txt"),
+      retry_policy.FAILURE_CRASH,
+    )
+    self.assertEqual(
+      retry_policy.match_log_signature("Error: System is out of GPU memory"),
+      retry_policy.FAILURE_OUT_OF_MEMORY,
+    )
+    self.assertIsNone(retry_policy.match_log_signature("Fra:1 Mem:12.00M | Rendering"))
+
+  def test_has_crash_log(self) -> None:
+    """Test that only a crash log, which was written after the task started, is found."""
+    with tempfile.TemporaryDirectory() as temp_dir, patch("tempfile.gettempdir") as gettempdir:
+      gettempdir.return_value = temp_dir
+      started_at = time.time() - 10
+      self.assertFalse(retry_policy.has_crash_log("/projects/cube.blend", started_at))
+      (Path(temp_dir) / "cube.crash.txt").write_text("backtrace", encoding="utf-8")
+      self.assertTrue(retry_policy.has_crash_log("/projects/cube.blend", started_at))
+      self.assertFalse(retry_policy.has_crash_log("/projects/cube.blend", time.time() + 10))
+
+  def test_retry_policy(self) -> None:
+    """Test that only transient failures are retried with a growing delay."""
+    policy = retry_policy.RetryPolicy(max_retries=2, delay_seconds=30)
+    self.assertTrue(policy.should_retry(retry_policy.FAILURE_CRASH, 0))
+    self.assertTrue(policy.should_retry(retry_policy.FAILURE_OUT_OF_MEMORY, 1))
+    self.assertFalse(policy.should_retry(retry_policy.FAILURE_CRASH, 2))
+    self.assertFalse(policy.should_retry(retry_policy.FAILURE_ERROR, 0))
+    self.assertFalse(policy.should_retry(retry_policy.FAILURE_UNKNOWN, 0))
+    self.assertEqual([policy.get_delay(attempt) for attempt in range(3)], [30, 60, 120])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,153 @@
+"""Append-only journal of a render run, so an interrupted queue can be resumed after a restart.
+
+The start and the status of every job are appended to a file next to the project as JSON lines.
+If RenderRob or the machine stops in the middle of a queue, the journal of the last run is
+replayed, so the jobs it already rendered keep their status and only the others are rendered.
+The records are flushed right away, so they survive a crash of RenderRob, but they are only synced
+to the disk if the last sync is a few seconds ago, so a fast queue doesn't wait for the disk. A
+job, whose record got lost in a crash of the machine, is just rendered again.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from protos import state_pb2
+from utils_common import print_utils
+
+JOURNAL_SUFFIX = ".journal"
+SYNC_INTERVAL_SECONDS = 2
+
+RECORD_RUN_START = "run_start"
+RECORD_RUN_RESUME = "run_resume"
+RECORD_JOB_START = "job_start"
+RECORD_JOB_FINISH = "job_finish"
+RECORD_RUN_END = "run_end"
+
+
+def get_journal_path(project_path: Path | str) -> Path:
+  """Get the path of the journal of a project, e.g. my_project.rrp.journal."""
+  return Path(f"{project_path}{JOURNAL_SUFFIX}")
+
+
+def get_job_id(job: state_pb2.render_job) -> str:  # pylint: disable=no-member
+  """Get the id of a job in the journal. It changes if the job is edited.
+
+  The settings are part of the id, so a job, which was edited after the interrupted run, is
+  rendered again when the run is resumed.
+  """
+  return hashlib.sha256(job.SerializeToString(deterministic=True)).hexdigest()[:16]
+
+
+def read_records(journal_path: Path | str) -> list[dict]:
+  """Read the records of a journal. A line, which was only partly written, is left out."""
+  try:
+    lines = Path(journal_path).read_text(encoding="utf-8").splitlines()
+  except OSError:
+    return []
+  records = []
+  for line in lines:
+    try:
+      records.append(json.loads(line))
+    except json.JSONDecodeError:
+      continue
+  return records
+
+
+def get_interrupted_run(journal_path: Path | str) -> dict[str, str] | None:
+  """Replay the journal of the last run, if it was interrupted.
+
+  Returns:
+    The status of the finished jobs of the last run by job id, or None if there is no run or the
+    last run rendered all its jobs.
+  """
+  statuses = None
+  for record in read_records(journal_path):
+    if record["type"] == RECORD_RUN_START:
+      statuses = {}
+    elif record["type"] == RECORD_RUN_END:
+      statuses = None
+    elif record["type"] == RECORD_JOB_FINISH and statuses is not None:
+      statuses[record["job"]] = record["status"]
+  return statuses
+
+
+class RunJournal:
+  """Append the events of a render run to the journal of a project."""
+
+  def __init__(self, journal_path: Path | str) -> None:
+    """Initialize the journal. The file is only opened once a run starts."""
+    self.path = Path(journal_path)
+    self._file = None
+    self._last_sync = 0
+    self._started_jobs = set()
+
+  def start_run(self, resume: bool = False) -> None:
+    """Start a new run, which replaces the previous one, or continue the interrupted run."""
+    self.close()
+    self._started_jobs = set()
+    try:
+      self.path.parent.mkdir(parents=True, exist_ok=True)
+      # pylint: disable-next=consider-using-with
+      self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+    except OSError as error:
+      print_utils.print_warning(f"Could not write the run journal {self.path}: {error}")
+      return
+    self._write({"type": RECORD_RUN_RESUME if resume else RECORD_RUN_START}, sync=True)
+
+  def job_started(self, job: state_pb2.render_job, row: int) -> None:  # pylint: disable=no-member
+    """Record the start of a job. Further chunks of the job are not recorded."""
+    job_id = get_job_id(job)
+    if job_id in self._started_jobs:
+      return
+    self._started_jobs.add(job_id)
+    self._write({"type": RECORD_JOB_START, "job": job_id, "row": row})
+
+  def job_finished(
+    self,
+    job: state_pb2.render_job,  # pylint: disable=no-member
+    row: int,
+    status: str,
+  ) -> None:
+    """Record the status of a finished job."""
+    self._write(
+      {"type": RECORD_JOB_FINISH, "job": get_job_id(job), "row": row, "status": status},
+    )
+
+  def end_run(self) -> None:
+    """Record that all jobs of the run are rendered and close the journal."""
+    self._write({"type": RECORD_RUN_END}, sync=True)
+    self.close()
+
+  def close(self) -> None:
+    """Sync and close the journal. A run, which didn't end, can be resumed later."""
+    if self._file is None:
+      return
+    try:
+      self._sync()
+      self._file.close()
+    except OSError:
+      pass
+    self._file = None
+
+  def _write(self, record: dict, sync: bool = False) -> None:
+    """Append a record and sync the file, if the last sync is long enough ago."""
+    if self._file is None:
+      return
+    record["time"] = time.time()
+    try:
+      self._file.write(json.dumps(record) + "\n")
+      self._file.flush()
+      if sync or time.time() - self._last_sync >= SYNC_INTERVAL_SECONDS:
+        self._sync()
+    except OSError as error:
+      print_utils.print_warning(f"Could not write the run journal {self.path}: {error}")
+
+  def _sync(self) -> None:
+    """Write the records to the disk."""
+    os.fsync(self._file.fileno())
+    self._last_sync = time.time()
@@ -0,0 +1,79 @@
+"""Unit tests for run_journal.py."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import run_journal
+from protos import state_pb2
+
+
+def make_job(blend_file: str) -> state_pb2.render_job:  # pylint: disable=no-member
+  """Create a render job for testing."""
+  render_job = state_pb2.render_job()  # pylint: disable=no-member
+  render_job.file = blend_file
+  render_job.active = True
+  return render_job
+
+
+class TestRunJournal(unittest.TestCase):
+  """Tests for the run_journal module."""
+
+  def setUp(self) -> None:
+    """Create the journal in a temporary directory."""
+    self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self.journal_path = run_journal.get_journal_path(Path(self.temp_dir.name) / "project.rrp")
+
+  def tearDown(self) -> None:
+    """Remove the temporary directory."""
+    self.temp_dir.cleanup()
+
+  def test_interrupted_run(self) -> None:
+    """Test that the finished jobs of an interrupted run are replayed."""
+    first_job = make_job("a.blend")
+    second_job = make_job("b.blend")
+    journal = run_journal.RunJournal(self.journal_path)
+    journal.start_run()
+    journal.job_started(first_job, 0)
+    journal.job_started(first_job, 0)
+    journal.job_started(second_job, 1)
+    journal.job_finished(first_job, 0, "warning")
+    journal.close()
+
+    records = run_journal.read_records(self.journal_path)
+    self.assertEqual(
+      [record["type"] for record in records],
+      ["run_start", "job_start", "job_start", "job_finish"],
+    )
+    first_id = run_journal.get_job_id(first_job)
+    self.assertEqual(run_journal.get_interrupted_run(self.journal_path), {first_id: "warning"})
+
+    # A resumed run keeps the statuses of the interrupted run.
+    journal.start_run(resume=True)
+    journal.job_finished(second_job, 1, "finished")
+    journal.close()
+    # A line, which was only partly written before a crash, is left out.
+    with open(self.journal_path, "a", encoding="utf-8") as journal_file:
+      journal_file.write('{"type": "job_fin')
+    self.assertEqual(
+      run_journal.get_interrupted_run(self.journal_path),
+      {first_id: "warning", run_journal.get_job_id(second_job): "finished"},
+    )
+
+  def test_finished_run(self) -> None:
+    """Test that a run, which rendered all its jobs, can't be resumed."""
+    self.assertIsNone(run_journal.get_interrupted_run(self.journal_path))
+    journal = run_journal.RunJournal(self.journal_path)
+    journal.start_run()
+    journal.job_finished(make_job("a.blend"), 0, "finished")
+    journal.end_run()
+    self.assertIsNone(run_journal.get_interrupted_run(self.journal_path))
+
+    # A new run replaces the previous one.
+    journal.start_run()
+    journal.close()
+    self.assertEqual(run_journal.get_interrupted_run(self.journal_path), {})
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -44,6 +44,17 @@ class SettingsWindow:
     self.window.spinBox_2.setValue(int(self.state.preview.frame_step))
     self.window.spinBox.setValue(int(self.state.preview.resolution))
     self.window.spinBox_4.setValue(int(self.state.fps))
+    self.window.spinBox_5.setValue(max(int(self.state.cpu_workers), 1))
+    self.window.spinBox_6.setValue(max(int(self.state.gpu_workers), 1))
+    self.window.spinBox_7.setValue(int(self.state.chunk_size))
+    self.window.spinBox_8.setValue(int(self.state.chunk_count))
+    # The items of the combo box are in the order of the job_order enum.
+    self.window.comboBox_order.setCurrentIndex(self.state.job_order)
+    self.window.spinBox_9.setValue(int(self.state.max_retries))
+    self.window.spinBox_10.setValue(int(self.state.retry_delay))
+    self.window.checkBox_4.setCheckState(
+      Qt.Checked if self.state.retry_reduce_workers else Qt.Unchecked,
+    )
 
     self.window.lineEdit_4.setText(";".join(self.state.addons))
 
@@ -101,6 +112,15 @@ class SettingsWindow:
     fps = self.window.spinBox_4.cleanText()
     self.state.fps = int(fps) if resolution else 0
 
+    self.state.cpu_workers = self.window.spinBox_5.value()
+    self.state.gpu_workers = self.window.spinBox_6.value()
+    self.state.chunk_size = self.window.spinBox_7.value()
+    self.state.chunk_count = self.window.spinBox_8.value()
+    self.state.job_order = self.window.comboBox_order.currentIndex()
+    self.state.max_retries = self.window.spinBox_9.value()
+    self.state.retry_delay = self.window.spinBox_10.value()
+    self.state.retry_reduce_workers = self.window.checkBox_4.isChecked()
+
     del self.state.addons[:]
     addons_str = self.window.lineEdit_4.text()
     for addon in addons_str.split(";"):
@@ -1,9 +1,15 @@
 """Class to build a shot name from the render job."""
 
+import os
+import re
 from pathlib import Path
 
 from protos import state_pb2
-from utils_rr import ui_utils
+from utils_rr import render_constants
+from utils_rr.path_utils import invalidate_directory, list_directory
+
+VERSION_PLACEHOLDER = "v$$"
+MAX_VERSION = 1000
 
 
 def still_or_animation(start: str, end: str) -> str:
@@ -21,6 +27,58 @@ def still_or_animation(start: str, end: str) -> str:
   raise ValueError(msg)
 
 
+def find_versions(directory: Path, name: str, directories_only: bool = False) -> dict[int, Path]:
+  """Find the existing versions of a file or folder name with a version placeholder.
+
+  Args:
+    directory: The directory, which contains the versions.
+    name: The name of the file or folder with the version placeholder.
+    directories_only: Whether to only consider directories.
+
+  Returns:
+    The existing versions with their paths.
+  """
+  prefix, _, suffix = name.partition(VERSION_PLACEHOLDER)
+  pattern = re.compile(f"{re.escape(prefix)}v(\\d{{2,}}){re.escape(suffix)}")
+  versions = {}
+  for entry_name, is_dir in list_directory(directory).items():
+    match = pattern.fullmatch(entry_name)
+    if not match or (directories_only and not is_dir):
+      continue
+    version = int(match.group(1))
+    # Only names, which the version number formatting creates, are versions. E.g. not v001.
+    if version <= MAX_VERSION and str(version).zfill(2) == match.group(1):
+      versions[version] = directory / entry_name
+  return versions
+
+
+def find_rendered_frames(frame_path: str) -> set[int]:
+  """Find the frames of an animation, which are already rendered into its folder.
+
+  The folder is listed once. Empty files, which are left behind by an interrupted render, count as
+  missing. They are kept, since Blender replaces them, when it renders their frame range.
+
+  Args:
+    frame_path: The path of the frames with #### as the placeholder of the frame number.
+
+  Returns:
+    The numbers of the rendered frames.
+  """
+  directory, _, frame_name = frame_path.rpartition("/")
+  prefix, _, suffix = frame_name.partition("####")
+  pattern = re.compile(f"{re.escape(prefix)}(\\d+){re.escape(suffix)}")
+  rendered_frames = set()
+  try:
+    with os.scandir(directory or ".") as entries:
+      for entry in entries:
+        match = pattern.fullmatch(entry.name)
+        if match and entry.is_file() and entry.stat().st_size > 0:
+          rendered_frames.add(int(match.group(1)))
+  except OSError:
+    return set()
+  return rendered_frames
+
+
 class ShotNameBuilder:
   """Class to build a shot name from the render job."""
 
@@ -29,6 +87,7 @@ class ShotNameBuilder:
     render_job: state_pb2.render_job,  # pylint: disable=no-member
     output_path: str,
     is_replay_mode: bool = False,
+    reserved_versions: dict[str, int] | None = None,
   ) -> None:
     """Initialize the shot name builder.
 
@@ -37,9 +96,12 @@ class ShotNameBuilder:
       output_path: The path to the output folder.
       is_replay_mode: Whether the path is used for showing the result. If so, the version number
         is not increased.
+      reserved_versions: The highest version, which was handed out to a job rendering in
+        parallel, by the frame path without version. A new version is higher and is added to it.
     """
     self.render_job = render_job
     self.replay_mode = is_replay_mode
+    self.reserved_versions = reserved_versions
     self.shotname = self.get_shotname()
     self.frame_path = self.get_full_frame_path(output_path, self.shotname)
 
@@ -76,46 +138,62 @@ class ShotNameBuilder:
       scene_name,
       view_layer_name,
       quality_state_string,
-      "v$$",
+      VERSION_PLACEHOLDER,
     ]
 
     return "-".join(filter(None, shotname_arr)).replace(" ", "_")
 
   def set_version_number(self, full_frame_path: str) -> str:
-    """Get the version number of the shot."""
+    """Get the version number of the shot.
+
+    The existing versions are found in a single, cached listing of the folder containing them.
+    """
     _full_frame_path = Path(full_frame_path)
-    for shot_iter_num in range(1000, -1, -1):
-      # STILL
-      if "v$$" not in _full_frame_path.parent.parts[-1]:
-        still_path = full_frame_path.replace("v$$", "v" + str(shot_iter_num).zfill(2))
-        if Path(still_path).exists():
-          break
-        continue
-      # ANIMATION
-      folderpath_str = str(_full_frame_path.parent).replace(
-        "v$$",
-        "v" + str(shot_iter_num).zfill(2),
+    # STILL
+    if VERSION_PLACEHOLDER not in _full_frame_path.parent.name:
+      versions = find_versions(_full_frame_path.parent, _full_frame_path.name)
+      shot_iter_num = max(versions, default=0)
+    # ANIMATION
+    else:
+      versions = find_versions(
+        _full_frame_path.parent.parent,
+        _full_frame_path.parent.name,
+        directories_only=True,
       )
-      folderpath = Path(folderpath_str)
-      if folderpath.exists():
-        if any(folderpath.iterdir()):
-          break
-        shot_iter_num -= 1
-        break
+      shot_iter_num = max(versions, default=0)
+      # An empty folder of the last version is used again.
+      if versions:
+        try:
+          with os.scandir(versions[shot_iter_num]) as entries:
+            is_empty = next(entries, None) is None
+        except OSError:
+          # The folder was removed since the cached listing, so it counts as empty.
+          invalidate_directory(_full_frame_path.parent.parent)
+          is_empty = True
+        if is_empty:
+          shot_iter_num -= 1
 
     shot_iter_num += 1
-    if shot_iter_num > 1 and (self.replay_mode or self.render_job.overwrite):
-      shot_iter_num -= 1
+    if self.replay_mode or self.render_job.overwrite:
+      if shot_iter_num > 1:
+        shot_iter_num -= 1
+    elif self.reserved_versions is not None:
+      # The folder of a version, which another job just started to render, can still be empty.
+      shot_iter_num = max(shot_iter_num, self.reserved_versions.get(full_frame_path, 0) + 1)
+      self.reserved_versions[full_frame_path] = shot_iter_num
 
     # Update full_frame_path with iteration number.
-    return full_frame_path.replace("v$$", f"v{str(shot_iter_num).zfill(2)}")
+    return full_frame_path.replace(VERSION_PLACEHOLDER, f"v{str(shot_iter_num).zfill(2)}")
 
   def get_full_frame_path(self, output_path: str, shotname: str) -> str:
     """Build the path to the frames including the file name and directory."""
-    if not output_path:
+    if output_path:
+      output_path = Path(output_path)
+    else:
       output_path = Path(self.render_job.file.replace("\\", "/")).parent
 
-    frame_name = f"{shotname}-f####.{ui_utils.FILE_FORMATS_ACTUAL[self.render_job.file_format]}"
+    file_extension = render_constants.FILE_FORMATS_ACTUAL[self.render_job.file_format]
+    frame_name = f"{shotname}-f####.{file_extension}"
     if still_or_animation(self.render_job.start, self.render_job.end) == "STILL":
       frame_render_folder = output_path / "stills"
       frame_name = frame_name.replace("f####", f"f{str(self.render_job.start).zfill(4)}")
@@ -1,11 +1,13 @@
 """Unit tests for shot_name_builder.py."""
 import os
 import pathlib
+import shutil
 import tempfile
 import unittest
 
 import shot_name_builder
 from protos import state_pb2
+from utils_rr import path_utils
 
 
 class TestShotNameBuilder(unittest.TestCase):
@@ -246,5 +248,46 @@ class TestShotNameBuilder(unittest.TestCase):
                                     ).replace("\\", "/"))
 
 
+  def test_find_versions(self) -> None:
+    """Test that only names created by the version formatting are versions."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      for name in ["shot-v01", "shot-v02", "shot-v123", "shot-v003", "shot-v04-old", "other-v05"]:
+        (pathlib.Path(tempdir) / name).mkdir()
+      (pathlib.Path(tempdir) / "shot-v06").touch()
+      versions = shot_name_builder.find_versions(pathlib.Path(tempdir), "shot-v$$")
+      self.assertEqual(sorted(versions), [1, 2, 6, 123])
+      versions = shot_name_builder.find_versions(
+        pathlib.Path(tempdir),
+        "shot-v$$",
+        directories_only=True,
+      )
+      self.assertEqual(sorted(versions), [1, 2, 123])
+      self.assertEqual(versions[1], pathlib.Path(tempdir) / "shot-v01")
+
+  def test_set_version_number_removed_folder(self) -> None:
+    """Test that a version folder, which was removed after it was listed, counts as empty."""
+    with tempfile.TemporaryDirectory() as tempdir:
+      render_job = state_pb2.render_job()  # pylint:disable=no-member
+      render_job.file = "/home/rob/Projects/RenderRob/rr_test.blend"
+      render_job.high_quality = True
+      version_folder = pathlib.Path(tempdir) / "rr_test-hq-v01"
+      version_folder.mkdir()
+      (version_folder / "rr_test-hq-v01-f0001.png").touch()
+      versionless_frame = f"{tempdir}/rr_test-hq-v$$/rr_test-hq-v$$-f####.png"
+      snb = shot_name_builder.ShotNameBuilder(render_job, tempdir)
+      # The listing of a watched folder is reused without checking the folder again. Listings of
+      # folders, which were modified just now, are never cached.
+      os.utime(tempdir, (0, 0))
+      path_utils.watch_directory(tempdir)
+      try:
+        self.assertIn("-v02/", snb.set_version_number(versionless_frame))
+        shutil.rmtree(version_folder)
+        self.assertIn("-v01/", snb.set_version_number(versionless_frame))
+        versions = shot_name_builder.find_versions(pathlib.Path(tempdir), "rr_test-hq-v$$")
+        self.assertEqual(versions, {})
+      finally:
+        path_utils.unwatch_directory(tempdir)
+
+
 if __name__ == "__main__":
   unittest.main()
@@ -1,28 +1,12 @@
 """Class to provide storing methods to the render rob proto class.
 
 Note: Only the state of the table is being handled here. The state of the settings
-is being handled in the settings window class.
+is being handled in the settings window class. The table model edits the render jobs
+of the state directly, so the state doesn't need to be synced with the table.
 """
 
-import json
-from pathlib import Path
-from typing import Any
-
-from PySide6.QtWidgets import QCheckBox, QTableWidget, QTableWidgetItem
-
 from protos import state_pb2
-from utils_rr import path_utils, table_utils, ui_utils
-
-
-def get_text(item: QTableWidgetItem, widget: str = None) -> str:
-  """Get the text from a table item."""
-  if not item:
-    return ""
-  if widget == "dropdown":
-    return item.currentText().replace(" ", "_")
-  if widget == "checkbox":
-    return item.findChild(QCheckBox).isChecked()
-  return item.text()
+from utils_rr import path_utils, ui_utils
 
 
 def init_settings(state: state_pb2.render_rob_state) -> None:  # pylint: disable=no-member
@@ -32,14 +16,10 @@ def init_settings(state: state_pb2.render_rob_state) -> None:  # pylint: disable
   state.settings.preview.samples = 16
   state.settings.preview.frame_step = 4
   state.settings.preview.resolution = 50
-
-
-def find_job(jobs: Any, job: Any) -> int:
-  """Find a job in a list of jobs."""
-  for i, current_job in enumerate(jobs):
-    if current_job == job:
-      return i
-  return -1
+  state.settings.cpu_workers = 1
+  state.settings.gpu_workers = 1
+  state.settings.max_retries = 2
+  state.settings.retry_delay = 30
 
 
 class StateSaver:
@@ -50,102 +30,27 @@ class StateSaver:
     self.state = state_pb2.render_rob_state()  # pylint: disable=no-member
     init_settings(self.state)
 
-  def state_to_table(self, table: QTableWidget) -> None:
-    """Load the state into a table."""
-    for _ in range(table.rowCount()):
-      table.removeRow(0)
-    for i, render_job in enumerate(self.state.render_jobs):
-      table.insertRow(i)
-
-      table_utils.post_process_row(table, i)
-      table.setItem(i, 1, QTableWidgetItem(render_job.file))
-      table.setItem(i, 2, QTableWidgetItem(render_job.camera))
-      table.setItem(i, 3, QTableWidgetItem(str(render_job.start)))
-      table.setItem(i, 4, QTableWidgetItem(str(render_job.end)))
-      table.setItem(i, 5, QTableWidgetItem(str(render_job.x_res)))
-      table.setItem(i, 6, QTableWidgetItem(str(render_job.y_res)))
-      table.setItem(i, 7, QTableWidgetItem(str(render_job.samples)))
-      ui_utils.set_checkbox_values(
-        table,
-        i,
-        [
-          render_job.active,
-          render_job.motion_blur,
-          render_job.overwrite,
-          render_job.high_quality,
-          render_job.denoise,
-        ],
-      )
-      ui_utils.set_combobox_indexes(
-        table, i, [render_job.file_format, render_job.engine, render_job.device]
-      )
-      table.setItem(i, 15, QTableWidgetItem(render_job.scene))
-      table.setItem(i, 16, QTableWidgetItem(";".join(render_job.view_layers)))
-      table.setItem(i, 17, QTableWidgetItem(render_job.comments))
-      table_utils.set_text_alignment(table, i)
-
-  def table_to_state(self, table: QTableWidget) -> None:
-    """Create a render job from a table row."""
-
-    del self.state.render_jobs[:]
-    for i in range(table.rowCount()):
-      render_job = state_pb2.render_job()  # pylint: disable=no-member
-      render_job.active = get_text(table.cellWidget(i, 0), widget="checkbox")
-      render_job.file = get_text(table.item(i, 1))
-      render_job.camera = get_text(table.item(i, 2))
-
-      # NOTE: The values are strings and not ints, since the user can leave the
-      # fields empty.
-      render_job.start = get_text(table.item(i, 3))
-      render_job.end = get_text(table.item(i, 4))
-      render_job.x_res = get_text(table.item(i, 5))
-      render_job.y_res = get_text(table.item(i, 6))
-      render_job.samples = get_text(table.item(i, 7))
-
-      file_format_str = get_text(table.cellWidget(i, 8), widget="dropdown")
-      render_job.file_format = state_pb2.file_format.Value(file_format_str)
-
-      engine_str = get_text(table.cellWidget(i, 9), widget="dropdown")
-      render_job.engine = state_pb2.render_engine.Value(engine_str)
-
-      device_str = get_text(table.cellWidget(i, 10), widget="dropdown")
-      render_job.device = state_pb2.device.Value(device_str)
-
-      render_job.motion_blur = get_text(table.cellWidget(i, 11), widget="checkbox")
-      render_job.overwrite = get_text(table.cellWidget(i, 12), widget="checkbox")
-      render_job.high_quality = get_text(table.cellWidget(i, 13), widget="checkbox")
-      render_job.denoise = get_text(table.cellWidget(i, 14), widget="checkbox")
-      render_job.scene = get_text(table.item(i, 15))
-      del render_job.view_layers[:]
-      new_view_layer_list = get_text(table.item(i, 16)).split(";")
-      render_job.view_layers.extend(new_view_layer_list)
-      render_job.comments = get_text(table.item(i, 17))
-      self.state.render_jobs.append(render_job)
-
-  def load_job_from_json(self, json_path: str) -> state_pb2.render_job:  # pylint: disable=no-member
-    """Load the state from a json file."""
-    json_path_ = Path(json_path)
-    json_state = json.loads(json_path_.read_text())
+  def load_job_from_dict(self, job_json: dict) -> state_pb2.render_job:  # pylint: disable=no-member
+    """Load a job from the settings, which the settings loader read from Blender."""
     render_job = state_pb2.render_job()  # pylint: disable=no-member
-    render_job.file = json_state["file"]
-    render_job.active = json_state["active"]
-    render_job.camera = json_state["camera"]
-    render_job.start = json_state["start"]
-    render_job.end = json_state["end"]
-    render_job.x_res = json_state["x_res"]
-    render_job.y_res = json_state["y_res"]
-    render_job.samples = json_state["samples"]
-    render_job.device = json_state["device"]
-    render_job.engine = json_state["engine"].replace("blender_eevee_next", "eevee")
-    render_job.motion_blur = json_state["motion_blur"]
-    render_job.overwrite = json_state["overwrite"]
-    render_job.high_quality = json_state["high_quality"]
-    render_job.denoise = json_state["denoise"]
-    render_job.scene = json_state["scene"]
-    render_job.view_layers.extend(json_state["view_layers"])
+    render_job.file = job_json["file"]
+    render_job.active = job_json["active"]
+    render_job.camera = job_json["camera"]
+    render_job.start = job_json["start"]
+    render_job.end = job_json["end"]
+    render_job.x_res = job_json["x_res"]
+    render_job.y_res = job_json["y_res"]
+    render_job.samples = job_json["samples"]
+    render_job.device = job_json["device"]
+    render_job.engine = job_json["engine"].replace("blender_eevee_next", "eevee")
+    render_job.motion_blur = job_json["motion_blur"]
+    render_job.overwrite = job_json["overwrite"]
+    render_job.high_quality = job_json["high_quality"]
+    render_job.denoise = job_json["denoise"]
+    render_job.scene = job_json["scene"]
+    render_job.view_layers.extend(job_json["view_layers"])
     try:
-      render_job.file_format = ui_utils.FILEMFORMAT_MAPPING[json_state["file_format"].lower()]
+      render_job.file_format = ui_utils.FILEMFORMAT_MAPPING[job_json["file_format"].lower()]
     except KeyError:
       render_job.file_format = "png"
-    json_path_.unlink()
     return render_job
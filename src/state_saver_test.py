@@ -2,10 +2,11 @@
 import unittest
 from pathlib import Path
 
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QApplication
 
+import job_registry
 import main
-import state_saver
 from protos import state_pb2
 from utils_rr import table_utils
 
@@ -29,49 +30,42 @@ class TestStateSaver(unittest.TestCase):
     del self.main_window
     return super().tearDown()
 
-  def test_get_text(self) -> None:
-    """Test the get_text method."""
-    self.assertEqual(state_saver.get_text(self.main_window.table.cellWidget(0, 2)), "")
-    self.assertTrue(state_saver.get_text(
-        self.main_window.table.cellWidget(0, 0), widget="checkbox"))
-    self.assertEqual(state_saver.get_text(
-        self.main_window.table.cellWidget(0, 8), widget="dropdown"), "exr_single")
-
   def test_state_to_table(self) -> None:
-    """Test the state_to_table method."""
-    state_saver_instance = state_saver.StateSaver()
-    state_saver_instance.state.ParseFromString(Path("test/basic_state.rrp").read_bytes())
-
-    table = self.main_window.table
-    state_saver_instance.state_to_table(table)
-    self.assertEqual(table.rowCount(), 1)
-    self.assertEqual(table.columnCount(), 18)
-    self.assertTrue(state_saver.get_text(table.cellWidget(0, 0), widget="checkbox"))
-    self.assertEqual(state_saver.get_text(table.item(0, 1)), "test/cube.blend")
-    self.assertEqual(state_saver.get_text(table.item(0, 2)), "b")
-    self.assertEqual(state_saver.get_text(table.item(0, 3)), "1")
-    self.assertEqual(state_saver.get_text(table.item(0, 4)), "2")
-    self.assertEqual(state_saver.get_text(table.item(0, 5)), "3")
-    self.assertEqual(state_saver.get_text(table.item(0, 6)), "4")
-    self.assertEqual(state_saver.get_text(table.item(0, 7)), "5")
-    self.assertEqual(state_saver.get_text(table.cellWidget(0, 8), widget="dropdown"), "exr_single")
-    self.assertEqual(state_saver.get_text(table.cellWidget(0, 9), widget="dropdown"), "cycles")
-    self.assertEqual(state_saver.get_text(table.cellWidget(0, 10), widget="dropdown"), "gpu")
-    self.assertTrue(state_saver.get_text(table.cellWidget(0, 11), widget="checkbox"))
-    self.assertFalse(state_saver.get_text(table.cellWidget(0, 12), widget="checkbox"))
-    self.assertTrue(state_saver.get_text(table.cellWidget(0, 13), widget="checkbox"))
-    self.assertFalse(state_saver.get_text(table.cellWidget(0, 14), widget="checkbox"))
-    self.assertEqual(state_saver.get_text(table.item(0, 15)), "c")
-    self.assertEqual(state_saver.get_text(table.item(0, 16)).split(";"), ["d"])
-    self.assertEqual(state_saver.get_text(table.item(0, 17)), "e")
+    """Test that an opened state is shown in the table."""
+    self.main_window.open_file("test/basic_state.rrp")
+    model = self.main_window.table.model()
+    self.assertEqual(model.rowCount(), 1)
+    self.assertEqual(model.columnCount(), 18)
+    self.assertEqual(model.index(0, 0).data(Qt.CheckStateRole), Qt.Checked)
+    self.assertEqual(model.index(0, 1).data(), "test/cube.blend")
+    self.assertEqual(model.index(0, 2).data(), "b")
+    self.assertEqual(model.index(0, 3).data(), "1")
+    self.assertEqual(model.index(0, 7).data(), "5")
+    self.assertEqual(model.index(0, 8).data(), "exr single")
+    self.assertEqual(model.index(0, 9).data(), "cycles")
+    self.assertEqual(model.index(0, 10).data(), "gpu")
+    self.assertEqual(model.index(0, 11).data(Qt.CheckStateRole), Qt.Checked)
+    self.assertEqual(model.index(0, 12).data(Qt.CheckStateRole), Qt.Unchecked)
+    self.assertEqual(model.index(0, 15).data(), "c")
+    self.assertEqual(model.index(0, 16).data(), "d")
+    self.assertEqual(model.index(0, 17).data(), "e")
 
   def test_table_to_state(self) -> None:
-    """Test the table_to_state method."""
+    """Test that edits in the table are written into the state."""
     self.main_window.open_file("test/basic_state.rrp")
-    state_saver_instance = state_saver.StateSaver()
-    state_saver_instance.parent_widget = self.main_window
-    state_saver_instance.table_to_state(self.main_window.table)
     reference_state = state_pb2.render_rob_state()  # pylint: disable=no-member
-    with open("test/basic_state.rrp", "rb") as rrp_file:
-      reference_state.ParseFromString(rrp_file.read())
-    self.assertEqual(state_saver_instance.state.render_jobs, reference_state.render_jobs)
+    reference_state.ParseFromString(Path("test/basic_state.rrp").read_bytes())
+    job_registry.assign_job_ids(reference_state.render_jobs)
+    state = self.main_window.state_saver.state
+    self.assertEqual(state.render_jobs, reference_state.render_jobs)
+
+    model = self.main_window.table.model()
+    model.setData(model.index(0, 2), "camera_a")
+    model.setData(model.index(0, 0), Qt.Unchecked, Qt.CheckStateRole)
+    self.assertEqual(state.render_jobs[0].camera, "camera_a")
+    self.assertFalse(state.render_jobs[0].active)
+    self.assertFalse(self.main_window.is_saved)
+
+    self.main_window.undo()
+    self.main_window.undo()
+    self.assertEqual(state.render_jobs, reference_state.render_jobs)
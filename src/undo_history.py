@@ -0,0 +1,213 @@
+"""Undo and redo history, which stores the changes of the render jobs instead of whole states.
+
+Every user action, e.g. editing a cell or moving a row, is stored as a group of small changes,
+which are recorded by the table model. Undoing a group applies the inverse changes to the model,
+so only the affected rows are touched. The history is limited by the approximate number of bytes
+the changes on both stacks take up, so it does not grow without limit during a long session.
+
+Note: The history only knows the model interface with set_value, insert_job, removeRows and
+move_row. It does not import Qt.
+"""
+
+import dataclasses
+
+from protos import state_pb2
+
+DEFAULT_BYTE_BUDGET = 8 * 1024 * 1024
+# Approximate memory of a change without its values.
+CHANGE_OVERHEAD_BYTES = 100
+
+
+@dataclasses.dataclass
+class ValueChange:
+  """A changed cell."""
+
+  row: int
+  column: int
+  old_value: str | int | bool
+  new_value: str | int | bool
+
+  def undo(self, model) -> None:
+    """Restore the old value."""
+    model.set_value(self.row, self.column, self.old_value)
+
+  def redo(self, model) -> None:
+    """Set the new value again."""
+    model.set_value(self.row, self.column, self.new_value)
+
+  def size(self) -> int:
+    """Get the approximate memory of the change in bytes."""
+    return CHANGE_OVERHEAD_BYTES + len(str(self.old_value)) + len(str(self.new_value))
+
+
+@dataclasses.dataclass
+class RowInsert:
+  """An inserted row. The render job is stored serialized."""
+
+  row: int
+  job: bytes
+
+  def undo(self, model) -> None:
+    """Remove the row again."""
+    model.removeRows(self.row, 1)
+
+  def redo(self, model) -> None:
+    """Insert the row again."""
+    render_job = state_pb2.render_job.FromString(self.job)  # pylint: disable=no-member
+    model.insert_job(self.row, render_job)
+
+  def size(self) -> int:
+    """Get the approximate memory of the change in bytes."""
+    return CHANGE_OVERHEAD_BYTES + len(self.job)
+
+
+@dataclasses.dataclass
+class RowRemove(RowInsert):
+  """A removed row. The render job is stored serialized."""
+
+  def undo(self, model) -> None:
+    """Insert the row again."""
+    super().redo(model)
+
+  def redo(self, model) -> None:
+    """Remove the row again."""
+    super().undo(model)
+
+
+@dataclasses.dataclass
+class RowMove:
+  """A row moved from row to the position before new_row."""
+
+  row: int
+  new_row: int
+
+  def destination(self) -> int:
+    """Get the row the moved row ends up in."""
+    return self.new_row - 1 if self.new_row > self.row else self.new_row
+
+  def undo(self, model) -> None:
+    """Move the row back."""
+    destination = self.destination()
+    model.move_row(destination, self.row + 1 if self.row > destination else self.row)
+
+  def redo(self, model) -> None:
+    """Move the row again."""
+    model.move_row(self.row, self.new_row)
+
+  def size(self) -> int:
+    """Get the approximate memory of the change in bytes."""
+    return CHANGE_OVERHEAD_BYTES
+
+
+def get_group_size(group: list[ValueChange | RowInsert | RowRemove | RowMove]) -> int:
+  """Get the approximate memory of a group of changes in bytes."""
+  return sum(change.size() for change in group)
+
+
+class UndoHistory:
+  """Undo and redo stack of groups of changes."""
+
+  def __init__(self, byte_budget: int = DEFAULT_BYTE_BUDGET) -> None:
+    """Initialize an empty history.
+
+    Args:
+      byte_budget: The approximate memory the undo and redo groups may use together. The groups
+        farthest from the current state are dropped once it is exceeded.
+    """
+    self.byte_budget = byte_budget
+    self.undo_groups = []
+    self.redo_groups = []
+    self.undo_bytes = 0
+    self.redo_bytes = 0
+    self.current_group = None
+    # Changes made while undoing or redoing are not recorded.
+    self.applying = False
+
+  def clear(self) -> None:
+    """Remove all changes, e.g. after a new file was loaded."""
+    self.undo_groups = []
+    self.redo_groups = []
+    self.undo_bytes = 0
+    self.redo_bytes = 0
+    self.current_group = None
+
+  def begin_group(self) -> None:
+    """Start a group of changes, which are undone together."""
+    self.end_group()
+    self.current_group = []
+
+  def end_group(self) -> None:
+    """Finish the current group of changes."""
+    group = self.current_group
+    self.current_group = None
+    if not group:
+      return
+    self.undo_groups.append(group)
+    self.undo_bytes += get_group_size(group)
+    self.redo_groups = []
+    self.redo_bytes = 0
+    self.trim()
+
+  def trim(self) -> None:
+    """Drop the oldest undo groups and then the last redo groups until the budget is met.
+
+    The latest undo group and the next redo group are kept, even if they exceed the budget.
+    """
+    while self.undo_bytes + self.redo_bytes > self.byte_budget and len(self.undo_groups) > 1:
+      self.undo_bytes -= get_group_size(self.undo_groups.pop(0))
+    while self.undo_bytes + self.redo_bytes > self.byte_budget and len(self.redo_groups) > 1:
+      self.redo_bytes -= get_group_size(self.redo_groups.pop(0))
+
+  def record(self, change: ValueChange | RowInsert | RowRemove | RowMove) -> None:
+    """Record a change. A change outside of a group is undone on its own."""
+    if self.applying:
+      return
+    if self.current_group is not None:
+      self.current_group.append(change)
+      return
+    self.current_group = [change]
+    self.end_group()
+
+  def can_undo(self) -> bool:
+    """Check if there is a group to undo."""
+    return bool(self.undo_groups)
+
+  def can_redo(self) -> bool:
+    """Check if there is a group to redo."""
+    return bool(self.redo_groups)
+
+  def undo(self, model) -> bool:
+    """Undo the latest group of changes on the model. Returns False if there is nothing to undo."""
+    self.end_group()
+    if not self.undo_groups:
+      return False
+    group = self.undo_groups.pop()
+    self.undo_bytes -= get_group_size(group)
+    self.applying = True
+    try:
+      for change in reversed(group):
+        change.undo(model)
+    finally:
+      self.applying = False
+    self.redo_groups.append(group)
+    self.redo_bytes += get_group_size(group)
+    self.trim()
+    return True
+
+  def redo(self, model) -> bool:
+    """Redo the latest undone group of changes. Returns False if there is nothing to redo."""
+    self.end_group()
+    if not self.redo_groups:
+      return False
+    group = self.redo_groups.pop()
+    self.redo_bytes -= get_group_size(group)
+    self.applying = True
+    try:
+      for change in group:
+        change.redo(model)
+    finally:
+      self.applying = False
+    self.undo_groups.append(group)
+    self.undo_bytes += get_group_size(group)
+    self.trim()
+    return True
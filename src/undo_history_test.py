@@ -0,0 +1,86 @@
+"""Unit tests for undo_history.py."""
+import unittest
+
+from protos import state_pb2
+from render_job_model_test import get_cameras, make_state
+from utils_rr.render_job_model import RenderJobModel
+
+
+class TestUndoHistory(unittest.TestCase):
+  """Tests for the UndoHistory class."""
+
+  def setUp(self) -> None:
+    """Set up a model with three rows."""
+    self.model = RenderJobModel(make_state(["a", "b", "c"]))
+    self.history = self.model.history
+    return super().setUp()
+
+  def test_undo_redo(self):
+    """Test that every kind of change can be undone and redone."""
+    self.model.set_value(0, 2, "x")
+    self.model.move_row(0, 3)
+    self.model.insertRows(1, 1)
+    self.model.removeRows(2, 1)
+    self.assertEqual(get_cameras(self.model), ["b", "", "x"])
+
+    while self.history.undo(self.model):
+      pass
+    self.assertEqual(get_cameras(self.model), ["a", "b", "c"])
+    while self.history.redo(self.model):
+      pass
+    self.assertEqual(get_cameras(self.model), ["b", "", "x"])
+
+  def test_group(self):
+    """Test that the changes of a group are undone together and a new change clears redo."""
+    self.history.begin_group()
+    self.model.set_value(0, 2, "x")
+    self.model.move_row(0, 2)
+    self.history.end_group()
+    self.assertEqual(get_cameras(self.model), ["b", "x", "c"])
+    self.assertTrue(self.history.undo(self.model))
+    self.assertEqual(get_cameras(self.model), ["a", "b", "c"])
+    self.assertFalse(self.history.can_undo())
+
+    self.model.set_value(1, 2, "y")
+    self.assertFalse(self.history.can_redo())
+    self.assertEqual(self.model.state.render_jobs[1].camera, "y")
+
+  def test_byte_budget(self):
+    """Test that the oldest groups are dropped once the byte budget is exceeded."""
+    self.history.byte_budget = 1000
+    for i in range(20):
+      self.model.set_value(0, 17, str(i) * 20)
+    self.assertLessEqual(self.history.undo_bytes, 1000)
+    undo_count = 0
+    while self.history.undo(self.model):
+      undo_count += 1
+    self.assertLess(undo_count, 20)
+    self.assertNotEqual(self.model.state.render_jobs[0].comments, "")
+
+  def test_byte_budget_redo(self):
+    """Test that the undone groups count against the byte budget as well."""
+    self.model.set_value(0, 17, "x" * 400)
+    self.model.set_value(1, 17, "y" * 400)
+    self.model.set_value(2, 17, "z" * 400)
+    while self.history.undo(self.model):
+      pass
+    self.assertEqual(self.history.undo_bytes, 0)
+    self.history.byte_budget = 1000
+    redo_count = 0
+    while self.history.redo(self.model):
+      redo_count += 1
+      self.assertLessEqual(self.history.undo_bytes + self.history.redo_bytes, 1000)
+    self.assertEqual(redo_count, 2)
+    self.assertEqual(self.model.state.render_jobs[1].comments, "y" * 400)
+    self.assertEqual(self.model.state.render_jobs[2].comments, "")
+
+  def test_reset_clears_history(self):
+    """Test that replacing the state clears the history."""
+    self.model.set_value(0, 2, "x")
+    self.model.state.CopyFrom(state_pb2.render_rob_state())  # pylint: disable=no-member
+    self.model.reset()
+    self.assertFalse(self.history.can_undo())
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,37 @@
+"""Module executed in Blender to get the scenes, cameras and view layers of blend files.
+
+The blend files are read from the environment and opened one after the other in the same Blender
+session. The metadata of every file is printed as a JSON line.
+"""
+
+import json
+import os
+import traceback
+
+import bpy  # pylint: disable=import-error
+
+from utils_common.render_protocol import METADATA_FILES_VARIABLE, METADATA_PREFIX
+
+
+def get_metadata() -> dict:
+  """Get the metadata of the loaded blend file."""
+  return {
+    "active_scene": bpy.context.scene.name,
+    "cameras": sorted(obj.name for obj in bpy.data.objects if obj.type == "CAMERA"),
+    "scenes": {
+      scene.name: [view_layer.name for view_layer in scene.view_layers]
+      for scene in bpy.data.scenes
+    },
+  }
+
+
+def print_metadata() -> None:
+  """Print the metadata of all blend files in the environment."""
+  for file_path in json.loads(os.environ.get(METADATA_FILES_VARIABLE, "[]")):
+    try:
+      bpy.ops.wm.open_mainfile(filepath=file_path, load_ui=False)
+      result = {"file": file_path, "metadata": get_metadata()}
+    except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+      traceback.print_exc()
+      result = {"file": file_path, "error": str(error)}
+    print(METADATA_PREFIX + json.dumps(result), flush=True)
@@ -0,0 +1,169 @@
+"""Warm Blender worker, which renders several jobs without restarting Blender.
+
+The worker reads one JSON request per line from stdin. A request describes the same render as the
+command line arguments of a single Blender process. The blend file is only loaded again if it
+differs from the file of the previous request. Otherwise the scene settings, which the previous
+request changed, are restored to the values of the loaded file. After each request, the worker prints a result
+line with the exit code a Blender process would have returned. Since the result line is written
+to stdout as well, all output of a request is read before its result.
+"""
+
+import json
+import sys
+import traceback
+
+import bpy  # pylint: disable=import-error
+
+from utils_common import print_utils
+from utils_common.render_protocol import EXIT_CODE_FAILED, EXIT_CODE_FINISHED, RESULT_PREFIX
+
+# The scene properties, which a request and the render settings setter change. The media type is
+# restored before the file format, since it limits the available file formats.
+SCENE_PROPERTIES = (
+  "camera",
+  "frame_start",
+  "frame_end",
+  "frame_step",
+  "render.filepath",
+  "render.resolution_x",
+  "render.resolution_y",
+  "render.resolution_percentage",
+  "render.use_border",
+  "render.use_motion_blur",
+  "render.use_overwrite",
+  "render.use_placeholder",
+  "render.use_stamp",
+  "render.engine",
+  "render.image_settings.media_type",
+  "render.image_settings.file_format",
+  "eevee.taa_render_samples",
+  "cycles.samples",
+  "cycles.device",
+  "cycles.use_animated_seed",
+  "cycles.use_denoising",
+)
+
+
+def set_file_format(scene: bpy.types.Scene, file_format: str) -> None:
+  """Set the output file format like the -F command line argument of Blender."""
+  image_settings = scene.render.image_settings
+  # Since Blender 5.0, multilayer and video formats are only available for their media type.
+  if hasattr(image_settings, "media_type"):
+    media_types = {"OPEN_EXR_MULTILAYER": "MULTI_LAYER_IMAGE", "FFMPEG": "VIDEO"}
+    image_settings.media_type = media_types.get(file_format, "IMAGE")
+  image_settings.file_format = file_format
+
+
+def save_scene_settings(scene: bpy.types.Scene) -> dict[str, object]:
+  """Get the values of the scene properties, which a request changes.
+
+  Properties, which don't exist in this Blender version, e.g. the media type before Blender 5.0,
+  are left out.
+  """
+  values = {}
+  for property_path in SCENE_PROPERTIES:
+    *owner_names, name = property_path.split(".")
+    owner = scene
+    for owner_name in owner_names:
+      owner = getattr(owner, owner_name, None)
+    if owner is not None and hasattr(owner, name):
+      values[property_path] = getattr(owner, name)
+  values["view_layers"] = {view_layer.name: view_layer.use for view_layer in scene.view_layers}
+  return values
+
+
+def restore_scene_settings(scene: bpy.types.Scene, values: dict[str, object]) -> None:
+  """Set the scene properties to the values of save_scene_settings."""
+  for property_path, value in values.items():
+    if property_path == "view_layers":
+      continue
+    *owner_names, name = property_path.split(".")
+    owner = scene
+    for owner_name in owner_names:
+      owner = getattr(owner, owner_name)
+    setattr(owner, name, value)
+  for view_layer in scene.view_layers:
+    if view_layer.name in values["view_layers"]:
+      view_layer.use = values["view_layers"][view_layer.name]
+
+
+class RenderServer:
+  """Render requests in the running Blender instance."""
+
+  def __init__(self) -> None:
+    """Initialize the render server without a loaded file."""
+    self.loaded_file = None
+    self.active_scene = None
+    self.scene_settings = {}
+
+  def load_file(self, file_path: str) -> None:
+    """Load a blend file, unless it is already loaded.
+
+    If the file is already loaded, the active scene and the scene settings are restored, so the
+    settings of the previous request don't carry over, e.g. if the next job leaves the camera or
+    the resolution empty.
+    """
+    if file_path == self.loaded_file:
+      for scene in bpy.data.scenes:
+        if scene.name in self.scene_settings:
+          restore_scene_settings(scene, self.scene_settings[scene.name])
+      if self.active_scene in bpy.data.scenes:
+        bpy.context.window.scene = bpy.data.scenes[self.active_scene]
+      return
+    self.loaded_file = None
+    bpy.ops.wm.open_mainfile(filepath=file_path, load_ui=False)
+    self.loaded_file = file_path
+    self.active_scene = bpy.context.scene.name
+    self.scene_settings = {scene.name: save_scene_settings(scene) for scene in bpy.data.scenes}
+
+  def render(self, request: dict) -> int:
+    """Render a request and return the exit code.
+
+    Args:
+      request: The file, scene, output path, file format, the render settings setter command and
+        either the still frame or the frame range to render.
+    """
+    self.load_file(request["file"])
+    if request["scene"] in bpy.data.scenes:
+      bpy.context.window.scene = bpy.data.scenes[request["scene"]]
+    scene = bpy.context.scene
+    scene.render.filepath = request["frame_path"]
+    scene.render.use_overwrite = True
+    set_file_format(scene, request["file_format"])
+    exec(request["python"], {})  # noqa: S102  # pylint: disable=exec-used
+
+    # The render settings setter can switch the scene.
+    scene = bpy.context.scene
+    # Like the -f command line argument, a still is rendered as an animation with a single frame,
+    # so the frame number is added to the file name.
+    if "still" in request:
+      scene.frame_start = scene.frame_end = request["still"]
+    elif "start" in request:
+      scene.frame_start = request["start"]
+      scene.frame_end = request["end"]
+    bpy.ops.render.render(animation=True, scene=scene.name)
+    return EXIT_CODE_FINISHED
+
+  def handle_request(self, request: dict) -> int:
+    """Render a request and turn errors into the exit code of a failed Blender process."""
+    try:
+      return self.render(request)
+    except SystemExit as error:
+      exit_code = error.code if isinstance(error.code, int) else EXIT_CODE_FAILED
+    except Exception:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+      traceback.print_exc()
+      print_utils.print_error_no_exit("The warm worker couldn't render the job.")
+      exit_code = EXIT_CODE_FAILED
+    # The file might be in an unknown state, so it is loaded again for the next request.
+    self.loaded_file = None
+    return exit_code
+
+
+def serve() -> None:
+  """Render the requests from stdin until it is closed."""
+  server = RenderServer()
+  for line in sys.stdin:
+    if not line.strip():
+      continue
+    exit_code = server.handle_request(json.loads(line))
+    print(RESULT_PREFIX + json.dumps({"exit_code": exit_code}), flush=True)
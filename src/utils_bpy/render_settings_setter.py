@@ -1,10 +1,72 @@
 """This module contains the functions to set the render settings in Blender."""
 
+import importlib
+import re
 import sys
+import time
 
 import bpy  # pylint: disable=import-error
 
 from utils_common import print_utils, rr_c_image
+from utils_common.render_protocol import EVENT_FRAME_DONE, EVENT_FRAME_START
+
+# The start time of the frame, which is currently rendered.
+frame_start_times = {}
+# The highest memory in megabytes, which Blender reported while rendering the current frame, by
+# scene.
+frame_peak_memory = {}
+# A memory value of the render statistics, e.g. "Mem: 5M", "Mem:12.34M (Peak 56.78M)" or
+# "Peak:1.20G".
+MEMORY_PATTERN = re.compile(r"(?:Mem|Peak):? ?(\d+(?:\.\d+)?)([MG])")
+
+
+def report_frame_start(scene: bpy.types.Scene, *_args) -> None:
+  """Report the start of a frame to RenderRob."""
+  frame_start_times[scene.name] = time.monotonic()
+  frame_peak_memory[scene.name] = 0
+  print_utils.emit_event(EVENT_FRAME_START, frame=scene.frame_current)
+
+
+def parse_memory_mb(stats: str) -> float:
+  """Get the highest memory of a line of render statistics in megabytes, or 0 if it has none."""
+  return max(
+    (float(value) * (1024 if unit == "G" else 1) for value, unit in MEMORY_PATTERN.findall(stats)),
+    default=0,
+  )
+
+
+def report_render_stats(stats: str, *_args) -> None:
+  """Keep the highest memory, which the render statistics of the current frame show.
+
+  Unlike the peak memory of the process, it is reset for every frame, so a warm worker doesn't
+  report the memory of a previous job.
+  """
+  memory_mb = parse_memory_mb(stats)
+  for scene_name, peak_memory_mb in frame_peak_memory.items():
+    frame_peak_memory[scene_name] = max(peak_memory_mb, memory_mb)
+
+
+def report_frame_done(scene: bpy.types.Scene, *_args) -> None:
+  """Report a rendered frame, its render time and the peak memory of the frame to RenderRob."""
+  start_time = frame_start_times.pop(scene.name, time.monotonic())
+  print_utils.emit_event(
+    EVENT_FRAME_DONE,
+    frame=scene.frame_current,
+    seconds=round(time.monotonic() - start_time, 3),
+    peak_memory_mb=round(frame_peak_memory.pop(scene.name, 0), 1),
+  )
+
+
+def register_frame_handlers() -> None:
+  """Report the rendered frames. The handlers are added only once for a warm worker."""
+  handlers = bpy.app.handlers
+  for handler_list, handler in (
+    (handlers.render_pre, report_frame_start),
+    (handlers.render_stats, report_render_stats),
+    (handlers.render_post, report_frame_done),
+  ):
+    if handler not in handler_list:
+      handler_list.append(handler)
 
 
 class RenderSettingsSetter:
@@ -15,6 +77,7 @@ class RenderSettingsSetter:
     rr_c_image.draw_image()
 
     print_utils.print_info("Render Rob here. I'm starting to make my changes in your Blender file!")
+    register_frame_handlers()
 
     self.current_scene_data = None
     self.view_layer_data = None
@@ -164,15 +227,20 @@ class RenderSettingsSetter:
     yres: int,
     percres: int,
     high_quality: bool,
+    overwrite: bool = False,
   ) -> None:
-    """Set the output settings."""
+    """Set the output settings.
+
+    Existing frames are only replaced with overwrite, which is used for frame ranges, whose frames
+    are missing or were left empty by an interrupted render.
+    """
     if xres:
       self.current_scene_render.resolution_x = int(xres)
     if yres:
       self.current_scene_render.resolution_y = int(yres)
     self.current_scene_render.resolution_percentage = percres
 
-    self.current_scene_render.use_overwrite = False
+    self.current_scene_render.use_overwrite = overwrite
     self.current_scene_render.use_placeholder = False
 
     self.current_scene_data.frame_step = frame_step
@@ -180,8 +248,14 @@ class RenderSettingsSetter:
     print_utils.print_info("Finished setting the rendering settings!")
 
   def custom_commands(self) -> None:
-    """Import user commands."""
+    """Run the user commands.
+
+    A warm worker imports the module once, so it is reloaded to run the commands for every job.
+    """
     try:
-      import custom_commands  # pylint: disable=import-error,import-outside-toplevel,unused-import  # noqa: F401
+      if "custom_commands" in sys.modules:
+        importlib.reload(sys.modules["custom_commands"])
+      else:
+        import custom_commands  # pylint: disable=import-error,import-outside-toplevel,unused-import  # noqa: F401
     except ImportError:
       print_utils.print_info("No user commands found.")
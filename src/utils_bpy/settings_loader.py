@@ -1,46 +1,67 @@
-"""Module executed in Blender to get the render_job settings."""
+"""Module executed in Blender to get the render_job settings.
+
+The scenes and cameras of the jobs are read from the environment, so the settings of all jobs of a
+blend file are read in a single Blender session. The settings of every job are printed as a JSON
+line.
+"""
 
 import json
-from pathlib import Path
+import os
+import traceback
 
 import bpy  # pylint: disable=import-error
 
 from utils_common import print_utils
+from utils_common.render_protocol import SYNC_PREFIX, SYNC_REQUESTS_VARIABLE
 
 
-def save_settings() -> None:
-  """Save the render_job settings to the render_job proto."""
+def get_settings(request: dict) -> dict:
+  """Get the render_job settings of the scene and camera of a request."""
+  scene = bpy.data.scenes.get(request.get("scene", "")) or bpy.context.scene
+  camera = bpy.data.objects.get(request.get("camera", ""))
+  camera_name = camera.name if camera and camera.type == "CAMERA" else scene.camera.name
   render_job = {}
 
   render_job["file"] = bpy.data.filepath
   render_job["active"] = True
-  render_job["camera"] = bpy.context.scene.camera.name
-  render_job["start"] = str(bpy.context.scene.frame_start)
-  render_job["end"] = str(bpy.context.scene.frame_end)
-  render_job["x_res"] = str(bpy.context.scene.render.resolution_x)
-  render_job["y_res"] = str(bpy.context.scene.render.resolution_y)
-  engine = bpy.context.scene.render.engine
+  render_job["camera"] = camera_name
+  render_job["start"] = str(scene.frame_start)
+  render_job["end"] = str(scene.frame_end)
+  render_job["x_res"] = str(scene.render.resolution_x)
+  render_job["y_res"] = str(scene.render.resolution_y)
+  engine = scene.render.engine
   if engine == "CYCLES":
-    render_job["samples"] = str(bpy.context.scene.cycles.samples)
+    render_job["samples"] = str(scene.cycles.samples)
   else:
-    render_job["samples"] = str(bpy.context.scene.eevee.taa_render_samples)
+    render_job["samples"] = str(scene.eevee.taa_render_samples)
 
-  if bpy.context.scene.cycles.device == "GPU":
+  if scene.cycles.device == "GPU":
     render_job["device"] = "gpu"
   else:
     render_job["device"] = "cpu"
   render_job["engine"] = engine.lower()
-  render_job["motion_blur"] = bpy.context.scene.render.use_motion_blur
+  render_job["motion_blur"] = scene.render.use_motion_blur
   render_job["overwrite"] = False
-  render_job["high_quality"] = not bpy.context.scene.render.use_stamp
-  render_job["denoise"] = bpy.context.scene.cycles.use_denoising
-  render_job["scene"] = bpy.context.scene.name
-  render_job["view_layers"] = [vl.name for vl in bpy.context.scene.view_layers if vl.use]
-  render_job["file_format"] = bpy.context.scene.render.image_settings.file_format.lower()
+  render_job["high_quality"] = not scene.render.use_stamp
+  render_job["denoise"] = scene.cycles.use_denoising
+  render_job["scene"] = scene.name
+  render_job["view_layers"] = [vl.name for vl in scene.view_layers if vl.use]
+  render_job["file_format"] = scene.render.image_settings.file_format.lower()
+
+  return render_job
 
-  Path(".sync.json").write_text(json.dumps(render_job), encoding="utf-8")
+
+def save_settings() -> None:
+  """Print the render_job settings of all requests."""
+  requests = json.loads(os.environ.get(SYNC_REQUESTS_VARIABLE, "[{}]"))
+  for index, request in enumerate(requests):
+    try:
+      result = {"request": index, "settings": get_settings(request)}
+    except Exception as error:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+      traceback.print_exc()
+      result = {"request": index, "error": str(error)}
+    print(SYNC_PREFIX + json.dumps(result), flush=True)
 
 
 save_settings()
-raise ValueError(Path(".sync.json").resolve())
 print_utils.print_info("Settings saved.")
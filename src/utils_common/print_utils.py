@@ -1,6 +1,21 @@
-"""Utility functions for printing to the console."""
+"""Utility functions for printing to the console.
+
+If RenderRob started Blender, warnings and errors are also reported as events. An event is a line
+with the event prefix and a JSON object, so RenderRob doesn't have to guess the status of a job
+from the colored text.
+"""
+import json
 import os
+import re
 import sys
+import time
+
+from utils_common.render_protocol import (
+  EVENT_ERROR,
+  EVENT_PREFIX,
+  EVENT_WARNING,
+  EVENTS_VARIABLE,
+)
 
 BASH_COLORS = {
     "RESET_ALL": '\u001b[0m',
@@ -11,6 +26,8 @@ BASH_COLORS = {
     "FORE_WHITE": '\u001b[37m',
 }
 CACHEFILEPATH = "ERRORCACHE"
+# The color codes a line can start with, since the messages end with a reset without a new line.
+ANSI_PREFIX_PATTERN = re.compile(r"^(?:\x1b\[[0-9;]*m ?)+")
 
 
 def print_error(ipt_str):
@@ -20,6 +37,7 @@ def print_error(ipt_str):
   print("[ERROR] " + ipt_str, flush=True)
   print(BASH_COLORS["RESET_ALL"], end="", flush=True)
   write_cache("[ERROR]" + ipt_str)
+  emit_event(EVENT_ERROR, message=ipt_str)
   print_info("Blender quit")
   sys.exit(62097)
 
@@ -31,6 +49,7 @@ def print_error_no_exit(ipt_str):
   print("[ERROR] " + ipt_str, flush=True)
   print(BASH_COLORS["RESET_ALL"], end="", flush=True)
   write_cache("[ERROR]" + ipt_str)
+  emit_event(EVENT_ERROR, message=ipt_str)
 
 
 def print_warning(ipt_str):
@@ -40,6 +59,7 @@ def print_warning(ipt_str):
   print("[WARNING] " + ipt_str, flush=True)
   print(BASH_COLORS["RESET_ALL"], end="", flush=True)
   write_cache("[WARNING]" + ipt_str)
+  emit_event(EVENT_WARNING, message=ipt_str)
 
 
 def print_info_input(ipt_str):
@@ -57,6 +77,28 @@ def print_info(ipt_str):
         "[INFO] " + ipt_str + BASH_COLORS["RESET_ALL"], flush=True)
 
 
+def emit_event(event_type, **fields):
+  """Report an event to RenderRob, if it started this process."""
+  if not os.environ.get(EVENTS_VARIABLE):
+    return
+  event = {"type": event_type, "time": time.time(), **fields}
+  print(EVENT_PREFIX + json.dumps(event), flush=True)
+
+
+def parse_event(line):
+  """Get the event of an output line, or None if the line is no event."""
+  line = ANSI_PREFIX_PATTERN.sub("", line.rstrip("\n"))
+  if not line.startswith(EVENT_PREFIX):
+    return None
+  try:
+    event = json.loads(line[len(EVENT_PREFIX) :])
+  except json.JSONDecodeError:
+    return None
+  if not isinstance(event, dict) or "type" not in event:
+    return None
+  return event
+
+
 def write_cache(ipt_str):
   """Write an error message to the error cache."""
   if not os.path.exists(CACHEFILEPATH):
@@ -0,0 +1,22 @@
+"""Constants shared by RenderRob and the modules it runs in Blender."""
+
+EXIT_CODE_FINISHED = 0
+EXIT_CODE_FAILED = 62097
+# Prefix of the line, with which a warm worker reports the result of a request.
+RESULT_PREFIX = "RENDERROB_RESULT "
+# Environment variable with the JSON list of the scenes and cameras, whose settings are synced.
+SYNC_REQUESTS_VARIABLE = "RENDERROB_SYNC_REQUESTS"
+# Prefix of the line, with which the settings loader reports the settings of a job.
+SYNC_PREFIX = "RENDERROB_SYNC "
+# Environment variable with the JSON list of the blend files, whose metadata is scanned.
+METADATA_FILES_VARIABLE = "RENDERROB_METADATA_FILES"
+# Prefix of the line, with which the metadata loader reports the metadata of a blend file.
+METADATA_PREFIX = "RENDERROB_METADATA "
+# Environment variable, which makes the modules in Blender report events to RenderRob.
+EVENTS_VARIABLE = "RENDERROB_EVENTS"
+# Prefix of the line, with which Blender reports an event, e.g. a warning or a rendered frame.
+EVENT_PREFIX = "RENDERROB_EVENT "
+EVENT_WARNING = "warning"
+EVENT_ERROR = "error"
+EVENT_FRAME_START = "frame_start"
+EVENT_FRAME_DONE = "frame_done"
@@ -0,0 +1,187 @@
+"""Background syncs, which read the settings of render jobs from their blend files.
+
+Every sync runs Blender in its own process, so several syncs can run at the same time without
+blocking the GUI. A sync reads the settings of all jobs of one blend file in a single Blender
+session and streams them back as JSON lines. The jobs are identified by their keys, since rows
+can be moved or edited while Blender is starting.
+"""
+
+import json
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from PySide6.QtCore import QProcess
+
+from utils_common import print_utils
+from utils_common.render_protocol import SYNC_PREFIX, SYNC_REQUESTS_VARIABLE
+
+# Number of lines of the Blender output, which are shown if a sync fails.
+FAILURE_OUTPUT_LINES = 50
+
+
+@dataclass
+class SyncRequest:
+  """A job, whose settings are read from its blend file."""
+
+  job_key: str
+  scene: str
+  camera: str
+
+
+@dataclass
+class SyncTask:
+  """A running sync of the jobs of a blend file."""
+
+  name: str
+  requests: dict[int, SyncRequest]
+  process: QProcess
+  remainder: bytes = b""
+  output_lines: list[str] = field(default_factory=list)
+
+
+class BlenderSync:
+  """Run syncs in Blender processes and report their progress."""
+
+  def __init__(
+    self,
+    finished_callback: Callable[[str, dict | None], None],
+    progress_callback: Callable[[int, int], None] | None = None,
+  ) -> None:
+    """Initialize the syncs.
+
+    Args:
+      finished_callback: Called for every job with its key and its settings from Blender, or
+        None if the sync of the job failed or was canceled.
+      progress_callback: Called with the numbers of finished and started jobs, whenever a sync
+        starts or reports a job. Both are reset once all syncs are finished.
+    """
+    self.finished_callback = finished_callback
+    self.progress_callback = progress_callback
+    self.tasks = {}
+    self.next_task_id = 0
+    self.started_count = 0
+    self.finished_count = 0
+
+  def start(
+    self,
+    name: str,
+    program: str,
+    arguments: list[str],
+    requests: list[SyncRequest],
+  ) -> None:
+    """Start a sync of the jobs of a blend file in a new process.
+
+    Args:
+      name: The name of the sync, which is shown in the console.
+      program: The Blender executable.
+      arguments: The arguments, which open the blend file and run the settings loader.
+      requests: The jobs of the blend file.
+    """
+    process = QProcess()
+    process.setProcessChannelMode(QProcess.MergedChannels)
+    env = QProcess.systemEnvironment()
+    scenes_and_cameras = [
+      {"scene": request.scene, "camera": request.camera} for request in requests
+    ]
+    env.append(f"{SYNC_REQUESTS_VARIABLE}={json.dumps(scenes_and_cameras)}")
+    process.setEnvironment(env)
+    process.setProgram(program)
+    process.setArguments(arguments)
+    task_id = self.next_task_id
+    self.next_task_id += 1
+    self.tasks[task_id] = SyncTask(name, dict(enumerate(requests)), process)
+    process.readyRead.connect(lambda: self._read_output(task_id))
+    process.finished.connect(lambda exit_code, _status: self._finish(task_id, exit_code))
+    process.errorOccurred.connect(lambda error: self._fail_to_start(task_id, error))
+    self.started_count += len(requests)
+    print_utils.print_info(f"Syncing settings of {len(requests)} job(s) from {name}.")
+    self._report_progress()
+    process.start()
+
+  def running_count(self) -> int:
+    """Get the number of running syncs."""
+    return len(self.tasks)
+
+  def cancel_all(self) -> None:
+    """Kill all running syncs. Their remaining jobs are left unchanged."""
+    for task_id in list(self.tasks):
+      task = self.tasks[task_id]
+      task.process.blockSignals(True)
+      task.process.kill()
+      task.process.waitForFinished()
+      print_utils.print_warning(f"Canceled the sync of {task.name}.")
+      self._complete(task_id)
+
+  def _read_output(self, task_id: int) -> None:
+    """Report the jobs, whose settings were printed since the last call."""
+    if task_id not in self.tasks:
+      return
+    task = self.tasks[task_id]
+    data = task.remainder + bytes(task.process.readAllStandardOutput())
+    *lines, task.remainder = data.split(b"\n")
+    for line_bytes in lines:
+      line = line_bytes.decode(errors="replace").rstrip("\r")
+      if not line.startswith(SYNC_PREFIX):
+        task.output_lines.append(line)
+        del task.output_lines[:-FAILURE_OUTPUT_LINES]
+        continue
+      try:
+        result = json.loads(line[len(SYNC_PREFIX) :])
+      except json.JSONDecodeError as error:
+        # The job of a broken line is reported as failed once the sync is finished.
+        print_utils.print_warning(f"Could not read a result of the sync of {task.name}: {error}")
+        continue
+      request = task.requests.pop(result["request"], None)
+      if request is None:
+        continue
+      if "error" in result:
+        print_utils.print_error_no_exit(
+          f"Syncing the settings of a job from {task.name} failed: {result['error']}",
+        )
+      self._report_job(request, result.get("settings"))
+
+  def _fail_to_start(self, task_id: int, error: QProcess.ProcessError) -> None:
+    """Handle a sync, whose process could not be started."""
+    if task_id not in self.tasks or error != QProcess.FailedToStart:
+      return
+    task = self.tasks[task_id]
+    print_utils.print_error_no_exit(
+      f"Could not start Blender for {task.name}: {task.process.errorString()}",
+    )
+    self._complete(task_id)
+
+  def _finish(self, task_id: int, exit_code: int) -> None:
+    """Handle a finished sync."""
+    if task_id not in self.tasks:
+      return
+    task = self.tasks[task_id]
+    # The last line might not end with a line break.
+    task.remainder += b"\n"
+    self._read_output(task_id)
+    if task.requests or exit_code != 0:
+      output = "\n".join(task.output_lines)
+      print_utils.print_error_no_exit(f"Syncing settings from {task.name} failed.\n{output}")
+    self._complete(task_id)
+
+  def _complete(self, task_id: int) -> None:
+    """Report the jobs without settings as failed and clean up a sync."""
+    task = self.tasks.pop(task_id)
+    try:
+      for request in task.requests.values():
+        self._report_job(request, None)
+    finally:
+      task.process.deleteLater()
+      if not self.tasks:
+        self.started_count = 0
+        self.finished_count = 0
+
+  def _report_job(self, request: SyncRequest, settings: dict | None) -> None:
+    """Report the settings of a job and the progress."""
+    self.finished_count += 1
+    self.finished_callback(request.job_key, settings)
+    self._report_progress()
+
+  def _report_progress(self) -> None:
+    """Report the numbers of finished and started jobs."""
+    if self.progress_callback:
+      self.progress_callback(self.finished_count, self.started_count)
@@ -0,0 +1,128 @@
+"""Delegates, which paint and edit checkbox and combobox cells without a widget per cell."""
+
+from PySide6.QtCore import QEvent, QRect, Qt, QTimer
+from PySide6.QtWidgets import (
+  QApplication,
+  QComboBox,
+  QStyle,
+  QStyleOptionButton,
+  QStyleOptionComboBox,
+  QTableView,
+)
+
+from utils_rr import ui_utils
+from utils_rr.placeholder_delegate import PlaceholderDelegate
+from utils_rr.render_job_model import COMBOBOX_ITEMS
+
+
+def get_style(option) -> QStyle:
+  """Get the style of the widget, which is painted."""
+  return option.widget.style() if option.widget else QApplication.style()
+
+
+class CheckBoxDelegate(PlaceholderDelegate):
+  """Paint a centered checkbox and toggle it with a click anywhere in the cell."""
+
+  def __init__(self, parent=None):
+    super().__init__("", parent)
+
+  def paint(self, painter, option, index):
+    """Paint the background and the checkbox."""
+    background = index.data(Qt.BackgroundRole)
+    if background:
+      painter.fillRect(option.rect, background)
+    style = get_style(option)
+    check_box_option = QStyleOptionButton()
+    size = style.pixelMetric(QStyle.PM_IndicatorWidth, None, option.widget)
+    check_box_option.rect = QRect(0, 0, size, size)
+    check_box_option.rect.moveCenter(option.rect.center())
+    check_box_option.state = QStyle.State_On if index.data(Qt.CheckStateRole) == Qt.Checked else (
+      QStyle.State_Off
+    )
+    if index.flags() & Qt.ItemIsUserCheckable:
+      check_box_option.state |= QStyle.State_Enabled
+    style.drawPrimitive(QStyle.PE_IndicatorCheckBox, check_box_option, painter, option.widget)
+
+  def editorEvent(self, event, model, option, index):  # pylint: disable=invalid-name
+    """Toggle the checkbox with a left click or the space key."""
+    if not index.flags() & Qt.ItemIsUserCheckable:
+      return False
+    if event.type() == QEvent.MouseButtonDblClick:
+      return True
+    is_click = (
+      event.type() == QEvent.MouseButtonRelease
+      and event.button() == Qt.LeftButton
+      and option.rect.contains(event.position().toPoint())
+    )
+    is_key = event.type() == QEvent.KeyPress and event.key() in (Qt.Key_Space, Qt.Key_Select)
+    if not is_click and not is_key:
+      return False
+    checked = index.data(Qt.CheckStateRole) == Qt.Checked
+    return model.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+
+
+class ComboBoxDelegate(PlaceholderDelegate):
+  """Paint a combobox and open a real combobox only while the cell is edited."""
+
+  def __init__(self, items: list[str], parent=None):
+    super().__init__("", parent)
+    self.items = items
+
+  def paint(self, painter, option, index):
+    """Paint the background and the combobox with the current text."""
+    background = index.data(Qt.BackgroundRole)
+    if background:
+      painter.fillRect(option.rect, background)
+    style = get_style(option)
+    combo_box_option = QStyleOptionComboBox()
+    combo_box_option.rect = option.rect
+    combo_box_option.currentText = index.data(Qt.DisplayRole)
+    combo_box_option.state = option.state
+    if not index.flags() & Qt.ItemIsEditable:
+      combo_box_option.state &= ~QStyle.State_Enabled
+    style.drawComplexControl(QStyle.CC_ComboBox, combo_box_option, painter, option.widget)
+    style.drawControl(QStyle.CE_ComboBoxLabel, combo_box_option, painter, option.widget)
+
+  def createEditor(self, parent, option, index):  # pylint: disable=invalid-name
+    """Create a combobox, which commits the value as soon as an item is chosen."""
+    del option, index
+    combo_box = QComboBox(parent)
+    combo_box.addItems(self.items)
+    combo_box.activated.connect(lambda: self.commit_and_close(combo_box))
+    QTimer.singleShot(0, combo_box.showPopup)
+    return combo_box
+
+  def commit_and_close(self, combo_box: QComboBox) -> None:
+    """Write the chosen item into the model and close the combobox."""
+    self.commitData.emit(combo_box)
+    self.closeEditor.emit(combo_box)
+
+  def setEditorData(self, editor, index):  # pylint: disable=invalid-name
+    """Select the current value in the combobox."""
+    editor.setCurrentIndex(index.data(Qt.EditRole))
+
+  def setModelData(self, editor, model, index):  # pylint: disable=invalid-name
+    """Write the chosen item into the model."""
+    model.setData(index, editor.currentIndex(), Qt.EditRole)
+
+  def editorEvent(self, event, model, option, index):  # pylint: disable=invalid-name
+    """Open the combobox with a single click like a real combobox."""
+    del model
+    if (
+      event.type() == QEvent.MouseButtonRelease
+      and event.button() == Qt.LeftButton
+      and index.flags() & Qt.ItemIsEditable
+      and option.widget
+    ):
+      option.widget.setCurrentIndex(index)
+      option.widget.edit(index)
+      return True
+    return False
+
+
+def setup_cell_delegates(table_view: QTableView) -> None:
+  """Set up the checkbox and combobox delegates for the given table view."""
+  for col in ui_utils.CHECKBOX_COLUMNS:
+    table_view.setItemDelegateForColumn(col, CheckBoxDelegate(table_view))
+  for col, items in COMBOBOX_ITEMS.items():
+    table_view.setItemDelegateForColumn(col, ComboBoxDelegate(items, table_view))
@@ -0,0 +1,211 @@
+"""Buffered console, which shows the output of the Blender workers in the main window.
+
+Blender can print thousands of lines per second, e.g. with verbose Cycles output. Inserting every
+line on its own blocks the GUI, so the output is collected and appended in bulk by a timer. Lines
+with the same format are inserted as a single block of text and the number of lines in the
+console is limited. The whole output of a job is written to its log file.
+
+The events Blender reports, e.g. warnings and rendered frames, are passed to a callback instead of
+being shown. The other lines can be passed to a second callback, e.g. to look for signs of a crash.
+"""
+
+import re
+from collections.abc import Callable
+from pathlib import Path
+
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QColor, QTextCharFormat, QTextCursor
+from PySide6.QtWidgets import QTextBrowser
+
+import job_log
+from utils_common.print_utils import BASH_COLORS, parse_event
+from utils_rr import table_utils
+
+FLUSH_INTERVAL_MS = 50
+MAX_CONSOLE_LINES = 20000
+# Only scroll down if the user is close to the bottom.
+AUTO_SCROLL_DISTANCE = 1500
+
+STYLE_DEFAULT = "default"
+STYLE_RESET = "reset"
+STYLE_INFO = "info"
+STYLE_WARNING = "warning"
+STYLE_ERROR = "error"
+# The style of the lines after a colored message was reset.
+STYLE_AFTER_RESET = "after_reset"
+
+# The background color codes print_utils starts a message with.
+BACKGROUND_STYLES = {
+  BASH_COLORS["RESET_ALL"]: STYLE_RESET,
+  BASH_COLORS["BACK_CYAN"]: STYLE_INFO,
+  BASH_COLORS["BACK_YELLOW"]: STYLE_WARNING,
+  BASH_COLORS["BACK_RED"]: STYLE_ERROR,
+}
+ANSI_CODE_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+ANSI_PREFIX_PATTERN = re.compile(r"(?:\x1b\[[0-9;]*m ?)+")
+
+
+def parse_line(line: str) -> tuple[str, str | None, bool]:
+  """Remove the ANSI codes from a line.
+
+  Returns:
+    The text of the line, the style the line starts with or None if it doesn't start with a
+    color code, and whether the line ends with a reset code.
+  """
+  style = None
+  prefix = ANSI_PREFIX_PATTERN.match(line)
+  if prefix:
+    for code in ANSI_CODE_PATTERN.findall(prefix.group()):
+      style = BACKGROUND_STYLES.get(code, style)
+    text = ANSI_CODE_PATTERN.sub("", line[prefix.end() :])
+  else:
+    text = ANSI_CODE_PATTERN.sub("", line)
+  if "blender.crash.txt" in line:
+    style = STYLE_ERROR
+  return text, style, line.endswith(BASH_COLORS["RESET_ALL"])
+
+
+def get_text_format(style: str) -> QTextCharFormat:
+  """Get the format of a style with the colors of the current theme."""
+  colors = table_utils.COLORS
+  text_format = QTextCharFormat()
+  if style == STYLE_RESET:
+    text_format.setBackground(QColor(colors["grey_light"]))
+    text_format.setForeground(QColor(colors["grey_light"]))
+  elif style == STYLE_INFO:
+    text_format.setBackground(QColor(colors["blue_grey_lighter"]))
+    text_format.setForeground(QColor(Qt.black))
+  elif style == STYLE_WARNING:
+    text_format.setBackground(QColor(colors["yellow"]))
+    text_format.setForeground(QColor(Qt.black))
+  elif style == STYLE_ERROR:
+    text_format.setBackground(QColor(colors["red"]))
+    text_format.setForeground(QColor(colors["grey_light"]))
+  elif style == STYLE_AFTER_RESET:
+    text_format.setBackground(QColor(52, 80, 100))
+    text_format.setForeground(QColor(colors["grey_light"]))
+  return text_format
+
+
+class ConsoleOutput:
+  """Collect the output of the workers and append it to a text browser in bulk."""
+
+  def __init__(
+    self,
+    text_browser: QTextBrowser,
+    event_callback: Callable[[int, dict], None] | None = None,
+    line_callback: Callable[[int, str], None] | None = None,
+  ) -> None:
+    """Initialize the console.
+
+    Args:
+      text_browser: The text browser the output is shown in.
+      event_callback: Called with the worker id and the event for every event a worker reports.
+      line_callback: Called with the worker id and the text of every other line of a worker.
+    """
+    self.text_browser = text_browser
+    self.text_browser.document().setMaximumBlockCount(MAX_CONSOLE_LINES)
+    self.event_callback = event_callback
+    self.line_callback = line_callback
+    self.pending_chunks = []
+    self.remainders = {}
+    self.worker_styles = {}
+    self.logs = job_log.JobLogs()
+    self.timer = QTimer()
+    self.timer.setSingleShot(True)
+    self.timer.setInterval(FLUSH_INTERVAL_MS)
+    self.timer.timeout.connect(self.flush)
+
+  def append(self, worker_id: int, label: str, data: bytes) -> None:
+    """Add output of a worker. It is shown with the next flush."""
+    self.pending_chunks.append((worker_id, label, data))
+    if not self.timer.isActive():
+      self.timer.start()
+
+  def open_log(self, worker_id: int, log_path: Path) -> None:
+    """Write the output of a worker to a log file."""
+    self.logs.open(worker_id, log_path)
+
+  def close_log(self, worker_id: int) -> None:
+    """Close the log of a worker, unless another worker still writes to it."""
+    self.logs.close(worker_id)
+
+  def finish_worker(self, worker_id: int) -> None:
+    """Show all output of a finished worker including its last incomplete line."""
+    self.flush()
+    remainder = self.remainders.pop(worker_id, None)
+    if remainder:
+      runs = []
+      self.add_line(runs, worker_id, *remainder)
+      self.insert_runs(runs, force_scroll=False)
+    self.worker_styles.pop(worker_id, None)
+    self.close_log(worker_id)
+
+  def clear_workers(self) -> None:
+    """Forget the incomplete lines of all workers, e.g. after they were killed."""
+    self.remainders = {}
+    self.worker_styles = {}
+    self.logs.close_all()
+
+  def flush(self) -> None:
+    """Append all collected output to the text browser."""
+    self.timer.stop()
+    chunks = self.pending_chunks
+    self.pending_chunks = []
+    runs = []
+    force_scroll = False
+    for worker_id, label, data in chunks:
+      _, text = self.remainders.pop(worker_id, (label, ""))
+      text += data.decode(errors="replace")
+      # Keep incomplete lines until the rest arrives, so the output of parallel workers does not
+      # get mixed up within a line.
+      text, _, remainder = text.rpartition("\n")
+      if remainder:
+        self.remainders[worker_id] = (label, remainder)
+      for line in text.splitlines():
+        # Errors are always shown, even if the user scrolled up.
+        force_scroll = self.add_line(runs, worker_id, label, line) or force_scroll
+    if runs:
+      self.insert_runs(runs, force_scroll=force_scroll)
+    self.logs.flush()
+
+  def add_line(self, runs: list[list[str]], worker_id: int, label: str, line: str) -> bool:
+    """Add a line to the runs of text with the same style, or report the event of the line.
+
+    Returns:
+      Whether the line is an error.
+    """
+    text, style, ends_with_reset = parse_line(line)
+    if style:
+      self.worker_styles[worker_id] = style
+    event = parse_event(text)
+    if event:
+      if self.event_callback:
+        self.event_callback(worker_id, event)
+      return False
+    if self.line_callback:
+      self.line_callback(worker_id, text)
+    self.logs.write_line(worker_id, text, job_log.get_line_kind(line))
+    is_error = style == STYLE_ERROR
+    style = self.worker_styles.get(worker_id, STYLE_DEFAULT)
+    if runs and runs[-1][1] == style:
+      runs[-1][0] += label + text + "\n"
+    else:
+      runs.append([label + text + "\n", style])
+    if ends_with_reset:
+      self.worker_styles[worker_id] = STYLE_AFTER_RESET
+    return is_error
+
+  def insert_runs(self, runs: list[list[str]], force_scroll: bool) -> None:
+    """Insert runs of text with the same style at the end of the text browser."""
+    scroll_bar = self.text_browser.verticalScrollBar()
+    at_bottom = scroll_bar.value() > scroll_bar.maximum() - AUTO_SCROLL_DISTANCE
+    cursor = QTextCursor(self.text_browser.document())
+    cursor.movePosition(QTextCursor.End)
+    cursor.beginEditBlock()
+    for text, style in runs:
+      cursor.insertText(text, get_text_format(style))
+    cursor.endEditBlock()
+    if at_bottom or force_scroll:
+      self.text_browser.moveCursor(QTextCursor.End)
+      scroll_bar.setValue(scroll_bar.maximum())
@@ -19,11 +19,13 @@ class DropWidget(QWidget):
           continue
         # if not file_path.endswith('.blend'):
         #   continue
-        table = self.parent().tableWidget
+        table = self.parent().tableView
         # blend_files_path = self.parent().state_saver.state.settings.blender_files_path
         # file_path = os.path.relpath(file_path, blend_files_path)
-        table_utils.add_file_below(table, file_path)
-        table.itemChanged.emit(table.item(table.rowCount() - 1, 1))
+        model = table.model()
+        model.job_about_to_change.emit(model.rowCount())
+        row = table_utils.add_file_below(table, file_path)
+        model.job_changed.emit(row, 1)
         event.accept()
     else:
       event.ignore()
@@ -0,0 +1,137 @@
+"""File watcher, which keeps the cached file system state of path_utils up to date.
+
+The table checks whether the blend files exist and the shot name builder lists the output folder
+to find the next version. Instead of polling the file system on the GUI thread, the folders of the
+blend files and the output folders are watched in the background. The cached results in them are
+reused until a change is reported.
+"""
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+from PySide6.QtCore import QFileSystemWatcher, QTimer
+
+from protos import state_pb2
+from utils_rr import path_utils
+
+# Changes often come in bursts, e.g. while frames are saved, so they are reported together.
+CHANGE_DELAY_MS = 200
+
+
+def get_output_directories(
+  settings: state_pb2.settings,  # pylint: disable=no-member
+) -> set[str]:
+  """Get the output folders of the settings of a state, which receive the rendered frames."""
+  if not settings.output_path:
+    return set()
+  return {
+    os.path.abspath(settings.output_path),
+    os.path.abspath(Path(settings.output_path) / "stills"),
+  }
+
+
+def get_watched_directories(
+  state: state_pb2.render_rob_state,  # pylint: disable=no-member
+) -> set[str]:
+  """Get the folders of the blend files and the output folders of a state."""
+  settings = state.settings
+  directories = get_output_directories(settings)
+  if settings.blender_files_path:
+    directories.add(settings.blender_files_path)
+  for job in state.render_jobs:
+    if job.file:
+      blend_path = path_utils.get_abs_blend_path(job.file, settings.blender_files_path)
+      directories.add(str(Path(blend_path).parent))
+  return {os.path.abspath(directory) for directory in directories}
+
+
+class FileWatcher:
+  """Watch the folders of a state and invalidate the cached results in them on changes."""
+
+  def __init__(self, changed_callback: Callable[[set[str]], None] | None = None) -> None:
+    """Initialize the watcher.
+
+    Args:
+      changed_callback: Called once after a burst of changes with the changed folders.
+    """
+    self.changed_callback = changed_callback
+    self.watcher = QFileSystemWatcher()
+    self.watcher.directoryChanged.connect(self.directory_changed)
+    self.timer = QTimer()
+    self.timer.setSingleShot(True)
+    self.timer.setInterval(CHANGE_DELAY_MS)
+    self.timer.timeout.connect(self.report_changes)
+    # The folders of the state, which didn't exist yet, when the state was watched.
+    self.missing_directories = set()
+    # The folders, which changed since the last report.
+    self.changed_directories = set()
+
+  def watch_state(self, state: state_pb2.render_rob_state) -> None:  # pylint: disable=no-member
+    """Watch exactly the folders of a state.
+
+    Missing folders can't be watched. They are tried again by watch_missing_directories.
+    """
+    directories = get_watched_directories(state)
+    watched = set(self.watcher.directories())
+    removed = watched - directories
+    if removed:
+      self.watcher.removePaths(list(removed))
+      for directory in removed:
+        path_utils.unwatch_directory(directory)
+    self._add_directories(directories - watched)
+    self.missing_directories = directories - set(self.watcher.directories())
+
+  def watch_missing_directories(self) -> None:
+    """Watch the folders of the state, which were missing so far, once they exist.
+
+    The files in a new folder weren't known before, so a change is reported.
+    """
+    added = self._add_directories(self.missing_directories)
+    if added:
+      self.missing_directories -= added
+      self.changed_directories |= added
+      self.timer.start()
+
+  def _add_directories(self, directories: set[str]) -> set[str]:
+    """Watch the existing folders of a set.
+
+    Returns:
+      The folders, which are watched now.
+    """
+    existing = [directory for directory in directories if os.path.isdir(directory)]
+    if not existing:
+      return set()
+    self.watcher.addPaths(existing)
+    added = set(existing) & set(self.watcher.directories())
+    for directory in added:
+      # Results from before the folder was watched may already be outdated.
+      path_utils.invalidate_directory(directory)
+      path_utils.watch_directory(directory)
+    return added
+
+  def directory_changed(self, directory: str) -> None:
+    """Invalidate the cached results in a changed folder."""
+    if directory not in self.watcher.directories():
+      # The folder was removed, so it is no longer watched.
+      path_utils.unwatch_directory(directory)
+    else:
+      path_utils.invalidate_directory(directory)
+    self.changed_directories.add(directory)
+    self.timer.start()
+
+  def report_changes(self) -> None:
+    """Report the folders, which changed since the last report."""
+    changed_directories = self.changed_directories
+    self.changed_directories = set()
+    if self.changed_callback:
+      self.changed_callback(changed_directories)
+
+  def clear(self) -> None:
+    """Stop watching all folders."""
+    self.missing_directories = set()
+    self.changed_directories = set()
+    for directory in self.watcher.directories():
+      path_utils.unwatch_directory(directory)
+    if self.watcher.directories():
+      self.watcher.removePaths(self.watcher.directories())
@@ -0,0 +1,189 @@
+"""Scanner, which reads the metadata of blend files in background Blender processes.
+
+The metadata is read from the cache if the blend file didn't change. Otherwise, the blend files are
+distributed over a small pool of Blender processes, which open several files each, so the table
+stays responsive and a launch of Blender is shared by several files.
+"""
+
+import json
+from collections.abc import Callable, Iterable
+
+from PySide6.QtCore import QProcess
+
+import blend_metadata
+from utils_common import print_utils
+from utils_common.render_protocol import METADATA_FILES_VARIABLE, METADATA_PREFIX
+
+MAX_SCAN_PROCESSES = 4
+
+
+class MetadataScanner:
+  """Keep the metadata of blend files in memory and scan the missing ones."""
+
+  def __init__(
+    self,
+    cache: blend_metadata.MetadataCache,
+    changed_callback: Callable[[], None] | None = None,
+  ) -> None:
+    """Initialize the scanner.
+
+    Args:
+      cache: The on-disk cache of the metadata.
+      changed_callback: Called after a Blender process reported the metadata of its files.
+    """
+    self.cache = cache
+    self.changed_callback = changed_callback
+    # The metadata by the path of the blend file. It is None if the file couldn't be scanned.
+    self.metadata = {}
+    # The signatures of the files, which are being scanned.
+    self.signatures = {}
+    # Files, which were being scanned when the metadata was forgotten, so their results might be
+    # outdated. They are only stored in the cache.
+    self.stale_paths = set()
+    self.queue = []
+    self.processes = {}
+    self.next_process_id = 0
+    self.program = ""
+    self.arguments = []
+
+  def get(self, path: str) -> dict | None:
+    """Get the metadata of a blend file, if it is known."""
+    return self.metadata.get(path)
+
+  def lookup(self, path: str) -> dict | None:
+    """Get the metadata of a blend file from memory or, if it wasn't requested yet, the cache."""
+    if path in self.metadata:
+      return self.metadata[path]
+    return self.cache.lookup(path)
+
+  def forget(self, paths: Iterable[str] | None = None) -> None:
+    """Forget the metadata of blend files in memory, e.g. after they changed on the disk.
+
+    The next request checks the files against the cache again.
+
+    Args:
+      paths: The absolute paths of the blend files. All files are forgotten if it is None.
+    """
+    if paths is None:
+      self.metadata.clear()
+      self.stale_paths = set(self.signatures)
+      return
+    for path in paths:
+      self.metadata.pop(path, None)
+      if path in self.signatures:
+        self.stale_paths.add(path)
+
+  def request(self, paths: list[str], program: str, arguments: list[str]) -> None:
+    """Load the metadata of blend files from the cache or start scanning them.
+
+    Args:
+      paths: The absolute paths of the blend files.
+      program: The Blender executable.
+      arguments: The arguments, which run the metadata loader in Blender.
+    """
+    for path in dict.fromkeys(paths):
+      if path in self.metadata or path in self.signatures:
+        continue
+      signature = blend_metadata.get_file_signature(path)
+      if signature is None:
+        continue
+      metadata = self.cache.get(path, signature)
+      if metadata is not None:
+        self.metadata[path] = metadata
+        continue
+      self.signatures[path] = signature
+      self.queue.append(path)
+    self.program = program
+    self.arguments = arguments
+    if program:
+      self._start_processes()
+
+  def running_count(self) -> int:
+    """Get the number of running Blender processes."""
+    return len(self.processes)
+
+  def cancel_all(self) -> None:
+    """Kill all Blender processes and forget the queued files."""
+    for process, _ in self.processes.values():
+      process.blockSignals(True)
+      process.kill()
+      process.waitForFinished()
+      process.deleteLater()
+    self.processes.clear()
+    self.queue.clear()
+    self.signatures.clear()
+    self.stale_paths.clear()
+
+  def _start_processes(self) -> None:
+    """Distribute the queued files over the free Blender processes."""
+    free_count = min(MAX_SCAN_PROCESSES - len(self.processes), len(self.queue))
+    if free_count <= 0:
+      return
+    batches = [self.queue[i::free_count] for i in range(free_count)]
+    self.queue = []
+    for batch in batches:
+      process = QProcess()
+      process.setProcessChannelMode(QProcess.MergedChannels)
+      env = QProcess.systemEnvironment()
+      env.append(f"{METADATA_FILES_VARIABLE}={json.dumps(batch)}")
+      process.setEnvironment(env)
+      process.setProgram(self.program)
+      process.setArguments(self.arguments)
+      process_id = self.next_process_id
+      self.next_process_id += 1
+      self.processes[process_id] = (process, set(batch))
+      process.finished.connect(
+        lambda _exit_code, _status, process_id=process_id: self._finish(process_id),
+      )
+      process.errorOccurred.connect(
+        lambda error, process_id=process_id: self._fail_to_start(process_id, error),
+      )
+      process.start()
+
+  def _fail_to_start(self, process_id: int, error: QProcess.ProcessError) -> None:
+    """Handle a Blender process, which could not be started."""
+    if error != QProcess.FailedToStart or process_id not in self.processes:
+      return
+    process = self.processes[process_id][0]
+    print_utils.print_warning(f"Could not start Blender to read metadata: {process.errorString()}")
+    self._finish(process_id)
+
+  def _finish(self, process_id: int) -> None:
+    """Store the metadata, which a finished Blender process reported, and scan the next files."""
+    if process_id not in self.processes:
+      return
+    process, batch = self.processes.pop(process_id)
+    output = bytes(process.readAllStandardOutput()).decode(errors="replace")
+    for line in output.splitlines():
+      if not line.startswith(METADATA_PREFIX):
+        continue
+      try:
+        result = json.loads(line[len(METADATA_PREFIX) :])
+      except json.JSONDecodeError as error:
+        print_utils.print_warning(f"Could not read the metadata reported by Blender: {error}")
+        continue
+      path = result["file"]
+      if path not in batch:
+        continue
+      batch.discard(path)
+      metadata = result.get("metadata")
+      if metadata is None:
+        print_utils.print_warning(f"Could not read the metadata of {path}: {result['error']}")
+      else:
+        self.cache.put(path, self.signatures[path], metadata)
+      self._store(path, metadata)
+    # Files without a result are not scanned again until they are forgotten.
+    for path in batch:
+      self._store(path, None)
+    process.deleteLater()
+    self._start_processes()
+    if self.changed_callback:
+      self.changed_callback()
+
+  def _store(self, path: str, metadata: dict | None) -> None:
+    """Store the metadata of a scanned file in memory, unless it might be outdated."""
+    self.signatures.pop(path, None)
+    if path in self.stale_paths:
+      self.stale_paths.discard(path)
+    else:
+      self.metadata[path] = metadata
@@ -1,8 +1,24 @@
 """Path utilities."""
 
 import os
+import time
 from pathlib import Path
 
+# A listing taken within this time after the last change of a directory is not reused, since file
+# systems with a coarse timestamp resolution don't change the modification time a second time.
+RACY_LISTING_SECONDS = 2
+# The result of an existence check is reused for this long, e.g. for coloring the table.
+PATH_EXISTS_TTL_SECONDS = 5
+# The cached results in a watched directory are checked again after this long, since watchers miss
+# changes on some file systems, e.g. network shares.
+WATCHED_MAX_AGE_SECONDS = 60
+
+_directory_listings = {}
+_path_exists_cache = {}
+# Directories, whose changes are reported by a file watcher through invalidate_directory(). Cached
+# results in them are valid until they are invalidated or reach WATCHED_MAX_AGE_SECONDS.
+_watched_directories = set()
+
 
 def discover_blender_path() -> None:
   """Discover the path to Blender."""
@@ -46,3 +62,82 @@ def normalize_drive_letter(path: str) -> str:
   if path[1] == ":":
     return path[0].upper() + path[1:]
   return path
+
+
+def list_directory(directory: str | Path) -> dict[str, bool]:
+  """List the entries of a directory with whether they are directories themselves.
+
+  The listing is cached until the modification time of the directory changes, so repeated calls
+  cost a single stat instead of a directory listing. The listing of a watched directory is reused
+  without a stat for up to WATCHED_MAX_AGE_SECONDS. A missing directory has no entries.
+  """
+  directory = os.path.abspath(directory)
+  now = time.monotonic()
+  cached = _directory_listings.get(directory)
+  if cached and directory in _watched_directories and now - cached[2] < WATCHED_MAX_AGE_SECONDS:
+    return cached[1]
+  try:
+    modification_time = os.stat(directory).st_mtime
+  except OSError:
+    _directory_listings.pop(directory, None)
+    return {}
+  if cached and cached[0] == modification_time:
+    _directory_listings[directory] = (modification_time, cached[1], now)
+    return cached[1]
+  listing_time = time.time()
+  try:
+    with os.scandir(directory) as entries:
+      listing = {entry.name: entry.is_dir() for entry in entries}
+  except OSError:
+    return {}
+  if listing_time - modification_time > RACY_LISTING_SECONDS:
+    _directory_listings[directory] = (modification_time, listing, now)
+  return listing
+
+
+def path_exists(path: str | Path, max_age: float | None = None) -> bool:
+  """Check if a path exists.
+
+  The result is cached, since the table checks the paths of all blend files on every change. It is
+  reused until the watcher reports a change of the parent directory, at most for
+  WATCHED_MAX_AGE_SECONDS, or, if the parent directory is not watched, for max_age seconds, which
+  defaults to PATH_EXISTS_TTL_SECONDS.
+  """
+  path = os.path.abspath(path)
+  if os.path.dirname(path) in _watched_directories:
+    max_age = WATCHED_MAX_AGE_SECONDS
+  elif max_age is None:
+    max_age = PATH_EXISTS_TTL_SECONDS
+  now = time.monotonic()
+  cached = _path_exists_cache.get(path)
+  if cached and now - cached[0] < max_age:
+    return cached[1]
+  exists = os.path.exists(path)
+  _path_exists_cache[path] = (now, exists)
+  return exists
+
+
+def clear_path_exists_cache() -> None:
+  """Forget the results of all existence checks."""
+  _path_exists_cache.clear()
+
+
+def watch_directory(directory: str | Path) -> None:
+  """Trust the cached results in a directory until it is invalidated."""
+  _watched_directories.add(os.path.abspath(directory))
+
+
+def unwatch_directory(directory: str | Path) -> None:
+  """Stop trusting the cached results in a directory, e.g. if it is no longer watched."""
+  directory = os.path.abspath(directory)
+  _watched_directories.discard(directory)
+  invalidate_directory(directory)
+
+
+def invalidate_directory(directory: str | Path) -> None:
+  """Forget the cached listing of a directory and the existence checks of its entries."""
+  directory = os.path.abspath(directory)
+  _directory_listings.pop(directory, None)
+  _path_exists_cache.pop(directory, None)
+  for path in [path for path in _path_exists_cache if os.path.dirname(path) == directory]:
+    del _path_exists_cache[path]
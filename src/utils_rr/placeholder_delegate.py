@@ -1,18 +1,55 @@
-"""Placeholder delegate for QTableWidget."""
+"""Placeholder delegate for the render job table."""
+
+from collections.abc import Callable
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor
-from PySide6.QtWidgets import QStyledItemDelegate, QTableWidget
+from PySide6.QtWidgets import QCompleter, QLineEdit, QStyledItemDelegate, QTableView
 
 from utils_rr import ui_utils
+from utils_rr.render_job_model import VIEW_LAYERS_COLUMN
+
+
+class MultiValueCompleter(QCompleter):
+  """Complete the last value of a list of values, e.g. of the view layers."""
+
+  def __init__(self, items: list[str], separator: str, parent=None):
+    super().__init__(items, parent)
+    self.separator = separator
+
+  def splitPath(self, path):  # pylint: disable=invalid-name
+    """Complete only the value after the last separator."""
+    return [path.split(self.separator)[-1]]
+
+  def pathFromIndex(self, index):  # pylint: disable=invalid-name
+    """Replace the last value with the completion."""
+    values = self.widget().text().split(self.separator)
+    values[-1] = super().pathFromIndex(index)
+    return self.separator.join(values)
 
 
 class PlaceholderDelegate(QStyledItemDelegate):
-  """Placeholder delegate for QTableWidget."""
+  """Paint a placeholder text into empty cells."""
+
+  def __init__(
+    self,
+    placeholder_text,
+    parent=None,
+    completions: Callable[[int], list[str]] | None = None,
+    separator: str | None = None,
+  ):
+    """Initialize the delegate.
 
-  def __init__(self, placeholder_text, parent=None):
+    Args:
+      placeholder_text: The text, which is painted into empty cells.
+      parent: The parent of the delegate.
+      completions: Called with the row of an edited cell to get the completions of the editor.
+      separator: The separator of the values in the cell, of which only the last is completed.
+    """
     super().__init__(parent)
     self.placeholder_text = placeholder_text
+    self.completions = completions
+    self.separator = separator
 
   def paint(self, painter, option, index):
     """Paint the placeholder text."""
@@ -23,17 +60,39 @@ class PlaceholderDelegate(QStyledItemDelegate):
       painter.setPen(QColor("#c0c0c0"))
       painter.drawText(placeholder_rect, Qt.AlignHCenter | Qt.AlignVCenter, self.placeholder_text)
 
+  def createEditor(self, parent, option, index):  # pylint: disable=invalid-name
+    """Create the editor and add the completions of the row."""
+    editor = super().createEditor(parent, option, index)
+    if not self.completions or not isinstance(editor, QLineEdit):
+      return editor
+    items = self.completions(index.row())
+    if not items:
+      return editor
+    if self.separator:
+      completer = MultiValueCompleter(items, self.separator, editor)
+    else:
+      completer = QCompleter(items, editor)
+    completer.setCaseSensitivity(Qt.CaseInsensitive)
+    editor.setCompleter(completer)
+    return editor
+
+
+def setup_placeholder_delegate(
+  table_view: QTableView,
+  completions: dict[int, Callable[[int], list[str]]] | None = None,
+) -> None:
+  """Set up the placeholder delegate for the text and number columns of the given table view.
 
-def setup_placeholder_delegate(table_widget: QTableWidget):
-  """Set up the placeholder delegate for the given table widget."""
-  table_widget.blockSignals(True)
-  for row in range(table_widget.rowCount()):
-    for col in ui_utils.TEXT_COLUMNS + ui_utils.NUMBER_COLUMNS:
-      item = table_widget.item(row, col)
-      if item:
-        placeholder_text = ui_utils.PLACEHOLDER_TEXT[col]
-        item.setData(Qt.EditRole, placeholder_text)
-        item.setFlags(item.flags() | Qt.ItemIsEditable)
-        item_delegate = PlaceholderDelegate(placeholder_text, table_widget)
-        table_widget.setItemDelegateForColumn(col, item_delegate)
-  table_widget.blockSignals(False)
+  Args:
+    table_view: The table view.
+    completions: The functions, which get the completions of a row, by column.
+  """
+  completions = completions or {}
+  for col in ui_utils.TEXT_COLUMNS + ui_utils.NUMBER_COLUMNS:
+    item_delegate = PlaceholderDelegate(
+      ui_utils.PLACEHOLDER_TEXT[col],
+      table_view,
+      completions.get(col),
+      ";" if col == VIEW_LAYERS_COLUMN else None,
+    )
+    table_view.setItemDelegateForColumn(col, item_delegate)
@@ -0,0 +1,380 @@
+"""Table model, which presents the render jobs of the state to a table view.
+
+Note: The model edits the render jobs of the state in place, so the state is always up to date and
+doesn't need to be synced with the table. All edits are recorded in the undo history of the model.
+"""
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+from PySide6.QtGui import QColor
+
+import job_registry
+import undo_history
+from protos import state_pb2
+from utils_rr import table_utils, ui_utils
+
+COLUMN_FIELDS = [
+  "active",
+  "file",
+  "camera",
+  "start",
+  "end",
+  "x_res",
+  "y_res",
+  "samples",
+  "file_format",
+  "engine",
+  "device",
+  "motion_blur",
+  "overwrite",
+  "high_quality",
+  "denoise",
+  "scene",
+  "view_layers",
+  "comments",
+]
+HEADER_LABELS = [
+  "Active",
+  "File",
+  "Camera",
+  "Start",
+  "End",
+  "X\nRes",
+  "Y\nRes",
+  "Samples",
+  "File\nFormat",
+  "Engine",
+  "Device",
+  "Motion\nBlur",
+  "Continue\nJob",
+  "Final\nMode",
+  "Denoise",
+  "Scene",
+  "View\nLayers",
+  "Comments",
+]
+COMBOBOX_ITEMS = {
+  8: ui_utils.FILE_FORMATS_UI,
+  9: ui_utils.RENDER_ENGINES,
+  10: ui_utils.DEVICES,
+}
+FILE_COLUMN = 1
+CAMERA_COLUMN = 2
+SCENE_COLUMN = 15
+VIEW_LAYERS_COLUMN = 16
+
+
+def new_render_job() -> state_pb2.render_job:  # pylint: disable=no-member
+  """Create a render job with the values of a new table row."""
+  render_job = state_pb2.render_job()  # pylint: disable=no-member
+  render_job.active = True
+  render_job.view_layers.append("")
+  return render_job
+
+
+class RenderJobModel(QAbstractTableModel):
+  """Table model, which edits the render jobs of the state in place."""
+
+  # Emitted with the row before the user edits a render job.
+  job_about_to_change = Signal(int)
+  # Emitted with the row and column after the user edited a render job.
+  job_changed = Signal(int, int)
+
+  def __init__(
+    self,
+    state: state_pb2.render_rob_state,  # pylint: disable=no-member
+    parent=None,
+  ) -> None:
+    """Initialize the model.
+
+    Args:
+      state: The state, whose render jobs are shown.
+      parent: The parent object.
+    """
+    super().__init__(parent)
+    self.state = state
+    self.read_only = False
+    self.row_colors = [None] * len(state.render_jobs)
+    # The colors of single cells of each row, which take precedence over the row color.
+    self.cell_colors = [{} for _ in state.render_jobs]
+    # The settings key of each row, which finds duplicated jobs. It is computed on demand and
+    # cleared when the row is edited.
+    self._settings_keys = [None] * len(state.render_jobs)
+    self.history = undo_history.UndoHistory()
+    # The row of every render job by its id. It is built on demand after rows were added, removed
+    # or moved.
+    self._rows_by_id = None
+    self.dataChanged.connect(self._forget_settings_keys)
+
+  def reset(self) -> None:
+    """Show the render jobs again after the state was replaced, e.g. after loading a file."""
+    self.beginResetModel()
+    self.row_colors = [None] * len(self.state.render_jobs)
+    self.cell_colors = [{} for _ in self.state.render_jobs]
+    self._settings_keys = [None] * len(self.state.render_jobs)
+    self.history.clear()
+    self._rows_by_id = None
+    self.endResetModel()
+
+  def job(self, row: int) -> state_pb2.render_job:  # pylint: disable=no-member
+    """Get the render job of a row."""
+    return self.state.render_jobs[row]
+
+  def find_row(self, job_id: str) -> int:
+    """Get the row of the render job with an id, or -1 if no render job has the id."""
+    if self._rows_by_id is None:
+      self._rows_by_id = {job.id: row for row, job in enumerate(self.state.render_jobs)}
+    return self._rows_by_id.get(job_id, -1)
+
+  def get_settings_key(self, row: int) -> bytes:
+    """Get the key of a row, which is equal for jobs with the same settings."""
+    if self._settings_keys[row] is None:
+      self._settings_keys[row] = job_registry.get_settings_key(self.job(row))
+    return self._settings_keys[row]
+
+  def _forget_settings_keys(
+    self,
+    top_left: QModelIndex,
+    bottom_right: QModelIndex,
+    roles: list[int] | None = None,
+  ) -> None:
+    """Forget the settings keys of edited rows. A changed color doesn't change the settings."""
+    if roles and Qt.BackgroundRole in roles:
+      return
+    for row in range(top_left.row(), bottom_right.row() + 1):
+      self._settings_keys[row] = None
+
+  def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # pylint: disable=invalid-name
+    """Get the number of render jobs."""
+    if parent.isValid():
+      return 0
+    return len(self.state.render_jobs)
+
+  def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:  # pylint: disable=invalid-name
+    """Get the number of columns."""
+    if parent.isValid():
+      return 0
+    return len(COLUMN_FIELDS)
+
+  def headerData(  # pylint: disable=invalid-name
+    self,
+    section: int,
+    orientation: Qt.Orientation,
+    role: int = Qt.DisplayRole,
+  ) -> str | None:
+    """Get the column labels and the row numbers."""
+    if role != Qt.DisplayRole:
+      return None
+    if orientation == Qt.Horizontal:
+      return HEADER_LABELS[section]
+    return str(section + 1)
+
+  def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+    """Get the flags of a cell."""
+    flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+    if not index.isValid() or self.read_only:
+      return flags
+    if index.column() in ui_utils.CHECKBOX_COLUMNS:
+      return flags | Qt.ItemIsUserCheckable
+    return flags | Qt.ItemIsEditable
+
+  def get_value(self, row: int, column: int) -> str | int | bool:
+    """Get the value of a cell as shown in the editor of the column."""
+    value = getattr(self.job(row), COLUMN_FIELDS[column])
+    if column == VIEW_LAYERS_COLUMN:
+      return ";".join(value)
+    return value
+
+  def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> object:
+    """Get the data of a cell."""
+    if not index.isValid():
+      return None
+    row = index.row()
+    column = index.column()
+    if role == Qt.CheckStateRole and column in ui_utils.CHECKBOX_COLUMNS:
+      return Qt.Checked if self.get_value(row, column) else Qt.Unchecked
+    if role == Qt.DisplayRole:
+      if column in ui_utils.CHECKBOX_COLUMNS:
+        return None
+      if column in COMBOBOX_ITEMS:
+        return COMBOBOX_ITEMS[column][self.get_value(row, column)]
+      return self.get_value(row, column)
+    if role == Qt.EditRole:
+      return self.get_value(row, column)
+    if role == Qt.TextAlignmentRole:
+      if column == FILE_COLUMN:
+        return Qt.AlignLeft | Qt.AlignVCenter
+      return Qt.AlignCenter
+    if role == Qt.BackgroundRole:
+      return self.get_background(row, column)
+    return None
+
+  def get_background(self, row: int, column: int) -> QColor | None:
+    """Get the background color of a cell."""
+    if column in self.cell_colors[row]:
+      return self.cell_colors[row][column]
+    # Check if the value in the numbers columns is valid.
+    if column in ui_utils.NUMBER_COLUMNS:
+      value = self.get_value(row, column)
+      if value and not value.isnumeric():
+        return QColor(table_utils.COLORS["red"])
+    return self.row_colors[row]
+
+  def set_value(self, row: int, column: int, value: str | int | bool) -> bool:
+    """Set the value of a cell without notifying about a user edit.
+
+    Returns:
+      Whether the value changed.
+    """
+    old_value = self.get_value(row, column)
+    if old_value == value:
+      return False
+    self.history.record(undo_history.ValueChange(row, column, old_value, value))
+    render_job = self.job(row)
+    if column == VIEW_LAYERS_COLUMN:
+      del render_job.view_layers[:]
+      render_job.view_layers.extend(value.split(";"))
+    else:
+      setattr(render_job, COLUMN_FIELDS[column], value)
+    index = self.index(row, column)
+    self.dataChanged.emit(index, index)
+    return True
+
+  def setData(  # pylint: disable=invalid-name
+    self,
+    index: QModelIndex,
+    value: object,
+    role: int = Qt.EditRole,
+  ) -> bool:
+    """Set the value of a cell edited by the user."""
+    if not index.isValid() or self.read_only:
+      return False
+    row = index.row()
+    column = index.column()
+    if role == Qt.CheckStateRole and column in ui_utils.CHECKBOX_COLUMNS:
+      value = Qt.CheckState(value) == Qt.Checked
+    elif role == Qt.EditRole and column not in ui_utils.CHECKBOX_COLUMNS:
+      value = value if column in COMBOBOX_ITEMS else str(value)
+    else:
+      return False
+    if self.get_value(row, column) == value:
+      return False
+    self.job_about_to_change.emit(row)
+    self.set_value(row, column, value)
+    self.job_changed.emit(row, column)
+    return True
+
+  def insert_job(
+    self,
+    row: int,
+    render_job: state_pb2.render_job,  # pylint: disable=no-member
+  ) -> None:
+    """Insert a copy of a render job before the given row.
+
+    The copy gets a new id, if the job has none or its id is already used by another row, e.g.
+    when a row is duplicated.
+    """
+    job_copy = state_pb2.render_job()  # pylint: disable=no-member
+    job_copy.CopyFrom(render_job)
+    if not job_copy.id or self.find_row(job_copy.id) != -1:
+      job_copy.id = job_registry.new_job_id()
+    self.history.record(undo_history.RowInsert(row, job_copy.SerializeToString()))
+    self.beginInsertRows(QModelIndex(), row, row)
+    self.state.render_jobs.insert(row, job_copy)
+    self.row_colors.insert(row, None)
+    self.cell_colors.insert(row, {})
+    self._settings_keys.insert(row, None)
+    self._rows_by_id = None
+    self.endInsertRows()
+
+  def insertRows(  # pylint: disable=invalid-name
+    self,
+    row: int,
+    count: int,
+    parent: QModelIndex = QModelIndex(),
+  ) -> bool:
+    """Insert new render jobs before the given row."""
+    if parent.isValid():
+      return False
+    for _ in range(count):
+      self.insert_job(row, new_render_job())
+    return True
+
+  def removeRows(  # pylint: disable=invalid-name
+    self,
+    row: int,
+    count: int,
+    parent: QModelIndex = QModelIndex(),
+  ) -> bool:
+    """Remove render jobs."""
+    if parent.isValid() or row < 0 or row + count > self.rowCount():
+      return False
+    # The following rows move up after each removal, so every row is removed at the same index.
+    for removed_row in range(row, row + count):
+      self.history.record(
+        undo_history.RowRemove(row, self.job(removed_row).SerializeToString()),
+      )
+    self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+    del self.state.render_jobs[row : row + count]
+    del self.row_colors[row : row + count]
+    del self.cell_colors[row : row + count]
+    del self._settings_keys[row : row + count]
+    self._rows_by_id = None
+    self.endRemoveRows()
+    return True
+
+  def move_row(self, row: int, new_row: int) -> bool:
+    """Move a render job to another row."""
+    if new_row in (row, row + 1) or not 0 <= row < self.rowCount():
+      return False
+    if not 0 <= new_row <= self.rowCount():
+      return False
+    self.history.record(undo_history.RowMove(row, new_row))
+    self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), new_row)
+    render_job = state_pb2.render_job()  # pylint: disable=no-member
+    render_job.CopyFrom(self.job(row))
+    color = self.row_colors.pop(row)
+    cell_colors = self.cell_colors.pop(row)
+    settings_key = self._settings_keys.pop(row)
+    del self.state.render_jobs[row]
+    # The destination is given as row before the move, so it shifts if the row moves down.
+    destination = new_row - 1 if new_row > row else new_row
+    self.state.render_jobs.insert(destination, render_job)
+    self.row_colors.insert(destination, color)
+    self.cell_colors.insert(destination, cell_colors)
+    self._settings_keys.insert(destination, settings_key)
+    self._rows_by_id = None
+    self.endMoveRows()
+    return True
+
+  def set_row_color(
+    self,
+    row: int,
+    color: QColor | None,
+    cell_colors: dict[int, QColor] | None = None,
+  ) -> bool:
+    """Set the background color of a row and replace the colors of its cells.
+
+    The row is only repainted if its colors changed.
+
+    Returns:
+      Whether the colors changed.
+    """
+    cell_colors = cell_colors or {}
+    if self.row_colors[row] == color and self.cell_colors[row] == cell_colors:
+      return False
+    self.row_colors[row] = color
+    self.cell_colors[row] = cell_colors
+    self.dataChanged.emit(
+      self.index(row, 0),
+      self.index(row, self.columnCount() - 1),
+      [Qt.BackgroundRole],
+    )
+    return True
+
+  def set_cell_color(self, row: int, column: int, color: QColor) -> None:
+    """Set the background color of a single cell."""
+    if self.cell_colors[row].get(column) == color:
+      return
+    self.cell_colors[row][column] = color
+    index = self.index(row, column)
+    self.dataChanged.emit(index, index, [Qt.BackgroundRole])
@@ -1,10 +1,9 @@
 """Utility functions for table operations."""
-from typing import Any, Optional
+from typing import Optional
 
-from PySide6.QtGui import QColor, Qt
-from PySide6.QtWidgets import (QCheckBox, QComboBox, QHeaderView, QStyledItemDelegate, QTableWidget,
-                               QTableWidgetItem, QWidget)
-from utils_rr import ui_utils, path_utils
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import QHeaderView, QTableView
+from utils_rr import path_utils
 
 COLORS_LIGHT = {
     "red": 0x980030,
@@ -42,266 +41,143 @@ COLORS_DARK = {
 COLORS = COLORS_DARK
 
 
-def fix_active_row_path(item: QTableWidgetItem, blend_folder: str) -> None:
-  """Fix the path of the currently selected row."""
-  path = item.text()
+def fix_path(path: str, blend_folder: str) -> str:
+  """Fix a path entered into the file column."""
   path = path_utils.normalize_drive_letter(path)
   path = path.replace('"', "").replace("\\", "/")
   if blend_folder:
     path = path_utils.get_rel_blend_path(path, blend_folder)
-  item.setText(path)
-
-
-def make_editable(table_widget: QTableWidget) -> None:
-  """Undo the make QTableWidget only selectable."""
-  class EditableDelegate(QStyledItemDelegate):
-    """Allow editing of QTableWidget."""
-
-    def createEditor(self, parent, option, index):  # pylint: disable=invalid-name
-      """Allow editing by returning the default editor"""
-      return QStyledItemDelegate.createEditor(self, parent, option, index)
-  delegate = EditableDelegate()
-  table_widget.setItemDelegate(delegate)
-  for row in range(table_widget.rowCount()):
-    for col in ui_utils.COMBOBOX_COLUMNS:
-      widget = table_widget.cellWidget(row, col)
-      if widget and isinstance(widget, QComboBox):
-        widget.setDisabled(False)
-
-    for col in ui_utils.CHECKBOX_COLUMNS:
-      widget = table_widget.cellWidget(row, col)
-      checkbox_item = widget.findChild(QCheckBox)
-      if widget and isinstance(widget, QWidget):
-        checkbox_item.setDisabled(False)
-
-
-def make_read_only_selectable(table_widget: QTableWidget) -> None:
-  """Make QTableWidget only selectable."""
+  return path
+
+
+def make_editable(table_view: QTableView) -> None:
+  """Undo the make table view only selectable."""
+  table_view.model().read_only = False
+  table_view.viewport().update()
+
+
+def make_read_only_selectable(table_view: QTableView) -> None:
+  """Make the table view only selectable."""
   #  #10 Set the render button to disabled.
-  class ReadOnlyDelegate(QStyledItemDelegate):
-    """Prevent editing of QTableWidget."""
-
-    def createEditor(self, parent, option, index):  # pylint: disable=invalid-name
-      """Prevent editing of QTableWidget by returning None."""
-      del parent, option, index
-  delegate = ReadOnlyDelegate()
-  table_widget.setItemDelegate(delegate)
-  for row in range(table_widget.rowCount()):
-    for col in ui_utils.COMBOBOX_COLUMNS:
-      combobox_item = table_widget.cellWidget(row, col)
-      if combobox_item and isinstance(combobox_item, QComboBox):
-        combobox_item.setEditable(False)
-        combobox_item.setDisabled(True)
-
-    for col in ui_utils.CHECKBOX_COLUMNS:
-      widget = table_widget.cellWidget(row, col)
-      checkbox_item = widget.findChild(QCheckBox)
-      checked = checkbox_item.isChecked()
-      if widget and isinstance(widget, QWidget):
-        # checkbox_item.setCheckable(False)
-        checkbox_item.setDisabled(True)
-        checkbox_item.setChecked(checked)
+  table_view.model().read_only = True
+  table_view.viewport().update()
+
+
+def select_row(table_view: QTableView, row: int, column: int) -> None:
+  """Make a cell of a row the current cell."""
+  table_view.setCurrentIndex(table_view.model().index(row, max(column, 0)))
 
 
 # @operator
-def move_row_down(table_widget: QTableWidget, before_callback_function: callable,
+def move_row_down(table_view: QTableView, before_callback_function: callable,
                   after_callback_function: callable) -> None:
   """Move the currently selected row down."""
-  table_widget.blockSignals(True)
   before_callback_function()
 
-  row = table_widget.currentRow()
-  column = table_widget.currentColumn()
-  if row < table_widget.rowCount() - 1:
-    combobox_values = list(ui_utils.get_combobox_indexes(table_widget, row))
-    checkbox_values = list(ui_utils.get_checkbox_values(table_widget, row))
-    table_widget.insertRow(row + 2)
-    for i in range(table_widget.columnCount()):
-      table_widget.setItem(row + 2, i, table_widget.takeItem(row, i))
-      table_widget.setCurrentCell(row + 2, column)
-    table_widget.removeRow(row)
-    ui_utils.fill_row(table_widget, row + 1)
-    ui_utils.set_combobox_indexes(table_widget, row + 1, combobox_values)
-    ui_utils.set_checkbox_values(table_widget, row + 1, checkbox_values)
-    set_text_alignment(table_widget, row + 1)
+  row = table_view.currentIndex().row()
+  column = table_view.currentIndex().column()
+  if 0 <= row < table_view.model().rowCount() - 1:
+    table_view.model().move_row(row, row + 2)
+    select_row(table_view, row + 1, column)
 
   after_callback_function()
-  table_widget.blockSignals(False)
 
 
 # @operator
-def move_row_up(table_widget: QTableWidget, before_callback_function: callable,
+def move_row_up(table_view: QTableView, before_callback_function: callable,
                 after_callback_function: callable) -> None:
   """Move the currently selected row up."""
-  table_widget.blockSignals(True)
   before_callback_function()
 
-  row = table_widget.currentRow()
-  column = table_widget.currentColumn()
+  row = table_view.currentIndex().row()
+  column = table_view.currentIndex().column()
   if row > 0:
-    combobox_values = list(ui_utils.get_combobox_indexes(table_widget, row))
-    checkbox_values = list(ui_utils.get_checkbox_values(table_widget, row))
-    table_widget.insertRow(row - 1)
-    for i in range(table_widget.columnCount()):
-      table_widget.setItem(row - 1, i, table_widget.takeItem(row + 1, i))
-      table_widget.setCurrentCell(row - 1, column)
-    table_widget.removeRow(row + 1)
-    ui_utils.fill_row(table_widget, row - 1)
-    ui_utils.set_combobox_indexes(table_widget, row - 1, combobox_values)
-    ui_utils.set_checkbox_values(table_widget, row - 1, checkbox_values)
-    set_text_alignment(table_widget, row - 1)
+    table_view.model().move_row(row, row - 1)
+    select_row(table_view, row - 1, column)
 
   after_callback_function()
-  table_widget.blockSignals(False)
 
 
 # @operator
-def duplicate_row(table_widget: QTableWidget, state_saver: Any,
-                  before_callback_function: callable, after_callback_function: callable) -> None:
+def duplicate_row(table_view: QTableView, before_callback_function: callable,
+                  after_callback_function: callable) -> None:
   """Duplicate the currently selected row."""
-  table_widget.blockSignals(True)
   before_callback_function()
 
-  state_saver.table_to_state(table_widget)
-  current_row = table_widget.currentRow()
-  state_saver.state.render_jobs.insert(
-      current_row + 1, state_saver.state.render_jobs[current_row])
-  state_saver.state_to_table(table_widget)
+  model = table_view.model()
+  current_row = table_view.currentIndex().row()
+  if current_row != -1:
+    model.insert_job(current_row + 1, model.job(current_row))
 
   after_callback_function()
-  table_widget.blockSignals(False)
 
 
 # @operator
-def add_row_below(table_widget: QTableWidget,
+def add_row_below(table_view: QTableView,
                   before_callback_function: Optional[callable] = None,
                   after_callback_function: Optional[callable] = None) -> None:
   """Add a row below the current row."""
-  table_widget.blockSignals(True)
   if before_callback_function:
     before_callback_function()
 
-  current_row = table_widget.currentRow() + 1
-  table_widget.insertRow(current_row)
-  ui_utils.fill_row(table_widget, current_row)
-  set_text_alignment(table_widget, current_row)
+  table_view.model().insertRows(table_view.currentIndex().row() + 1, 1)
 
   if after_callback_function:
     after_callback_function()
-  table_widget.blockSignals(False)
 
 
 # @operator
-def remove_active_row(table_widget: QTableWidget, before_callback_function: callable,
+def remove_active_row(table_view: QTableView, before_callback_function: callable,
                       after_callback_function: callable) -> None:
   """Remove the currently selected row."""
-  table_widget.blockSignals(True)
   before_callback_function()
 
-  current_row = table_widget.currentRow()
+  model = table_view.model()
+  current_row = table_view.currentIndex().row()
   if current_row == -1:
-    current_row = table_widget.rowCount() - 1
-  table_widget.removeRow(current_row)
+    current_row = model.rowCount() - 1
+  model.removeRows(current_row, 1)
 
   after_callback_function()
-  table_widget.blockSignals(False)
 
 
 # @operator
-def add_file_below(table_widget: QTableWidget, path: str) -> None:
-  """Add a file below the current row."""
-  table_widget.blockSignals(True)
-  id_row = table_widget.rowCount()
-  table_widget.insertRow(id_row)
-  ui_utils.fill_row(table_widget, id_row)
-  set_text_alignment(table_widget, id_row)
-  table_widget.setItem(id_row, 1, QTableWidgetItem(path))
-  table_widget.blockSignals(False)
-
-
-def post_process_row(table_widget: QTableWidget, row: int) -> None:
-  """Post-process the table after loading it from a UI file."""
-
-  header = table_widget.horizontalHeader()
+def add_file_below(table_view: QTableView, path: str) -> int:
+  """Add a file below the last row and return the new row."""
+  model = table_view.model()
+  row = model.rowCount()
+  model.insertRows(row, 1)
+  model.set_value(row, 1, path)
+  return row
+
+
+def setup_header(table_view: QTableView) -> None:
+  """Set up the header after loading the table from a UI file."""
+  header = table_view.horizontalHeader()
   header.setMinimumHeight(50)
-  table_widget.setHorizontalHeaderLabels(
-      ["Active",
-       "File",
-       "Camera",
-       "Start",
-       "End",
-       "X\nRes",
-       "Y\nRes",
-       "Samples",
-       "File\nFormat",
-       "Engine",
-       "Device",
-       "Motion\nBlur",
-       "Continue\nJob",
-       "Final\nMode",
-       "Denoise",
-       "Scene",
-       "View\nLayers",
-       "Comments",
-       ])
 
   # Set the file column to stretch. The other columns will be resized to fit
-  # their contents. Some of the functions here might be obsolete though. Needed
-  # to be checked later.
+  # their contents.
   header.setSectionResizeMode(QHeaderView.ResizeToContents)
   header.setSectionResizeMode(1, QHeaderView.Stretch)
-  # header.setSectionResizeMode(17, QHeaderView.Fixed)
-  table_widget.resizeColumnsToContents()
-  ui_utils.fill_row(table_widget, row)
-
-
-def set_text_alignment(table_widget: QTableWidget, row: int) -> None:
-  """Set the text alignment of the table items."""
-  for i in range(table_widget.columnCount()):
-    if i in ui_utils.COMBOBOX_COLUMNS or i in ui_utils.CHECKBOX_COLUMNS:
-      continue
-    old_item = table_widget.item(row, i)
-    if old_item:
-      text = old_item.text()
-    else:
-      text = ""
-    item = QTableWidgetItem(text)
-    if not item:
-      continue
-    table_widget.removeCellWidget(row, i)
-    if i == 1:
-      item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-    else:
-      item.setTextAlignment(Qt.AlignCenter)
-    table_widget.setItem(row, i, item)
-
-
-def color_row_background(table_widget: QTableWidget, row_index: int, base_color: QColor) -> None:
-  """Color the background of a row."""
-
-  # Taking the background color of the camera tableitem as reference.
-  previous_color = table_widget.item(row_index, 2).background()
-
-  color = base_color
+
+
+def get_row_color(previous_color: QColor | None, base_color: QColor) -> QColor:
+  """Get the color of a row. A red row stays red and a yellow row doesn't turn green."""
   if previous_color == QColor(COLORS["red"]):
-    color = QColor(COLORS["red"])
-  elif previous_color == QColor(COLORS["yellow"]):
-    if base_color == QColor(COLORS["green"]):
-      color = QColor(COLORS["yellow"])
-
-  for column_index in range(table_widget.columnCount()):
-    item = table_widget.item(row_index, column_index)
-
-    if column_index in ui_utils.CHECKBOX_COLUMNS:
-      ui_utils.set_checkbox_background_color(
-          table_widget, row_index, column_index, color)
-    # if column_index in ui_utils.COMBOBOX_COLUMNS:
-    #   ui_utils.set_combobox_background_color(
-    #       table_widget, row_index, column_index, color)
-
-    # Check if the value in the numbers columns is valid.
-    if item and item.text() and (
-            column_index in ui_utils.NUMBER_COLUMNS and not item.text().isnumeric()):
-      item.setBackground(QColor(COLORS["red"]))
-    elif item:
-      item.setBackground(color)
+    return QColor(COLORS["red"])
+  if previous_color == QColor(COLORS["yellow"]) and base_color == QColor(COLORS["green"]):
+    return QColor(COLORS["yellow"])
+  return base_color
+
+
+def color_row_background(model, row_index: int, base_color: QColor) -> None:
+  """Color the background of a row.
+
+  Args:
+    model: The render job model of the table.
+    row_index: The row to color.
+    base_color: The color of the row, unless it is already red or yellow.
+  """
+  color = get_row_color(model.row_colors[row_index], base_color)
+  model.set_row_color(row_index, color, model.cell_colors[row_index])
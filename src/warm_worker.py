@@ -0,0 +1,138 @@
+"""Pool of Blender processes, which stay open between render jobs.
+
+Starting Blender, activating the addons and loading the blend file often takes longer than
+rendering a preview frame. A warm worker runs the utils_bpy.render_server module and renders one
+request after another, so these costs are only paid once per worker and blend file.
+
+Note: This module must not import Qt, so it can be used on render nodes without a display.
+"""
+
+import json
+import os
+import queue
+import subprocess
+import threading
+
+from render_job_to_rss import render_server_command
+from utils_common.render_protocol import EVENTS_VARIABLE, EXIT_CODE_FAILED, RESULT_PREFIX
+
+
+class WarmWorker:
+  """A Blender process, which renders the requests sent to it one after another."""
+
+  def __init__(self, blender_path: str, output_queue: queue.Queue) -> None:
+    """Start the Blender process.
+
+    Args:
+      blender_path: The path to the Blender executable.
+      output_queue: Receives (task_id, line, None) for every output line and
+        (task_id, None, exit_code) when a task is finished.
+    """
+    self.output_queue = output_queue
+    self.task_id = None
+    self.loaded_file = None
+    self.process = subprocess.Popen(
+      [blender_path, "-b", "--python-expr", render_server_command()],
+      stdin=subprocess.PIPE,
+      stdout=subprocess.PIPE,
+      stderr=subprocess.STDOUT,
+      env={**os.environ, "PYTHONUNBUFFERED": "1", EVENTS_VARIABLE: "1"},
+      text=True,
+      errors="replace",
+    )
+    self._lock = threading.Lock()
+    reader_thread = threading.Thread(target=self._read_output, daemon=True)
+    reader_thread.start()
+
+  def is_alive(self) -> bool:
+    """Check if the Blender process is still running."""
+    return self.process.poll() is None
+
+  def is_idle(self) -> bool:
+    """Check if the worker can take a new request."""
+    with self._lock:
+      return self.task_id is None and self.is_alive()
+
+  def render(self, task_id: int, request: dict) -> None:
+    """Send a request to the worker. The result is put into the output queue."""
+    with self._lock:
+      self.task_id = task_id
+    self.loaded_file = request["file"]
+    try:
+      self.process.stdin.write(json.dumps(request) + "\n")
+      self.process.stdin.flush()
+    except OSError:
+      # The reader thread reports the task as failed, once Blender has quit.
+      self.process.kill()
+
+  def stop(self) -> None:
+    """Quit Blender after the current request."""
+    try:
+      self.process.stdin.close()
+    except OSError:
+      self.process.kill()
+
+  def kill(self) -> None:
+    """Quit Blender immediately."""
+    self.process.kill()
+
+  def _finish_task(self, exit_code: int) -> None:
+    with self._lock:
+      task_id = self.task_id
+      self.task_id = None
+    if task_id is not None:
+      self.output_queue.put((task_id, None, exit_code))
+
+  def _read_output(self) -> None:
+    for line in self.process.stdout:
+      if line.startswith(RESULT_PREFIX):
+        self._finish_task(json.loads(line[len(RESULT_PREFIX) :])["exit_code"])
+      elif self.task_id is not None:
+        self.output_queue.put((self.task_id, line, None))
+    exit_code = self.process.wait()
+    # A crash of Blender fails the task it was rendering.
+    self._finish_task(exit_code or EXIT_CODE_FAILED)
+
+
+class WarmWorkerPool:
+  """Hand out render requests to warm workers and start new workers if all are busy."""
+
+  def __init__(self, blender_path: str, output_queue: queue.Queue) -> None:
+    """Initialize an empty pool.
+
+    Args:
+      blender_path: The path to the Blender executable.
+      output_queue: The queue the output and the results of all workers are put into.
+    """
+    self.blender_path = blender_path
+    self.output_queue = output_queue
+    self.workers = []
+
+  def get_idle_worker(self, blend_file: str) -> WarmWorker:
+    """Get an idle worker, preferably one which has already loaded the blend file."""
+    self.workers = [worker for worker in self.workers if worker.is_alive()]
+    idle_workers = [worker for worker in self.workers if worker.is_idle()]
+    for worker in idle_workers:
+      if worker.loaded_file == blend_file:
+        return worker
+    if idle_workers:
+      return idle_workers[0]
+    worker = WarmWorker(self.blender_path, self.output_queue)
+    self.workers.append(worker)
+    return worker
+
+  def render(self, task_id: int, request: dict) -> None:
+    """Render a request on an idle worker."""
+    self.get_idle_worker(request["file"]).render(task_id, request)
+
+  def shutdown(self) -> None:
+    """Quit all workers once they are idle."""
+    for worker in self.workers:
+      worker.stop()
+    self.workers = []
+
+  def kill(self) -> None:
+    """Quit all workers immediately."""
+    for worker in self.workers:
+      worker.kill()
+    self.workers = []
@@ -0,0 +1,103 @@
+"""Unit tests for warm_worker.py."""
+
+import platform
+import queue
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import warm_worker
+from utils_common.render_protocol import RESULT_PREFIX
+
+FAKE_WARM_BLENDER = """#!{python}
+import json
+import os
+import sys
+for line in sys.stdin:
+  request = json.loads(line)
+  print("Fake Blender rendering", request["file"], "in", os.getpid(), flush=True)
+  if "crash" in request["file"]:
+    os._exit(11)
+  exit_code = 62097 if "broken" in request["file"] else 0
+  print("{prefix}" + json.dumps({{"exit_code": exit_code}}), flush=True)
+"""
+
+
+def make_fake_warm_blender(directory: str) -> str:
+  """Write an executable, which behaves like a warm Blender worker."""
+  fake_blender = Path(directory) / "blender"
+  fake_blender.write_text(
+    FAKE_WARM_BLENDER.format(python=sys.executable, prefix=RESULT_PREFIX),
+    encoding="utf-8",
+  )
+  fake_blender.chmod(fake_blender.stat().st_mode | stat.S_IEXEC)
+  return str(fake_blender)
+
+
+def wait_for_result(output_queue: queue.Queue) -> tuple[list[str], int]:
+  """Collect the output of a task until its result arrives."""
+  lines = []
+  while True:
+    _, line, exit_code = output_queue.get(timeout=10)
+    if line is None:
+      return lines, exit_code
+    lines.append(line)
+
+
+@unittest.skipIf(platform.system() == "Windows", "Fake Blender executable needs a shebang.")
+class TestWarmWorkerPool(unittest.TestCase):
+  """Tests for the WarmWorkerPool class."""
+
+  def setUp(self) -> None:
+    """Set up a pool with a fake Blender."""
+    self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+    self.output_queue = queue.Queue()
+    self.pool = warm_worker.WarmWorkerPool(
+      make_fake_warm_blender(self.temp_dir.name),
+      self.output_queue,
+    )
+
+  def tearDown(self) -> None:
+    """Quit the workers and remove the temporary directory."""
+    self.pool.kill()
+    self.temp_dir.cleanup()
+
+  def test_reuse_worker(self) -> None:
+    """Test that an idle worker is reused and preferred if it has loaded the file."""
+    self.pool.render(0, {"file": "a.blend"})
+    self.pool.render(1, {"file": "b.blend"})
+    wait_for_result(self.output_queue)
+    wait_for_result(self.output_queue)
+    self.assertEqual(len(self.pool.workers), 2)
+
+    worker_b = self.pool.workers[1]
+    self.pool.render(2, {"file": "b.blend"})
+    lines, exit_code = wait_for_result(self.output_queue)
+    self.assertEqual(exit_code, 0)
+    self.assertEqual(lines, [f"Fake Blender rendering b.blend in {worker_b.process.pid}\n"])
+    self.assertEqual(len(self.pool.workers), 2)
+
+  def test_failed_request(self) -> None:
+    """Test that a failed request keeps the worker alive."""
+    self.pool.render(0, {"file": "broken.blend"})
+    _, exit_code = wait_for_result(self.output_queue)
+    self.assertEqual(exit_code, 62097)
+    self.assertTrue(self.pool.workers[0].is_alive())
+
+  def test_crashed_worker(self) -> None:
+    """Test that a crash fails the task and the worker is replaced."""
+    self.pool.render(0, {"file": "crash.blend"})
+    _, exit_code = wait_for_result(self.output_queue)
+    self.assertEqual(exit_code, 11)
+    crashed_pid = self.pool.workers[0].process.pid
+
+    self.pool.render(1, {"file": "a.blend"})
+    lines, exit_code = wait_for_result(self.output_queue)
+    self.assertEqual(exit_code, 0)
+    self.assertNotIn(str(crashed_pid), lines[0])
+
+
+if __name__ == "__main__":
+  unittest.main()